@@ -0,0 +1,10 @@
+"""Put the Python tooling packages on the import path for the pytest suites."""
+
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+for package_root in (APP_DIR / "testsprite_tests", APP_DIR / "scripts"):
+    if str(package_root) not in sys.path:
+        sys.path.insert(0, str(package_root))
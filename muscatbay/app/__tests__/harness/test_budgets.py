@@ -0,0 +1,55 @@
+import json
+
+from harness.budgets import BUDGETS_FILE, Budget, BudgetCollector, baseline_from, evaluate, load_baseline, load_budgets
+from harness.runner import TestCase, TestResult
+
+WATER = Budget(id="water", title="/water interactive", route="/water", ready="#panel-monthly", budget_ms=2500)
+STP = Budget(id="stp", title="STP table", route="/stp", ready="tr", budget_ms=1000, tests=("TC022",))
+
+
+def test_shipped_budget_file_parses():
+    budgets = load_budgets(BUDGETS_FILE)
+    ids = {b.id for b in budgets}
+    assert {"water-monthly-interactive", "stp-daily-log-render"} <= ids
+    assert all(b.budget_ms > 0 for b in budgets)
+
+
+def test_only_reached_budgets_are_judged():
+    verdicts = evaluate([WATER, STP], {"water": 1800.0}, {}, "TC004_Monthly")
+    assert [v.budget_id for v in verdicts] == ["water"]
+    assert verdicts[0].exceeded is False
+    assert verdicts[0].delta_ms is None
+
+
+def test_budget_restricted_to_listed_tests():
+    assert evaluate([STP], {"stp": 1500.0}, {}, "TC023_Sort") == []
+    [verdict] = evaluate([STP], {"stp": 1500.0}, {}, "TC022_Details")
+    assert verdict.exceeded is True
+
+
+def test_delta_is_reported_against_baseline():
+    [verdict] = evaluate([WATER], {"water": 2200.0}, {"water": 2000.0}, "TC004_x")
+    assert verdict.delta_ms == 200.0
+    assert verdict.delta_pct == 10.0
+
+
+def test_collector_fails_a_passing_test_over_budget():
+    collector = BudgetCollector([WATER], {"water": 2000.0})
+    case = TestCase(test_id="TC004", name="TC004_Monthly", path=None)
+    collector._marks[case.name] = {"water": 3100.0}
+    result = TestResult(test_id="TC004", name=case.name)
+    collector.finish(case, result)
+    assert result.status == "failed"
+    assert "3100 ms > 2500 ms" in result.failures[0]
+    assert "+1100 ms vs baseline" in result.failures[0]
+
+
+def test_baseline_round_trip(tmp_path):
+    verdicts = (
+        evaluate([WATER], {"water": 1000.0}, {}, "TC004_a")
+        + evaluate([WATER], {"water": 3000.0}, {}, "TC005_b")
+        + evaluate([WATER], {"water": 2000.0}, {}, "TC006_c")
+    )
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline_from(verdicts)))
+    assert load_baseline(path) == {"water": 2000.0}
@@ -0,0 +1,92 @@
+import datetime as dt
+
+import pytest
+
+from harness import dataset, postgrest
+from harness.mock_backend import MockBackend
+
+TODAY = dt.date(2026, 10, 19)
+
+
+@pytest.fixture(scope="module")
+def x1():
+    return dataset.generate(1, seed=3, today=TODAY)
+
+
+@pytest.fixture(scope="module")
+def x10():
+    return dataset.generate(10, seed=3, today=TODAY)
+
+
+def test_registry_comes_from_the_seed_file():
+    registry = dataset.load_meter_registry()
+    assert len(registry) == 350
+    main = next(m for m in registry if m["account_number"] == "C43659")
+    assert main["label"] == "L1" and main["parent_account_number"] is None
+
+
+def test_generation_is_deterministic(x1):
+    again = dataset.generate(1, seed=3, today=TODAY)
+    assert again["water_monthly_consumption"] == x1["water_monthly_consumption"]
+    assert again["electricity_readings"] == x1["electricity_readings"]
+
+
+def test_scaling_keeps_bulks_and_replicates_leaves(x1, x10):
+    def by_label(tables):
+        counts = {}
+        for m in tables["water_meters"]:
+            counts[m["label"]] = counts.get(m["label"], 0) + 1
+        return counts
+
+    base, scaled = by_label(x1), by_label(x10)
+    assert scaled["L1"] == base["L1"] == 1
+    assert scaled["L2"] == base["L2"] and scaled["DC"] == base["DC"]
+    assert scaled["L4"] == base["L4"] * 10
+    accounts = {m["account_number"] for m in x10["water_meters"]}
+    parents = {m["parent_account_number"] for m in x10["water_meters"] if m["parent_account_number"]}
+    assert parents <= accounts
+    assert len(x10["stp_operations"]) == 10 * len(x1["stp_operations"])
+
+
+def test_bulk_meters_carry_their_childrens_consumption_plus_loss(x1):
+    sep = {r["account_number"]: r["consumption"] for r in x1["water_monthly_consumption"] if r["period"] == "2026-09"}
+    zone_3a_children = [m["account_number"] for m in x1["water_meters"] if m["parent_account_number"] == "4300343"]
+    child_sum = sum(sep[a] or 0 for a in zone_3a_children)
+    assert child_sum < sep["4300343"] < child_sum * 1.3
+
+
+def test_daily_rows_stop_at_month_to_date(x1):
+    october = [r for r in x1["water_daily_consumption"] if r["month"] == "Oct-26"]
+    assert october and all(r["day_19"] is None for r in october)
+    assert any(r["day_18"] is not None for r in october)
+
+
+def test_dataset_round_trip_and_load_script(tmp_path, x1):
+    manifest = dataset.write_dataset(x1, tmp_path, 1, 3)
+    assert manifest["tables"]["water_meters"] == 350
+    assert dataset.load_dataset(tmp_path)["stp_operations"] == x1["stp_operations"]
+    assert '\\copy "Assets_Register_Database"' in (tmp_path / "load.sql").read_text()
+
+
+def test_postgrest_filters_orders_and_pages():
+    rows = [{"id": i, "zone": "Zone_03A" if i % 2 else "Zone_05", "consumption": None if i == 3 else i * 1.5}
+            for i in range(1, 11)]
+    window, content_range = postgrest.query(
+        rows, "select=id,zone&zone=eq.Zone_03A&order=id.desc&offset=1&limit=2", prefer="count=exact")
+    assert window == [{"id": 7, "zone": "Zone_03A"}, {"id": 5, "zone": "Zone_03A"}]
+    assert content_range == "1-2/5"
+    window, _ = postgrest.query(rows, "select=id&consumption=is.null")
+    assert window == [{"id": 3}]
+    window, _ = postgrest.query(rows, "select=id&or=(id.eq.1,id.gte.9)&id=not.in.(10)")
+    assert window == [{"id": 1}, {"id": 9}]
+    window, content_range = postgrest.query(rows, "select=id", range_header="8-20")
+    assert [r["id"] for r in window] == [9, 10] and content_range == "8-9/*"
+
+
+def test_mock_backend_serves_the_dataset(x10):
+    backend = MockBackend("dataset", dataset=x10)
+    status, headers, body = backend.serve_dataset(
+        "water_meters", "GET", "select=meter_id&label=eq.L4&offset=0&limit=1000", prefer="count=exact")
+    assert status == 200 and len(body) == 1000
+    assert headers["content-range"] == f"0-999/{sum(1 for m in x10['water_meters'] if m['label'] == 'L4')}"
+    assert backend.serve_dataset("no_such_table", "GET", "select=*") is None
@@ -0,0 +1,65 @@
+from harness.dedup import analyse, collapse, fingerprint, group
+from harness.runner import discover
+
+LOGIN = '''
+import asyncio
+from playwright.async_api import expect
+
+async def run_test():
+    page = await context.new_page()
+    await page.goto("http://localhost:3002", wait_until="commit", timeout=10000)
+    frame = context.pages[-1]
+    elem = frame.locator('xpath=//form/input[1]').nth(0)
+    await page.wait_for_timeout(3000); await elem.fill('dev@muscatbay.com')
+    elem = frame.locator('xpath=//form/button').nth(0)
+    await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+'''
+
+
+def write(tmp_path, name, body):
+    (tmp_path / f"{name}.py").write_text(LOGIN + body)
+
+
+def test_retried_blocks_collapse():
+    assert collapse(list("abcabcd")) == list("abcd")
+    assert collapse(list("aab")) == list("ab")
+
+
+def test_fingerprint_reads_steps_and_assertions(tmp_path):
+    write(tmp_path, "TC001_a", '''
+    await page.goto('http://localhost:3002/water', timeout=10000)
+    await expect(frame.locator('text=Monthly Dashboard').first).to_be_visible(timeout=1000)
+''')
+    fp = fingerprint(tmp_path / "TC001_a.py", "TC001")
+    assert fp.journey == (("goto", "/"), ("fill", "xpath=//form/input[1]"), ("click", "xpath=//form/button"),
+                          ("goto", "/water"))
+    assert fp.assertions == (("/water", "to_be_visible", "text=Monthly Dashboard"),)
+    assert fp.pages == ("/", "/water")
+
+
+def test_same_journey_groups_and_keeps_the_richest_test(tmp_path):
+    write(tmp_path, "TC001_kpis", "    await expect(frame.locator('text=7 KPIs').first).to_be_visible()\n"
+                                  "    await expect(frame.locator('text=Trends').first).to_be_visible()\n")
+    write(tmp_path, "TC004_kpis_again", "    await expect(frame.locator('text=7 KPIs').first).to_be_visible()\n")
+    write(tmp_path, "TC008_mobile", "    await page.set_viewport_size({'width': 375, 'height': 812})\n")
+    fps = [fingerprint(tmp_path / f"{n}.py") for n in ("TC001_kpis", "TC004_kpis_again", "TC008_mobile")]
+    groups = group(fps)
+    assert [(g.kind, g.representative, g.members) for g in groups] == [
+        ("overlapping", "TC001_kpis", ["TC001_kpis", "TC004_kpis_again"]),
+        ("unique", "TC008_mobile", ["TC008_mobile"]),
+    ]
+    assert groups[0].fast == ["TC001_kpis"]
+
+
+def test_fast_ci_keeps_every_member_that_asserts_something_new(tmp_path):
+    write(tmp_path, "TC001_x", "    await expect(frame.locator('text=Spinner').first).to_be_visible()\n"
+                               "    await expect(frame.locator('text=Demo Mode').first).to_be_visible()\n")
+    write(tmp_path, "TC002_y", "    await expect(frame.locator('text=Live Data').first).to_be_visible()\n")
+    write(tmp_path, "TC003_z", "    await expect(frame.locator('text=Demo Mode').first).to_be_visible()\n")
+    report = analyse(discover(tmp_path))
+    assert report["groups"] == 1 and report["fast_selection"] == ["TC001_x", "TC002_y"]
+    cells = report["coverage"]["/"]
+    assert cells["to_be_visible text=Live Data"] == {"tests": ["TC002_y"], "fast": True}
+    assert cells["to_be_visible text=Demo Mode"] == {"tests": ["TC001_x", "TC003_z"], "fast": True}
+    assert all(cell["fast"] for cell in cells.values())
+    assert report["page_loads"]["/"] == {"full": 3, "fast": 2}
@@ -0,0 +1,67 @@
+import pytest
+
+from harness.mock_backend import FixtureStore, MockBackend, replicate_rows, request_key
+from harness.runner import TestCase
+
+METERS = [
+    {"meter_id": "C43659", "account_number": "C43659", "label": "Main Bulk", "parent_meter": None},
+    {"meter_id": "4300343", "account_number": "4300343", "label": "Zone 3A Bulk", "parent_meter": "C43659"},
+    {"meter_id": "4300001", "account_number": "4300001", "label": "Z3-42 Villa", "parent_meter": "4300343"},
+    {"meter_id": "4300002", "account_number": "4300002", "label": "Z3-43 Villa", "parent_meter": "4300343"},
+]
+QUERY = "select=meter_id,account_number,label,parent_meter&order=meter_id.asc"
+
+
+def record(store, table, query, body, range_header=""):
+    store.put(table, {
+        "key": request_key("GET", query, range_header), "method": "GET", "query": query, "range": range_header,
+        "status": 200, "headers": {"content-type": "application/json"}, "body": body,
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FixtureStore(tmp_path / "supabase")
+    record(store, "water_meters", QUERY + "&offset=0&limit=2", METERS[:2])
+    record(store, "water_meters", QUERY + "&offset=2&limit=2", METERS[2:])
+    store.save()
+    return FixtureStore(tmp_path / "supabase")
+
+
+def test_fixtures_round_trip_and_replay_exactly(store):
+    backend = MockBackend("replay", store)
+    status, headers, body = backend.serve("water_meters", "GET", QUERY + "&offset=2&limit=2")
+    assert status == 200 and body == METERS[2:]
+    assert backend.serve("water_meters", "GET", "select=*") is None
+
+
+def test_replication_keeps_parents_single():
+    rows = replicate_rows(METERS, 3, keep={"C43659", "4300343"})
+    assert len(rows) == 4 + 2 * 2
+    assert [r["meter_id"] for r in rows if r["meter_id"].startswith("C43659")] == ["C43659"]
+    replica = next(r for r in rows if r["meter_id"] == "4300001~2")
+    assert replica["parent_meter"] == "4300343"
+    assert replica["label"] == "Z3-42 Villa~2"
+
+
+def test_scaled_replay_serves_the_requested_page_of_the_enlarged_table(store):
+    backend = MockBackend("replay", store, scale=10)
+    _, headers, first = backend.serve("water_meters", "GET", QUERY + "&offset=0&limit=2")
+    assert [r["meter_id"] for r in first] == ["C43659", "4300343"]
+    assert headers["content-range"] == "0-1/22"
+    _, headers, tail = backend.serve("water_meters", "GET", QUERY + "&offset=20&limit=5")
+    assert len(tail) == 2 and headers["content-range"] == "20-21/22"
+
+
+def test_backend_down_tests_always_get_the_offline_backend(store):
+    backend = MockBackend("replay", store)
+    down = TestCase("TC027", "TC027_Demo_Mode_badge_or_offlineerror_message_is_shown_when_STP_data_cannot_be_fetched", None)
+    normal = TestCase("TC022", "TC022_Details_Data_tab_loads_daily_operations_log_for_a_selected_month", None)
+    assert backend.mode_for(down) == "offline"
+    assert backend.mode_for(normal) == "replay"
+    assert MockBackend("live", store).mode_for(down) == "live"
+
+
+def test_unknown_mode_is_rejected(store):
+    with pytest.raises(ValueError):
+        MockBackend("staging", store)
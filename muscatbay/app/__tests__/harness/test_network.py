@@ -0,0 +1,67 @@
+from harness.network import SupabaseCall, classify_url, find_patterns, parse_content_range, query_shape, summarize
+
+
+def call(table, query, page="/water", test="TC004_x", rows=10, size=1000, method="GET", kind="rest"):
+    return SupabaseCall(test=test, page=page, kind=kind, method=method, table=table, query=query,
+                        status=200, bytes=size, rows=rows, total=None, duration_ms=12.5)
+
+
+def patterns(findings):
+    return sorted((f["pattern"], f["table"]) for f in findings)
+
+
+def test_content_range_parsing():
+    assert parse_content_range("0-999/3456") == (1000, 3456)
+    assert parse_content_range("*/0") == (0, 0)
+    assert parse_content_range("0-24/*") == (25, None)
+    assert parse_content_range(None) == (None, None)
+
+
+def test_only_supabase_urls_are_classified():
+    assert classify_url("https://x.supabase.co/rest/v1/water_meters?select=meter_id") == (
+        "rest", "water_meters", "select=meter_id")
+    assert classify_url("https://x.supabase.co/rest/v1/rpc/refresh_summary")[0] == "rpc"
+    assert classify_url("wss://x.supabase.co/realtime/v1/websocket?vsn=1.0.0")[:2] == ("realtime", "v1/websocket")
+    assert classify_url("http://localhost:3000/_next/static/chunk.js") is None
+
+
+def test_shape_drops_filter_values_and_paging():
+    a = query_shape("select=*&meter_id=eq.C43659&offset=0&limit=1000")
+    b = query_shape("select=*&meter_id=eq.C43660&offset=1000&limit=1000")
+    assert a == b == (("meter_id", "eq.?"), ("select", "*"))
+
+
+def test_select_star_and_duplicates_are_flagged():
+    calls = [
+        call("stp_operations", "select=*&order=date.desc"),
+        call("stp_operations", "select=*&order=date.desc"),
+        call("water_meters", "select=meter_id,label"),
+    ]
+    assert patterns(find_patterns(calls)) == [("duplicate", "stp_operations"), ("select-star", "stp_operations")]
+
+
+def test_paging_loop_is_not_mistaken_for_n_plus_one():
+    calls = [
+        call("water_monthly_consumption", f"select=meter_id,period,consumption&offset={i * 1000}&limit=1000", rows=1000)
+        for i in range(4)
+    ]
+    [finding] = find_patterns(calls)
+    assert finding["pattern"] == "paged-read"
+    assert finding["rows"] == 4000
+
+
+def test_per_meter_requests_are_n_plus_one():
+    calls = [call("water_daily_consumption", f"select=day,consumption&account_number=eq.M{i}") for i in range(6)]
+    assert patterns(find_patterns(calls)) == [("n-plus-one", "water_daily_consumption")]
+
+
+def test_summary_is_grouped_per_page():
+    pages = summarize([
+        call("water_meters", "select=meter_id", size=2000),
+        call("stp_operations", "select=date", page="/stp", size=500),
+        call("water_monthly_consumption", "select=period", size=8000, rows=1000),
+    ])
+    assert list(pages) == ["/stp", "/water"]
+    water = pages["/water"]
+    assert water["requests"] == 2 and water["bytes"] == 10000 and water["rows"] == 1010
+    assert list(water["tables"]) == ["water_monthly_consumption", "water_meters"]
@@ -0,0 +1,72 @@
+"""An in-memory stand-in for ``pipeline.rest.RestClient`` over the harness's PostgREST evaluator."""
+
+from urllib.parse import urlencode
+
+import pytest
+
+from harness import postgrest
+
+
+class MemoryClient:
+    """``select`` / ``count`` / ``upsert`` / ``update`` / ``delete`` / ``upload`` with the RestClient signatures; ``writes`` logs every write."""
+
+    def __init__(self, **tables):
+        self.tables = {name: [dict(r) for r in rows] for name, rows in tables.items()}
+        self.objects = {}
+        self.writes = []
+
+    def _matching(self, table, filters):
+        # The evaluator skips `and=(…)`; apply it here as a conjunction.
+        every = postgrest._or_conditions(filters.pop("and")) if "and" in filters else []
+        rows = [r for r in self.tables.get(table, []) if all(postgrest._matches(r, c) for c in every)]
+        return rows, filters
+
+    def _where(self, table, filters):
+        rows, filters = self._matching(table, dict(filters))
+        conditions = [c for c in (postgrest.parse_condition(k, v) for k, v in filters.items()) if c]
+        return [r for r in rows if all(postgrest._matches(r, c) for c in conditions)]
+
+    def select(self, table, select="*", order="", **filters):
+        rows, filters = self._matching(table, dict(filters))
+        params = {"select": select, **filters}
+        if order:
+            params["order"] = order
+        return postgrest.query(rows, urlencode(params))[0]
+
+    def count(self, table, **filters):
+        return len(self._where(table, filters))
+
+    def upsert(self, table, rows, on_conflict):
+        keys = on_conflict.split(",")
+        stored = self.tables.setdefault(table, [])
+        index = {tuple(r.get(k) for k in keys): r for r in stored}
+        for row in rows:
+            key = tuple(row.get(k) for k in keys)
+            if key in index:
+                index[key].update(row)
+            else:
+                stored.append(dict(row))
+                index[key] = stored[-1]
+        self.writes.append((table, len(rows)))
+        return len(rows)
+
+    def update(self, table, values, **filters):
+        for row in self._where(table, filters):
+            row.update(values)
+        self.writes.append((table, values))
+
+    def upload(self, bucket, path, data, content_type="text/csv"):
+        if (bucket, path) in self.objects:
+            return False
+        self.objects[(bucket, path)] = data
+        self.writes.append((f"{bucket}/{path}", len(data)))
+        return True
+
+    def delete(self, table, **filters):
+        doomed = {id(r) for r in self._where(table, filters)}
+        self.tables[table] = [r for r in self.tables.get(table, []) if id(r) not in doomed]
+
+
+@pytest.fixture
+def memory_client():
+    return MemoryClient
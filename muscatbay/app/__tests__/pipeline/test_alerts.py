@@ -0,0 +1,109 @@
+import datetime as dt
+import json
+
+from pipeline import alerts
+from pipeline.water import WaterMeter, build_monthly_data, compute_period, meters_from_rows, to_fixed
+
+NOW = dt.datetime(2026, 7, 13, tzinfo=dt.timezone.utc)
+
+
+def meter(level="L3", zone="Zone_05", label="Test Meter", type="Residential (Villa)", **consumption):
+    return WaterMeter(label=label, account_number="C0000", level=level, zone=zone, parent_meter="",
+                      type=type, consumption={k.replace("_", "-"): v for k, v in consumption.items()})
+
+
+def test_water_loss_message_matches_the_browser_engine():
+    found = alerts.evaluate_water_loss_alerts([
+        meter("L1", "Main", "NAMA Main", Mar_26=1000),
+        meter("L2", label="Zone 5 Bulk", Mar_26=700),
+        meter("L3", label="Villa 1", Mar_26=562),
+    ])
+    assert found == [{
+        "id": "water-loss:Mar-26",
+        "level": "error",
+        "module": "water",
+        "title": "Water loss critically above target",
+        "message": "Mar-26: system loss is 43.8% of supply — 28.8 pp above the 15% target (438 m³).",
+        "href": "/water",
+    }]
+
+
+def test_walks_back_to_the_latest_month_with_a_main_bulk_reading():
+    found = alerts.evaluate_water_loss_alerts([
+        meter("L1", "Main", Feb_26=1000, Mar_26=None),
+        meter("L2", zone="Zone_05", Feb_26=100, Mar_26=90),
+        meter("L3", zone="Zone_05", Feb_26=40, Mar_26=80),
+        meter("DC", "Main", "DC | Hotel", "Retail", Feb_26=850, Mar_26=800),
+    ])
+    assert [a["id"] for a in found] == ["water-zone-loss:Feb-26"]
+    assert found[0]["message"] == "Feb-26: 1 zone above 25% loss — Zone 5 60.0%."
+
+
+def test_rows_are_translated_to_the_legacy_strings_the_rules_expect():
+    meter_rows = [
+        {"meter_id": "MB-L1", "account_number": "C43659", "meter_name": "Main Bulk (NAMA)", "level": "L1",
+         "zone": "Main_Bulk", "parent_meter": None, "type": "Main Bulk"},
+        {"meter_id": "MB-D1", "account_number": "4300001", "meter_name": "D-44 Building Bulk Meter", "level": "L3",
+         "zone": "Zone_03A", "parent_meter": "Zone 3A (Bulk)", "type": "Building (Bulk)"},
+    ]
+    consumption = [{"account_number": "C43659", "period": "2026-06", "consumption": "125.5"},
+                   {"account_number": "4300001", "period": "2023-12", "consumption": 9}]
+    daily = [{"account_number": "C43659", "month": "Jul-26", "day_1": 4, "day_2": None, "day_3": 5},
+             {"account_number": "4300001", "month": "Jun-26", "day_1": 99}]
+    meters, derived = meters_from_rows(meter_rows, consumption, daily)
+    assert derived == [("Jul-26", 3)]
+    assert meters[0].consumption == {"Jun-26": 125.5, "Jul-26": 9.0}
+    assert (meters[1].zone, meters[1].parent_meter, meters[1].type) == (
+        "Zone_03_(A)", "ZONE 3A (BULK ZONE 3A)", "D_Building_Bulk")
+    assert meters[1].consumption == {}
+
+
+def test_balance_keeps_unread_meters_out_of_the_totals():
+    data = build_monthly_data([
+        meter("L1", "Main", Mar_26=1000),
+        meter("L2", Mar_26=None),
+        meter("L3", Mar_26=-5),
+    ])
+    period = compute_period(data, "2026", 2)
+    assert (period["A1"], period["A2"], period["A3"]) == (1000, 0, -5)
+    assert period["missingMeters"] == 1 and period["negativeMeters"] == 1
+    assert to_fixed(1.25) == 1.3 and to_fixed(-1.25) == -1.3
+
+
+def test_contract_expiry_sets_and_wording():
+    found = alerts.evaluate_contract_alerts([
+        {"Contractor": "Bravo", "Service Provided": "Lifts", "Status": "Active", "End Date": "7/1/2026"},
+        {"Contractor": "Alpha", "Service Provided": "HVAC", "Status": "Active", "End Date": "2026-06-30"},
+        {"Contractor": "Gone", "Service Provided": "Pest", "Status": "Expired", "End Date": "1/1/2025"},
+        {"Contractor": "Soon", "Service Provided": "Pools", "Status": "Active", "End Date": "2026-07-14"},
+        {"Contractor": "Later", "Service Provided": "FM", "Status": "Active", "End Date": "2026-12-31"},
+        {"Contractor": "Bad", "Service Provided": "x", "Status": "Active", "End Date": "2/30/2026"},
+    ], NOW)
+    assert [a["id"] for a in found] == ["contracts-expired:Alpha|Bravo", "contracts-expiring:Soon"]
+    assert found[0]["message"] == ("Alpha (HVAC) ended 30 Jun 2026; Bravo (Lifts) ended 1 Jul 2026. "
+                                   "Renew or update the register.")
+    assert found[1]["message"] == "Soon in 1 day (14 Jul 2026)."
+
+
+def test_stp_gates_and_combined_ordering(tmp_path):
+    ops = [{"date": f"2026-07-{d:02d}", "inlet_sewage": 100, "tse_for_irrigation": 0 if d == 5 else 85}
+           for d in range(1, 9)]
+    ops.append({"date": "2026-08-01", "inlet_sewage": 100, "tse_for_irrigation": 0})   # future: ignored
+    found = alerts.evaluate_operational_alerts(
+        contractors=[{"Contractor": "Soon", "Service Provided": "Pools", "Status": "Active", "End Date": "2026-07-20"}],
+        stp_operations=ops,
+        now=NOW,
+    )
+    assert [a["id"] for a in found] == [
+        "stp-zero-output:2026-07-05",
+        "stp-low-recovery:2026-07-08",
+        "contracts-expiring:Soon",
+        "stp-stale-log:2026-07-08",
+    ]
+    assert "74.4% of inlet over the last 8 logged days" in found[1]["message"]
+    assert found[3]["message"].startswith("No operations logged since 8 Jul 2026 (5 days)")
+
+    path = alerts.write_artifact(found, {"stp_operations": ops}, NOW, tmp_path)
+    payload = json.loads(path.read_text())
+    assert payload["unavailableSources"] == ["water", "contractors"]
+    assert [r["rank"] for r in alerts.table_rows(found, NOW)] == [0, 1, 2, 3]
@@ -0,0 +1,72 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from pipeline import contractors
+from pipeline.contractors import ContractorIndex
+
+TODAY = dt.date(2026, 7, 13)
+
+TRACKER = [
+    {"Contractor": "Alpha", "Service Provided": "HVAC", "Status": "Active", "Contract Type": "Contract",
+     "Start Date": "1/1/2024", "End Date": "12/31/2025", "Annual Value (OMR)": 36600},
+    {"Contractor": "Bravo", "Service Provided": "Lifts", "Status": "Active", "Contract Type": "PO",
+     "Start Date": "2025-07-01", "End Date": "8/31/2026", "Annual Value (OMR)": 1000},
+    {"Contractor": "Gone", "Service Provided": "Pest", "Status": "Expired", "Contract Type": "PO",
+     "Start Date": None, "End Date": "7/20/2026", "Annual Value (OMR)": None},
+    {"Contractor": "Open", "Service Provided": "FM", "Status": "Active", "Contract Type": "Contract",
+     "Start Date": "1/1/2026", "End Date": None, "Annual Value (OMR)": 500},
+    {"Contractor": "Typo", "Service Provided": "x", "Status": "Active", "Contract Type": "PO",
+     "Start Date": "1/1/2027", "End Date": "1/1/2026", "Annual Value (OMR)": 1},
+]
+YEARLY = [
+    {"contractor": "OWATCO", "contract_year": 1, "year_label": "2024/2025", "amount_omr": 100.5},
+    {"contractor": "Kalhat", "contract_year": 1, "year_label": "2024/2025", "amount_omr": 200},
+    {"contractor": "Kalhat", "contract_year": 2, "year_label": "2025/2026", "amount_omr": None},
+]
+
+
+def names(index, positions):
+    return [index.names[p] for p in positions]
+
+
+def test_interval_queries():
+    index = ContractorIndex.from_rows(TRACKER, YEARLY)
+    assert names(index, index.active_on(TODAY)) == ["Gone", "Bravo"]
+    assert index.active_count(TODAY) == 2
+    assert index.active_count(dt.date(2025, 8, 1)) == 3
+    assert names(index, index.expiring_within(TODAY, 60)) == ["Bravo"]     # Gone is marked expired
+    assert names(index, index.lapsed(TODAY)) == ["Alpha"]
+    # 2025: Alpha all year + Bravo from 1 Jul (184 of 365 days).
+    assert index.committed_in(2025) == pytest.approx(36600 + 1000 * 184 / 365, abs=1e-3)
+    assert index.committed_in(2024) == 36600 and index.committed_in(2030) == 0
+    assert index.yearly_totals() == {"2024/2025": 300.5, "2025/2026": 0.0}
+
+
+def test_columns_round_trip():
+    index = ContractorIndex.from_rows(TRACKER, YEARLY)
+    again = ContractorIndex.from_columns(index.to_columns())
+    np.testing.assert_array_equal(again.end, index.end)
+    np.testing.assert_array_equal(again.yearly, index.yearly)
+    assert again.committed == index.committed
+    assert names(again, again.expiring_within(TODAY, 60)) == ["Bravo"]
+
+
+def test_cache_follows_the_source_version(memory_client, tmp_path):
+    stamp = {"updated_at": "2026-07-01T00:00:00+00:00"}
+    client = memory_client(Contractor_Tracker=[dict(r, **stamp) for r in TRACKER],
+                           contractor_yearly_costs=[dict(r, **stamp) for r in YEARLY])
+    contractors._MEMO.clear()
+    first, rebuilt = contractors.load_index(client, tmp_path)
+    assert rebuilt and (tmp_path / contractors.ARTIFACT_NAME).exists()
+    again, rebuilt = contractors.load_index(client, tmp_path)
+    assert again is first and not rebuilt
+
+    contractors._MEMO.clear()                      # a fresh process reads the cache file
+    cached, rebuilt = contractors.load_index(client, tmp_path)
+    assert not rebuilt and cached.committed == first.committed
+
+    client.tables["Contractor_Tracker"].pop()      # a delete moves the row count
+    fresh, rebuilt = contractors.load_index(client, tmp_path)
+    assert rebuilt and len(fresh) == len(TRACKER) - 1
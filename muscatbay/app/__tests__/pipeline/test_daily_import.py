@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+from pipeline import daily_import
+
+APP_DIR = Path(__file__).resolve().parents[2]
+
+
+def pivot_lines(delimiter=","):
+    header = delimiter.join(["Acct #", "READING_MNTH"] + [str(d) for d in range(1, 32)])
+    jan = delimiter.join(["4300001", "12026", '"2,154.00"', "NULL", "", "0"] + ["1.5"] * 27)
+    dec = delimiter.join(["4300002", "122025", "3"])                        # short line: days 2…31 blank
+    odd = delimiter.join(["4300003", "bad", "7"])                           # unusable month → the default
+    return ["\ufeff" + header + "\r\n", jan + "\r\n", "\r\n", dec + "\n", odd + "\n"]
+
+
+@pytest.mark.parametrize("delimiter", [",", "\t"])
+def test_pivot_export_lines_become_wide_records(delimiter):
+    stats = daily_import.ImportStats()
+    got = list(daily_import.records(pivot_lines(delimiter), month="Mar-26", year=2026, stats=stats))
+    assert [(r["account_number"], r["month"], r["year"]) for r in got] == [
+        ("4300001", "Jan-26", 2026), ("4300002", "Dec-25", 2025), ("4300003", "Mar-26", 2026)]
+    jan = got[0]
+    assert (jan["day_1"], jan["day_2"], jan["day_3"], jan["day_4"], jan["day_31"]) == (2154.0, None, None, 0.0, 1.5)
+    assert jan["meter_name"] == "4300001" and "zone" not in jan
+    assert got[1]["day_1"] == 3 and got[1]["day_2"] is None
+    assert (stats.lines, stats.records) == (3, 3)
+
+    # Without a default month the undated line is counted and dropped.
+    stats = daily_import.ImportStats()
+    assert len(list(daily_import.records(pivot_lines(delimiter), stats=stats))) == 2 and stats.undated == 1
+
+
+def test_header_aliases_and_the_template_format():
+    layout = daily_import.detect(["Meter Name", "ACCT NO", "Level", "Day 1", "day_2", "03", "31", "32"], ",")
+    assert layout.columns == {"meter_name": 0, "account_number": 1, "label": 2}
+    assert layout.days == {1: 3, 2: 4, 31: 6} and not layout.pivot
+    assert daily_import.parse_reading_month("122025") == ("Dec-25", 2025)
+    assert daily_import.parse_reading_month("132025") is None
+    assert daily_import.parse_reading("12.5 m3") == 12.5
+
+    with open(APP_DIR / "scripts" / "test_water_upload.csv", encoding="utf-8-sig", newline="") as handle:
+        rows = list(daily_import.records(handle, "Jan-26", 2026))
+    assert rows and all(r["month"] == "Jan-26" and r["year"] == 2026 for r in rows)
+    assert rows[0]["zone"] == "Zone_05" and rows[0]["day_1"] == 4.35
+    with pytest.raises(ValueError):
+        list(daily_import.records(["day_1,day_2\n", "1,2\n"]))
+
+
+def test_run_keeps_registry_meters_and_fills_their_metadata(memory_client, tmp_path):
+    export = tmp_path / "grafana.csv"
+    export.write_text("".join(pivot_lines()) + "9999999,12026,5\n" + "4300001,12026,9\n", encoding="utf-8")
+    client = memory_client(water_meters=[
+        {"meter_id": "MB-1", "account_number": "4300001", "meter_name": "Z5-17", "label": "L3",
+         "zone": "Zone_05", "parent_meter": "Zone 5 (Bulk)", "type": "Residential (Villa)"},
+        {"meter_id": "MB-2", "account_number": "4300002", "meter_name": "Z3-42 (Villa)", "label": "L3",
+         "zone": "Zone_03A", "parent_meter": None, "type": "Residential (Villa)"},
+    ])
+    stats = daily_import.run(client, [export], month="Mar-26", year=2026)
+    assert (stats.records, stats.unconfigured, stats.written) == (5, 2, 2)
+    stored = {(r["account_number"], r["month"]): r for r in client.tables["water_daily_consumption"]}
+    assert sorted(stored) == [("4300001", "Jan-26"), ("4300002", "Dec-25")]
+    jan = stored[("4300001", "Jan-26")]
+    assert jan["day_1"] == 9 and jan["day_31"] is None          # the later line for the same key wins
+    assert (jan["meter_name"], jan["label"], jan["zone"]) == ("Z5-17", "L3", "Zone 5")
+    assert stored[("4300002", "Dec-25")]["zone"] == "Zone 3A"
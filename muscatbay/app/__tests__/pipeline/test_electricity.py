@@ -0,0 +1,71 @@
+import numpy as np
+
+from pipeline import electricity as el
+
+METERS = [{"id": f"m{i}", "name": f"Meter {i}", "meter_type": "Street Light", "account_number": f"R{i}"} for i in range(3)]
+MONTHS = ["Nov-24", "Dec-24", "Jan-25", "Feb-25", "Mar-25", "Apr-25"]
+
+
+def describe_state(value, baseline, samples, min_samples=el.MIN_SAMPLES):
+    """reading-cell.tsx describeReading, one cell at a time."""
+    if value is None:
+        return "missing"
+    if value < 0:
+        return "negative"
+    known = samples >= min_samples and baseline >= el.MIN_BASELINE_KWH
+    if value == 0:
+        return "zero" if known else "normal"
+    if not known:
+        return "normal"
+    ratio = value / baseline
+    if ratio >= el.SPIKE_CRITICAL:
+        return "spike-crit"
+    if ratio >= el.SPIKE_HIGH:
+        return "spike-high"
+    if ratio <= el.DIP:
+        return "dip"
+    return "normal"
+
+
+def readings(values):
+    return [{"meter_id": f"m{i}", "month": month, "consumption": v}
+            for i, row in enumerate(values) for month, v in zip(MONTHS, row)]
+
+
+def test_matrix_orders_months_chronologically_and_keeps_null_apart_from_zero():
+    rows = readings([[10, None, 0, 10, 10, 10], [1, 1, 1, 1, 1, 1], [5, 5, 5, 5, 5, 5]])
+    matrix = el.ReadingMatrix.from_rows(METERS, list(reversed(rows)) + [{"meter_id": "m0", "month": "bad", "consumption": 1}])
+    assert matrix.months == MONTHS
+    assert np.isnan(matrix.values[0, 1]) and matrix.values[0, 2] == 0
+
+
+def test_vectorised_states_match_the_per_cell_classifier():
+    rng = np.random.default_rng(4)
+    values = rng.choice([None, -2, 0, 1, 20, 40, 90, 150, 400], size=(3, 6)).tolist()
+    classifier = el.LoadClassifier(el.ReadingMatrix.from_rows(METERS, readings(values)))
+    for start, end in [("Nov-24", "Apr-25"), ("Jan-25", "Mar-25"), ("Feb-25", "Feb-25")]:
+        heat = classifier.window(start, end)
+        s, e = MONTHS.index(start), MONTHS.index(end)
+        for i, row in enumerate(values):
+            window = row[s:e + 1]
+            positives = [v for v in window if v is not None and v > 0]
+            base = sum(positives) / len(positives) if positives else 0
+            assert heat["baseline"][i] == base
+            expected = [describe_state(v, base, len(positives)) for v in window]
+            assert [el.STATES[c] for c in heat["states"][i]] == expected
+
+
+def test_load_watch_flags_and_rolling_windows():
+    values = [[100, 100, 100, 100, 100, 400], [10, 10, 10, 10, 10, 2], [None, None, None, 8, 8, 0]]
+    classifier = el.LoadClassifier(el.ReadingMatrix.from_rows(METERS, readings(values)))
+    assert [el.STATES[c] for c in classifier.current_flags()] == ["spike-high", "dip", "zero"]
+    rolling = classifier.rolling(3)
+    assert el.STATES[rolling[0, 5]] == "spike-high"        # 400 vs mean(100, 100, 400)
+    assert el.STATES[rolling[2, 5]] == "normal"            # only two positive reads in the window
+    assert el.state_counts(rolling)["missing"] == 3
+
+
+def test_unknown_range_falls_back_to_the_whole_history():
+    classifier = el.LoadClassifier(el.ReadingMatrix.from_rows(METERS, readings([[1] * 6] * 3)))
+    assert classifier.span("Jan-30", "Apr-25") == (0, 5)
+    assert classifier.span("Mar-25", "Jan-25") == (0, 5)
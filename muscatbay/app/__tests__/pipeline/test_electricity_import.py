@@ -0,0 +1,59 @@
+import datetime as dt
+
+from pipeline import electricity_import
+from pipeline.electricity_import import MeterIndex
+
+
+def meters():
+    return [
+        {"id": "m1", "name": "Beachwell", "account_number": "R51903"},
+        {"id": "m2", "name": "Bank muscat", "account_number": ""},
+        {"id": "m3", "name": "Helipad", "account_number": "R52334"},
+    ]
+
+
+def test_blank_cells_are_null_not_zero_and_meters_resolve_by_account_or_name():
+    assert electricity_import.month_key("June 2026") == "Jun-26"
+    assert electricity_import.month_key(dt.datetime(2026, 5, 1)) == "May-26"
+    assert electricity_import.month_key("Meter Type") is None
+    sheet = [
+        ["Electricity master", None, None, None],
+        ["Meter Name", "Account No.", "Apr-26", "May-26"],
+        ["BEACHWELL ", "R51903", 16268, "1,204"],
+        ["Bank  Muscat", None, 0, "n/a"],
+        ["Old name", "R52334", 3, None],
+        ["Unknown", "R00000", 1, 2],
+    ]
+    source = electricity_import.parse_table(sheet)
+    assert [(r.name, r.account, r.line) for r in source][:2] == [("BEACHWELL", "R51903", 3), ("Bank  Muscat", None, 4)]
+
+    stored = {("m1", "Apr-26"): 16268.0, ("m3", "Apr-26"): 3.0, ("m3", "May-26"): 0.0}
+    plan = electricity_import.plan(source, MeterIndex(meters()), stored)
+    assert plan.months == ["Apr-26", "May-26"] and plan.unmatched == ["R00000"]
+    assert plan.invalid == [(4, "May-26", "n/a")]
+    assert (plan.new, plan.changed, plan.unchanged, plan.closed) == (2, 1, 2, 1)
+    assert sorted((r["meter_id"], r["month"], r["consumption"]) for r in plan.rows) == [
+        ("m1", "May-26", 1204.0), ("m2", "Apr-26", 0.0), ("m3", "May-26", None)]
+    assert plan.changes == [("Helipad", "May-26", 0.0, None)]
+
+
+def test_run_upserts_only_the_diff_and_rerunning_writes_nothing(memory_client, tmp_path):
+    export = tmp_path / "electricity.csv"
+    export.write_text("Name,Account Number,Jun-26,Jul-26\nBeachwell,R51903,100,120\nHelipad,R52334,,5\n",
+                      encoding="utf-8")
+    client = memory_client(electricity_meters=meters(), electricity_readings=[
+        {"meter_id": "m1", "month": "Jun-26", "consumption": 100},
+        {"meter_id": "m1", "month": "May-26", "consumption": 90}])
+
+    dry = electricity_import.run(client, [export], dry_run=True)
+    assert (dry.new, dry.unchanged) == (2, 1) and client.writes == []
+
+    electricity_import.run(client, [export], months=["July 2026"])
+    assert client.writes == [("electricity_readings", 2)]
+    readings = {(r["meter_id"], r["month"]): r["consumption"] for r in client.tables["electricity_readings"]}
+    assert readings == {("m1", "Jun-26"): 100, ("m1", "May-26"): 90, ("m1", "Jul-26"): 120.0,
+                        ("m3", "Jul-26"): 5.0}
+
+    again = electricity_import.run(client, [export])
+    assert (again.new, again.changed, again.unchanged, len(again.rows)) == (0, 0, 3, 0)
+    assert len(client.writes) == 1
@@ -0,0 +1,125 @@
+from pathlib import Path
+
+from pipeline import index_advisor
+
+APP_DIR = Path(__file__).resolve().parents[2]
+
+SCHEMA = """
+-- readings
+CREATE TABLE IF NOT EXISTS public.readings (
+    id SERIAL PRIMARY KEY,
+    account_number TEXT NOT NULL,
+    month TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    zone TEXT,
+    CONSTRAINT readings_key UNIQUE (account_number, month, year)
+);
+CREATE INDEX idx_readings_account ON readings(account_number);
+CREATE INDEX idx_readings_zone ON readings (zone DESC);
+CREATE INDEX idx_readings_old ON readings (year);
+DROP INDEX IF EXISTS public.idx_readings_old;
+CREATE TABLE "Tracker" ("Contractor" text primary key, "Status" text);
+"""
+
+SOURCE = """
+const TABLE = 'readings';
+export async function load(client, month, year) {
+    let query = client
+        .from(TABLE)
+        .select('account_number, month, year');
+    if (month) query = query.eq('month', month);
+    if (year) query = query.eq('year', year);
+    const tracker = await client.from('Tracker').select('*').order('Contractor');
+    const { error } = await client.storage.from('uploads').upload('x', file);
+    return client.from('readings').select('*').gte('year', 2025).order('account_number');
+}
+"""
+
+
+def test_shapes_and_indexes_are_read_from_source():
+    shapes = index_advisor.capture(SOURCE, "api.ts")
+    assert [(s.source, s.table, s.filters, s.order) for s in shapes] == [
+        ("api.ts:5", "readings", [("month", "eq"), ("year", "eq")], []),
+        ("api.ts:9", "Tracker", [], ["Contractor"]),
+        ("api.ts:11", "readings", [("year", "gte")], ["account_number"]),
+    ]
+    schema = {t: {i.name: i for i in found.values()} for t, found in index_advisor.load_indexes(SCHEMA, "s.sql").items()}
+    assert sorted(schema) == ["Tracker", "readings"]
+    readings = schema["readings"]
+    assert sorted(readings) == ["idx_readings_account", "idx_readings_zone", "readings_id_pkey", "readings_key"]
+    assert readings["readings_key"].columns == ("account_number", "month", "year") and readings["readings_key"].constraint
+    assert readings["idx_readings_zone"].columns == ("zone",)
+    assert schema["Tracker"]["Tracker_Contractor_pkey"].columns == ("Contractor",)
+
+
+def test_advice_names_missing_unused_and_redundant_indexes():
+    shapes = index_advisor.capture(SOURCE, "api.ts")
+    schema = {t: list(found.values()) for t, found in index_advisor.load_indexes(SCHEMA).items()}
+    report = index_advisor.advise(shapes, schema)
+    assert report["missing"] == [
+        {"table": "readings", "columns": ["month", "year"], "shapes": ["api.ts:5"]},
+        {"table": "readings", "columns": ["year"], "shapes": ["api.ts:11"]},
+    ]
+    assert [(r["index"], r["coveredBy"]) for r in report["redundant"]] == [("idx_readings_account", "readings_key")]
+    assert [r["index"] for r in report["unused"]] == ["idx_readings_zone"]
+    assert index_advisor.index_sql("Tracker", ["Status"]) == \
+        'create index if not exists idx_tracker_status on public."Tracker" ("Status");'
+
+    # The real tree parses end to end.
+    assert len(index_advisor.capture_dir(APP_DIR / "functions" / "api")) > 20
+    assert "water_monthly_consumption" in index_advisor.load_schema(APP_DIR / "sql")
+
+
+PIPELINE = '''
+TABLES = {"readings": "account_number", "Tracker": "Contractor"}
+
+
+def watermark(client, since):
+    for table, key in TABLES.items():
+        client.select(table, key, order="updated_at", updated_at=f"gt.{since}")
+'''
+
+
+def test_pipeline_calls_and_sql_consumers_keep_an_index_in_use(tmp_path):
+    shapes = index_advisor.capture_python(PIPELINE, "job.py")
+    assert [(s.table, s.filters, s.order) for s in shapes] == [
+        ("readings", [("updated_at", "gt")], ["updated_at"]),
+        ("Tracker", [("updated_at", "gt")], ["updated_at"]),
+    ]
+    (tmp_path / "v.sql").write_text(
+        "create or replace view public.by_zone as select zone, count(*) from public.readings group by zone;\n",
+        encoding="utf-8")
+    schema = {t: list(found.values()) for t, found in index_advisor.load_indexes(SCHEMA).items()}
+    report = index_advisor.advise(index_advisor.capture(SOURCE, "api.ts"), schema,
+                                  index_advisor.load_consumers(tmp_path))
+    assert report["unused"] == []
+
+
+def test_real_pipeline_shapes_name_only_columns_their_table_has():
+    columns = index_advisor.load_columns(APP_DIR / "sql")
+    shapes = index_advisor.capture_pipeline(APP_DIR / "scripts" / "pipeline")
+    ppm = [(s.table, s.filters) for s in shapes if s.source.startswith("pipeline/ppm.py")]
+    assert ppm == [("master_assets_register", [("asset_uid", "in")])]       # `from .assets import TABLE`
+    checked = [s for s in shapes if s.table in columns]
+    assert len(checked) > 30
+    assert [(s.source, s.table, c) for s in checked for c in [f for f, _ in s.filters] + s.order
+            if c not in columns[s.table]] == []
+
+
+def test_a_failed_replay_is_recorded_and_the_rest_are_measured():
+    shapes = [index_advisor.QueryShape("job.py:3", t, [("period", "eq")], []) for t in ("a_monthly", "b_monthly")]
+    report = {"missing": [{"table": t, "columns": ["period"], "shapes": ["job.py:3"]} for t in ("a_monthly", "b_monthly")],
+              "partial": []}
+
+    class Explainer:
+        errors = (LookupError,)
+
+        def measure(self, shape, columns):
+            if shape.table == "a_monthly":
+                raise LookupError('column "period" does not exist')
+            return {"shape": shape.source, "table": shape.table, "beforeMs": 2.0, "afterMs": 1.0,
+                    "before": "Seq Scan", "after": "Index Scan"}
+
+    measured = index_advisor.measure_all(Explainer(), report, shapes)
+    assert [(m["table"], m.get("error")) for m in measured] == [
+        ("a_monthly", 'column "period" does not exist'), ("b_monthly", None)]
@@ -0,0 +1,67 @@
+import pytest
+
+from pipeline import migrations
+from pipeline.migrations import Migration
+
+FUNCTION = """
+-- header; with a semicolon in the comment
+BEGIN;
+create table if not exists public.t (id int primary key, note text);
+/* block; comment */
+create or replace function public.f() returns trigger language plpgsql as $fn$
+begin
+    new.note := 'it''s; fine';
+    return new;
+end;
+$fn$;
+create index concurrently if not exists idx_t_note on public.t (note);
+COMMIT;
+"""
+
+
+def test_split_keeps_quoted_semicolons_and_drops_transaction_control():
+    m = Migration("20261001_t", FUNCTION)
+    assert [s.kind for s in m.statements] == ["CREATE TABLE", "CREATE FUNCTION", "CREATE INDEX"]
+    assert [s.line for s in m.statements] == [4, 6, 12]
+    assert "'it''s; fine'" in m.statements[1].sql and m.statements[1].sql.endswith("$fn$")
+    assert not m.data
+    batches = m.batches()
+    assert [(len(b.statements), b.autocommit) for b in batches] == [(2, False), (1, True)]
+    assert migrations.lint(m) == []
+
+
+def test_data_loads_are_chunked_and_non_idempotent_statements_linted():
+    updates = "".join(f"update public.t set note = 'n{i}' where id = {i};\n" for i in range(7))
+    data = Migration("full_sync", updates + "select count(*) from public.t;")
+    assert data.data and not data.dated
+    assert [len(b.statements) for b in data.batches(3)] == [3, 3, 2]
+
+    schema = Migration("20261002_u", """
+        create table public.u (id int);
+        drop policy if exists "read all" on public.u;
+        create policy "read all" on public.u for select using (true);
+        create policy "write all" on public.u for all using (true);
+        delete from public.u where id < 0;
+        insert into public.u values (1);
+        insert into public.v values (1);
+    """)
+    assert [line for line, _ in migrations.lint(schema)] == [2, 5, 8]
+
+
+def test_pending_order_and_remote_guard(tmp_path):
+    for name in ("20261002_b", "20261001_a", "update_x"):
+        (tmp_path / f"{name}.sql").write_text("select 1;", encoding="utf-8")
+    found = migrations.discover(tmp_path)
+    assert [m.version for m in found] == ["20261001_a", "20261002_b", "update_x"]
+
+    applied = {"20261001_a": {"status": "applied"}}
+    assert [m.version for m in migrations.pending(found, applied)] == ["20261002_b"]
+    assert [m.version for m in migrations.pending(found, applied, ("update_x.sql",))] == ["update_x"]
+    with pytest.raises(ValueError):
+        migrations.pending(found, applied, ("nope",))
+
+    assert migrations.is_local("postgresql://postgres@localhost:54322/postgres")
+    assert migrations.is_local("dbname=postgres host=/var/run/postgresql")
+    assert not migrations.is_local("postgresql://postgres@db.abc.supabase.co:5432/postgres")
+    with pytest.raises(RuntimeError):
+        migrations.run(tmp_path, tmp_path, dsn="postgresql://postgres@db.abc.supabase.co/postgres")
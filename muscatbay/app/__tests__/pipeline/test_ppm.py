@@ -0,0 +1,89 @@
+import datetime as dt
+import json
+
+from pipeline import ppm
+from pipeline.assets import AssetRegister
+
+TODAY = dt.date(2026, 10, 19)
+
+
+def asset(uid, next_ppm, zone="Zone 3", discipline="HVAC", frequency="Quarterly", interval=None, last=None):
+    return {"asset_uid": uid, "zone": zone, "discipline": discipline, "status": "Active",
+            "ppm_frequency": frequency, "ppm_interval_months": interval,
+            "last_ppm_date": last, "next_ppm_date": next_ppm}
+
+
+ROWS = [
+    asset("A", "2026-10-25"),
+    asset("B", "2026-10-01", zone="Zone 5"),                               # overdue
+    asset("C", "2026-11-30", discipline="Electrical", frequency="ANNUAL"),
+    asset("D", "2026-01-31", frequency="Monthly", interval=1),            # long overdue, monthly
+    asset("E", "2026-10-20", frequency="WEEKLY"),
+    asset("F", "2026-12-05", frequency="OC"),                              # on condition: one visit
+    asset("G", None, frequency="Monthly"),
+]
+
+
+def index():
+    return ppm.PpmIndex.from_register(AssetRegister.from_rows(ROWS))
+
+
+def test_due_windows_and_counts():
+    idx = index()
+    ids = lambda positions: [idx.ids[p] for p in positions]
+    assert ids(idx.due_between(TODAY, TODAY + dt.timedelta(days=7))) == ["E", "A"]
+    assert ids(idx.overdue(TODAY)) == ["D", "B"]
+    assert ids(idx.due_between(TODAY, dt.date(2026, 12, 31), zone="Zone 3", discipline="HVAC")) == ["E", "A", "F"]
+    assert ids(idx.due_between(TODAY, dt.date(2026, 12, 31), zone="Nowhere")) == []
+    assert idx.counts("discipline", TODAY, dt.date(2026, 12, 31)) == {"Electrical": 1, "HVAC": 3}
+    assert ids(idx.unscheduled) == ["G"]
+
+
+def test_update_rederives_only_changed_assets():
+    idx = index()
+    moved = idx.update([dict(ROWS[1], last_ppm_date="2026-10-10"), dict(ROWS[3], last_ppm_date="2025-12-31",
+                                                                       ppm_interval_months=1)])
+    assert [(idx.ids[p], ppm.from_epoch(new)) for p, _, new in moved] == [("B", dt.date(2027, 1, 10))]
+    assert [idx.ids[p] for p in idx.overdue(TODAY)] == ["D"]
+    assert [idx.ids[p] for p in idx.due_between(dt.date(2027, 1, 1), dt.date(2027, 1, 31), zone="Zone 5")] == ["B"]
+    assert ppm.add_months(dt.date(2024, 1, 31), 1) == dt.date(2024, 2, 29)
+
+
+def test_calendar_steps_each_interval_through_the_window():
+    idx = index()
+    occ = idx.calendar(TODAY, months=3)                 # Oct–Dec 2026
+    visits = {}
+    for p, d in zip(occ.positions, occ.days):
+        visits.setdefault(idx.ids[p], []).append(ppm.from_epoch(d).isoformat())
+    assert visits["A"] == ["2026-10-25"]
+    assert visits["C"] == ["2026-11-30"]
+    assert visits["D"] == ["2026-10-31", "2026-11-30", "2026-12-31"]
+    assert len(visits["E"]) == 11 and visits["E"][-1] == "2026-12-29"
+    assert visits["F"] == ["2026-12-05"] and "G" not in visits
+    assert list(occ.days) == sorted(occ.days)
+
+
+def test_run_writes_back_changed_dates_once(memory_client, tmp_path):
+    rows = [asset("A", "2026-10-25", last="2026-07-25"), asset("B", "2026-09-01", last="2026-08-01")]
+    client = memory_client(master_assets_register=rows)
+    ppm.run(client, tmp_path, today=TODAY, months=2)
+    assert client.writes == []                  # no previous run: fingerprints seeded, no date rewritten
+
+    client.tables["master_assets_register"][1]["last_ppm_date"] = "2026-08-15"
+    payload = ppm.run(client, tmp_path, today=TODAY, months=2)
+    assert [r["next_ppm_date"] for r in client.tables["master_assets_register"]] == ["2026-10-25", "2026-11-15"]
+    assert payload["overdue"]["count"] == 0 and payload["dueWithin"]["30"]["count"] == 2
+    assert payload["calendar"]["2026-11"]["visits"] == [[1, "2026-11-15"]]
+
+    client.writes.clear()
+    ppm.run(client, tmp_path, today=TODAY, months=2)
+    assert client.writes == []
+    assert json.loads((tmp_path / ppm.ARTIFACT_NAME).read_text())["fingerprints"]["B"] == "2026-08-15||Quarterly"
+
+
+def test_full_rewrite_needs_confirm(memory_client, tmp_path):
+    client = memory_client(master_assets_register=[asset("A", "2026-12-01", last="2026-07-25")])
+    ppm.run(client, tmp_path, today=TODAY, full=True)
+    assert client.writes == [] and client.tables["master_assets_register"][0]["next_ppm_date"] == "2026-12-01"
+    ppm.run(client, tmp_path, today=TODAY, full=True, confirm=True)
+    assert client.tables["master_assets_register"][0]["next_ppm_date"] == "2026-10-25"
@@ -0,0 +1,55 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from pipeline.ranges import PrefixTable, YearRanges, daily_table
+from pipeline.water import WaterMeter, build_monthly_data, period_value
+
+
+def test_blank_months_are_not_zero_readings():
+    table = PrefixTable.from_lists([[10, None, 0, 5], [None, None, None, None], [0, 0, None, "2.5"]])
+    assert table.total(0, 3).tolist() == [15, 0, 2.5]
+    assert table.count(0, 3).tolist() == [3, 0, 3]
+    assert table.has_reading(1, 1).tolist() == [False, False, True]  # a zero is a reading
+    assert table.has_reading(2, 2).tolist() == [True, False, False]
+    assert table.mean().tolist() == [5, 0, 2.5 / 3]  # meanReading: 0 when nothing was read
+    value = table.value(1, 2)
+    assert value[0] == 0 and math.isnan(value[1]) and value[2] == 0
+    with pytest.raises(ValueError):
+        table.total(3, 1)
+
+
+def test_period_values_match_period_value_for_every_selection():
+    rng = random.Random(3)
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    meters = []
+    for i in range(40):
+        consumption = {}
+        for year in ("25", "26"):
+            if rng.random() < 0.2:
+                continue
+            for month in months:
+                roll = rng.random()
+                consumption[f"{month}-{year}"] = None if roll < 0.15 else 0 if roll < 0.2 else round(rng.uniform(-5, 500), 2)
+        meters.append(WaterMeter(f"Meter {i}", f"A{i}", "L3", "Zone_05", "", "Retail", consumption))
+    data = build_monthly_data(meters)
+    ranges = YearRanges(data)
+    selections = [None] + list(range(12)) + [(s, e) for s in range(12) for e in range(s, 12)]
+    for year in ranges.years:
+        for sel in selections:
+            got = ranges.period_values(year, sel)
+            for m, v in zip(data.meters, got):
+                cache = m.y.get(year)
+                want = period_value(cache, sel) if cache else None
+                assert (want is None and np.isnan(v)) or v == pytest.approx(want, abs=1e-9)
+
+
+def test_daily_rows_give_month_to_date_with_gaps():
+    rows = [{"day_1": 4, "day_2": None, "day_3": 0, "day_5": 6}, {}]
+    table = daily_table(rows)
+    assert table.value(0, 30)[0] == 10
+    assert math.isnan(table.value(0, 30)[1])
+    assert table.count(0, 2).tolist() == [2, 0]
+    assert math.isnan(table.value(1, 1)[0])
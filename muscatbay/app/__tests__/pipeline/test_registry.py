@@ -0,0 +1,49 @@
+from pipeline import registry
+
+
+def meter_rows(stamp="2026-05-01T00:00:00+00:00"):
+    return [
+        {"meter_id": "MB-1", "account_number": "4300001", "meter_name": "Z5-17", "label": "L3", "zone": "Zone_05",
+         "parent_meter": "Zone 5 (Bulk)", "type": "Residential (Villa)", "sort_order": 1, "updated_at": stamp},
+        {"meter_id": "MB-2", "account_number": "4300178", "meter_name": "D-44 Building Bulk Meter", "label": "L3",
+         "zone": "Zone_03A", "parent_meter": "Zone 3A (Bulk)", "type": "Building (Bulk)", "sort_order": 2,
+         "updated_at": "2026-01-01T00:00:00+00:00"},
+    ]
+
+
+def test_translations_and_enrichment_are_lookups():
+    assert registry.to_legacy("zone", "Zone_03A") == "Zone_03_(A)"
+    assert registry.to_v2("zone", "Zone_03_(A)") == "Zone_03A"
+    assert registry.to_v2("type", "D_Building_Bulk") == "Building (Bulk)"
+    assert registry.to_legacy("type", "Retail") == "Retail"
+    assert registry.resolve_zone_display(" ZONE_03_(B) ") == "Zone 3B"
+    assert registry.resolve_zone_display("village square") == "Village Square"
+
+    reg = registry.MeterRegistry(meter_rows())
+    assert reg.find(" 4300178 ") == 1 and reg.find("", "z5-17") == 0 and reg.find("9999") is None
+    record = {"meter_name": "4300178", "account_number": "4300178", "type": "Shop"}
+    assert reg.enrich(record)
+    assert record == {"meter_name": "D-44 Building Bulk Meter", "account_number": "4300178", "type": "Shop",
+                      "label": "L3", "zone": "Zone 3A", "parent_meter": "ZONE 3A (BULK ZONE 3A)"}
+    named = {"meter_name": "Villa 17", "account_number": "", "zone": "zone_05"}
+    assert not reg.enrich(named, "Villa 17")
+    assert reg.enrich(named, "Z5-17") and named["zone"] == "Zone 5" and named["meter_name"] == "Villa 17"
+    zoneless = registry.MeterRegistry([{**meter_rows()[0], "zone": None}])
+    from_file = {"account_number": "4300001", "zone": "Zone_05"}
+    assert zoneless.enrich(from_file) and from_file["zone"] == "Zone 5"
+
+
+def test_registry_is_fetched_once_per_version(memory_client, tmp_path):
+    client = memory_client(water_meters=meter_rows())
+    first, fetched = registry.load_registry(client, tmp_path)
+    assert fetched and len(first) == 2
+    again, fetched = registry.load_registry(client, tmp_path)
+    assert again is first and not fetched
+
+    # A fresh process reads the cache file; an edit to water_meters refetches.
+    registry._MEMO.clear()
+    cached, fetched = registry.load_registry(client, tmp_path)
+    assert not fetched and cached.find("4300001") == 0
+    client.tables["water_meters"][0].update(zone="Zone_08", updated_at="2026-06-01T00:00:00+00:00")
+    fresh, fetched = registry.load_registry(client, tmp_path)
+    assert fetched and fresh.patches[0]["zone"] == "Zone 08"
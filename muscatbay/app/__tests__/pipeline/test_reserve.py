@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from pipeline import reserve
+from pipeline.assets import AssetRegister
+
+
+def asset(uid, cost, life, erl=None, qty=1, condition="Good", discipline="HVAC", zone="Zone 3", **extra):
+    return {"asset_uid": uid, "current_replacement_cost_omr": cost, "life_expectancy_years": life,
+            "erl_years": erl, "quantity": qty, "condition": condition, "discipline": discipline,
+            "zone": zone, "system_area": "Cooling", "status": "Active", **extra}
+
+
+REGISTER = AssetRegister.from_rows([
+    asset("A", 1000, 10, erl=2, qty=2),                                  # 2028, 2038, 2048
+    asset("B", 500, 20, erl=8, condition="Poor", discipline="Electrical"),  # 8 × 0.4 → 2030 (3.2 → 4)
+    asset("C", 100, 5, erl=0, condition="fair"),                         # overdue: 2026, every 5 years
+    {"Asset_UID": "D", "Current_Replacement_Cost_OMR": 300, "Life_Expectancy_Years": 15,
+     "Install_Year": 2016, "Status": "Working", "Discipline": "Electrical"},  # legacy columns: 5 left → 2031
+    asset("E", None, 10, erl=1),                                         # unpriced
+    asset("F", 900, 10, erl=1, status="Decommissioned"),
+])
+
+
+def test_schedule_per_asset():
+    p = reserve.project(REGISTER, 2026, horizon=30, inflation=0.0)
+    due = {uid: [p.years[j] for j in np.flatnonzero(row)] for uid, row in zip(REGISTER.ids, p.schedule)}
+    assert due["A"] == [2028, 2038, 2048]
+    assert due["B"] == [2030, 2050]
+    assert due["C"] == [2026, 2031, 2036, 2041, 2046, 2051]
+    assert due["D"] == [2031, 2046]
+    assert due["E"] == due["F"] == []
+    assert p.schedule[0, 2] == 2000
+    assert p.scheduled.tolist() == [True, True, True, True, False, False]
+
+    inflated = reserve.project(REGISTER, 2026, inflation=0.05)
+    assert inflated.schedule[0, 2] == pytest.approx(2000 * 1.05 ** 2)
+
+
+def test_aggregates_and_artifact():
+    p = reserve.project(REGISTER, 2026, inflation=0.0)
+    groups = reserve.group_totals(REGISTER.disciplines, p.schedule)
+    assert groups["Electrical"].sum() == 2 * 500 + 2 * 300
+    assert sum(g.sum() for g in groups.values()) == p.totals.sum()
+
+    payload = reserve.artifact(REGISTER, p, grid=(np.array([0.0, 0.03]), np.array([0.0, 0.5])))
+    assert payload["assets"] == {"active": 5, "scheduled": 4, "unscheduled": 1, "unscheduledCost": 0.0}
+    assert list(payload["byDiscipline"]) == ["HVAC", "Electrical"]
+    assert payload["bySystemArea"]["Unassigned"]["total"] == 600
+    assert payload["sweep"]["total"][0][0] == round(float(p.totals.sum()), 2)
+
+
+def test_sweep_matches_single_projections():
+    inflations, extensions = np.linspace(0, 0.06, 4), np.linspace(0, 0.3, 5)
+    grid = reserve.sweep(REGISTER, 2026, inflations, extensions)
+    for i, inflation in enumerate(inflations):
+        for j, extension in enumerate(extensions):
+            single = reserve.project(REGISTER, 2026, inflation=inflation, life_extension=extension)
+            np.testing.assert_allclose(grid[i, j], single.totals)
+
+
+def test_level_contribution_keeps_the_fund_solvent():
+    spend = np.array([0, 0, 900, 0, 300.0])
+    c = reserve.level_contribution(spend)
+    assert c == pytest.approx(300)                      # 3 × 300 covers year 2
+    balance = np.cumsum(c - spend)
+    assert balance.min() == pytest.approx(0, abs=1e-9)
+    assert reserve.level_contribution(spend, opening_balance=5000) == 0
+    assert reserve.level_contribution(spend, interest=0.05) < c
+    assert reserve.parse_grid("0:0.06:4").tolist() == pytest.approx([0, 0.02, 0.04, 0.06])
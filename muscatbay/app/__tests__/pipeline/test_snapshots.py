@@ -0,0 +1,62 @@
+import datetime as dt
+import json
+
+import numpy as np
+
+from pipeline import snapshots
+
+
+def stp_days(n):
+    start = dt.date(2026, 8, 1)
+    return [{"date": (start + dt.timedelta(days=i)).isoformat(), "inlet_sewage": 650, "tse_for_irrigation": 600,
+             "tanker_trips": 3, "updated_at": "2026-10-01T00:00:00+00:00"} for i in range(n)]
+
+
+def assets():
+    row = {"asset_uid": "A", "discipline": "MEP", "zone": "Zone 3", "condition": "Good", "status": "Active",
+           "quantity": 2, "current_replacement_cost_omr": 150.5}
+    return [row, {**row, "asset_uid": "B", "current_replacement_cost_omr": None},
+            {**row, "asset_uid": "C", "status": "Decommissioned"}]
+
+
+def test_values_are_plain_and_versions_follow_the_data():
+    data = snapshots.plain({"a": np.float64(1.5), "b": [np.int64(2), float("nan")], "c": dt.date(2026, 10, 19),
+                            "d": np.array([1.0, np.inf])})
+    assert data == {"a": 1.5, "b": [2, None], "c": "2026-10-19", "d": [1.0, None]}
+    assert snapshots.data_version(data) == snapshots.data_version(dict(reversed(list(data.items()))))
+    assert snapshots.data_version(data) != snapshots.data_version({**data, "a": 1.6})
+
+
+def test_modules_are_rewritten_only_when_their_data_changes(memory_client, tmp_path, monkeypatch):
+    client = memory_client(stp_operations=stp_days(100), master_assets_register=assets())
+    index = snapshots.run(client, tmp_path, modules=["stp", "assets"])
+    stp_file = tmp_path / index["modules"]["stp"]["file"]
+    envelope = json.loads(stp_file.read_text(encoding="utf-8"))
+    assert envelope["module"] == "stp" and envelope["version"] == index["modules"]["stp"]["version"]
+    assert len(envelope["data"]["recentDays"]) == snapshots.RECENT_DAYS and len(envelope["data"]["monthly"]) == 4
+    stats = json.loads((tmp_path / "assets.json").read_text(encoding="utf-8"))["data"]
+    assert (stats["active"], stats["decommissioned"], stats["unpriced"], stats["replacementValue"]) == (2, 1, 1, 301.0)
+    assert stats["byZone"] == {"Zone 3": {"count": 2, "value": 301.0}}
+
+    # Unchanged STP keeps its file; an asset edit rewrites assets only; a failing source keeps the old snapshot.
+    stamp = stp_file.stat().st_mtime_ns
+    client.tables["master_assets_register"][1]["current_replacement_cost_omr"] = 10
+
+    def unavailable(client, cache_dir, today):
+        raise RuntimeError("select electricity_meters failed (503)")
+
+    monkeypatch.setitem(snapshots.MODULES, "electricity", unavailable)
+    again = snapshots.run(client, tmp_path, modules=["stp", "assets", "electricity"])
+    assert stp_file.stat().st_mtime_ns == stamp and again["modules"]["stp"] == index["modules"]["stp"]
+    assert again["modules"]["assets"]["version"] != index["modules"]["assets"]["version"]
+    assert again["unavailable"] == ["electricity"]
+    assert json.loads((tmp_path / snapshots.INDEX_NAME).read_text(encoding="utf-8")) == again
+
+    # A dropped connection (requests' RequestException with the real client) is caught the same way.
+    def dropped(client, cache_dir, today):
+        raise ConnectionError("Connection aborted")
+
+    monkeypatch.setattr(snapshots, "client_errors", lambda: (RuntimeError, ConnectionError))
+    monkeypatch.setitem(snapshots.MODULES, "contractors", dropped)
+    last = snapshots.run(client, tmp_path, modules=["contractors"])
+    assert last["unavailable"] == ["contractors", "electricity"] and "stp" in last["modules"]
@@ -0,0 +1,68 @@
+import datetime as dt
+import random
+import statistics
+
+from pipeline import stp
+
+
+def ops(n, start=dt.date(2026, 1, 1), seed=5):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        inlet = rng.choice([0, 600, 650, 700, 720, 1100])
+        out.append({"date": (start + dt.timedelta(days=i)).isoformat(), "inlet_sewage": inlet,
+                    "tse_for_irrigation": inlet * rng.choice([0.6, 0.85, 0.92, 0.97]),
+                    "tanker_trips": rng.choice([0, 2, 3, 6, 9]), "updated_at": f"2026-05-01T00:00:{i % 60:02d}"})
+    return out
+
+
+def test_rolling_median_matches_a_recomputed_median():
+    rng = random.Random(1)
+    values = [rng.choice([1, 2, 2, 3, 5, 8, 8, 13]) for _ in range(300)]
+    rolling, width = stp.RollingMedian(), 7
+    for i, v in enumerate(values):
+        rolling.add(v)
+        if i >= width:
+            rolling.remove(values[i - width])
+        assert rolling.median() == statistics.median(values[max(0, i - width + 1):i + 1])
+    assert stp.RollingMedian().median() == 0.0
+
+
+def test_daily_rows_use_the_trailing_window_and_the_threshold_gates():
+    days = stp.normalize_days(ops(60))
+    rows = stp.build_daily(days, baseline_days=10)
+    for i, row in enumerate(rows):
+        window = days[max(0, i - 9):i + 1]
+        inlets = [d[1] for d in window if d[1] > 0]
+        assert row["baseline_inlet"] == (statistics.median(inlets) if inlets else 0)
+        assert row["baseline_trips"] == statistics.median(d[3] for d in window)
+        assert row["load_severity"] == stp.classify_hydraulic_load(row["inlet"], row["baseline_inlet"])
+        assert row["severity"] == stp.worst([row[k] for k in (
+            "efficiency_severity", "load_severity", "reuse_severity", "tanker_severity", "drop_severity")])
+    assert stp.classify_tanker_trips(9, 3) == "high" and stp.classify_tanker_trips(5, 3) == "watch"
+    assert stp.classify_reuse(-1, 0) == "critical" and stp.classify_reuse(0, 500) == "critical"
+
+
+def test_incremental_rebuild_equals_the_full_rebuild():
+    days = stp.normalize_days(ops(90))
+    full = stp.build_daily(days)
+    cut = 61                                            # first day of the changed month
+    tail = stp.build_daily(days[cut:], context=days[cut - stp.BASELINE_DAYS:cut])
+    assert tail == full[cut:]
+
+
+def test_monthly_rollup_and_range_summary():
+    daily = stp.build_daily(stp.normalize_days(ops(59) + [{"date": "2026-01-05", "inlet_sewage": 10}]))
+    months = {m["ym"]: m for m in stp.monthly_rollup(daily)}
+    assert months["2026-01"]["days_logged"] == 31 and months["2026-02"]["days_in_month"] == 28
+    jan = [r for r in daily if r["ym"] == "2026-01"]
+    assert months["2026-01"]["total_trips"] * stp.TANKER_FEE == months["2026-01"]["income"]
+    assert sum(months["2026-01"][f"days_{s}"] for s in ("good", "watch", "high", "critical")) == \
+        sum(r["severity"] != "nodata" for r in jan)
+
+    index = stp.RangeIndex(daily)
+    summary = index.summary(dt.date(2026, 1, 10), dt.date(2026, 2, 3))
+    in_range = [r for r in daily if "2026-01-10" <= r["date"] <= "2026-02-03"]
+    assert summary["daysLogged"] == summary["daysExpected"] == 25
+    assert abs(summary["totalTSE"] - sum(r["tse"] for r in in_range)) < 1e-9
+    assert index.summary(dt.date(2025, 1, 1), dt.date(2025, 2, 1))["daysLogged"] == 0
@@ -0,0 +1,48 @@
+import pytest
+
+from pipeline import stp_rollup, water
+
+
+def day(id, date, inlet, tse, trips, updated_at, **rollup):
+    return {"id": id, "date": date, "inlet_sewage": inlet, "tse_for_irrigation": tse,
+            "tanker_trips": trips, "updated_at": updated_at, **rollup}
+
+
+def test_month_helpers():
+    assert water.month_span("2025-11", "2026-02") == ["2025-11", "2025-12", "2026-01", "2026-02"]
+    assert stp_rollup.month_bounds("2024-02") == ("2024-02-01", "2024-02-29")
+    assert stp_rollup._contiguous(["2025-11", "2025-12", "2026-01", "2026-04"]) == [
+        ["2025-11", "2025-12", "2026-01"], ["2026-04"]]
+    assert stp_rollup.parse_months("2025-12:2026-01") == ["2025-12", "2026-01"]
+    with pytest.raises(ValueError):
+        stp_rollup.parse_months("2026-13")
+
+
+def test_rollups_come_from_volumes_and_fresh_rows_are_skipped():
+    fresh = {"monthly_volume_input": 300, "monthly_volume_output": 250,
+             "monthly_income": 22.5, "monthly_savings": 330}
+    rows = [day(1, "2026-03-01", 100, 100, 2, "t", **fresh), day(2, "2026-03-02", 200, 150, 3, "t", **fresh),
+            day(3, "2026-04-01", 90, "80.5", None, "t", monthly_income=999)]
+    assert stp_rollup.month_rollups(rows)["2026-03"] == fresh
+    assert stp_rollup.plan_updates(rows) == [{
+        "id": 3, "date": "2026-04-01", "monthly_volume_input": 90, "monthly_volume_output": 80.5,
+        "monthly_income": 0, "monthly_savings": 106.26}]
+
+
+def test_run_recomputes_changed_months_and_converges(memory_client):
+    client = memory_client(stp_operations=[
+        day(1, "2026-02-28", 50, 40, 1, "2026-03-01T00:00:00+00:00"),
+        day(2, "2026-03-01", 100, 80, 2, "2026-03-02T00:00:00+00:00"),
+        day(3, "2026-03-02", 100, 80, 0, "2026-03-03T00:00:00+00:00"),
+    ])
+    assert len(stp_rollup.run(client)) == 3
+    assert client.tables["pipeline_state"][0]["watermark"] == "2026-03-03T00:00:00+00:00"
+    assert client.tables["stp_operations"][1]["monthly_income"] == 9
+
+    # An edit to one March day: only March is re-read, and both March rows change.
+    client.tables["stp_operations"][2].update(tanker_trips=4, updated_at="2026-03-04T00:00:00+00:00")
+    assert [u["id"] for u in stp_rollup.run(client)] == [2, 3]
+    assert client.tables["stp_operations"][2]["monthly_income"] == 27
+    # Nothing new after the watermark, and a forced re-run of both months writes nothing.
+    assert stp_rollup.run(client) == []
+    assert stp_rollup.run(client, months=["2026-02", "2026-03"]) == []
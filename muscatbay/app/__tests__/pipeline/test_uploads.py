@@ -0,0 +1,80 @@
+from pipeline import daily_import, uploads
+
+HEADER = "ACCOUNT_NUMBER,READING_MNTH," + ",".join(str(d) for d in range(1, 32)) + "\n"
+
+
+def registry_rows():
+    return [{"meter_id": f"MB-{a}", "account_number": a, "meter_name": f"Meter {a}", "label": "L3",
+             "zone": "Zone_05", "parent_meter": "Zone 5 (Bulk)", "type": "Residential (Villa)",
+             "updated_at": "2026-09-09T00:00:00+00:00"} for a in ("4300001", "4300002")]
+
+
+def test_the_hash_ignores_encoding_noise(tmp_path):
+    plain, noisy, other = tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "c.csv"
+    plain.write_bytes((HEADER + "4300001,92026,1,2\n").encode())
+    noisy.write_bytes(("\ufeff" + HEADER.replace("\n", "\r\n") + "4300001,92026,1,2  \r\n\r\n").encode())
+    other.write_bytes((HEADER + "4300001,92026,1,3\n").encode())
+    assert uploads.content_hash(plain) == uploads.content_hash(noisy) != uploads.content_hash(other)
+    assert uploads.storage_path("ab" * 32, "Sep-26") == f"water/2026/09/{'ab' * 32}.csv"
+
+
+def test_a_file_is_imported_once_and_overlaps_write_only_changes(memory_client, tmp_path):
+    client = memory_client(water_meters=registry_rows())
+    week1 = tmp_path / "week1.csv"
+    week1.write_text(HEADER + "4300001,92026,1,2,3\n4300002,92026,5,5,5\n", encoding="utf-8")
+    stats = daily_import.run(client, [week1])
+    assert (stats.written, stats.cells) == (2, 6)
+    assert [(r["sha256"], r["month"]) for r in client.tables["water_upload_manifest"]] == [
+        (uploads.content_hash(week1), "Sep-26")]
+    assert list(client.objects) == [("grafana-uploads", f"water/2026/09/{uploads.content_hash(week1)}.csv")]
+
+    # The same file again: nothing parsed, stored or written.
+    writes = len(client.writes)
+    assert daily_import.run(client, [week1]).duplicates == 1
+    assert len(client.writes) == writes
+
+    # A later pull that overlaps: 4300002 is unchanged, 4300001 gains day 4 and keeps days 1-3.
+    week2 = tmp_path / "week2.csv"
+    week2.write_text(HEADER + "4300001,92026,,,3,4\n4300002,92026,5,5,5\n", encoding="utf-8")
+    stats = daily_import.run(client, [week2])
+    assert (stats.written, stats.unchanged, stats.cells) == (1, 1, 1)
+    stored = {r["account_number"]: r for r in client.tables["water_daily_consumption"]}
+    assert [stored["4300001"][f"day_{d}"] for d in range(1, 6)] == [1, 2, 3, 4, None]
+    assert len(client.tables["water_upload_manifest"]) == 2
+
+
+def test_stored_rows_get_only_their_changed_cells(memory_client):
+    class Recording(memory_client):
+        def upsert(self, table, rows, on_conflict):
+            self.payloads = getattr(self, "payloads", []) + [[dict(r) for r in rows]]
+            return super().upsert(table, rows, on_conflict)
+
+    client = Recording(water_meters=registry_rows())
+    stream = lambda text: daily_import.records((HEADER + text).splitlines(keepends=True))
+    daily_import.upsert_stream(client, stream("4300001,92026,1,2\n4300002,92026,5\n"))
+    assert [len(group[0]) for group in client.payloads] == [35]           # new rows go whole
+
+    client.payloads = []
+    stats = daily_import.ImportStats()
+    daily_import.upsert_stream(client, stream("4300001,92026,1,2,3\n4300002,92026,6,7\n"), stats)
+    keys = ["account_number", "month", "year", "meter_name"]
+    assert client.payloads == [
+        [{**dict(zip(keys, ("4300001", "Sep-26", 2026, "4300001"))), "day_3": 3.0}],
+        [{**dict(zip(keys, ("4300002", "Sep-26", 2026, "4300002"))), "day_1": 6.0, "day_2": 7.0}],
+    ]
+    assert (stats.written, stats.cells) == (2, 3)
+    assert [r["day_1"] for r in client.tables["water_daily_consumption"]] == [1.0, 6.0]
+
+
+def test_a_dropped_storage_upload_still_records_the_file(memory_client, tmp_path, monkeypatch):
+    client = memory_client(water_meters=registry_rows())
+
+    def dropped(bucket, path, data):
+        raise ConnectionError("Connection aborted")
+
+    monkeypatch.setattr(client, "upload", dropped)
+    monkeypatch.setattr(uploads, "client_errors", lambda: (RuntimeError, ConnectionError))
+    export = tmp_path / "week1.csv"
+    export.write_text(HEADER + "4300001,92026,1,2,3\n", encoding="utf-8")
+    assert daily_import.run(client, [export]).written == 1
+    assert [(r["month"], r["storage_path"]) for r in client.tables["water_upload_manifest"]] == [("Sep-26", None)]
@@ -0,0 +1,78 @@
+from pipeline import watch
+
+
+def sources():
+    return {
+        "water_meters": [{"meter_id": "MB-1", "zone": "Zone_05", "updated_at": "2026-10-01T00:00:00+00:00"}],
+        "water_monthly_consumption": [{"meter_id": "MB-1", "period": "2026-08", "updated_at": "2026-10-01T00:00:00+00:00"}],
+        "stp_operations": [{"date": "2026-09-30", "updated_at": "2026-10-01T00:00:00+00:00"}],
+    }
+
+
+def test_micro_batches_close_when_quiet_or_too_old():
+    batch = watch.MicroBatch(settle=10, max_wait=30)
+    assert not batch.due(0)
+    batch.add([("stp_operations", {})], 0)
+    assert not batch.due(5)
+    batch.add([("stp_operations", {})], 8)
+    assert not batch.due(15) and batch.due(18)
+    for t in (20, 28, 36):
+        batch.add([("water_meters", {})], t)
+    assert batch.due(40)                                        # never quiet, but 40 s since the first change
+    assert len(batch.take()) == 5 and not batch.due(100)
+    assert watch.plan({"stp_operations", "water_meters"}) == list(watch.JOB_ORDER)
+    assert watch.plan({"water_monthly_consumption"}) == ["water-summary", "water-balance", "alerts", "snapshots:water"]
+
+
+def test_a_burst_of_changes_runs_the_jobs_it_feeds_once(memory_client, tmp_path):
+    client = memory_client(**sources())
+    ran = []
+    jobs = {name: (lambda n: lambda client, out_dir, batch: ran.append((n, batch)))(name) for name in watch.JOB_ORDER}
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+        # An import lands during the first two polls, then the feed goes quiet.
+        if now[0] <= 10:
+            tick = int(now[0]) // 5
+            client.tables["water_monthly_consumption"].append(
+                {"meter_id": "MB-1", "period": ("2026-08", "2026-09")[tick - 1],
+                 "updated_at": f"2026-10-02T00:00:0{tick}+00:00"})
+
+    batches = watch.watch(client, tmp_path, interval=5, settle=10, cycles=6, catch_up=False, jobs=jobs,
+                          clock=lambda: now[0], sleep=sleep)
+    scoped = {"months": ["2026-08", "2026-09"], "newest": "2026-10-02T00:00:02+00:00"}
+    assert batches == 1 and ran == [("water-summary", scoped), ("water-balance", None),
+                                    ("alerts", None), ("snapshots:water", None)]
+    marks = {t: watch.newest(client, t) for t in watch.SOURCES}
+    assert watch.poll(client, marks) == []
+    changes = [("water_monthly_consumption", r) for r in client.tables["water_monthly_consumption"][1:]]
+    assert watch.describe(changes) == "water_monthly_consumption ×2 (2026-08, 2026-09)"
+    assert watch.scope(changes + [("stp_operations", {"date": "2026-09-30"})]) == {
+        "stp-monthly": {"months": ["2026-09"], "newest": None}, "water-summary": scoped}
+    assert "water-summary" not in watch.scope(changes + [("water_meters", {"meter_id": "MB-1"})])
+
+
+def test_a_job_that_raises_does_not_stop_the_rest(tmp_path):
+    def down(client, out_dir, batch):
+        raise RuntimeError("Reading stp_operations failed (503)")
+
+    ran = []
+    jobs = {"stp": down, "alerts": lambda client, out_dir, batch: ran.append("alerts")}
+    assert watch.run_jobs(None, ["stp", "alerts"], tmp_path, jobs) == ["stp"] and ran == ["alerts"]
+
+
+def test_a_scoped_batch_moves_the_job_watermark(memory_client, tmp_path):
+    from pipeline import state, stp_rollup
+
+    day = {"id": 1, "date": "2026-09-30", "inlet_sewage": 500, "tse_for_irrigation": 400, "tanker_trips": 3,
+           "updated_at": "2026-10-01T00:00:05+00:00"}
+    client = memory_client(stp_operations=[day], pipeline_state=[
+        {"job": stp_rollup.JOB, "watermark": "2026-10-01T00:00:00+00:00"}])
+    scoped = watch.scope([("stp_operations", day)])
+    assert watch.run_jobs(client, ["stp-monthly"], tmp_path, scoped=scoped) == []
+    assert state.get_watermark(client, stp_rollup.JOB) == "2026-10-01T00:00:05+00:00"
+
+    # An older batch (a job that ran late) never moves the watermark back.
+    stp_rollup.run(client, months=["2026-09"], newest="2026-09-01T00:00:00+00:00")
+    assert state.get_watermark(client, stp_rollup.JOB) == "2026-10-01T00:00:05+00:00"
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from pipeline.water import WaterMeter, build_monthly_data, compute_period
+from pipeline.water_balance import BalanceMatrix, WaterBalance
+
+
+def meter(level="L3", zone="Zone_05", label="Test Meter", type="Residential (Villa)", parent="", **consumption):
+    return WaterMeter(label=label, account_number="C0000", level=level, zone=zone, parent_meter=parent,
+                      type=type, consumption={k.replace("_", "-"): v for k, v in consumption.items()})
+
+
+def small_network():
+    return [
+        meter("L1", "Main", "NAMA Main", type="Main Bulk", Jan_26=1000, Feb_26=1100, Mar_26=None),
+        meter("L2", "Zone_05", "Zone 5 Bulk", type="Zone Bulk", Jan_26=600, Feb_26=650, Mar_26=640),
+        meter("L3", "Zone_05", "Villa 1", Jan_26=300, Feb_26=None, Mar_26=310),
+        meter("L3", "Zone_05", "D-44 Building Bulk Meter", type="D_Building_Bulk", Jan_26=200, Feb_26=210),
+        meter("L4", "Zone_05", "D-44 Apt 1", type="Residential (Apart)", parent="D-44 Building Bulk Meter",
+              Jan_26=150, Feb_26=170, Mar_26=160),
+        meter("DC", "Main", "DC | Hotel", "Retail", Jan_26=250, Feb_26=260, Mar_26=255),
+        meter("N/A", "Main", "Spare", Jan_26=999),
+    ]
+
+
+def test_monthly_series_is_the_balance_for_every_month():
+    engine = WaterBalance(BalanceMatrix.from_meters(small_network()))
+    series = engine.monthly_series()
+    jan = series["months"].index("Jan-26")
+    assert series["A1"][jan:jan + 3] == [1000, 1100, 0]
+    assert series["A2"][jan:jan + 3] == [850, 910, 895]
+    assert series["A3"][jan:jan + 3] == [700, 430, 725]       # villa + apartment + DC, never the building bulk
+    assert series["missingMeters"][jan:jan + 3] == [0, 1, 2]  # the N/A meter is never counted
+    assert series["zones"]["Zone_05"]["loss"][jan] == 150
+    assert series["lossCost"][jan] == pytest.approx(300 * 1.32)
+    assert engine.balance(jan, jan + 1)["A1"] == 2100
+
+
+def test_period_matches_compute_period_for_months_and_ranges():
+    rng = random.Random(5)
+    zones = ["Zone_01", "Zone_03A", "Zone_05", "Zone_08"]
+    meters = [meter("L1", "Main", "Main", type="Main Bulk")]
+    for z in zones:
+        meters.append(meter("L2", z, f"{z} Bulk", type="Zone Bulk"))
+        for b in range(3):
+            name = f"{z} Building {b}"
+            meters.append(meter("L3", z, name, type="D_Building_Bulk"))
+            meters += [meter("L4", z, f"{name} Apt {a}", type="Residential (Apart)", parent=name) for a in range(4)]
+        meters += [meter("L3", z, f"{z} Villa {v}", type=rng.choice(["Residential (Villa)", "Retail", "IRR_Servies"]))
+                   for v in range(6)]
+    meters += [meter("DC", "Main", f"DC | Unit {d}", "Retail") for d in range(3)]
+    for m in meters:
+        for year in ("24", "25", "26"):
+            if m.level == "L3" and year == "24" and rng.random() < 0.3:
+                continue                                         # not installed yet: no YearCache
+            for month in ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"):
+                roll = rng.random()
+                m.consumption[f"{month}-{year}"] = None if roll < 0.08 else -2.5 if roll < 0.1 \
+                    else round(rng.uniform(0, 900), 2)
+
+    data = build_monthly_data(meters)
+    engine = WaterBalance(BalanceMatrix.from_meters(meters))
+    for y, year in enumerate(engine.matrix.years):
+        for month in range(12):
+            assert engine.period(12 * y + month, 12 * y + month) == compute_period(data, str(year), month)
+        for s, e in ((0, 11), (2, 6), (10, 11)):
+            assert engine.period(12 * y + s, 12 * y + e) == compute_period(data, str(year), (s, e))
+
+
+def test_ranges_cross_the_year_boundary():
+    meters = small_network() + [meter("L1", "Main", "Old Main", type="Main Bulk", Nov_25=40, Dec_25=60)]
+    engine = WaterBalance(BalanceMatrix.from_meters(meters))
+    result = engine.period_for("Nov-25", "Feb-26")
+    assert result["A1"] == 40 + 60 + 1000 + 1100
+    assert result["missingMeters"] == 0
+    assert engine.balance(engine.column("Nov-25"), engine.column("Feb-26"))["A1"] == result["A1"]
+    assert [z["zone"] for z in result["zones"]] == ["Zone_05"]
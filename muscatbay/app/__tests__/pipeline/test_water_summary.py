@@ -0,0 +1,66 @@
+from pipeline import water_summary
+from pipeline.water import build_monthly_data, compute_period, meters_from_rows
+
+
+def registry():
+    def m(meter_id, account, name, label, zone, type, parent=None):
+        return {"meter_id": meter_id, "account_number": account, "meter_name": name, "label": label,
+                "zone": zone, "parent_meter": parent, "type": type, "sort_order": 0,
+                "updated_at": "2026-01-01T00:00:00+00:00"}
+
+    return [
+        m("MB-L1", "C43659", "Main Bulk (NAMA)", "L1", "Main_Bulk", "Main Bulk"),
+        m("MB-L2-5", "4300345", "Zone 5 (Bulk)", "L2", "Zone_05", "Zone Bulk"),
+        m("MB-L3-1", "4300001", "Z5-1", "L3", "Zone_05", "Residential (Villa)"),
+        m("MB-L3-2", "4300178", "D-44 Building Bulk Meter", "L3", "Zone_05", "Building (Bulk)"),
+        m("MB-L4-1", "4300030", "Z5-D44-1", "L4", "Zone_05", "Residential (Apart)", "D-44 Building Bulk Meter"),
+        m("MB-DC-1", "4300336", "Hotel Main", "DC", "Direct Connection", "Retail"),
+    ]
+
+
+def readings():
+    values = {
+        "C43659": {"2026-01": 1000, "2026-02": 1100},
+        "4300345": {"2026-01": 600, "2026-02": 650},
+        "4300001": {"2026-01": 300, "2026-02": None},
+        "4300178": {"2026-01": 200, "2026-02": 210},
+        "4300030": {"2026-01": 150, "2026-02": 170},
+        "4300336": {"2026-01": 250, "2026-02": 260},
+    }
+    return [{"meter_id": f"row-{account}", "account_number": account, "period": period, "consumption": v,
+             "updated_at": "2026-03-01T00:00:00+00:00"}
+            for account, months in values.items() for period, v in months.items()]
+
+
+def test_summary_rows_are_compute_period_for_the_month():
+    meters, _ = meters_from_rows(registry(), readings())
+    rows = water_summary.summarize(meters, ["2026-01", "2026-02", "2026-03"])
+    expected = compute_period(build_monthly_data(meters), "2026", 1)
+    feb = [r for r in rows["water_balance_monthly"] if r["period"] == "2026-02"][0]
+    assert (feb["a1"], feb["a3"], feb["missing_meters"]) == (expected["A1"], expected["A3"], 1)
+    assert [r["period"] for r in rows["water_balance_monthly"]] == ["2026-01", "2026-02"]   # March has no readings
+    zone = [r for r in rows["water_zone_monthly"] if r["period"] == "2026-01"][0]
+    assert (zone["bulk"], zone["end_users"], zone["meters"]) == (600, 450, 2)
+    assert [(r["building"], r["sub"]) for r in rows["water_building_monthly"] if r["period"] == "2026-02"] == [
+        ("D-44 Building Bulk Meter", 170)]
+    assert {r["type"] for r in rows["water_type_monthly"]} == {"Residential (Villa)", "Residential (Apart)"}
+    assert rows["water_dc_monthly"][0]["total"] == 250
+
+
+def test_run_recomputes_only_touched_months(memory_client):
+    client = memory_client(water_meters=registry(), water_monthly_consumption=readings(), water_daily_consumption=[])
+    first = water_summary.run(client)
+    assert len(first["water_balance_monthly"]) == 2
+    assert client.tables["pipeline_state"][0]["watermark"] == "2026-03-01T00:00:00+00:00"
+    assert water_summary.run(client)["water_balance_monthly"] == []
+
+    # A correction to February: only February is rewritten, and a DC that now reads 0 leaves the table.
+    for row in client.tables["water_monthly_consumption"]:
+        if row["period"] == "2026-02" and row["account_number"] == "4300336":
+            row.update(consumption=0, updated_at="2026-03-05T00:00:00+00:00")
+    again = water_summary.run(client)
+    assert [r["period"] for r in again["water_balance_monthly"]] == ["2026-02"]
+    assert [(r["period"], r["name"]) for r in client.tables["water_dc_monthly"]] == [("2026-01", "Hotel Main")]
+    feb = [r for r in client.tables["water_balance_monthly"] if r["period"] == "2026-02"][0]
+    assert feb["a2"] == 650 and feb["a3"] == 170
+    assert client.tables["pipeline_state"][0]["watermark"] == "2026-03-05T00:00:00+00:00"
@@ -0,0 +1,46 @@
+from pipeline import water_system
+
+
+def meters():
+    return [{"meter_id": "MB-1", "account_number": "4300001", "meter_name": "Z3-1", "meter_name_original": None,
+             "label": "L3", "zone": "Zone_03A", "parent_meter": "Zone 3A (Bulk)", "type": "Residential (Villa)",
+             "sort_order": 7}]
+
+
+def test_wide_rows_unpivot_into_changed_cells_and_meters():
+    assert water_system.column_period("jun_26") == "2026-06" and water_system.column_period("label") is None
+    stored = {("MB-1", "2026-01"): 10.0, ("MB-1", "2026-02"): 12.0, ("MB-1", "2026-03"): 5.0}
+    rows = [
+        {"id": 7, "label": "Z3-1", "account_number": "4300001", "level": "L3", "zone": "Zone_03_(B)",
+         "parent_meter": "ZONE 3A (BULK ZONE 3A)", "type": "Residential (Villa)",
+         "jan_26": "10", "feb_26": "13.5", "mar_26": None, "apr_26": "1,204"},
+        {"label": "New Shop", "account_number": " 4300999 ", "level": "L9", "type": "D_Building_Common",
+         "jan_26": 4},
+        {"label": "no account", "jan_26": 1},
+    ]
+    plan = water_system.plan(rows, meters(), stored)
+    assert (plan.registered, plan.updated, plan.unchanged, plan.cleared, plan.skipped) == (1, 1, 1, 1, 1)
+    assert plan.meters[0]["zone"] == "Zone_03B" and plan.meters[0]["parent_meter"] == "Zone 3A (Bulk)"
+    assert plan.meters[1] == {
+        "meter_id": "WS-4300999", "account_number": "4300999", "meter_name": "New Shop",
+        "meter_name_original": "New Shop", "label": "N/A", "zone": "Unzoned", "parent_meter": None,
+        "type": "Building (Common)", "sort_order": 8}
+    assert [(r["meter_id"], r["period"], r["consumption"]) for r in plan.readings] == [
+        ("MB-1", "2026-02", 13.5), ("MB-1", "2026-03", None), ("MB-1", "2026-04", 1204.0),
+        ("WS-4300999", "2026-01", 4.0)]
+
+
+def test_run_writes_each_table_once(memory_client, tmp_path):
+    export = tmp_path / "water_system.csv"
+    export.write_text("\ufeffid,label,account_number,level,zone,parent_meter,type,jan_26,feb_26\n"
+                      "7,Z3-1,4300001,L3,Zone_03_(A),ZONE 3A (BULK ZONE 3A),Residential (Villa),10,\n"
+                      ",Pump,4300500,DC,Direct Connection,,IRR_Servies,2,3\n", encoding="utf-8")
+    client = memory_client(water_meters=meters(), water_monthly_consumption=[
+        {"meter_id": "MB-1", "account_number": "4300001", "period": "2026-01", "consumption": 9}])
+    water_system.run(client, water_system.read_rows(export))
+    assert client.writes == [("water_meters", 1), ("water_monthly_consumption", 3)]
+    new = client.tables["water_meters"][-1]
+    assert (new["meter_id"], new["zone"], new["type"], new["label"]) == (
+        "WS-4300500", "Direct_Connection", "Irrigation (Services)", "DC")
+    readings = {(r["meter_id"], r["period"]): r["consumption"] for r in client.tables["water_monthly_consumption"]}
+    assert readings == {("MB-1", "2026-01"): 10.0, ("WS-4300500", "2026-01"): 2.0, ("WS-4300500", "2026-02"): 3.0}
@@ -0,0 +1,30 @@
+"""
+Batch data pipeline: jobs that run once per data import and write derived
+rows or artifacts, so the dashboards read precomputed results instead of
+re-deriving them from the full history in every browser session.
+
+The pure modules (``water``, ``alerts``, ``electricity``, ``stp`` …) mirror
+the TypeScript in ``lib/`` and ``components/`` and are unit-tested under
+``__tests__/pipeline``; ``rest`` talks to Supabase with the service-role key
+from ``.env.local``.
+
+Usage (from ``muscatbay/app``):
+    python3 scripts/run-pipeline.py alerts
+    python3 scripts/run-pipeline.py alerts --dry-run      # artifact only, table untouched
+    python3 scripts/run-pipeline.py contractors
+    python3 scripts/run-pipeline.py daily-import export.csv --dry-run
+    python3 scripts/run-pipeline.py electricity --window 6
+    python3 scripts/run-pipeline.py electricity-import Electricity_Master.xlsx --months Jun-26 --dry-run
+    python3 scripts/run-pipeline.py index-advice --dsn postgresql://postgres@localhost:54322/postgres
+    python3 scripts/run-pipeline.py migrate --dsn postgresql://postgres@localhost:54322/postgres
+    python3 scripts/run-pipeline.py migrate full_water_26_sync --dry-run   # plan + lint, no database
+    python3 scripts/run-pipeline.py ppm --dry-run          # artifact only, next_ppm_date untouched
+    python3 scripts/run-pipeline.py reserve --sweep-inflation 0:0.06:10 --sweep-extension 0:0.3:10
+    python3 scripts/run-pipeline.py snapshots --modules water,stp
+    python3 scripts/run-pipeline.py stp                    # incremental; --full rebuilds
+    python3 scripts/run-pipeline.py stp-monthly --months 2025-11:2026-01
+    python3 scripts/run-pipeline.py water-balance
+    python3 scripts/run-pipeline.py water-summary          # incremental; --full recomputes every month
+    python3 scripts/run-pipeline.py water-system legacy_water.csv --dry-run
+    python3 scripts/run-pipeline.py watch --interval 15    # until Ctrl-C
+"""
@@ -0,0 +1,334 @@
+"""
+Command line entry point: ``python3 scripts/run-pipeline.py <command>``
+(or ``python3 -m pipeline <command>`` from ``scripts/``).
+
+Commands:
+    alerts  evaluate the operational alert rules and replace the
+            operational_alerts table (+ operational-alerts.json artifact)
+    contractors
+            parse the AMC tracker once into an interval index (active /
+            expiring / committed OMR per year), cached until the source
+            tables change
+    daily-import
+            stream Grafana pivot / template CSV exports into
+            water_daily_consumption (registry-filtered, chunked upserts)
+    electricity
+            classify every electricity reading against its meter's baseline
+            (full range and trailing windows) into a heatmap artifact
+    electricity-import
+            load monthly readings from the master workbook / CSV: meters
+            resolved by account number or name, blank = NULL (not in
+            service), diffed against the stored months and bulk-upserted
+    index-advice
+            match the query shapes of functions/api/*.ts against the indexes
+            in sql/ (missing / partial / unused / redundant), with EXPLAIN
+            timings against a local Postgres when given ``--dsn``
+    migrate apply sql/migrations/ in order, tracked in schema_migrations:
+            per-statement timings and lock holds, chunked resumable data
+            loads, idempotency lint; local stand-in first
+    ppm     index every asset's next PPM date: overdue / due-within counts per
+            zone and discipline and the 12-month PPM calendar; re-derives
+            next_ppm_date for assets whose last PPM or interval changed
+    reserve project replacement spend per asset over the next 30 years, with
+            aggregates per discipline / zone / system area and an optional
+            inflation × life-extension sweep
+    snapshots
+            precompute a versioned first-paint snapshot per dashboard module
+            (water, electricity, STP, assets, contractors) + index.json
+    stp     refresh the STP daily/monthly KPI cube from the days changed since
+            its watermark (``--full`` rebuilds it)
+    stp-monthly
+            recompute the monthly_* rollup columns of stp_operations for the
+            months changed since the last run (or ``--months A:B``)
+    water-balance
+            the A1/A2/A3 balance, stage losses and per-zone / per-type series
+            for every month from one meter × month matrix product
+    water-summary
+            refresh the per-month balance / zone / type / DC / building
+            summary tables for the months changed since its watermark
+    water-system
+            write wide legacy "Water System" rows (jan_24 … dec_26) straight
+            to water_meters / water_monthly_consumption as bulk upserts
+    watch   follow water_meters / water_monthly_consumption / stp_operations
+            by their updated_at and re-run the jobs they feed, one
+            micro-batch of changes at a time
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from . import (
+    alerts, contractors, daily_import, electricity, electricity_import, index_advisor, migrations, ppm, reserve, snapshots, stp, stp_rollup,
+    water_balance, water_summary, water_system, watch,
+)
+from .env import APP_DIR, ARTIFACTS_DIR
+
+
+def refresh_snapshot(client, module: str, out: Path = ARTIFACTS_DIR) -> None:
+    """Rebuild one module's dashboard snapshot after an import wrote to its tables."""
+    print(f"  refreshing the {module} snapshot")
+    snapshots.run(client, out / snapshots.DIR_NAME, out, [module])
+
+
+def cmd_alerts(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    alerts.run(RestClient.from_env(), Path(args.out), dry_run=args.dry_run)
+    return 0
+
+
+def cmd_contractors(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    contractors.run(RestClient.from_env(), Path(args.out))
+    return 0
+
+
+def cmd_daily_import(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    client = RestClient.from_env()
+    year = args.year or (2000 + int(args.month[-2:]) if args.month else None)
+    stats = daily_import.run(client, [Path(p) for p in args.files], month=args.month, year=year,
+                             dry_run=args.dry_run, cache_dir=Path(args.out), force=args.force)
+    if not args.dry_run and stats.written:
+        refresh_snapshot(client, "water", Path(args.out))
+    return 0
+
+
+def cmd_electricity(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    electricity.run(RestClient.from_env(), Path(args.out), rolling_width=args.window)
+    return 0
+
+
+def cmd_electricity_import(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    client = RestClient.from_env()
+    months = [m.strip() for m in args.months.split(",") if m.strip()] or None
+    result = electricity_import.run(client, [Path(p) for p in args.files], months=months, sheet=args.sheet,
+                                    dry_run=args.dry_run)
+    if not args.dry_run and result.rows:
+        refresh_snapshot(client, "electricity")
+    return 0
+
+
+def cmd_index_advice(args: argparse.Namespace) -> int:
+    index_advisor.run(Path(args.api), Path(args.sql), Path(args.out), dsn=args.dsn or None,
+                      ts_dirs=tuple(APP_DIR / d for d in ("lib", "app")))
+    return 0
+
+
+def cmd_migrate(args: argparse.Namespace) -> int:
+    migrations.run(Path(args.dir), Path(args.out), dsn=args.dsn, names=tuple(args.names), chunk=args.chunk,
+                   dry_run=args.dry_run, allow_remote=args.allow_remote, baseline=args.baseline)
+    return 0
+
+
+def cmd_ppm(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    ppm.run(RestClient.from_env(), Path(args.out), months=args.months, full=args.full, dry_run=args.dry_run,
+            confirm=args.confirm)
+    return 0
+
+
+def cmd_reserve(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    grid = None
+    if args.sweep_inflation or args.sweep_extension:
+        grid = (reserve.parse_grid(args.sweep_inflation or str(args.inflation)),
+                reserve.parse_grid(args.sweep_extension or str(args.life_extension)))
+    reserve.run(RestClient.from_env(), Path(args.out), base_year=args.base_year, horizon=args.horizon,
+                inflation=args.inflation, life_extension=args.life_extension, grid=grid,
+                opening_balance=args.opening_balance, interest=args.interest)
+    return 0
+
+
+def cmd_snapshots(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    modules = [m.strip() for m in args.modules.split(",") if m.strip()] or None
+    snapshots.run(RestClient.from_env(), Path(args.out), cache_dir=Path(args.cache), modules=modules, fmt=args.format)
+    return 0
+
+
+def cmd_stp(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    stp.run(RestClient.from_env(), full=args.full, dry_run=args.dry_run)
+    return 0
+
+
+def cmd_stp_monthly(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    client = RestClient.from_env()
+    months = stp_rollup.parse_months(args.months) if args.months else None
+    if stp_rollup.run(client, months=months, dry_run=args.dry_run) and not args.dry_run:
+        refresh_snapshot(client, "stp")
+    return 0
+
+
+def cmd_water_balance(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    water_balance.run(RestClient.from_env(), Path(args.out))
+    return 0
+
+
+def cmd_water_summary(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    months = stp_rollup.parse_months(args.months) if args.months else None
+    water_summary.run(RestClient.from_env(), months=months, full=args.full, dry_run=args.dry_run)
+    return 0
+
+
+def cmd_water_system(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    client = RestClient.from_env()
+    rows = [row for path in args.files for row in water_system.read_rows(Path(path))]
+    result = water_system.run(client, rows, dry_run=args.dry_run)
+    if not args.dry_run and (result.meters or result.readings):
+        refresh_snapshot(client, "water")
+    return 0
+
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    from .rest import RestClient
+
+    try:
+        watch.watch(RestClient.from_env(), Path(args.out), interval=args.interval, settle=args.settle,
+                    max_wait=args.max_wait, cycles=args.cycles, catch_up=not args.no_catch_up)
+    except KeyboardInterrupt:
+        print("  stopped")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="run-pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    al = sub.add_parser("alerts", help="precompute the operational alert feed")
+    al.add_argument("--out", default=str(ARTIFACTS_DIR), help="artifact directory")
+    al.add_argument("--dry-run", action="store_true", help="write the artifact but leave the table untouched")
+    al.set_defaults(func=cmd_alerts)
+
+    co = sub.add_parser("contractors", help="refresh the contractor analytics cache")
+    co.add_argument("--out", default=str(ARTIFACTS_DIR), help="cache / artifact directory")
+    co.set_defaults(func=cmd_contractors)
+
+    di = sub.add_parser("daily-import", help="import daily water CSV exports into water_daily_consumption")
+    di.add_argument("files", nargs="+", help="Grafana pivot or template CSV/TSV files")
+    di.add_argument("--month", default=None, help="Mon-YY for lines without READING_MNTH, e.g. Jan-26")
+    di.add_argument("--year", type=int, default=None, help="year for those lines (default: from --month)")
+    di.add_argument("--dry-run", action="store_true", help="parse and match without writing")
+    di.add_argument("--force", action="store_true", help="re-import files already in the upload manifest")
+    di.add_argument("--out", default=str(ARTIFACTS_DIR), help="meter-registry cache directory")
+    di.set_defaults(func=cmd_daily_import)
+
+    el = sub.add_parser("electricity", help="precompute the electricity spike/dip heatmap states")
+    el.add_argument("--out", default=str(ARTIFACTS_DIR), help="artifact directory")
+    el.add_argument("--window", type=int, default=12, help="trailing window (months) for the rolling states")
+    el.set_defaults(func=cmd_electricity)
+
+    ei = sub.add_parser("electricity-import", help="load monthly electricity readings from a workbook or CSV")
+    ei.add_argument("files", nargs="+", help="master workbook (.xlsx) or CSV: one row per meter, a column per month")
+    ei.add_argument("--months", default="", help="comma-separated Mon-YY columns to load (default: all)")
+    ei.add_argument("--sheet", default=None, help="workbook sheet (default: the first with a meter table)")
+    ei.add_argument("--dry-run", action="store_true", help="print the diff against the stored readings, write nothing")
+    ei.set_defaults(func=cmd_electricity_import)
+
+    ia = sub.add_parser("index-advice", help="check the app's query shapes against the schema's indexes")
+    ia.add_argument("--api", default=str(APP_DIR / "functions" / "api"), help="directory of the query modules")
+    ia.add_argument("--sql", default=str(APP_DIR / "sql"), help="directory of the schema / migration files")
+    ia.add_argument("--dsn", default="", help="local Postgres with the schema loaded, for EXPLAIN (needs psycopg)")
+    ia.add_argument("--out", default=str(ARTIFACTS_DIR), help="artifact directory")
+    ia.set_defaults(func=cmd_index_advice)
+
+    mg = sub.add_parser("migrate", help="apply sql/migrations/ with timings, lock holds and resumable chunks")
+    mg.add_argument("names", nargs="*", help="migrations to run (default: every pending dated one)")
+    mg.add_argument("--dsn", default="", help="Postgres to migrate, local stand-in first (needs psycopg)")
+    mg.add_argument("--dir", default=str(APP_DIR / "sql" / "migrations"), help="migration directory")
+    mg.add_argument("--chunk", type=int, default=migrations.CHUNK, help="statements per data-migration batch")
+    mg.add_argument("--dry-run", action="store_true", help="list the plan and lint findings, apply nothing")
+    mg.add_argument("--allow-remote", action="store_true",
+                    help="allow a non-local DSN for migrations already measured locally")
+    mg.add_argument("--baseline", metavar="VERSION",
+                    help="record dated migrations up to VERSION as applied without running them")
+    mg.add_argument("--out", default=str(ARTIFACTS_DIR), help="artifact directory (reports in migrations/)")
+    mg.set_defaults(func=cmd_migrate)
+
+    pp = sub.add_parser("ppm", help="build the PPM due-date index and 12-month calendar")
+    pp.add_argument("--out", default=str(ARTIFACTS_DIR), help="artifact directory")
+    pp.add_argument("--months", type=int, default=12, help="calendar length in months")
+    pp.add_argument("--full", action="store_true", help="re-derive every next_ppm_date, not only changed assets")
+    pp.add_argument("--dry-run", action="store_true", help="write the artifact but leave next_ppm_date untouched")
+    pp.add_argument("--confirm", action="store_true", help="with --full, actually rewrite next_ppm_date register-wide")
+    pp.set_defaults(func=cmd_ppm)
+
+    rf = sub.add_parser("reserve", help="project the reserve-fund replacement schedule")
+    rf.add_argument("--out", default=str(ARTIFACTS_DIR), help="artifact directory")
+    rf.add_argument("--base-year", type=int, default=None, help="first projected year (default: this year)")
+    rf.add_argument("--horizon", type=int, default=reserve.HORIZON, help="years to project")
+    rf.add_argument("--inflation", type=float, default=reserve.INFLATION, help="annual cost escalation, e.g. 0.03")
+    rf.add_argument("--life-extension", type=float, default=0.0, help="fractional life extension, e.g. 0.1")
+    rf.add_argument("--opening-balance", type=float, default=0.0, help="fund balance at the start (OMR)")
+    rf.add_argument("--interest", type=float, default=0.0, help="annual interest earned on the fund")
+    rf.add_argument("--sweep-inflation", default="", help="START:STOP:COUNT inflation grid for the sweep")
+    rf.add_argument("--sweep-extension", default="", help="START:STOP:COUNT life-extension grid for the sweep")
+    rf.set_defaults(func=cmd_reserve)
+
+    sn = sub.add_parser("snapshots", help="precompute the per-module dashboard snapshots")
+    sn.add_argument("--out", default=str(ARTIFACTS_DIR / snapshots.DIR_NAME), help="snapshot directory")
+    sn.add_argument("--cache", default=str(ARTIFACTS_DIR), help="directory of the contractor analytics cache")
+    sn.add_argument("--modules", default="", help=f"comma-separated subset of {','.join(snapshots.MODULES)}")
+    sn.add_argument("--format", choices=snapshots.FORMATS, default="json", help="file format (msgpack needs msgpack)")
+    sn.set_defaults(func=cmd_snapshots)
+
+    st = sub.add_parser("stp", help="refresh the STP daily/monthly KPI cube")
+    st.add_argument("--full", action="store_true", help="rebuild from the whole log instead of the watermark")
+    st.add_argument("--dry-run", action="store_true", help="compute and report without writing")
+    st.set_defaults(func=cmd_stp)
+
+    sm = sub.add_parser("stp-monthly", help="maintain the monthly rollup columns of stp_operations")
+    sm.add_argument("--months", default="", help="recompute yyyy-mm or yyyy-mm:yyyy-mm regardless of the watermark")
+    sm.add_argument("--dry-run", action="store_true", help="report the rows that would change without writing")
+    sm.set_defaults(func=cmd_stp_monthly)
+
+    wb = sub.add_parser("water-balance", help="precompute the monthly water balance series")
+    wb.add_argument("--out", default=str(ARTIFACTS_DIR), help="artifact directory")
+    wb.set_defaults(func=cmd_water_balance)
+
+    ws = sub.add_parser("water-summary", help="refresh the Water Monthly summary tables")
+    ws.add_argument("--months", default="", help="recompute yyyy-mm or yyyy-mm:yyyy-mm regardless of the watermark")
+    ws.add_argument("--full", action="store_true", help="recompute every month")
+    ws.add_argument("--dry-run", action="store_true", help="compute and report without writing")
+    ws.set_defaults(func=cmd_water_summary)
+
+    wy = sub.add_parser("water-system", help='write wide "Water System" rows to the v2 tables')
+    wy.add_argument("files", nargs="+", help="CSV files with the view's columns (account_number, jan_24, …)")
+    wy.add_argument("--dry-run", action="store_true", help="plan and report without writing")
+    wy.set_defaults(func=cmd_water_system)
+
+    wa = sub.add_parser("watch", help="re-run the derived jobs as their source tables change")
+    wa.add_argument("--out", default=str(ARTIFACTS_DIR), help="artifact directory")
+    wa.add_argument("--interval", type=float, default=watch.INTERVAL, help="seconds between polls")
+    wa.add_argument("--settle", type=float, default=watch.SETTLE, help="quiet seconds that close a batch")
+    wa.add_argument("--max-wait", type=float, default=watch.MAX_WAIT, help="longest a batch waits, in seconds")
+    wa.add_argument("--cycles", type=int, default=None, help="stop after this many polls")
+    wa.add_argument("--no-catch-up", action="store_true", help="skip the initial run of every job")
+    wa.set_defaults(func=cmd_watch)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
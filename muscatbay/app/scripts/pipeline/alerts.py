@@ -0,0 +1,336 @@
+"""
+Operational alerts, evaluated once per data import instead of in every session.
+
+The rules are lib/operational-alerts.ts, line for line: water loss of the
+latest computable month against TARGET_LOSS_PCT (plus zones above
+ZONE_CRITICAL_PCT), contracts past or within CONTRACT_WARN_DAYS of their End
+Date, and the STP recovery / zero-output / stale-log gates. Ids, titles and
+messages are byte-identical to what the browser computes, so acknowledgements
+stored against an id keep working when the feed switches to precomputed rows.
+
+``run`` writes the result twice: ``operational-alerts.json`` in the artifacts
+directory, and the ``operational_alerts`` table (see
+sql/migrations/20261019_operational_alerts.sql), which is replaced as a set —
+rows whose condition cleared are deleted, so the table only ever holds live
+alerts.
+"""
+
+import datetime as dt
+import json
+import re
+from pathlib import Path
+from typing import Optional
+
+from .water import (
+    MONTHS, TARGET_LOSS_PCT, build_monthly_data, compute_period, fetch_water_meters, fixed_str, fmt_int, to_fixed,
+)
+
+ZONE_CRITICAL_PCT     = 25
+CONTRACT_WARN_DAYS    = 60
+STP_RECOVERY_CRITICAL = 80
+STP_RECOVERY_WATCH    = 90
+STP_WINDOW_DAYS       = 14
+STP_STALE_DAYS        = 3
+
+LEVEL_RANK    = {"error": 0, "warning": 1, "info": 2}
+ALERTS_TABLE  = "operational_alerts"
+ARTIFACT_NAME = "operational-alerts.json"
+
+
+def alert(id: str, level: str, module: str, title: str, message: str, href: str) -> dict:
+    return {"id": id, "level": level, "module": module, "title": title, "message": message, "href": href}
+
+
+def fmt_date(d: dt.date) -> str:
+    """``d Mon yyyy`` — the app's ``fmtDateUTC``."""
+    return f"{d.day} {MONTHS[d.month - 1]} {d.year}"
+
+
+def cap_list(items: list, cap: int = 3) -> str:
+    if len(items) <= cap:
+        return "; ".join(items)
+    return f"{'; '.join(items[:cap])} +{len(items) - cap} more"
+
+
+def parse_tracker_date(s: Optional[str]) -> Optional[dt.date]:
+    """ISO ``yyyy-mm-dd`` or the tracker's US ``m/d/yyyy``; ``None`` when missing or not a real date."""
+    if not s:
+        return None
+    t = s.strip()
+    match = re.match(r"^(\d{4})-(\d{1,2})-(\d{1,2})", t)
+    if match:
+        y, m, d = (int(g) for g in match.groups())
+    else:
+        match = re.match(r"^(\d{1,2})/(\d{1,2})/(\d{4})$", t)
+        if not match:
+            return None
+        m, d, y = (int(g) for g in match.groups())
+    try:
+        return dt.date(y, m, d)
+    except ValueError:
+        return None
+
+
+def _utc_date(value) -> Optional[dt.datetime]:
+    """An ``stp_operations.date`` as an aware UTC datetime (date-only strings are UTC midnight, as in JS)."""
+    if isinstance(value, dt.datetime):
+        return value if value.tzinfo else value.replace(tzinfo=dt.timezone.utc)
+    if isinstance(value, dt.date):
+        return dt.datetime(value.year, value.month, value.day, tzinfo=dt.timezone.utc)
+    try:
+        parsed = dt.datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=dt.timezone.utc)
+
+
+def _num(value) -> float:
+    """``Number(x) || 0``."""
+    try:
+        n = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return n if n == n else 0.0
+
+
+# --------------------------------------------------------------------------
+# 1. Water loss exceedance
+# --------------------------------------------------------------------------
+
+def evaluate_water_loss_alerts(meters: Optional[list]) -> list:
+    if not meters:
+        return []
+    data = build_monthly_data(meters)
+
+    for key in reversed(data.available_months):
+        mon, _, yy = key.partition("-")
+        if mon not in MONTHS or not yy:
+            continue
+        period = compute_period(data, f"20{yy}", MONTHS.index(mon))
+        if period["A1"] <= 0:
+            continue
+
+        loss_pct, loss = period["lossPct"], period["loss"]
+        over_target = to_fixed(loss_pct - TARGET_LOSS_PCT, 1)
+        critical_zones = [z for z in period["zones"] if z["lossPct"] > ZONE_CRITICAL_PCT]
+        zone_list = cap_list([f"{z['name']} {fixed_str(z['lossPct'])}%" for z in critical_zones])
+        zone_note = f" Worst zones: {zone_list}." if critical_zones else ""
+
+        if loss_pct < 0:
+            return [alert(
+                f"water-loss-negative:{key}", "warning", "water", "Water balance negative",
+                f"{key}: consumption exceeds supply ({fixed_str(loss_pct)}%) — check the main bulk meter and reading timing.",
+                "/water",
+            )]
+        if loss_pct > TARGET_LOSS_PCT:
+            critical = loss_pct > ZONE_CRITICAL_PCT
+            return [alert(
+                f"water-loss:{key}", "error" if critical else "warning", "water",
+                "Water loss critically above target" if critical else "Water loss above target",
+                f"{key}: system loss is {fixed_str(loss_pct)}% of supply — {_js_number(over_target)} pp above the "
+                f"{TARGET_LOSS_PCT}% target ({fmt_int(loss)} m³).{zone_note}",
+                "/water",
+            )]
+        if critical_zones:
+            plural = "s" if len(critical_zones) > 1 else ""
+            return [alert(
+                f"water-zone-loss:{key}", "warning", "water", "Zone loss critically above target",
+                f"{key}: {len(critical_zones)} zone{plural} above {ZONE_CRITICAL_PCT}% loss — {zone_list}.",
+                "/water",
+            )]
+        return []
+    return []
+
+
+def _js_number(value: float) -> str:
+    """How JavaScript prints a number in a template string (``12`` not ``12.0``)."""
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+# --------------------------------------------------------------------------
+# 2. Contract expiry
+# --------------------------------------------------------------------------
+
+def evaluate_contract_alerts(contractors: Optional[list], now: dt.datetime) -> list:
+    if not contractors:
+        return []
+    today = now.astimezone(dt.timezone.utc).date()
+    expired, expiring = [], []
+    for c in contractors:
+        if "expired" in (c.get("Status") or "").lower():
+            continue
+        end = parse_tracker_date(c.get("End Date"))
+        if end is None:
+            continue
+        days = (end - today).days
+        name = c.get("Contractor") or "Unknown contractor"
+        service = c.get("Service Provided") or ""
+        if days < 0:
+            expired.append((name, service, end))
+        elif days <= CONTRACT_WARN_DAYS:
+            expiring.append((name, service, end, days))
+
+    alerts = []
+    if expired:
+        expired.sort(key=lambda e: e[2])
+        n = len(expired)
+        alerts.append(alert(
+            "contracts-expired:" + "|".join(sorted(e[0] for e in expired)), "error", "contractors",
+            f"{n} contract{'s' if n > 1 else ''} expired but still marked active",
+            f"{cap_list([f'{name} ({service}) ended {fmt_date(end)}' for name, service, end in expired])}. "
+            "Renew or update the register.",
+            "/contractors",
+        ))
+    if expiring:
+        expiring.sort(key=lambda e: e[3])
+        n = len(expiring)
+        alerts.append(alert(
+            "contracts-expiring:" + "|".join(sorted(e[0] for e in expiring)), "warning", "contractors",
+            f"{n} contract{'s' if n > 1 else ''} expiring within {CONTRACT_WARN_DAYS} days",
+            cap_list([f"{name} in {days} day{'' if days == 1 else 's'} ({fmt_date(end)})"
+                      for name, _, end, days in expiring]) + ".",
+            "/contractors",
+        ))
+    return alerts
+
+
+# --------------------------------------------------------------------------
+# 3. STP critical failures
+# --------------------------------------------------------------------------
+
+def evaluate_stp_alerts(operations: Optional[list], now: dt.datetime) -> list:
+    if not operations:
+        return []
+    days = []
+    for op in operations:
+        when = _utc_date(op.get("date"))
+        if when is not None and when <= now:
+            days.append((when, _num(op.get("inlet_sewage")), _num(op.get("tse_for_irrigation"))))
+    if not days:
+        return []
+    days.sort(key=lambda d: d[0])
+
+    alerts = []
+    latest = days[-1][0]
+    latest_iso = latest.date().isoformat()
+    window = days[-STP_WINDOW_DAYS:]
+
+    stale_days = (now.astimezone(dt.timezone.utc).date() - latest.date()).days
+    if stale_days > STP_STALE_DAYS:
+        alerts.append(alert(
+            f"stp-stale-log:{latest_iso}", "warning", "stp", "STP daily log is stale",
+            f"No operations logged since {fmt_date(latest)} ({stale_days} days) — plant monitoring is blind "
+            "until the log resumes.",
+            "/stp",
+        ))
+
+    zero_output = [d for d in window if d[1] > 0 and d[2] <= 0]
+    if zero_output:
+        last_zero = zero_output[-1][0]
+        alerts.append(alert(
+            f"stp-zero-output:{last_zero.date().isoformat()}", "error", "stp", "STP irrigation output stopped",
+            f"{len(zero_output)} of the last {len(window)} logged days had sewage inflow but zero TSE output "
+            f"(last: {fmt_date(last_zero)}) — check TSE pumps, valves and storage.",
+            "/stp",
+        ))
+
+    total_inlet = sum(d[1] for d in window)
+    total_tse = sum(d[2] for d in window)
+    if total_inlet > 0:
+        recovery = total_tse / total_inlet * 100
+        if recovery < STP_RECOVERY_CRITICAL:
+            alerts.append(alert(
+                f"stp-low-recovery:{latest_iso}", "error", "stp", "STP recovery critically low",
+                f"TSE recovery is {fixed_str(recovery)}% of inlet over the last {len(window)} logged days — below "
+                f"the {STP_RECOVERY_CRITICAL}% critical band. Inspect the treatment train.",
+                "/stp",
+            ))
+        elif recovery < STP_RECOVERY_WATCH:
+            alerts.append(alert(
+                f"stp-watch-recovery:{latest_iso}", "warning", "stp", "STP recovery below target",
+                f"TSE recovery is {fixed_str(recovery)}% of inlet over the last {len(window)} logged days — under "
+                f"the {STP_RECOVERY_WATCH}% operating target.",
+                "/stp",
+            ))
+    return alerts
+
+
+# --------------------------------------------------------------------------
+# Combined evaluation and publishing
+# --------------------------------------------------------------------------
+
+def evaluate_operational_alerts(water_meters=None, contractors=None, stp_operations=None, *, now: dt.datetime) -> list:
+    """Every rule, most severe first (stable within a level, like ``Array.prototype.sort``)."""
+    alerts = (
+        evaluate_water_loss_alerts(water_meters)
+        + evaluate_contract_alerts(contractors, now)
+        + evaluate_stp_alerts(stp_operations, now)
+    )
+    return sorted(alerts, key=lambda a: LEVEL_RANK[a["level"]])
+
+
+def table_rows(alerts: list, evaluated_at: dt.datetime) -> list:
+    stamp = evaluated_at.isoformat()
+    return [{**a, "rank": i, "evaluated_at": stamp} for i, a in enumerate(alerts)]
+
+
+def fetch_sources(client) -> dict:
+    """The three alert sources; a source that cannot be read is ``None`` (no alerts), never ``[]``-as-healthy."""
+    from .rest import client_errors
+
+    sources = {}
+    try:
+        sources["water_meters"] = fetch_water_meters(client)[0] or None
+    except client_errors() as exc:
+        print(f"  water: {exc}")
+        sources["water_meters"] = None
+    for key, table, select in (
+        ("contractors", "Contractor_Tracker", '"Contractor","Service Provided","Status","End Date"'),
+        ("stp_operations", "stp_operations", "date,inlet_sewage,tse_for_irrigation"),
+    ):
+        try:
+            sources[key] = client.select(table, select) or None
+        except client_errors() as exc:
+            print(f"  {key}: {exc}")
+            sources[key] = None
+    return sources
+
+
+def publish(client, alerts: list, evaluated_at: dt.datetime) -> None:
+    """Replace the table contents with ``alerts``: upsert the live set, delete everything else."""
+    from .rest import quote_list
+
+    rows = table_rows(alerts, evaluated_at)
+    if rows:
+        client.upsert(ALERTS_TABLE, rows, on_conflict="id")
+        client.delete(ALERTS_TABLE, id=f"not.in.{quote_list(a['id'] for a in alerts)}")
+    else:
+        client.delete(ALERTS_TABLE, id="not.is.null")
+
+
+def write_artifact(alerts: list, sources: dict, evaluated_at: dt.datetime, out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / ARTIFACT_NAME
+    path.write_text(json.dumps({
+        "evaluatedAt": evaluated_at.isoformat(),
+        "unavailableSources": [
+            name for name, key in (("water", "water_meters"), ("contractors", "contractors"), ("stp", "stp_operations"))
+            if not sources.get(key)
+        ],
+        "alerts": alerts,
+    }, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
+
+
+def run(client, out_dir: Path, now: Optional[dt.datetime] = None, dry_run: bool = False) -> list:
+    now = now or dt.datetime.now(dt.timezone.utc)
+    sources = fetch_sources(client)
+    alerts = evaluate_operational_alerts(**sources, now=now)
+    path = write_artifact(alerts, sources, now, out_dir)
+    print(f"  {len(alerts)} alert(s) → {path}")
+    for a in alerts:
+        print(f"    [{a['level']}] {a['id']}")
+    if not dry_run:
+        publish(client, alerts, now)
+        print(f"  {ALERTS_TABLE} replaced")
+    return alerts
@@ -0,0 +1,133 @@
+"""
+The asset register as column arrays.
+
+``master_assets_register`` (functions/api/assets.ts) — or the legacy
+``Assets_Register_Database`` export, whose PascalCase columns are folded the
+same way entities/asset.ts ``transformAsset`` folds them — loaded once into
+one NumPy array per numeric column and one list per label column, so the
+projection jobs work on whole columns instead of row dicts.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+TABLE       = "master_assets_register"
+SELECT_COLS = ",".join([
+    "asset_uid", "asset_tag", "asset_name", "discipline", "category", "system_area", "zone",
+    "quantity", "install_year", "life_expectancy_years", "current_age_years", "erl_years",
+    "pct_life_used", "criticality", "condition", "status", "is_asset_active",
+    "ppm_frequency", "ppm_interval_months", "last_ppm_date", "next_ppm_date",
+    "original_unit_cost_omr", "current_replacement_cost_omr",
+])
+
+# snake_case column → Assets_Register_Database column (entities/asset.ts LegacySupabaseAssetFields)
+LEGACY_COLUMNS = {
+    "asset_uid": "Asset_UID", "asset_tag": "Asset_Tag", "asset_name": "Asset_Name",
+    "discipline": "Discipline", "category": "Category", "system_area": "System_Area", "zone": "Zone",
+    "quantity": "Quantity", "install_year": "Install_Year", "life_expectancy_years": "Life_Expectancy_Years",
+    "current_age_years": "Current_Age_Years", "erl_years": "ERL_Years", "condition": "Condition",
+    "status": "Status", "is_asset_active": "Is_Asset_Active", "ppm_frequency": "PPM_Frequency",
+    "ppm_interval_months": "PPM_Interval", "original_unit_cost_omr": "BOQ_Unit_Cost_OMR",
+    "current_replacement_cost_omr": "Current_Replacement_Cost_OMR",
+}
+
+
+def field(row: dict, column: str):
+    value = row.get(column)
+    if value is None and column in LEGACY_COLUMNS:
+        value = row.get(LEGACY_COLUMNS[column])
+    return value
+
+
+def _float(value) -> float:
+    try:
+        return float(value) if value not in (None, "") else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _label(value) -> str:
+    return (str(value).strip() if value is not None else "") or "Unassigned"
+
+
+def asset_id(row: dict, index: int) -> str:
+    for column in ("asset_uid", "asset_tag"):
+        value = field(row, column)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return f"row-{index}"
+
+
+def is_decommissioned(row: dict) -> bool:
+    """transformAsset's status mapping: decommissioned/inactive status, or no status and not flagged active."""
+    status = field(row, "status")
+    if status:
+        lower = str(status).lower()
+        return "decommission" in lower or "inactive" in lower
+    active = field(row, "is_asset_active")
+    return not (active is True or active == "Y")
+
+
+@dataclass
+class AssetRegister:
+    ids: list
+    names: list
+    disciplines: list
+    zones: list
+    system_areas: list
+    conditions: list
+    statuses: list
+    quantity: np.ndarray           # float, NULL → 1
+    install_year: np.ndarray       # float, NaN = unknown
+    life_years: np.ndarray         # float, NaN = unknown
+    erl_years: np.ndarray          # float, NaN = not recorded
+    pct_life_used: np.ndarray      # float 0–100, NaN = not recorded
+    unit_cost: np.ndarray          # current replacement cost, else BOQ/original unit cost; NaN = unpriced
+    active: np.ndarray             # bool, False = decommissioned
+    rows: list                     # the source rows, for the per-asset jobs
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "AssetRegister":
+        def numbers(column):
+            return np.array([_float(field(r, column)) for r in rows], dtype=float)
+
+        replacement = numbers("current_replacement_cost_omr")
+        original = numbers("original_unit_cost_omr")
+        quantity = numbers("quantity")
+        return cls(
+            ids=[asset_id(r, i) for i, r in enumerate(rows)],
+            names=[field(r, "asset_name") or "Unknown Asset" for r in rows],
+            disciplines=[_label(field(r, "discipline")) for r in rows],
+            zones=[_label(field(r, "zone")) for r in rows],
+            system_areas=[_label(field(r, "system_area")) for r in rows],
+            conditions=[(field(r, "condition") or "").strip() for r in rows],
+            statuses=[(field(r, "status") or "").strip() for r in rows],
+            quantity=np.where(np.isnan(quantity) | (quantity <= 0), 1.0, quantity),
+            install_year=numbers("install_year"),
+            life_years=numbers("life_expectancy_years"),
+            erl_years=numbers("erl_years"),
+            pct_life_used=numbers("pct_life_used"),
+            unit_cost=np.where(np.isnan(replacement), original, replacement),
+            active=np.array([not is_decommissioned(r) for r in rows], dtype=bool),
+            rows=list(rows),
+        )
+
+    def remaining_life(self, base_year: int) -> np.ndarray:
+        """
+        Years of life left at ``base_year``: the recorded ERL, else what
+        ``pct_life_used`` leaves of the life expectancy, else life − age from
+        the install year (transformAsset's fallback). NaN when none is known.
+        """
+        from_pct = self.life_years * (1 - np.clip(self.pct_life_used, 0, 100) / 100)
+        from_age = self.life_years - (base_year - self.install_year)
+        remaining = np.where(np.isnan(self.erl_years), np.where(np.isnan(from_pct), from_age, from_pct), self.erl_years)
+        return np.maximum(remaining, 0.0)
+
+
+def fetch_register(client, columns: Optional[str] = None) -> AssetRegister:
+    return AssetRegister.from_rows(client.select(TABLE, columns or SELECT_COLS, order="asset_uid"))
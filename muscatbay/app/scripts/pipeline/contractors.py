@@ -0,0 +1,274 @@
+"""
+Contractor analytics: the AMC tracker parsed once into typed arrays.
+
+``evaluateContractAlerts`` and the tracker table re-parse every "Start Date" /
+"End Date" string (``parseTrackerDate``) on every evaluation, and the yearly
+cost matrix is rebuilt from raw ``contractor_yearly_costs`` rows on every
+render. :class:`ContractorIndex` holds
+
+    start / end       epoch days (int64); a missing start is open to the past,
+                      a row without an end date is not in the interval index
+    status / type     small integer codes into ``statuses`` / ``types``
+    annual            "Annual Value (OMR)" as float64, NaN when blank
+
+plus the end days sorted once, so "expiring within N days" is two
+``searchsorted`` calls and "how many active on X" is a prefix-count
+difference; ``committed`` (annual value spread over the calendar days each
+contract runs in a year) and ``yearly`` (contractor_yearly_costs as a
+contractor × contract-year matrix) are computed at build time, so every
+query is a lookup.
+
+:func:`load_index` keeps the parsed columns in
+``pipeline-artifacts/contractor-analytics.json`` keyed by the sources'
+version — row count and newest ``updated_at`` per table (a delete changes the
+count, an edit the timestamp) — and only re-reads and re-parses the tables
+when that version moves.
+"""
+
+import datetime as dt
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .alerts import CONTRACT_WARN_DAYS, parse_tracker_date
+
+EPOCH         = dt.date(1970, 1, 1)
+OPEN_START    = np.iinfo(np.int64).min // 2
+TRACKER_TABLE = "Contractor_Tracker"
+YEARLY_TABLE  = "contractor_yearly_costs"
+TRACKER_COLS  = '"Contractor","Service Provided","Status","Contract Type","Start Date","End Date","Annual Value (OMR)"'
+YEARLY_COLS   = "contractor,contract_year,year_label,amount_omr"
+ARTIFACT_NAME = "contractor-analytics.json"
+
+
+def epoch_day(day: Optional[dt.date]) -> Optional[int]:
+    return None if day is None else (day - EPOCH).days
+
+
+def _codes(values: list) -> tuple:
+    names = sorted(set(values))
+    lookup = {v: i for i, v in enumerate(names)}
+    return names, np.array([lookup[v] for v in values], dtype=np.int64)
+
+
+@dataclass
+class ContractorIndex:
+    names: list
+    services: list
+    statuses: list                 # distinct Status values; ``status`` indexes into it
+    types: list
+    status: np.ndarray
+    type: np.ndarray
+    start: np.ndarray              # epoch day, OPEN_START when blank
+    end: np.ndarray                # epoch day, -1 when blank/unreadable
+    annual: np.ndarray             # OMR, NaN when blank
+    yearly_contractors: list
+    yearly_labels: list            # one label per contract year (1-based position)
+    yearly: np.ndarray             # (contractors, contract years) OMR, NaN = no entry
+
+    def __post_init__(self):
+        # A start after the end is a typo in the tracker; leaving it out keeps active_count exact.
+        dated = np.flatnonzero((self.end >= 0) & (self.start <= self.end))
+        order = np.argsort(self.end[dated], kind="stable")
+        self._by_end = dated[order]
+        self._end_sorted = self.end[self._by_end]
+        self._start_sorted = np.sort(self.start[dated])
+        self._expired = np.array(["expired" in s.lower() for s in self.statuses], dtype=bool)[self.status] \
+            if len(self.status) else np.zeros(0, dtype=bool)
+        self.committed = self._committed_by_year()
+
+    # ---------------------------------------------------------------- build
+
+    @classmethod
+    def from_rows(cls, tracker: list, yearly_costs: Optional[list] = None) -> "ContractorIndex":
+        statuses, status = _codes([(r.get("Status") or "").strip() for r in tracker])
+        types, kind = _codes([(r.get("Contract Type") or "").strip() for r in tracker])
+        start = [epoch_day(parse_tracker_date(r.get("Start Date"))) for r in tracker]
+        end = [epoch_day(parse_tracker_date(r.get("End Date"))) for r in tracker]
+        annual = [r.get("Annual Value (OMR)") for r in tracker]
+
+        yearly_costs = yearly_costs or []
+        contractors = sorted({r["contractor"] for r in yearly_costs})
+        n_years = max((int(r["contract_year"]) for r in yearly_costs), default=0)
+        labels = [""] * n_years
+        matrix = np.full((len(contractors), n_years), np.nan)
+        row_of = {c: i for i, c in enumerate(contractors)}
+        for r in yearly_costs:
+            j = int(r["contract_year"]) - 1
+            labels[j] = labels[j] or (r.get("year_label") or "")
+            if r.get("amount_omr") is not None:
+                matrix[row_of[r["contractor"]], j] = float(r["amount_omr"])
+
+        return cls(
+            names=[r.get("Contractor") or "Unknown contractor" for r in tracker],
+            services=[r.get("Service Provided") or "" for r in tracker],
+            statuses=statuses, types=types, status=status, type=kind,
+            start=np.array([OPEN_START if d is None else d for d in start], dtype=np.int64),
+            end=np.array([-1 if d is None else d for d in end], dtype=np.int64),
+            annual=np.array([np.nan if v in (None, "") else float(v) for v in annual], dtype=float),
+            yearly_contractors=contractors, yearly_labels=labels, yearly=matrix,
+        )
+
+    def to_columns(self) -> dict:
+        """The parsed columns, JSON-ready (NaN → None); :meth:`from_columns` reverses it."""
+        def floats(a):
+            return [None if np.isnan(v) else float(v) for v in np.ravel(a)]
+
+        return {
+            "names": self.names, "services": self.services, "statuses": self.statuses, "types": self.types,
+            "status": self.status.tolist(), "type": self.type.tolist(),
+            "start": self.start.tolist(), "end": self.end.tolist(), "annual": floats(self.annual),
+            "yearlyContractors": self.yearly_contractors, "yearlyLabels": self.yearly_labels,
+            "yearly": floats(self.yearly),
+        }
+
+    @classmethod
+    def from_columns(cls, c: dict) -> "ContractorIndex":
+        def floats(values, shape=None):
+            a = np.array([np.nan if v is None else v for v in values], dtype=float)
+            return a.reshape(shape) if shape else a
+
+        return cls(
+            names=c["names"], services=c["services"], statuses=c["statuses"], types=c["types"],
+            status=np.array(c["status"], dtype=np.int64), type=np.array(c["type"], dtype=np.int64),
+            start=np.array(c["start"], dtype=np.int64), end=np.array(c["end"], dtype=np.int64),
+            annual=floats(c["annual"]),
+            yearly_contractors=c["yearlyContractors"], yearly_labels=c["yearlyLabels"],
+            yearly=floats(c["yearly"], (len(c["yearlyContractors"]), len(c["yearlyLabels"]))),
+        )
+
+    def _committed_by_year(self) -> dict:
+        """``{year: OMR}``: each contract's annual value × the share of that year's days it runs."""
+        spread = np.flatnonzero((self.end >= 0) & (self.start != OPEN_START) & ~np.isnan(self.annual)
+                                & (self.end >= self.start))
+        if not len(spread):
+            return {}
+        first = (EPOCH + dt.timedelta(days=int(self.start[spread].min()))).year
+        last = (EPOCH + dt.timedelta(days=int(self.end[spread].max()))).year
+        years = np.arange(first, last + 1)
+        year_start = np.array([epoch_day(dt.date(y, 1, 1)) for y in years])
+        year_end = np.array([epoch_day(dt.date(y, 12, 31)) for y in years])
+        overlap = np.minimum(self.end[spread, None], year_end) - np.maximum(self.start[spread, None], year_start) + 1
+        share = np.clip(overlap, 0, None) / (year_end - year_start + 1)
+        totals = (share * self.annual[spread, None]).sum(axis=0)
+        return {int(y): round(float(t), 3) for y, t in zip(years, totals)}
+
+    # -------------------------------------------------------------- queries
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def active_on(self, day: dt.date) -> np.ndarray:
+        """Positions whose [start, end] contains ``day``, by end date."""
+        d = epoch_day(day)
+        candidates = self._by_end[np.searchsorted(self._end_sorted, d, side="left"):]
+        return candidates[self.start[candidates] <= d]
+
+    def active_count(self, day: dt.date) -> int:
+        """``#(start ≤ day) − #(end < day)`` over the dated contracts — no scan."""
+        d = epoch_day(day)
+        return int(np.searchsorted(self._start_sorted, d, side="right") - np.searchsorted(self._end_sorted, d, side="left"))
+
+    def expiring_within(self, today: dt.date, days: int = CONTRACT_WARN_DAYS) -> np.ndarray:
+        """Not-expired contracts ending in ``[today, today + days]``, soonest first (the alert rule)."""
+        lo = np.searchsorted(self._end_sorted, epoch_day(today), side="left")
+        hi = np.searchsorted(self._end_sorted, epoch_day(today) + days, side="right")
+        found = self._by_end[lo:hi]
+        return found[~self._expired[found]]
+
+    def lapsed(self, today: dt.date) -> np.ndarray:
+        """Contracts past their end date whose status does not say expired."""
+        found = self._by_end[:np.searchsorted(self._end_sorted, epoch_day(today), side="left")]
+        return found[~self._expired[found]]
+
+    def committed_in(self, year: int) -> float:
+        return self.committed.get(year, 0.0)
+
+    def yearly_totals(self) -> dict:
+        """``{year label: OMR}`` from contractor_yearly_costs (buildYearlyMatrix's row totals)."""
+        return {label: round(float(t), 3) for label, t in zip(self.yearly_labels, np.nansum(self.yearly, axis=0))}
+
+
+# --------------------------------------------------------------------------
+# Cache
+# --------------------------------------------------------------------------
+
+_MEMO = {}
+
+
+def source_version(client) -> str:
+    """``"<table>:<rows>:<newest updated_at>;…"`` for the two source tables."""
+    parts = []
+    for table in (TRACKER_TABLE, YEARLY_TABLE):
+        newest = client.select(table, "updated_at", order="updated_at.desc.nullslast", limit="1")
+        parts.append(f"{table}:{client.count(table)}:{newest[0]['updated_at'] if newest else ''}")
+    return ";".join(parts)
+
+
+def load_index(client, cache_dir, version: Optional[str] = None) -> tuple:
+    """
+    ``(index, rebuilt)``. Served from memory or the cache file while the
+    sources' version is unchanged; otherwise the tables are read, parsed and
+    the cache rewritten.
+    """
+    version = version or source_version(client)
+    if version in _MEMO:
+        return _MEMO[version], False
+    path = cache_dir / ARTIFACT_NAME
+    if path.exists():
+        cached = json.loads(path.read_text(encoding="utf-8"))
+        if cached.get("version") == version:
+            index = ContractorIndex.from_columns(cached["columns"])
+            _MEMO.clear()
+            _MEMO[version] = index
+            return index, False
+
+    index = ContractorIndex.from_rows(
+        client.select(TRACKER_TABLE, TRACKER_COLS, order="Contractor"),
+        client.select(YEARLY_TABLE, YEARLY_COLS, order="contract_year"),
+    )
+    _MEMO.clear()
+    _MEMO[version] = index
+    write_cache(index, version, cache_dir)
+    return index, True
+
+
+def summary(index: ContractorIndex, today: dt.date) -> dict:
+    def listing(positions):
+        return [{"contractor": index.names[p], "service": index.services[p],
+                 "end": (EPOCH + dt.timedelta(days=int(index.end[p]))).isoformat()} for p in positions]
+
+    return {
+        "today": today.isoformat(),
+        "contracts": len(index),
+        "activeToday": index.active_count(today),
+        "expiringWithin": {str(n): listing(index.expiring_within(today, n)) for n in (30, CONTRACT_WARN_DAYS, 90)},
+        "lapsed": listing(index.lapsed(today)),
+        "committedByYear": {str(y): v for y, v in index.committed.items()},
+        "yearlyCostTotals": index.yearly_totals(),
+    }
+
+
+def write_cache(index: ContractorIndex, version: str, cache_dir) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": version,
+        "generatedAt": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "summary": summary(index, dt.date.today()),
+        "columns": index.to_columns(),
+    }
+    (cache_dir / ARTIFACT_NAME).write_text(json.dumps(payload, separators=(",", ":")) + "\n", encoding="utf-8")
+
+
+def run(client, cache_dir, today: Optional[dt.date] = None) -> dict:
+    today = today or dt.date.today()
+    index, rebuilt = load_index(client, cache_dir)
+    result = summary(index, today)
+    print(f"  {len(index)} contracts ({'re-parsed' if rebuilt else 'cache hit'}); "
+          f"{result['activeToday']} active today, {len(result['expiringWithin'][str(CONTRACT_WARN_DAYS)])} "
+          f"expiring within {CONTRACT_WARN_DAYS} days, {len(result['lapsed'])} lapsed")
+    if today.year in index.committed:
+        print(f"  committed {today.year}: {index.committed[today.year]:,.0f} OMR")
+    return result
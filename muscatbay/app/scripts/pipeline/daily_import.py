@@ -0,0 +1,346 @@
+"""
+Daily water imports: Grafana / template CSV exports → ``water_daily_consumption``.
+
+``parseCSV`` (functions/api/csv-upload.ts) reads the whole file in the browser,
+splits it on ``'\\n'`` and re-parses every line character by character. This
+module does the same conversion as a stream: the header is read once, the
+column aliases and the format are resolved into a :class:`Layout`, and every
+following line is turned into one wide record as it is read, so an export of
+any length — a full year of Grafana pivots is ~4,200 lines — converts in
+constant memory and well under a second.
+
+Both formats ``parseCSV`` accepts are detected from the header:
+
+    standard   meter_name, account_number, …, day_1 … day_31 (or "Day 1")
+    pivot      ACCOUNT_NUMBER / "Acct #", READING_MNTH, 1 … 31 — the month of
+               each line comes from READING_MNTH (``12026`` = Jan 2026,
+               ``122025`` = Dec 2025)
+
+A blank or ``NULL`` cell is ``None``, never 0; ``"2,154.00"`` is 2154.
+
+:func:`enrich` then applies ``filterMetersByConfiguration`` against the cached
+:class:`registry.MeterRegistry` — only meters in the registry pass, blank
+metadata is filled from it and zone codes become the display names
+``water_loss_daily`` uses — and :func:`upsert_stream` compares each record
+cell by cell with the last known stored row (:class:`StoredState`, one bulk
+read per month) and writes only the cells that differ, in fixed-size chunks
+on ``account_number,month,year``: a routine daily pull that adds one day to
+each meter sends the key, ``meter_name`` and that one day column, not all 31
+days and the metadata.
+:func:`run` skips files already imported, by content hash
+(:mod:`pipeline.uploads`).
+"""
+
+import csv
+import re
+from dataclasses import dataclass, field, fields
+from typing import Iterable, Iterator, Optional
+
+from . import uploads
+from .registry import MeterRegistry, load_registry
+from .water import DAY_COLUMNS, MONTHS, _number
+
+TABLE        = "water_daily_consumption"
+ON_CONFLICT  = "account_number,month,year"
+CHUNK        = 1000
+DAYS         = range(1, 32)
+
+# parseCSV's alias lists, in its order of preference.
+ALIASES = {
+    "meter_name": ("meter_name", "metername", "meter name", "name"),
+    "account_number": ("account_number", "accountnumber", "account", "acct #", "acct#", "acct", "acct no",
+                       "meter_id", "meterid"),
+    "label": ("label", "level"),
+    "zone": ("zone",),
+    "parent_meter": ("parent_meter", "parentmeter", "parent", "parent meter"),
+    "type": ("type", "meter_type"),
+    "reading_month": ("reading_mnth", "reading_month", "readingmnth", "readingmonth"),
+}
+METADATA = ("label", "zone", "parent_meter", "type")
+STORED_SELECT = ",".join(("account_number", "month", "year", "meter_name") + METADATA + tuple(DAY_COLUMNS))
+
+_DAY_HEADER = re.compile(r"^day[_\s]?(\d+)$")
+_JS_FLOAT = re.compile(r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+@dataclass
+class Layout:
+    delimiter: str
+    columns: dict                  # field → column index, for the aliases found
+    days: dict                     # day number → column index
+
+    @property
+    def pivot(self) -> bool:
+        return "reading_month" in self.columns
+
+
+@dataclass
+class ImportStats:
+    lines: int = 0
+    records: int = 0
+    unidentified: int = 0          # no account number and no meter name
+    undated: int = 0               # no READING_MNTH and no default month
+    unconfigured: int = 0          # not in the meter registry
+    unchanged: int = 0             # already stored exactly as in the file
+    cells: int = 0                 # day / metadata cells written
+    written: int = 0
+    duplicates: int = 0            # files whose content hash was already imported
+    months: set = field(default_factory=set)
+
+    def add(self, other: "ImportStats") -> None:
+        for f in fields(self):
+            if f.name == "months":
+                self.months |= other.months
+            else:
+                setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+def detect(header: list, delimiter: str) -> Optional[Layout]:
+    """Resolve the aliases and day columns of a header once; ``None`` without a meter column."""
+    lower = [h.strip().lower() for h in header]
+    columns = {}
+    for name, aliases in ALIASES.items():
+        idx = next((lower.index(a) for a in aliases if a in lower), -1)
+        if idx >= 0:
+            columns[name] = idx
+    days = {}
+    for idx, col in enumerate(h.strip() for h in header):
+        match = _DAY_HEADER.match(col.lower())
+        if match:
+            if 1 <= int(match.group(1)) <= 31:
+                days[int(match.group(1))] = idx
+        elif col.isdigit() and str(int(col)) == col and 1 <= int(col) <= 31:
+            days[int(col)] = idx
+    if "account_number" not in columns and "meter_name" not in columns:
+        return None
+    return Layout(delimiter, columns, days)
+
+
+def parse_reading_month(value: str) -> Optional[tuple]:
+    """READING_MNTH ``"12026"`` → ``("Jan-26", 2026)``; ``"122025"`` → ``("Dec-25", 2025)``."""
+    text = (value or "").strip()
+    if len(text) not in (5, 6) or not text.isdigit():
+        return None
+    month, year = int(text[:len(text) - 4]), int(text[-4:])
+    if not 1 <= month <= 12:
+        return None
+    return f"{MONTHS[month - 1]}-{str(year)[-2:]}", year
+
+
+def parse_reading(value: Optional[str]) -> Optional[float]:
+    """A day cell as parseCSV reads it: blank / NULL → None, thousands commas dropped, JS ``parseFloat``."""
+    if value is None:
+        return None
+    text = value.strip()
+    if not text or text.upper() == "NULL":
+        return None
+    match = _JS_FLOAT.match(text.replace(",", ""))
+    return float(match.group(0)) if match else None
+
+
+def records(lines: Iterable[str], month: Optional[str] = None, year: Optional[int] = None,
+            stats: Optional[ImportStats] = None) -> Iterator[dict]:
+    """
+    Wide ``water_daily_consumption`` records from the lines of one export, one
+    per data line, without holding more than the current line. ``month`` /
+    ``year`` are the defaults for lines without a usable READING_MNTH.
+    """
+    stats = stats if stats is not None else ImportStats()
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    first = first.lstrip("\ufeff")
+    delimiter = "\t" if "\t" in first else ","
+    layout = detect(next(csv.reader([first], delimiter=delimiter)), delimiter)
+    if layout is None:
+        raise ValueError("no meter identification column (account number or meter name) in the header")
+    cols, days = layout.columns, sorted(layout.days.items())
+    acct_i, name_i, month_i = cols.get("account_number"), cols.get("meter_name"), cols.get("reading_month")
+    meta = [(name, cols[name]) for name in METADATA if name in cols]
+
+    for values in csv.reader(lines, delimiter=delimiter):
+        if not values or not any(v.strip() for v in values):
+            continue
+        stats.lines += 1
+        width = len(values)
+        account = values[acct_i].strip() if acct_i is not None and acct_i < width else ""
+        name = values[name_i].strip() if name_i is not None and name_i < width else ""
+        if not account and not name:
+            stats.unidentified += 1
+            continue
+        parsed = parse_reading_month(values[month_i]) if month_i is not None and month_i < width else None
+        row_month, row_year = parsed if parsed else (month, year)
+        if not row_month or not row_year:
+            stats.undated += 1
+            continue
+        record = {"meter_name": name or account, "account_number": account, "month": row_month, "year": row_year}
+        for key, idx in meta:
+            if idx < width and values[idx].strip():
+                record[key] = values[idx].strip()
+        record.update({f"day_{d}": None for d in DAYS})
+        for d, idx in days:
+            if idx < width:
+                record[f"day_{d}"] = parse_reading(values[idx])
+        stats.records += 1
+        stats.months.add(row_month)
+        yield record
+
+
+def month_order(key: str) -> tuple:
+    """Sort key for ``"Mon-YY"``."""
+    return key[-2:], MONTHS.index(key[:3])
+
+
+def enrich(stream: Iterable[dict], registry: MeterRegistry, stats: Optional[ImportStats] = None) -> Iterator[dict]:
+    """``filterMetersByConfiguration`` over a record stream, against a cached :class:`MeterRegistry`."""
+    stats = stats if stats is not None else ImportStats()
+    for record in stream:
+        name = record["meter_name"] if record["meter_name"] != record["account_number"] else ""
+        if not registry.enrich(record, name):
+            stats.unconfigured += 1
+            continue
+        yield record
+
+
+def chunks(stream: Iterable[dict], size: int = CHUNK) -> Iterator[list]:
+    """
+    Lists of at most ``size`` records with the same columns (a PostgREST bulk
+    upsert needs matching keys in every object). A key repeated inside one
+    chunk keeps its last record only: one INSERT … ON CONFLICT cannot touch the
+    same row twice.
+    """
+    batch = {}
+    for record in stream:
+        batch[(record["account_number"], record["month"], record["year"])] = record
+        if len(batch) >= size:
+            yield from _by_columns(batch.values())
+            batch = {}
+    if batch:
+        yield from _by_columns(batch.values())
+
+
+def _by_columns(records: Iterable[dict]) -> Iterator[list]:
+    groups = {}
+    for record in records:
+        groups.setdefault(tuple(record), []).append(record)
+    yield from groups.values()
+
+
+class StoredState:
+    """
+    The last known ``water_daily_consumption`` rows, ``{(account, month, year): row}``.
+
+    Each month is read once, in one bulk read, the first time a record for it
+    arrives, and :meth:`apply` folds every payload written back in, so a key
+    that returns later in the stream (or in the next file of the same run) is
+    compared against what it was just written as — no read per chunk.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.rows = {}
+        self.loaded = set()
+
+    def get(self, key: tuple) -> Optional[dict]:
+        _, month, year = key
+        if (month, year) not in self.loaded:
+            self.loaded.add((month, year))
+            for row in self.client.select(TABLE, STORED_SELECT, month=f"eq.{month}", year=f"eq.{year}"):
+                self.rows[(row["account_number"], row["month"], int(row["year"]))] = row
+        return self.rows.get(key)
+
+    def apply(self, payload: dict) -> None:
+        key = (payload["account_number"], payload["month"], payload["year"])
+        self.rows.setdefault(key, {}).update(payload)
+
+
+def changed_records(state: StoredState, batch: list, stats: Optional[ImportStats] = None) -> list:
+    """
+    The payloads that bring the stored rows up to a batch, cell by cell.
+
+    A new row is written whole. A stored row gets a payload with its key,
+    ``meter_name`` (NOT NULL, and checked on the proposed row before the
+    conflict is seen) and only the day / metadata cells that differ — a blank
+    day in the file keeps the stored reading, so a month-to-date export that
+    stops at day 15 does not clear days 16… from a later one. A row with no
+    differing cell is skipped. ``stats.cells`` counts the cells written.
+    """
+    stats = stats if stats is not None else ImportStats()
+    payloads = []
+    for record in batch:
+        row = state.get((record["account_number"], record["month"], record["year"]))
+        if row is None:
+            stats.cells += sum(record[c] is not None for c in DAY_COLUMNS)
+            payload = record
+        else:
+            changes = {c: record[c] for c in DAY_COLUMNS if record[c] is not None and record[c] != _number(row.get(c))}
+            changes.update({key: record[key] for key in ("meter_name",) + METADATA
+                            if key in record and record[key] != row.get(key)})
+            if not changes:
+                stats.unchanged += 1
+                continue
+            stats.cells += len(changes)
+            payload = {key: record[key] for key in ("account_number", "month", "year", "meter_name")}
+            payload.update(changes)
+        state.apply(payload)
+        payloads.append(payload)
+    return payloads
+
+
+def upsert_stream(client, stream: Iterable[dict], stats: Optional[ImportStats] = None, size: int = CHUNK,
+                  dry_run: bool = False, state: Optional[StoredState] = None) -> int:
+    """
+    Write the cells that change something, one bulk upsert per distinct
+    column set in each chunk; ``dry_run`` reads and counts only.
+    """
+    stats = stats if stats is not None else ImportStats()
+    state = state if state is not None else StoredState(client)
+    for batch in chunks(stream, size):
+        payloads = changed_records(state, batch, stats)
+        if not dry_run:
+            for group in _by_columns(payloads):
+                client.upsert(TABLE, group, on_conflict=ON_CONFLICT)
+        stats.written += len(payloads)
+    return stats.written
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+def run(client, paths: list, month: Optional[str] = None, year: Optional[int] = None,
+        dry_run: bool = False, cache_dir=None, force: bool = False) -> ImportStats:
+    """
+    Import each file once: a file whose content hash is in the upload
+    manifest is skipped unless ``force``; a new one is imported (changed
+    cells only), stored in the bucket under its hash and added to the manifest.
+    """
+    stats = ImportStats()
+    state = StoredState(client)
+    registry, refetched = load_registry(client, cache_dir)
+    print(f"  {len(registry)} registry meters ({'fetched' if refetched else 'cached'})")
+    for path in paths:
+        digest = uploads.content_hash(path)
+        done = uploads.applied_months(client, digest)
+        if done and not force:
+            print(f"  {path.name}: already imported for {', '.join(done)} (sha256 {digest[:12]}…), skipped")
+            stats.duplicates += 1
+            continue
+        file_stats = ImportStats()
+        with open(path, encoding="utf-8-sig", newline="") as handle:
+            upsert_stream(client, enrich(records(handle, month, year, file_stats), registry, file_stats),
+                          file_stats, dry_run=dry_run, state=state)
+        months = sorted(file_stats.months, key=month_order)
+        if not dry_run and months:
+            target = uploads.store(client, path, digest, months[0])
+            uploads.record(client, digest, path.name, months, target, file_stats.records, file_stats.cells)
+        stats.add(file_stats)
+
+    months = ", ".join(sorted(stats.months, key=month_order)) or "—"
+    print(f"  {stats.lines} line(s) in {len(paths) - stats.duplicates} file(s) → {stats.records} record(s) for {months}")
+    print(f"  skipped: {stats.duplicates} file(s) already imported, {stats.unconfigured} not in the registry, "
+          f"{stats.unidentified} without a meter, {stats.undated} without a month, {stats.unchanged} unchanged")
+    verb = "would be upserted (dry run)" if dry_run else "upserted"
+    print(f"  {stats.written} row(s) / {stats.cells} cell(s) {verb} into {TABLE}")
+    return stats
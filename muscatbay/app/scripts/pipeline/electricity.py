@@ -0,0 +1,232 @@
+"""
+Electricity spike/dip classification over the whole meter × month matrix.
+
+The Meters table classifies one cell at a time (components/electricity/
+reading-cell.tsx ``describeReading``) against a baseline recomputed from the
+meter's readings, and Load Watch does the same for the current month
+(electricity-analytics.ts ``meterFlag``). Here every reading lands once in a
+``(meter × month)`` float array — NaN where the row is NULL (closed / not read),
+exactly the months the app leaves out of ``readings`` — and:
+
+    prefix sums   cumulative sum and count of the POSITIVE reads per meter, so
+                  the baseline of any window [s, e] is two subtractions
+    classify      one vectorised pass over a block of cells with the gates from
+                  lib/thresholds.ts (SPIKE_CRITICAL 3×, SPIKE_HIGH 2×, DIP 0.3×,
+                  MIN_BASELINE_KWH 5) plus the missing / negative / zero states
+    rolling       every cell against its own trailing window in one pass
+
+States are small integers (``STATES`` index) so a heatmap is an ``int8`` array.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .water import MONTHS
+
+SPIKE_CRITICAL   = 3
+SPIKE_HIGH       = 2
+DIP              = 0.3
+MIN_BASELINE_KWH = 5
+# reading-cell.tsx: ratio maths on fewer positive reads than this is not a baseline.
+MIN_SAMPLES      = 3
+
+STATES = ("normal", "missing", "negative", "zero", "spike-crit", "spike-high", "dip")
+NORMAL, MISSING, NEGATIVE, ZERO, SPIKE_CRIT, SPIKE_HIGH_STATE, DIP_STATE = range(len(STATES))
+
+
+def month_ordinal(key: str) -> Optional[int]:
+    """``"Apr-24"`` → months since Jan 2000, for chronological ordering; ``None`` if malformed."""
+    mon, _, yy = (key or "").partition("-")
+    if mon not in MONTHS or not yy.isdigit() or len(yy) != 2:
+        return None
+    return int(yy) * 12 + MONTHS.index(mon)
+
+
+@dataclass
+class ReadingMatrix:
+    meter_ids: list
+    names: list
+    types: list
+    accounts: list
+    months: list          # chronological "Mon-YY" keys
+    values: np.ndarray    # (meters, months) float64, NaN = no reading
+
+    @classmethod
+    def from_rows(cls, meters: list, readings: list) -> "ReadingMatrix":
+        """``electricity_meters`` + ``electricity_readings`` rows; unknown meters and bad month keys are dropped."""
+        months = sorted({r["month"] for r in readings if month_ordinal(r.get("month")) is not None}, key=month_ordinal)
+        col = {m: j for j, m in enumerate(months)}
+        row = {m["id"]: i for i, m in enumerate(meters)}
+        values = np.full((len(meters), len(months)), np.nan)
+        for r in readings:
+            i, j = row.get(r.get("meter_id")), col.get(r.get("month"))
+            if i is None or j is None or r.get("consumption") is None:
+                continue
+            values[i, j] = float(r["consumption"])
+        return cls(
+            meter_ids=[m["id"] for m in meters],
+            names=[m.get("name") or "" for m in meters],
+            types=[m.get("meter_type") or "" for m in meters],
+            accounts=[m.get("account_number") or "" for m in meters],
+            months=months,
+            values=values,
+        )
+
+
+def positive_prefix(values: np.ndarray) -> tuple:
+    """``(sums, counts)`` of the positive reads, each ``(meters, months + 1)`` with a leading zero column."""
+    positive = np.where(values > 0, values, 0.0)          # NaN > 0 is False
+    sums = np.zeros((values.shape[0], values.shape[1] + 1))
+    counts = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.int32)
+    np.cumsum(positive, axis=1, out=sums[:, 1:])
+    np.cumsum(values > 0, axis=1, out=counts[:, 1:])
+    return sums, counts
+
+
+def classify(values: np.ndarray, baseline: np.ndarray, samples: np.ndarray, min_samples: int = MIN_SAMPLES) -> np.ndarray:
+    """
+    State codes for ``values`` against ``baseline`` / ``samples`` (broadcastable).
+
+    ``min_samples=MIN_SAMPLES`` is the Meters-table rule; ``min_samples=0`` is
+    Load Watch's ``meterFlag``, which only asks for a baseline ≥ 5 kWh.
+    """
+    values = np.asarray(values, dtype=float)
+    baseline = np.broadcast_to(baseline, values.shape)
+    known = (np.broadcast_to(samples, values.shape) >= min_samples) & (baseline >= MIN_BASELINE_KWH)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(known, values / np.where(known, baseline, 1.0), np.nan)
+    conditions = [
+        np.isnan(values),
+        values < 0,
+        known & (values == 0),
+        known & (ratio >= SPIKE_CRITICAL),
+        known & (ratio >= SPIKE_HIGH),
+        known & (values > 0) & (ratio <= DIP),
+    ]
+    choices = [MISSING, NEGATIVE, ZERO, SPIKE_CRIT, SPIKE_HIGH_STATE, DIP_STATE]
+    return np.select(conditions, choices, default=NORMAL).astype(np.int8)
+
+
+class LoadClassifier:
+    """Window lookups over one :class:`ReadingMatrix`; the prefix arrays are built once."""
+
+    def __init__(self, matrix: ReadingMatrix, min_samples: int = MIN_SAMPLES):
+        self.matrix = matrix
+        self.min_samples = min_samples
+        self.sums, self.counts = positive_prefix(matrix.values)
+        self._col = {m: j for j, m in enumerate(matrix.months)}
+
+    def span(self, start_month: Optional[str] = None, end_month: Optional[str] = None) -> tuple:
+        """Column bounds ``[s, e]``; an unknown or inverted range means the whole history, as ``sliceRange`` does."""
+        last = len(self.matrix.months) - 1
+        s = self._col.get(start_month, 0 if start_month is None else -1)
+        e = self._col.get(end_month, last if end_month is None else -1)
+        if s < 0 or e < 0 or s > e:
+            return 0, last
+        return s, e
+
+    def baseline(self, s: int, e: int) -> tuple:
+        """``(baseline, samples)`` per meter for columns ``s..e`` — O(meters), whatever the width."""
+        total = self.sums[:, e + 1] - self.sums[:, s]
+        samples = self.counts[:, e + 1] - self.counts[:, s]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(samples > 0, total / np.maximum(samples, 1), 0.0)
+        return mean, samples
+
+    def window(self, start_month: Optional[str] = None, end_month: Optional[str] = None) -> dict:
+        """The heatmap for a date range: months, per-meter baselines and the state of every cell."""
+        s, e = self.span(start_month, end_month)
+        base, samples = self.baseline(s, e)
+        block = self.matrix.values[:, s:e + 1]
+        return {
+            "months": self.matrix.months[s:e + 1],
+            "baseline": base,
+            "samples": samples,
+            "states": classify(block, base[:, None], samples[:, None], self.min_samples),
+        }
+
+    def current_flags(self, start_month: Optional[str] = None, end_month: Optional[str] = None) -> np.ndarray:
+        """Load Watch: the range's last month against the range baseline (``meterFlag``)."""
+        s, e = self.span(start_month, end_month)
+        base, samples = self.baseline(s, e)
+        return classify(self.matrix.values[:, e], base, samples, min_samples=0)
+
+    def rolling(self, width: int) -> np.ndarray:
+        """
+        Every cell against its own trailing ``width``-month window, in one pass.
+
+        Column ``j`` uses months ``max(0, j - width + 1) .. j``, so the first
+        columns see the shorter history that actually exists.
+        """
+        n = len(self.matrix.months)
+        ends = np.arange(1, n + 1)
+        starts = np.maximum(ends - width, 0)
+        total = self.sums[:, ends] - self.sums[:, starts]
+        samples = self.counts[:, ends] - self.counts[:, starts]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            base = np.where(samples > 0, total / np.maximum(samples, 1), 0.0)
+        return classify(self.matrix.values, base, samples, self.min_samples)
+
+
+def state_counts(states: np.ndarray) -> dict:
+    counts = np.bincount(states.ravel(), minlength=len(STATES))
+    return {name: int(counts[i]) for i, name in enumerate(STATES)}
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+ARTIFACT_NAME = "electricity-load-states.json"
+
+
+def fetch_matrix(client) -> ReadingMatrix:
+    meters = client.select("electricity_meters", "id,name,account_number,meter_type", order="name")
+    readings = client.select("electricity_readings", "meter_id,month,consumption", order="id")
+    return ReadingMatrix.from_rows(meters, readings)
+
+
+def artifact(classifier: LoadClassifier, rolling_width: int) -> dict:
+    """
+    What the heatmap needs to answer any range without the raw history: the
+    values, the positive prefix sums/counts (baseline of [s, e] = two
+    subtractions), the full-history states and the trailing-window states.
+    """
+    m = classifier.matrix
+    full = classifier.window()
+
+    def rows(array, cast):
+        return [[None if isinstance(v, float) and v != v else cast(v) for v in r] for r in array.tolist()]
+
+    return {
+        "months": m.months,
+        "states": list(STATES),
+        "thresholds": {
+            "spikeCritical": SPIKE_CRITICAL, "spikeHigh": SPIKE_HIGH, "dip": DIP,
+            "minBaselineKwh": MIN_BASELINE_KWH, "minSamples": classifier.min_samples,
+        },
+        "meters": [
+            {"id": i, "name": n, "type": t, "account": a}
+            for i, n, t, a in zip(m.meter_ids, m.names, m.types, m.accounts)
+        ],
+        "values": rows(m.values, float),
+        "positiveSum": rows(classifier.sums, float),
+        "positiveCount": rows(classifier.counts, int),
+        "fullRange": {"states": full["states"].tolist(), "counts": state_counts(full["states"])},
+        "rolling": {"width": rolling_width, "states": classifier.rolling(rolling_width).tolist()},
+    }
+
+
+def run(client, out_dir, rolling_width: int = 12) -> dict:
+    classifier = LoadClassifier(fetch_matrix(client))
+    payload = artifact(classifier, rolling_width)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / ARTIFACT_NAME
+    path.write_text(json.dumps(payload, separators=(",", ":")) + "\n", encoding="utf-8")
+    shape = classifier.matrix.values.shape
+    print(f"  {shape[0]} meters × {shape[1]} months → {path}")
+    print("  " + ", ".join(f"{k} {v}" for k, v in payload["fullRange"]["counts"].items() if v))
+    return payload
@@ -0,0 +1,250 @@
+"""
+Monthly electricity readings from the master workbook / CSV, as one upsert.
+
+Each new month has arrived as a hand-written script — update_electricity_*.sql
+(DELETE the month, then one INSERT … SELECT per meter name) or the
+fix-electricity-readings.ts / reset-electricity.ts loaders — so adding a month
+meant editing code. This job reads the source as it is kept:
+
+    layout     one row per meter, a name and / or account-number column and
+               one column per month (``Apr-24``, ``Apr 2024``, a date cell …);
+               every month column in the file is imported, or only
+               ``months``
+    meters     resolved against one read of ``electricity_meters``: by
+               account number, else by name (case and spacing ignored); rows
+               that match no meter are reported, never created
+    NULL ≠ 0   an empty cell is the master's "closed / not in service": a
+               stored reading for it becomes NULL (never 0), and a meter
+               without one gets no row; only a written 0 is a zero reading
+    diff       the cells are compared with the stored readings of those months
+               (new / changed / unchanged); ``dry_run`` prints the diff and
+               writes nothing
+    upsert     the new and changed cells go out as one bulk upsert on
+               (meter_id, month), in the client's BATCH_SIZE slices — a few
+               hundred rows a month, so one request after another
+
+Needs sql/migrations/20261019_electricity_readings_key.sql (the unique
+(meter_id, month) key). Re-running a file writes nothing.
+"""
+
+import csv
+import datetime as dt
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .daily_import import parse_reading
+from .water import MONTHS
+
+METERS    = "electricity_meters"
+READINGS  = "electricity_readings"
+DIFF_SHOW = 25                      # changed cells listed per run
+
+NAME_HEADERS    = {"name", "meter", "meter name", "meter label"}
+ACCOUNT_HEADERS = {"account", "account number", "account no", "account #", "acct", "acct no"}
+
+_MONTH_HEADER = re.compile(r"^([a-z]{3})[a-z]*[\s\-_/']*(\d{2}|\d{4})$")
+
+
+def month_key(header) -> Optional[str]:
+    """A month column header → ``"Mon-YY"``: ``"Apr-24"``, ``"april 2024"``, ``"apr_24"``, a date cell."""
+    if isinstance(header, (dt.date, dt.datetime)):
+        return f"{MONTHS[header.month - 1]}-{header.year % 100:02d}"
+    match = _MONTH_HEADER.match(str(header or "").strip().lower())
+    if not match or match.group(1).title() not in MONTHS:
+        return None
+    return f"{match.group(1).title()}-{match.group(2)[-2:]}"
+
+
+def _header(value) -> str:
+    return re.sub(r"[^a-z0-9#]+", " ", str(value or "").lower()).strip()
+
+
+def _name_key(value) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+
+def _value(cell):
+    """``(consumption, valid)``: blank → ``(None, True)`` (not in service); unreadable text → ``(None, False)``."""
+    if cell is None:
+        return None, True
+    if isinstance(cell, (int, float)):
+        return (float(cell), True) if math.isfinite(cell) else (None, False)
+    text = str(cell).strip()
+    if not text:
+        return None, True
+    value = parse_reading(text)
+    return value, value is not None or text.upper() == "NULL"
+
+
+@dataclass
+class SourceRow:
+    name: Optional[str]
+    account: Optional[str]
+    cells: dict                     # {"Mon-YY": raw cell}
+    line: int
+
+
+def parse_table(rows: list, months: Optional[set] = None) -> list:
+    """
+    The meter rows of a sheet (lists of cells, header first). The header is the
+    first row with a name or account column and at least one month column.
+    """
+    for h, header in enumerate(rows):
+        labels = [_header(c) for c in header]
+        name_col = next((i for i, label in enumerate(labels) if label in NAME_HEADERS), None)
+        account_col = next((i for i, label in enumerate(labels) if label in ACCOUNT_HEADERS), None)
+        month_cols = {i: key for i, key in enumerate(map(month_key, header)) if key and (not months or key in months)}
+        if (name_col is not None or account_col is not None) and month_cols:
+            break
+    else:
+        return []
+    out = []
+    for n, row in enumerate(rows[h + 1:], start=h + 2):
+        def cell(i):
+            return row[i] if i is not None and i < len(row) else None
+        name, account = cell(name_col), cell(account_col)
+        name = str(name).strip() if name is not None and str(name).strip() else None
+        account = str(account).strip() if account is not None and str(account).strip() else None
+        if name is None and account is None:
+            continue
+        out.append(SourceRow(name, account, {key: cell(i) for i, key in month_cols.items()}, n))
+    return out
+
+
+def read_source(path, months: Optional[set] = None, sheet: Optional[str] = None) -> list:
+    """The meter rows of a CSV or an .xlsx workbook (its first sheet with a meter table, or ``sheet``)."""
+    path = Path(path)
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        try:
+            import openpyxl
+        except ImportError as exc:
+            raise RuntimeError("reading workbooks needs openpyxl (pip install openpyxl)") from exc
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        for worksheet in ([workbook[sheet]] if sheet else workbook.worksheets):
+            found = parse_table([list(r) for r in worksheet.iter_rows(values_only=True)], months)
+            if found:
+                return found
+        return []
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        return parse_table(list(csv.reader(handle)), months)
+
+
+# --------------------------------------------------------------------------
+# Plan
+# --------------------------------------------------------------------------
+
+class MeterIndex:
+    """``electricity_meters`` keyed by account number and by normalised name, built in one pass."""
+
+    def __init__(self, meters: list):
+        self.names = {m["id"]: m.get("name") or "" for m in meters}
+        self.by_account, self.by_name, shared = {}, {}, set()
+        for m in meters:
+            account = (m.get("account_number") or "").strip()
+            if account:
+                if account in self.by_account:
+                    shared.add(account)
+                self.by_account[account] = m["id"]
+            self.by_name.setdefault(_name_key(m.get("name")), m["id"])
+        for account in shared:                  # one account on several meters identifies none of them
+            del self.by_account[account]
+
+    def resolve(self, row: SourceRow) -> Optional[str]:
+        if row.account and row.account in self.by_account:
+            return self.by_account[row.account]
+        return self.by_name.get(_name_key(row.name)) if row.name else None
+
+
+@dataclass
+class ImportPlan:
+    rows: list = field(default_factory=list)        # electricity_readings rows to upsert
+    changes: list = field(default_factory=list)     # (meter name, month, stored, new) of changed cells
+    months: list = field(default_factory=list)
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    closed: int = 0                                 # cells written as NULL
+    unmatched: list = field(default_factory=list)   # source rows that match no meter
+    invalid: list = field(default_factory=list)     # (line, month, cell) that are neither blank nor a number
+
+
+def plan(source: list, index: MeterIndex, stored: dict) -> ImportPlan:
+    """
+    The readings that bring ``stored`` (``{(meter_id, month): consumption}``,
+    NULL included) up to the ``source`` rows. A later row for the same meter wins.
+    """
+    result = ImportPlan()
+    cells = {}
+    for row in source:
+        meter_id = index.resolve(row)
+        if meter_id is None:
+            result.unmatched.append(row.account or row.name)
+            continue
+        for month, raw in row.cells.items():
+            value, valid = _value(raw)
+            if not valid:
+                result.invalid.append((row.line, month, raw))
+                continue
+            cells[(meter_id, month)] = value
+    months = {m for _, m in cells}
+    result.months = sorted(months, key=lambda m: (m[-2:], MONTHS.index(m[:3])))
+    for (meter_id, month), value in cells.items():
+        if (meter_id, month) in stored:
+            old = stored[(meter_id, month)]
+            if old == value:                    # None == 0.0 is False: closing a meter is a change
+                result.unchanged += 1
+                continue
+            result.changed += 1
+            result.changes.append((index.names[meter_id], month, old, value))
+        elif value is None:                     # nothing stored and nothing read: no row, as before
+            continue
+        else:
+            result.new += 1
+        result.closed += value is None
+        result.rows.append({"meter_id": meter_id, "month": month, "consumption": value})
+    return result
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+def stored_readings(client, months: list) -> dict:
+    from .rest import quote_list
+
+    if not months:
+        return {}
+    rows = client.select(READINGS, "meter_id,month,consumption", order="meter_id,month",
+                         month=f"in.{quote_list(months)}")
+    return {(r["meter_id"], r["month"]): None if r.get("consumption") is None else float(r["consumption"])
+            for r in rows}
+
+
+def _fmt(value) -> str:
+    return "NULL" if value is None else f"{value:g}"
+
+
+def run(client, paths: list, months: Optional[list] = None, sheet: Optional[str] = None,
+        dry_run: bool = False) -> ImportPlan:
+    wanted = {month_key(m) or m for m in months} if months else None
+    source = [row for path in paths for row in read_source(path, wanted, sheet)]
+    index = MeterIndex(client.select(METERS, "id,name,account_number", order="name"))
+    keys = sorted({m for row in source for m in row.cells})
+    result = plan(source, index, stored_readings(client, keys))
+    span = f"{result.months[0]}…{result.months[-1]}" if result.months else "no months"
+    print(f"  {len(source)} meter row(s), {span}: {result.new} new reading(s), {result.changed} changed, "
+          f"{result.unchanged} unchanged ({result.closed} written as NULL / not in service)")
+    for name, month, old, new in result.changes[:DIFF_SHOW]:
+        print(f"    {name} {month}: {_fmt(old)} → {_fmt(new)}")
+    if len(result.changes) > DIFF_SHOW:
+        print(f"    … {len(result.changes) - DIFF_SHOW} more changed cell(s)")
+    if result.unmatched:
+        print(f"  {len(result.unmatched)} row(s) match no electricity meter: {', '.join(result.unmatched[:10])}")
+    for line, month, raw in result.invalid[:10]:
+        print(f"  line {line} {month}: {raw!r} is not a reading — skipped")
+    if not dry_run and result.rows:
+        client.upsert(READINGS, result.rows, on_conflict="meter_id,month")
+    return result
@@ -0,0 +1,37 @@
+"""
+Paths and credentials shared by every pipeline command.
+
+Credentials come from ``.env.local`` exactly as the standalone import scripts
+read them: NEXT_PUBLIC_SUPABASE_URL plus SUPABASE_SERVICE_ROLE_KEY, because the
+pipeline writes derived tables that RLS closes to the app's signed-in roles.
+"""
+
+import os
+from pathlib import Path
+
+APP_DIR       = Path(__file__).resolve().parents[2]
+ENV_FILE      = APP_DIR / ".env.local"
+ARTIFACTS_DIR = APP_DIR / "pipeline-artifacts"
+
+
+def load_env(env_path: Path = ENV_FILE) -> None:
+    if not env_path.exists():
+        return
+    for line in env_path.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key and key not in os.environ:
+            os.environ[key] = value
+
+
+def supabase_credentials() -> tuple:
+    load_env()
+    supabase_url = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
+    service_key  = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not supabase_url or not service_key:
+        raise RuntimeError("Missing NEXT_PUBLIC_SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY in .env.local")
+    return supabase_url.rstrip("/"), service_key
@@ -0,0 +1,630 @@
+"""
+Query shapes of the app vs the indexes of the schema.
+
+The schema files (``sql/schema``, the v2 water migration and the later
+migrations) index some of the columns the app filters on and not others, and
+nothing checks the two against each other. This module:
+
+    captures  every supabase-js query in ``functions/api/*.ts``, ``lib/`` and
+              ``app/`` as a :class:`QueryShape` — table, the filtered columns
+              with their operator (``.eq`` / ``.in`` / ``.gte`` …) and the
+              ``.order`` columns — by static analysis of the builder chains,
+              and the pipeline's own ``client.select(table, …,
+              updated_at="gt.…")`` calls the same way
+    loads     every CREATE TABLE (primary keys, unique constraints) and CREATE
+              INDEX / DROP INDEX in ``sql/`` into :class:`Index` lists per table
+    advises   missing   a shape with equality / range filters that no btree
+                        index can lead with, and the index that would serve it
+              partial   the best index matches fewer equality columns than the
+                        shape filters on
+              unused    a plain index on a queried table whose leading column
+                        no shape filters or orders by and no view, function,
+                        trigger, policy or foreign key in ``sql/`` mentions
+              redundant a plain index whose columns lead another index
+
+    (tables the app reads that no file in ``sql/`` creates are only listed)
+
+and, given a DSN to a local Postgres loaded with the schema (and ideally a
+data copy), :class:`Explainer` replays each missing shape with sampled values
+under ``EXPLAIN (ANALYZE)``, creates the suggested index inside a transaction,
+replays it again and rolls back, so every suggestion comes with a measured
+before / after time. That part needs ``psycopg``; the static report does not.
+"""
+
+import ast
+import datetime as dt
+import json
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+ARTIFACT_NAME = "index-advice.json"
+EQUALITY      = {"eq", "is", "in"}
+RANGE         = {"gt", "gte", "lt", "lte"}
+
+_FROM = re.compile(r"\.from\(\s*(?:'([^']+)'|\"([^\"]+)\"|([A-Z][A-Z0-9_]*))\s*\)")
+_CONST = re.compile(r"const\s+([A-Z][A-Z0-9_]*)\s*=\s*['\"]([^'\"]+)['\"]")
+_CALL = re.compile(r"\.(eq|neq|gt|gte|lt|lte|in|is|like|ilike|not|filter|order)\(\s*['\"]([^'\"]+)['\"]"
+                   r"(?:\s*,\s*['\"](\w+)['\"])?")
+WINDOW = 1500               # characters after .from( searched for the rest of the chain
+
+
+@dataclass
+class QueryShape:
+    source: str                    # file:line of the .from(
+    table: str
+    filters: list                  # [(column, operator)] in chain order
+    order: list                    # order columns in chain order
+
+    @property
+    def equality(self) -> list:
+        return _unique(c for c, op in self.filters if op in EQUALITY)
+
+    @property
+    def ranged(self) -> list:
+        return _unique(c for c, op in self.filters if op in RANGE)
+
+    def candidate(self) -> tuple:
+        """The btree index that serves this shape: equality columns, then one range column, else the order."""
+        columns = self.equality + self.ranged[:1]
+        return tuple(columns or self.order[:1])
+
+
+@dataclass
+class Index:
+    name: str
+    table: str
+    columns: tuple
+    constraint: bool = False       # primary key / unique: enforces something, never "unused"
+    source: str = ""
+
+
+def _unique(values) -> list:
+    return list(dict.fromkeys(values))
+
+
+def _ident(name: str) -> str:
+    """A table / column identifier as Postgres folds it, without schema or quotes."""
+    name = name.strip()
+    if name.lower().startswith("public."):
+        name = name[7:]
+    return name[1:-1] if name.startswith('"') else name.lower()
+
+
+# --------------------------------------------------------------------------
+# Capture
+# --------------------------------------------------------------------------
+
+def capture(text: str, source: str = "") -> list:
+    """The query shapes of one TypeScript source."""
+    constants = dict(_CONST.findall(text))
+    starts = [(m, m.group(1) or m.group(2) or constants.get(m.group(3))) for m in _FROM.finditer(text)]
+    shapes = []
+    for i, (match, table) in enumerate(starts):
+        if not table or text[max(0, match.start() - 40):match.start()].rstrip().endswith("storage"):
+            continue                # an unresolved name, or a storage bucket
+        end = starts[i + 1][0].start() if i + 1 < len(starts) else len(text)
+        chain = text[match.end():min(end, match.end() + WINDOW)]
+        filters, order = [], []
+        for method, column, op in _CALL.findall(chain):
+            if method == "order":
+                order.append(column)
+            elif method == "filter":
+                filters.append((column, op or "filter"))
+            else:
+                filters.append((column, method))
+        line = text.count("\n", 0, match.start()) + 1
+        # supabase-js sends the name as written and PostgREST quotes it, so no case folding here.
+        shapes.append(QueryShape(f"{source}:{line}", table, filters, _unique(order)))
+    return shapes
+
+
+def capture_dir(directory, recursive: bool = False) -> list:
+    """The shapes of every ``.ts`` / ``.tsx`` file in ``directory`` (and below it when ``recursive``)."""
+    directory = Path(directory)
+    found = directory.rglob("*") if recursive else directory.glob("*")
+    paths = sorted(p for p in found if p.suffix in (".ts", ".tsx") and "node_modules" not in p.parts)
+    return [s for path in paths
+            for s in capture(path.read_text(encoding="utf-8"), str(path.relative_to(directory.parent)))]
+
+
+CLIENT_CALLS = {"select", "count", "update", "delete"}
+_NOT_FILTERS = {"select", "order", "limit", "and", "or"}
+
+
+def _strings(node, constants: dict) -> list:
+    """The table names a call argument can hold: a literal, a module constant or a ``module.CONSTANT``."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, ast.Name):
+        return constants.get(node.id, [])
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        return constants.get(f"{node.value.id}.{node.attr}", [])
+    return []
+
+
+def _operator(node) -> str:
+    """``"gt.{since}"`` / ``f"gt.{since}"`` → ``"gt"``; anything else is an opaque filter."""
+    head = node.value if isinstance(node, ast.Constant) else None
+    if isinstance(node, ast.JoinedStr) and node.values and isinstance(node.values[0], ast.Constant):
+        head = node.values[0].value
+    return head.partition(".")[0] if isinstance(head, str) and "." in head else "filter"
+
+
+def _bindings(tree, constants: dict) -> dict:
+    """Loop variables over constant tables: ``for table in (A, B)``, ``for t, cols in SOURCES.items()``."""
+    out = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.For, ast.comprehension)):
+            continue
+        target, source = node.target, node.iter
+        if isinstance(target, ast.Tuple) and target.elts:
+            target = target.elts[0]
+        if isinstance(source, ast.Call) and isinstance(source.func, ast.Attribute) and source.func.attr in ("items", "keys"):
+            source = source.func.value
+        if not isinstance(target, ast.Name):
+            continue
+        if isinstance(source, (ast.Tuple, ast.List)):
+            names = [t for element in source.elts for t in _strings(element, constants)]
+        else:
+            names = _strings(source, constants)
+        out.setdefault(target.id, []).extend(names)
+    return out
+
+
+def module_constants(tree) -> dict:
+    """A module's string constants and the string keys of its dict constants, by name."""
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            value = node.value
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                constants[node.targets[0].id] = [value.value]
+            elif isinstance(value, ast.Dict):
+                constants[node.targets[0].id] = [k.value for k in value.keys
+                                                  if isinstance(k, ast.Constant) and isinstance(k.value, str)]
+    return constants
+
+
+def _imported(nodes, modules: dict) -> dict:
+    """
+    The names the ``from .x import NAME`` / ``from . import x`` statements
+    among ``nodes`` bind, resolved against ``modules`` (``{module: constants}``):
+    ``NAME`` → that module's value, ``x.NAME`` → module ``x``'s.
+    """
+    names = {}
+    for node in nodes:
+        if not isinstance(node, ast.ImportFrom):
+            continue
+        source = (node.module or "").rpartition(".")[2]
+        for alias in node.names:
+            local = alias.asname or alias.name
+            if source in modules and alias.name in modules[source]:
+                names[local] = modules[source][alias.name]
+            elif not source and alias.name in modules:
+                names.update({f"{local}.{k}": v for k, v in modules[alias.name].items()})
+    return names
+
+
+def capture_python(text: str, source: str = "", modules: Optional[dict] = None) -> list:
+    """
+    The shapes of the pipeline's ``client.select / count / update / delete(table, …, column="op.value")``
+    calls. A table argument resolves through the module's own constants, its imports from
+    ``modules`` (module-level or inside the function) and loop variables over those; a call
+    whose table cannot be resolved records no shape.
+    """
+    tree = ast.parse(text)
+    modules = modules or {}
+    top = {**_imported(tree.body, modules), **module_constants(tree)}
+    scopes = [n for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    shapes = []
+    for scope in scopes:
+        # Imports and loop variables are resolved within their own function only.
+        constants = {**top, **_imported(ast.walk(scope), modules)}
+        shapes.extend(_client_calls(scope, {**constants, **_bindings(scope, constants)}, source))
+    return sorted(shapes, key=lambda s: int(s.source.rpartition(":")[2]))
+
+
+def _client_calls(scope, constants: dict, source: str) -> list:
+    shapes = []
+    for node in ast.walk(scope):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.args
+                and node.func.attr in CLIENT_CALLS and "client" in ast.unparse(node.func.value)):
+            continue
+        filters, order = [], []
+        for keyword in node.keywords:
+            if keyword.arg == "order" and isinstance(keyword.value, ast.Constant):
+                order = [c.split(".")[0].strip() for c in str(keyword.value.value).split(",") if c.strip()]
+            elif keyword.arg and keyword.arg not in _NOT_FILTERS:
+                filters.append((keyword.arg, _operator(keyword.value)))
+        for table in dict.fromkeys(_strings(node.args[0], constants)):
+            shapes.append(QueryShape(f"{source}:{node.lineno}", table, filters, order))
+    return shapes
+
+
+def capture_pipeline(pipeline_dir) -> list:
+    """The shapes of every pipeline module; imported table constants resolve to their own module's value."""
+    paths = sorted(Path(pipeline_dir).glob("*.py"))
+    trees = {path.stem: ast.parse(path.read_text(encoding="utf-8")) for path in paths}
+    modules = {name: module_constants(tree) for name, tree in trees.items()}
+    return [s for path in paths
+            for s in capture_python(path.read_text(encoding="utf-8"), f"pipeline/{path.name}", modules)]
+
+
+# --------------------------------------------------------------------------
+# Schema
+# --------------------------------------------------------------------------
+
+_COMMENT = re.compile(r"--[^\n]*")
+_NAME = r"((?:public\.)?(?:\"[^\"]+\"|\w+))"
+_TABLE = re.compile(r"create\s+table\s+(?:if\s+not\s+exists\s+)?" + _NAME + r"\s*\(", re.I)
+_INDEX = re.compile(r"create\s+(unique\s+)?index\s+(?:concurrently\s+)?(?:if\s+not\s+exists\s+)?(\w+)\s+on\s+"
+                    r"(?:only\s+)?" + _NAME + r"\s*(?:using\s+\w+\s*)?\(", re.I)
+_DROP = re.compile(r"drop\s+index\s+(?:concurrently\s+)?(?:if\s+exists\s+)?(?:public\.)?(\w+)", re.I)
+_ALTER = re.compile(r"alter\s+table\s+(?:only\s+)?(?:if\s+exists\s+)?" + _NAME +
+                    r"\s+add\s+(?:constraint\s+(\w+)\s+)?(primary\s+key|unique)\s*\(", re.I)
+
+
+def _parenthesised(text: str, start: int) -> str:
+    """The text inside the parenthesis opened just before ``start``."""
+    depth = 1
+    for i in range(start, len(text)):
+        depth += {"(": 1, ")": -1}.get(text[i], 0)
+        if depth == 0:
+            return text[start:i]
+    return text[start:]
+
+
+def _split(body: str) -> list:
+    parts, depth, current = [], 0, []
+    for ch in body:
+        depth += {"(": 1, ")": -1}.get(ch, 0)
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def _columns(text: str) -> tuple:
+    """Index / constraint column list → identifiers (expressions are kept as written)."""
+    out = []
+    for part in _split(text):
+        token = re.sub(r"\s+(asc|desc|nulls\s+(first|last))\b.*$", "", part, flags=re.I).strip()
+        out.append(_ident(token) if re.fullmatch(r"\"[^\"]+\"|\w+", token) else token.lower())
+    return tuple(out)
+
+
+def load_indexes(text: str, source: str = "", indexes: Optional[dict] = None) -> dict:
+    """Fold one SQL file into ``{table: {index name: Index}}``."""
+    indexes = indexes if indexes is not None else {}
+    text = _COMMENT.sub("", text)
+    for match in _TABLE.finditer(text):
+        table = _ident(match.group(1))
+        body = _parenthesised(text, match.end())
+        for item in _split(body):
+            lower = item.lower()
+            named = re.match(r"constraint\s+(\w+)\s+(.*)$", item, re.I | re.S)
+            name, clause = (named.group(1), named.group(2)) if named else (None, item)
+            key = re.match(r"(primary\s+key|unique)\s*\((.*)\)", clause.strip(), re.I | re.S)
+            if key:
+                kind = "pkey" if key.group(1).lower().startswith("primary") else "key"
+                columns = _columns(key.group(2))
+            elif re.search(r"\bprimary\s+key\b", lower) or re.search(r"\bunique\b", lower):
+                kind = "pkey" if "primary key" in lower else "key"
+                columns = (_ident(item.split()[0]),)
+            else:
+                continue
+            name = name or f"{table}_{'_'.join(columns)}_{kind}"
+            indexes.setdefault(table, {})[name] = Index(name, table, columns, True, source)
+    for match in _ALTER.finditer(text):
+        table = _ident(match.group(1))
+        columns = _columns(_parenthesised(text, match.end()))
+        name = match.group(2) or f"{table}_{'_'.join(columns)}_key"
+        indexes.setdefault(table, {})[name] = Index(name, table, columns, True, source)
+    for match in _INDEX.finditer(text):
+        table = _ident(match.group(3))
+        index = Index(match.group(2), table, _columns(_parenthesised(text, match.end())), bool(match.group(1)), source)
+        indexes.setdefault(table, {})[index.name] = index
+    for match in _DROP.finditer(text):
+        for table in indexes.values():
+            table.pop(match.group(1), None)
+    return indexes
+
+
+_WORD = re.compile(r'"[^"]+"|\w+')
+_CONSUMER_KINDS = {"CREATE VIEW", "CREATE MATERIALIZED", "CREATE FUNCTION", "CREATE PROCEDURE", "CREATE TRIGGER",
+                   "CREATE RULE", "CREATE POLICY"}
+_COLUMN_FK  = re.compile(r"(?:^|,)\s*(\"[^\"]+\"|\w+)\s+[^,]*?\breferences\b", re.I)
+_ADDED_FK   = re.compile(r"\badd\s+(?:column\s+)?(?:if\s+not\s+exists\s+)?(\"[^\"]+\"|\w+)\s+[^,]*?\breferences\b", re.I)
+_FOREIGN    = re.compile(r"\bforeign\s+key\s*\(([^)]*)\)", re.I)
+
+
+_TARGET = re.compile(r"(?:create|alter)\s+table\s+(?:if\s+(?:not\s+)?exists\s+)?(?:only\s+)?" + _NAME, re.I)
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(_ident(w) for w in _WORD.findall(text))
+
+
+def load_consumers(sql_dir) -> list:
+    """
+    ``(source, identifiers)`` for everything in ``sql/`` that reads a table
+    without going through PostgREST: view, function, trigger and policy
+    bodies, and foreign keys (a referencing column's index serves the FK
+    checks and cascades).
+    """
+    from .migrations import split_statements
+
+    consumers = []
+    for path in sorted(Path(sql_dir).rglob("*.sql")):
+        source = str(path.relative_to(sql_dir))
+        for statement in split_statements(path.read_text(encoding="utf-8", errors="replace")):
+            kind = statement.kind
+            if kind in _CONSUMER_KINDS:
+                consumers.append((f"{source}:{statement.line}", _words(statement.sql)))
+            elif kind in ("CREATE TABLE", "ALTER TABLE") and "references" in statement.sql.lower():
+                table = _ident(_TARGET.match(statement.sql).group(1))
+                if kind == "CREATE TABLE":
+                    columns = _COLUMN_FK.findall(_parenthesised(statement.sql, statement.sql.index("(") + 1))
+                else:
+                    columns = _ADDED_FK.findall(statement.sql)
+                columns += [c for group in _FOREIGN.findall(statement.sql) for c in _columns(group)[:1]]
+                for column in columns:
+                    consumers.append((f"{source}:{statement.line}", frozenset({table, _ident(column)})))
+    return consumers
+
+
+_ADD_COLUMN = re.compile(r"\badd\s+(?:column\s+)?(?:if\s+not\s+exists\s+)?(?!(?:constraint|primary|unique|foreign|check)\b)"
+                         r"(\"[^\"]+\"|\w+)", re.I)
+_NOT_COLUMN = {"constraint", "primary", "unique", "foreign", "check", "exclude", "like"}
+
+
+def load_columns(sql_dir) -> dict:
+    """
+    ``{table: {column}}`` from every CREATE TABLE and ALTER TABLE … ADD COLUMN
+    in ``sql/``; tables created elsewhere (only altered here) are left out.
+    """
+    from .migrations import split_statements
+
+    columns, created = {}, set()
+    for path in sorted(Path(sql_dir).rglob("*.sql")):
+        for statement in split_statements(_COMMENT.sub("", path.read_text(encoding="utf-8", errors="replace"))):
+            target = _TARGET.match(statement.sql)
+            if statement.kind == "CREATE TABLE" and target and "(" in statement.sql:
+                body = _parenthesised(statement.sql, statement.sql.index("(") + 1)
+                found = [item.split()[0] for item in _split(body) if item.split()[0].lower() not in _NOT_COLUMN]
+                created.add(_ident(target.group(1)))
+            elif statement.kind == "ALTER TABLE" and target:
+                found = _ADD_COLUMN.findall(statement.sql)
+            else:
+                continue
+            columns.setdefault(_ident(target.group(1)), set()).update(_ident(c) for c in found)
+    return {table: found for table, found in columns.items() if table in created}
+
+
+def load_schema(sql_dir) -> dict:
+    """``{table: [Index]}`` from every ``.sql`` file, ``schema/`` first, then the rest in name order."""
+    paths = sorted(Path(sql_dir).rglob("*.sql"), key=lambda p: (p.parent.name != "schema", str(p)))
+    indexes = {}
+    for path in paths:
+        load_indexes(path.read_text(encoding="utf-8", errors="replace"), str(path.relative_to(sql_dir)), indexes)
+    return {table: list(found.values()) for table, found in indexes.items()}
+
+
+# --------------------------------------------------------------------------
+# Advice
+# --------------------------------------------------------------------------
+
+def usable(index: Index, shape: QueryShape) -> int:
+    """How many leading index columns the shape's filters can use (equalities, then at most one range)."""
+    equality, ranged = set(shape.equality), set(shape.ranged)
+    n = 0
+    for column in index.columns:
+        if column in equality:
+            n += 1
+        elif column in ranged:
+            return n + 1
+        else:
+            break
+    if n == 0 and not (equality or ranged) and shape.order and index.columns[0] == shape.order[0]:
+        return 1
+    return n
+
+
+def advise(shapes: list, schema: dict, consumers: tuple = ()) -> dict:
+    """
+    ``consumers`` are :func:`load_consumers` entries: an index whose table and
+    leading column a view, function, trigger, policy or foreign key mentions
+    is in use even when no captured query filters on it.
+    """
+    missing, partial = {}, {}
+    used, unknown = {}, set()
+    for shape in shapes:
+        if shape.table not in schema:
+            # Defined outside sql/ (dashboard-created): its keys are unknown, so no advice.
+            unknown.add(shape.table)
+            continue
+        indexes = schema[shape.table]
+        used.setdefault(shape.table, set()).update([c for c, _ in shape.filters] + shape.order)
+        candidate = shape.candidate()
+        if not candidate:
+            continue
+        best = max((usable(i, shape) for i in indexes), default=0)
+        if best == 0:
+            missing.setdefault((shape.table, candidate), []).append(shape.source)
+        elif best < len(shape.equality):
+            partial.setdefault((shape.table, candidate), []).append(shape.source)
+
+    # A suggestion that leads a longer one on the same table is served by the longer one.
+    def collapse(found):
+        keys = list(found)
+        out = []
+        for table, columns in keys:
+            wider = [c for t, c in keys if t == table and c != columns and c[:len(columns)] == columns]
+            if not wider:
+                sources = [s for t, c in keys if t == table and columns[:len(c)] == c for s in found[(t, c)]]
+                out.append({"table": table, "columns": list(columns), "shapes": sorted(set(sources))})
+        return sorted(out, key=lambda r: (r["table"], r["columns"]))
+
+    unused, redundant = [], []
+    for table, indexes in sorted(schema.items()):
+        for index in indexes:
+            if index.constraint:
+                continue
+            wider = [o.name for o in indexes if o is not index and len(o.columns) >= len(index.columns)
+                     and o.columns[:len(index.columns)] == index.columns]
+            if wider:
+                redundant.append({"table": table, "index": index.name, "columns": list(index.columns),
+                                  "coveredBy": wider[0], "source": index.source})
+            elif (table in used and index.columns[0] not in used[table]
+                  and not any(table in words and index.columns[0] in words for _, words in consumers)):
+                unused.append({"table": table, "index": index.name, "columns": list(index.columns),
+                               "source": index.source})
+    return {"missing": collapse(missing), "partial": collapse(partial), "unused": unused, "redundant": redundant,
+            "unknownTables": sorted(unknown)}
+
+
+def index_sql(table: str, columns: list) -> str:
+    name = re.sub(r"\W+", "_", f"idx_{table}_{'_'.join(columns)}".lower())
+    quoted = ", ".join(_quote(c) for c in columns)
+    return f"create index if not exists {name} on public.{_quote(table)} ({quoted});"
+
+
+def _quote(name: str) -> str:
+    return name if re.fullmatch(r"[a-z_][a-z0-9_]*", name) else '"' + name.replace('"', '""') + '"'
+
+
+# --------------------------------------------------------------------------
+# EXPLAIN replay
+# --------------------------------------------------------------------------
+
+class Explainer:
+    """Replays shapes against a local Postgres with ``EXPLAIN (ANALYZE, FORMAT JSON)``."""
+
+    def __init__(self, dsn: str, runs: int = 3):
+        try:
+            import psycopg
+        except ImportError as exc:
+            raise RuntimeError("EXPLAIN replay needs psycopg (pip install 'psycopg[binary]')") from exc
+        self.conn = psycopg.connect(dsn)
+        self.runs = runs
+        self.errors = (psycopg.Error,)        # what one replay may raise without ending the run
+
+    def sample(self, table: str, column: str):
+        with self.conn.cursor() as cur:
+            cur.execute(f"select {_quote(column)} from public.{_quote(table)} where {_quote(column)} is not null limit 1")
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def statement(self, shape: QueryShape) -> tuple:
+        where, params = [], []
+        for column, op in shape.filters:
+            if op in EQUALITY | RANGE:
+                value = self.sample(shape.table, column)
+                if op == "is" or value is None:
+                    where.append(f"{_quote(column)} is null")
+                    continue
+                sign = {"eq": "=", "in": "=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}[op]
+                where.append(f"{_quote(column)} {sign} %s")
+                params.append(value)
+        sql = f"select * from public.{_quote(shape.table)}"
+        if where:
+            sql += " where " + " and ".join(where)
+        if shape.order:
+            sql += " order by " + ", ".join(_quote(c) for c in shape.order)
+        return sql + " limit 1000", params
+
+    def time(self, sql: str, params: list) -> tuple:
+        """``(best execution ms of the runs, top plan node type)``."""
+        best, node = None, ""
+        with self.conn.cursor() as cur:
+            for _ in range(self.runs):
+                cur.execute("explain (analyze, format json) " + sql, params)
+                plan = cur.fetchone()[0][0]
+                best = plan["Execution Time"] if best is None else min(best, plan["Execution Time"])
+                node = _scan(plan["Plan"])
+        return best, node
+
+    def measure(self, shape: QueryShape, columns: list) -> dict:
+        """Before / after the suggested index, which is created in a transaction and rolled back."""
+        try:
+            sql, params = self.statement(shape)
+            before, before_node = self.time(sql, params)
+            with self.conn.cursor() as cur:
+                cur.execute(index_sql(shape.table, columns))
+                cur.execute(f"analyze public.{_quote(shape.table)}")
+            after, after_node = self.time(sql, params)
+        finally:
+            self.conn.rollback()
+        return {"shape": shape.source, "table": shape.table, "sql": sql, "beforeMs": round(before, 3),
+                "afterMs": round(after, 3), "speedup": round(before / after, 2) if after else None,
+                "before": before_node, "after": after_node}
+
+
+def _scan(plan: dict) -> str:
+    """The scan node a plan bottoms out in (Seq Scan, Index Scan …)."""
+    while plan.get("Plans") and "Scan" not in plan["Node Type"]:
+        plan = plan["Plans"][0]
+    return plan["Node Type"]
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+def measure_all(explainer, report: dict, shapes: list) -> list:
+    """
+    Replay every missing / partial suggestion against the shapes it came from;
+    a replay that fails is recorded with its error and the rest still run.
+    """
+    by_shape = {(s.source, s.table): s for s in shapes}
+    measured = []
+    for entry in report["missing"] + report["partial"]:
+        for source in entry["shapes"]:
+            try:
+                result = explainer.measure(by_shape[(source, entry["table"])], entry["columns"])
+            except explainer.errors as exc:
+                measured.append({"shape": source, "table": entry["table"], "error": str(exc).strip()})
+                print(f"  failed     {source} on {entry['table']}: {str(exc).strip()}")
+                continue
+            measured.append(result)
+            print(f"  measured   {source}: {result['beforeMs']} → {result['afterMs']} ms "
+                  f"({result['before']} → {result['after']})")
+    return measured
+
+
+def run(api_dir, sql_dir, out_dir, dsn: Optional[str] = None, ts_dirs: tuple = (),
+        pipeline_dir=None) -> dict:
+    """``api_dir``'s query modules, plus every ``ts_dirs`` tree and the pipeline's client calls, against ``sql_dir``."""
+    shapes = capture_dir(api_dir) + [s for d in ts_dirs for s in capture_dir(d, recursive=True)]
+    shapes += capture_pipeline(pipeline_dir if pipeline_dir is not None else Path(__file__).parent)
+    schema = load_schema(sql_dir)
+    report = advise(shapes, schema, load_consumers(sql_dir))
+    print(f"  {len(shapes)} query shape(s) over {len({s.table for s in shapes})} table(s); "
+          f"{sum(len(v) for v in schema.values())} index(es) in {len(schema)} table(s)")
+    for entry in report["missing"]:
+        print(f"  missing    {index_sql(entry['table'], entry['columns'])}  ← {', '.join(entry['shapes'])}")
+    for entry in report["partial"]:
+        print(f"  partial    {entry['table']} ({', '.join(entry['columns'])})  ← {', '.join(entry['shapes'])}")
+    for entry in report["redundant"]:
+        print(f"  redundant  {entry['index']} on {entry['table']} — leads {entry['coveredBy']}")
+    for entry in report["unused"]:
+        print(f"  unused     {entry['index']} on {entry['table']} ({', '.join(entry['columns'])}) — "
+              f"no captured query, view, function, trigger or foreign key uses it")
+    if report["unknownTables"]:
+        print(f"  not in sql/: {', '.join(report['unknownTables'])}")
+
+    if dsn:
+        report["measured"] = measure_all(Explainer(dsn), report, shapes)
+
+    report.update(generatedAt=dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+                  shapes=[asdict(s) for s in shapes])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / ARTIFACT_NAME
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"  → {path}")
+    return report
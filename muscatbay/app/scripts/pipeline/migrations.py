@@ -0,0 +1,432 @@
+"""
+A migration runner for ``sql/migrations/``, measured on a local stand-in first.
+
+The files have been pasted into the Supabase SQL editor by hand, so nothing
+records which ran, what they cost or whether they are safe to re-run. This
+runner:
+
+    tracks     every applied file in ``schema_migrations``
+               (20261019_schema_migrations.sql, applied first) with the
+               checksum of its text; an edited file is reported, never re-run
+    orders     dated files (``20260703_…``) by version; undated one-off loads
+               (``update_water_apr_26.sql``, ``full_water_26_sync.sql`` …) run
+               only when named on the command line
+    measures   each statement's time and, from ``pg_locks`` after it, the
+               relation locks it took and how long they stayed held (until
+               the batch commits) — written to
+               ``pipeline-artifacts/migrations/{version}.{local|remote}.json``
+    chunks     data migrations (only INSERT / UPDATE / DELETE / SELECT) into
+               batches of ``chunk`` statements, one transaction each; progress
+               is recorded after every batch, so an interrupted load resumes at
+               the next batch instead of starting over. Schema migrations run
+               as one transaction (explicit BEGIN / COMMIT in the file are
+               dropped; CREATE INDEX CONCURRENTLY runs on its own, outside one)
+    guards     a DSN that is not local is refused unless ``allow_remote`` and
+               every pending migration already has a local report for the same
+               checksum — its cost is known before it touches production
+    lints      statements that fail or duplicate data on a second run
+               (CREATE without IF NOT EXISTS / OR REPLACE, CREATE POLICY or
+               TRIGGER without a DROP … IF EXISTS before it, INSERT without ON
+               CONFLICT / NOT EXISTS, …)
+
+Splitting, ordering, batching and linting are plain functions; only
+:class:`Runner` needs a database (and ``psycopg``).
+"""
+
+import datetime as dt
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+TABLE         = "schema_migrations"
+BOOTSTRAP     = "20261019_schema_migrations"
+CHUNK         = 100                 # statements per data-migration batch
+REPORT_DIR    = "migrations"        # under the artifact directory
+DATA_KINDS    = {"INSERT", "UPDATE", "DELETE", "SELECT", "WITH"}
+TRANSACTION   = {"BEGIN", "COMMIT", "END", "ROLLBACK", "START"}
+LOCAL_HOSTS   = {"", "localhost", "127.0.0.1", "::1"}
+
+_DOLLAR = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+_NAMED  = re.compile(r'^(?:drop (policy|trigger|view) if exists|create (policy|trigger|view)) ("[^"]*"|\S+)')
+LOCKS_SQL = """
+    select coalesce(c.relname, l.locktype), l.mode
+      from pg_locks l left join pg_class c on c.oid = l.relation
+     where l.pid = pg_backend_pid() and l.granted and l.locktype = 'relation'
+       and coalesce(c.relname, '') not like 'pg\\_%'
+"""
+
+
+@dataclass
+class Statement:
+    sql: str
+    line: int
+
+    @property
+    def words(self) -> list:
+        return re.sub(r"\s+", " ", self.sql).strip().lower().split(" ")
+
+    @property
+    def kind(self) -> str:
+        words = [w.upper() for w in self.words[:3]]
+        if words[0] in ("CREATE", "ALTER", "DROP") and len(words) > 1:
+            if words[1] == "OR" and len(self.words) > 3:              # CREATE OR REPLACE FUNCTION
+                return f"{words[0]} {self.words[3].upper()}"
+            if words[1] == "UNIQUE" and len(words) > 2:
+                return f"{words[0]} {words[2]}"
+            return f"{words[0]} {words[1]}"
+        return words[0]
+
+    @property
+    def concurrent(self) -> bool:
+        return " concurrently " in f" {' '.join(self.words)} "
+
+
+def split_statements(text: str) -> list:
+    """
+    The statements of a SQL script, without comments: quotes, quoted
+    identifiers and dollar-quoted bodies (``$$``, ``$fn$``) keep their
+    semicolons.
+    """
+    statements, buf, start_line = [], [], None
+    i, line, n = 0, 1, len(text)
+    while i < n:
+        ch = text[i]
+        if ch == "-" and text.startswith("--", i):
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        if ch == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            line += text.count("\n", i, end)
+            i = end
+            continue
+        if start_line is None and not ch.isspace() and ch != ";":
+            start_line = line
+        if ch in ("'", '"'):
+            end = i + 1
+            while end < n:
+                if text[end] == ch:
+                    if end + 1 < n and text[end + 1] == ch:      # '' / "" escape
+                        end += 2
+                        continue
+                    break
+                end += 1
+            end = min(end + 1, n)
+        elif ch == "$" and _DOLLAR.match(text, i):
+            tag = _DOLLAR.match(text, i).group(0)
+            close = text.find(tag, i + len(tag))
+            end = n if close < 0 else close + len(tag)
+        elif ch == ";":
+            sql = "".join(buf).strip()
+            if sql:
+                statements.append(Statement(sql, start_line))
+            buf, start_line = [], None
+            i += 1
+            continue
+        else:
+            end = i + 1
+        buf.append(text[i:end])
+        line += text.count("\n", i, end)
+        i = end
+    sql = "".join(buf).strip()
+    if sql:
+        statements.append(Statement(sql, start_line))
+    return statements
+
+
+@dataclass
+class Batch:
+    statements: list
+    autocommit: bool = False
+
+
+@dataclass
+class Migration:
+    version: str
+    text: str
+    checksum: str = field(init=False)
+    statements: list = field(init=False)
+
+    def __post_init__(self):
+        self.checksum = hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+        self.statements = [s for s in split_statements(self.text) if s.kind not in TRANSACTION]
+
+    @classmethod
+    def from_path(cls, path) -> "Migration":
+        path = Path(path)
+        return cls(path.stem, path.read_text(encoding="utf-8"))
+
+    @property
+    def dated(self) -> bool:
+        return self.version[:1].isdigit()
+
+    @property
+    def data(self) -> bool:
+        return bool(self.statements) and all(s.kind in DATA_KINDS for s in self.statements)
+
+    def batches(self, chunk: int = CHUNK) -> list:
+        if self.data:
+            return [Batch(self.statements[i:i + chunk]) for i in range(0, len(self.statements), chunk)]
+        batches, current = [], []
+        for statement in self.statements:
+            if statement.concurrent:
+                if current:
+                    batches.append(Batch(current))
+                batches.append(Batch([statement], autocommit=True))
+                current = []
+            else:
+                current.append(statement)
+        if current:
+            batches.append(Batch(current))
+        return batches
+
+
+def discover(directory) -> list:
+    """Every migration in ``directory``: dated ones in version order, then the undated ones by name."""
+    migrations = [Migration.from_path(p) for p in Path(directory).glob("*.sql")]
+    return sorted(migrations, key=lambda m: (not m.dated, m.version))
+
+
+def pending(migrations: list, applied: dict, names: tuple = ()) -> list:
+    """
+    What to run: the named migrations (any, in discovery order) or, without
+    names, every dated one not applied yet. A partially applied one is pending
+    until its last batch commits.
+    """
+    wanted = {n[:-4] if n.endswith(".sql") else n for n in names}
+    unknown = wanted - {m.version for m in migrations}
+    if unknown:
+        raise ValueError(f"no such migration: {', '.join(sorted(unknown))}")
+    out = []
+    for m in migrations:
+        row = applied.get(m.version)
+        if (m.version in wanted if wanted else m.dated) and (row is None or row["status"] == "partial"):
+            out.append(m)
+    return out
+
+
+def _table(name: str) -> str:
+    name = name.split("(")[0]
+    return name[7:] if name.startswith("public.") else name
+
+
+def lint(migration: Migration) -> list:
+    """``(line, message)`` for each statement that fails or duplicates data when the file runs twice."""
+    issues, dropped, cleared = [], set(), set()
+    for s in migration.statements:
+        text = " ".join(s.words)
+        if text.startswith("delete from "):
+            cleared.add(_table(s.words[2]))
+        named = _NAMED.match(text)
+        if named and named.group(1):
+            dropped.add((named.group(1), named.group(3)))
+            continue
+        problem = None
+        if re.match(r"create (unlogged )?table (?!if not exists)", text):
+            problem = "CREATE TABLE without IF NOT EXISTS"
+        elif re.match(r"create (unique )?index (?!(concurrently )?if not exists)", text):
+            problem = "CREATE INDEX without IF NOT EXISTS"
+        elif re.match(r"alter table .* add column (?!if not exists)", text):
+            problem = "ADD COLUMN without IF NOT EXISTS"
+        elif re.match(r"create (function|procedure) ", text):
+            problem = f"CREATE {s.words[1].upper()} without OR REPLACE"
+        elif named and (named.group(2), named.group(3)) not in dropped:
+            problem = f"CREATE {s.words[1].upper()} without a DROP {s.words[1].upper()} IF EXISTS before it"
+        elif re.match(r"create (type|schema|extension|sequence) (?!if not exists)", text):
+            problem = f"CREATE {s.words[1].upper()} fails when it exists"
+        elif re.match(r"alter publication \S+ add table", text):
+            problem = "ALTER PUBLICATION … ADD TABLE fails when the table is already published"
+        elif (text.startswith("insert into ") and " on conflict " not in text and " not exists " not in text
+              and _table(s.words[2]) not in cleared):
+            problem = "INSERT without ON CONFLICT, NOT EXISTS or a DELETE before it inserts twice"
+        if problem:
+            issues.append((s.line, problem))
+    return issues
+
+
+def is_local(dsn: str) -> bool:
+    """Whether a libpq DSN (URL or ``key=value``) points at this machine."""
+    if "://" in dsn:
+        host = urlparse(dsn).hostname or ""
+    else:
+        match = re.search(r"(?:^|\s)host\s*=\s*(\S+)", dsn)
+        host = match.group(1) if match else ""
+    return host in LOCAL_HOSTS or host.startswith("/")
+
+
+def report_path(out_dir, migration: Migration, target: str) -> Path:
+    return out_dir / REPORT_DIR / f"{migration.version}.{target}.json"
+
+
+def measured_locally(out_dir, migration: Migration) -> bool:
+    path = report_path(out_dir, migration, "local")
+    return path.exists() and json.loads(path.read_text(encoding="utf-8")).get("checksum") == migration.checksum
+
+
+# --------------------------------------------------------------------------
+# Runner
+# --------------------------------------------------------------------------
+
+class Runner:
+    """Applies migrations over one connection, timing every statement and watching its locks."""
+
+    def __init__(self, dsn: str):
+        try:
+            import psycopg
+        except ImportError as exc:
+            raise RuntimeError("the migration runner needs psycopg (pip install 'psycopg[binary]')") from exc
+        self.conn = psycopg.connect(dsn, autocommit=True)
+
+    def ensure_table(self, directory) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute("select to_regclass(%s)", (f"public.{TABLE}",))
+            if cur.fetchone()[0] is None:
+                with self.conn.transaction():
+                    for statement in Migration.from_path(Path(directory) / f"{BOOTSTRAP}.sql").statements:
+                        cur.execute(statement.sql)
+
+    def applied(self) -> dict:
+        with self.conn.cursor() as cur:
+            cur.execute(f"select version, checksum, status, chunks_done from public.{TABLE}")
+            return {r[0]: {"checksum": r[1], "status": r[2], "chunks_done": r[3]} for r in cur.fetchall()}
+
+    def record(self, cur, migration: Migration, status: str, done: int, total: int, ms: Optional[float]) -> None:
+        cur.execute(
+            f"insert into public.{TABLE} (version, checksum, status, chunks_done, chunks_total, statements, duration_ms)"
+            " values (%s, %s, %s, %s, %s, %s, %s)"
+            " on conflict (version) do update set checksum = excluded.checksum, status = excluded.status,"
+            " chunks_done = excluded.chunks_done, chunks_total = excluded.chunks_total,"
+            " statements = excluded.statements, duration_ms = excluded.duration_ms, applied_at = now()",
+            (migration.version, migration.checksum, status, done, total, len(migration.statements), ms))
+
+    def _run_batch(self, cur, batch: Batch) -> tuple:
+        """``(statement timings, lock holds)`` of one batch."""
+        timings, seen = [], {}
+        for statement in batch.statements:
+            started = time.perf_counter()
+            cur.execute(statement.sql)
+            elapsed = (time.perf_counter() - started) * 1000
+            timings.append({"line": statement.line, "kind": statement.kind, "ms": round(elapsed, 3),
+                            "rows": cur.rowcount if cur.rowcount is not None and cur.rowcount >= 0 else None})
+            if not batch.autocommit:
+                cur.execute(LOCKS_SQL)
+                for relation, mode in cur.fetchall():
+                    seen.setdefault((relation, mode), (statement.line, time.perf_counter()))
+        return timings, seen
+
+    def apply(self, migration: Migration, chunk: int = CHUNK, resume_at: int = 0) -> dict:
+        batches = migration.batches(chunk)
+        report = {"version": migration.version, "checksum": migration.checksum, "data": migration.data,
+                  "batches": len(batches), "resumedAt": resume_at, "statements": [], "locks": []}
+        started = time.perf_counter()
+        with self.conn.cursor() as cur:
+            for n, batch in enumerate(batches[resume_at:], start=resume_at + 1):
+                last = n == len(batches)
+                if batch.autocommit:
+                    timings, seen = self._run_batch(cur, batch)
+                    committed = time.perf_counter()
+                else:
+                    with self.conn.transaction():
+                        timings, seen = self._run_batch(cur, batch)
+                        if migration.data or last:
+                            ms = (time.perf_counter() - started) * 1000
+                            self.record(cur, migration, "applied" if last else "partial", n, len(batches), ms)
+                    committed = time.perf_counter()
+                report["statements"].extend(timings)
+                report["locks"].extend(
+                    {"relation": relation, "mode": mode, "statementLine": line,
+                     "heldMs": round((committed - since) * 1000, 3)}
+                    for (relation, mode), (line, since) in seen.items())
+                if last and batch.autocommit:
+                    self.record(cur, migration, "applied", n, len(batches), (time.perf_counter() - started) * 1000)
+        report["totalMs"] = round((time.perf_counter() - started) * 1000, 3)
+        return report
+
+    def baseline(self, migrations: list) -> None:
+        """Record migrations as already applied (by hand, before the runner) without running them."""
+        with self.conn.cursor() as cur, self.conn.transaction():
+            for m in migrations:
+                self.record(cur, m, "baseline", 0, 0, None)
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+def summarize(report: dict, top: int = 3) -> list:
+    """Log lines: the slowest statements and the strongest locks held longest."""
+    lines = [f"  {report['version']}: {len(report['statements'])} statement(s) in {report['batches']} batch(es), "
+             f"{report['totalMs']:.0f} ms"]
+    for s in sorted(report["statements"], key=lambda s: -s["ms"])[:top]:
+        lines.append(f"    {s['ms']:>10.1f} ms  line {s['line']}: {s['kind']}"
+                     + (f" ({s['rows']} row(s))" if s["rows"] is not None else ""))
+    strong = [lock for lock in report["locks"] if lock["mode"] in ("AccessExclusiveLock", "ExclusiveLock", "ShareLock",
+                                                                    "ShareRowExclusiveLock")]
+    for lock in sorted(strong, key=lambda lock: -lock["heldMs"])[:top]:
+        lines.append(f"    {lock['mode']} on {lock['relation']} held {lock['heldMs']:.0f} ms "
+                     f"(from line {lock['statementLine']})")
+    return lines
+
+
+def run(directory, out_dir, dsn: str = "", names: tuple = (), chunk: int = CHUNK, dry_run: bool = False,
+        allow_remote: bool = False, baseline: Optional[str] = None) -> list:
+    migrations = discover(directory)
+    target = "local" if not dsn or is_local(dsn) else "remote"
+    if target == "remote" and not (allow_remote or dry_run):
+        raise RuntimeError("refusing a non-local DSN without --allow-remote; run the migrations on a local stand-in first")
+    runner = Runner(dsn) if dsn and not dry_run else None
+    if runner is not None:
+        runner.ensure_table(directory)
+    applied = runner.applied() if runner is not None else {}
+
+    for m in migrations:
+        row = applied.get(m.version)
+        if row and row["checksum"] != m.checksum and row["status"] != "baseline":
+            print(f"  {m.version}: changed since it was applied (checksum differs) — not re-run")
+    todo = pending(migrations, applied, names)
+
+    if baseline:
+        marked = [m for m in todo if m.dated and m.version <= baseline]
+        if runner is not None:
+            runner.baseline(marked)
+        print(f"  {len(marked)} migration(s) up to {baseline} recorded as applied without running them")
+        return []
+
+    if target == "remote" and not dry_run:
+        unmeasured = [m.version for m in todo if not measured_locally(out_dir, m)]
+        if unmeasured:
+            raise RuntimeError(f"not measured on a local stand-in yet: {', '.join(unmeasured)}")
+
+    reports = []
+    for m in todo:
+        row = applied.get(m.version)
+        resume_at = row["chunks_done"] if row and row["status"] == "partial" else 0
+        if row and row["status"] == "partial" and row["checksum"] != m.checksum:
+            raise RuntimeError(f"{m.version} is partially applied and its file has changed since; resolve by hand")
+        batches = m.batches(chunk)
+        issues = lint(m)
+        print(f"  {m.version}: {len(m.statements)} statement(s), {len(batches)} batch(es)"
+              f"{' (data, chunked)' if m.data and len(batches) > 1 else ''}"
+              f"{f', resuming at batch {resume_at + 1}' if resume_at else ''}")
+        for line, problem in issues:
+            print(f"    line {line}: {problem}")
+        if runner is None:
+            continue
+        report = runner.apply(m, chunk, resume_at)
+        report.update(target=target, lint=[{"line": ln, "problem": p} for ln, p in issues],
+                      appliedAt=dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"))
+        path = report_path(out_dir, m, target)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        for line in summarize(report):
+            print(line)
+        reports.append(report)
+    if not todo:
+        print("  nothing to apply")
+    return reports
@@ -0,0 +1,406 @@
+"""
+PPM scheduling index.
+
+The Maintenance tab answers "what is due in the next N days" by parsing
+``next_ppm_date`` on every row it scans. Here each asset's due date is parsed
+once into an epoch-day integer and kept in sorted arrays:
+
+    global axis     (due day, asset) sorted by day — a due window or the overdue
+                    set is two ``searchsorted`` calls and a slice
+    group axes      one per dimension (zone, discipline), sorted by
+                    (label code, due day), so "due in 30 days in Zone 3" is the
+                    same two lookups and "due in 30 days per zone" is one
+                    vectorised ``searchsorted`` over every label
+
+:meth:`PpmIndex.update` takes the rows that changed, recomputes only their next
+due date (last PPM + interval) and moves their entries within the sorted
+arrays. :meth:`PpmIndex.calendar` lays every asset's occurrences over a
+12-month window in one broadcast (assets × occurrences), not a loop per asset.
+
+Intervals come from ``ppm_interval_months`` when set, else from the frequency
+label (the codes entities/asset.ts ``normalizePpmFrequency`` understands).
+"On Condition" and unknown frequencies have no interval: their stored next
+date is still indexed, they are just never rolled forward.
+"""
+
+import calendar
+import datetime as dt
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .alerts import parse_tracker_date
+from .assets import field
+
+EPOCH = dt.date(1970, 1, 1)
+WEEK  = 7
+SPAN  = 1_000_000         # group key = label code * SPAN + epoch day
+
+# normalizePpmFrequency's codes and labels (upper-cased) → months between visits; 0 = weekly
+FREQUENCY_MONTHS = {
+    "MONTHLY": 1, "Q": 3, "QUARTERLY": 3, "4": 3, "4× / YEAR": 3, "4M": 4, "EVERY 4 MONTHS": 4,
+    "HY": 6, "SEMI-ANNUAL": 6, "2": 6, "2× / YEAR": 6, "ANNUAL": 12, "WEEKLY": 0,
+}
+DIMENSIONS = ("zone", "discipline")
+
+
+def epoch_day(day: dt.date) -> int:
+    return (day - EPOCH).days
+
+
+def from_epoch(days: int) -> dt.date:
+    return EPOCH + dt.timedelta(days=int(days))
+
+
+def interval_months(row: dict) -> Optional[int]:
+    """Months between visits (0 = weekly), or ``None`` when the asset has no fixed interval."""
+    raw = field(row, "ppm_interval_months")
+    try:
+        months = int(float(raw)) if raw not in (None, "") else 0
+    except (TypeError, ValueError):
+        months = 0
+    if months > 0:
+        return months
+    return FREQUENCY_MONTHS.get(str(field(row, "ppm_frequency") or "").strip().upper())
+
+
+def add_months(day: dt.date, months: int) -> dt.date:
+    """Same day-of-month ``months`` later, clamped to the month's last day (31 Jan + 1 → 28/29 Feb)."""
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    return dt.date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def advance(day: dt.date, months: int) -> dt.date:
+    return day + dt.timedelta(days=WEEK) if months == 0 else add_months(day, months)
+
+
+def next_due(row: dict) -> Optional[dt.date]:
+    """Last PPM + interval when both are known, else the stored ``next_ppm_date``."""
+    last = parse_tracker_date(field(row, "last_ppm_date"))
+    months = interval_months(row)
+    if last is not None and months is not None:
+        return advance(last, months)
+    return parse_tracker_date(field(row, "next_ppm_date"))
+
+
+def fingerprint(row: dict) -> str:
+    """What a next-due date is derived from; a manual edit of ``next_ppm_date`` alone is not a change."""
+    return "|".join(str(field(row, c) or "") for c in ("last_ppm_date", "ppm_interval_months", "ppm_frequency"))
+
+
+class _Axis:
+    """Sorted ``keys`` with the asset position of each entry alongside."""
+
+    def __init__(self, keys: np.ndarray, positions: np.ndarray):
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order].astype(np.int64)
+        self.positions = positions[order].astype(np.int64)
+
+    def between(self, lo: int, hi: int) -> np.ndarray:
+        """Positions whose key is in ``[lo, hi]``, in key order."""
+        a = np.searchsorted(self.keys, lo, side="left")
+        b = np.searchsorted(self.keys, hi, side="right")
+        return self.positions[a:b]
+
+    def count(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.keys, hi, side="right") - np.searchsorted(self.keys, lo, side="left")
+
+    def remove(self, key: int, position: int) -> None:
+        i = np.searchsorted(self.keys, key, side="left")
+        while self.positions[i] != position:
+            i += 1
+        self.keys = np.delete(self.keys, i)
+        self.positions = np.delete(self.positions, i)
+
+    def insert(self, key: int, position: int) -> None:
+        i = np.searchsorted(self.keys, key, side="right")
+        self.keys = np.insert(self.keys, i, key)
+        self.positions = np.insert(self.positions, i, position)
+
+
+@dataclass
+class Occurrences:
+    positions: np.ndarray          # asset position of each visit
+    days: np.ndarray               # epoch day of each visit, ascending
+
+
+class PpmIndex:
+    def __init__(self, rows: list, ids: list, labels: dict):
+        """
+        Indexes the stored ``next_ppm_date`` of each row as it is;
+        :meth:`update` is what re-derives a date. ``labels`` maps each of
+        DIMENSIONS to one label per row.
+        """
+        self.rows = list(rows)
+        self.ids = list(ids)
+        self.by_id = {a: i for i, a in enumerate(self.ids)}
+        self.interval = np.array([-1 if (m := interval_months(r)) is None else m for r in self.rows], dtype=np.int64)
+        due = [parse_tracker_date(field(r, "next_ppm_date")) for r in self.rows]
+        self.due = np.array([-1 if d is None else epoch_day(d) for d in due], dtype=np.int64)
+        self.labels, self.codes = {}, {}
+        for dim in DIMENSIONS:
+            names, codes = np.unique(np.asarray(labels[dim], dtype=str), return_inverse=True)
+            self.labels[dim] = [str(n) for n in names]
+            self.codes[dim] = codes.astype(np.int64)
+        self._build()
+
+    @classmethod
+    def from_register(cls, register) -> "PpmIndex":
+        keep = np.flatnonzero(register.active)
+        return cls([register.rows[i] for i in keep], [register.ids[i] for i in keep], {
+            "zone": [register.zones[i] for i in keep],
+            "discipline": [register.disciplines[i] for i in keep],
+        })
+
+    def _build(self) -> None:
+        scheduled = np.flatnonzero(self.due >= 0)
+        self.axis = _Axis(self.due[scheduled], scheduled)
+        self.group_axes = {
+            dim: _Axis(self.codes[dim][scheduled] * SPAN + self.due[scheduled], scheduled) for dim in DIMENSIONS
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def unscheduled(self) -> np.ndarray:
+        return np.flatnonzero(self.due < 0)
+
+    def _code(self, dim: str, label: str) -> Optional[int]:
+        try:
+            return self.labels[dim].index(label)
+        except ValueError:
+            return None
+
+    def due_between(self, start: dt.date, end: dt.date, **groups) -> np.ndarray:
+        """
+        Positions due in ``[start, end]``, soonest first. ``zone=`` and/or
+        ``discipline=`` narrow it: the first filter is a range lookup on its
+        group axis, any second one a mask over that slice.
+        """
+        lo, hi = epoch_day(start), epoch_day(end)
+        groups = {k: v for k, v in groups.items() if v is not None}
+        if not groups:
+            return self.axis.between(lo, hi)
+        (dim, label), *rest = groups.items()
+        code = self._code(dim, label)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        found = self.group_axes[dim].between(code * SPAN + lo, code * SPAN + hi)
+        for other, other_label in rest:
+            other_code = self._code(other, other_label)
+            found = found[self.codes[other][found] == other_code] if other_code is not None else found[:0]
+        return found
+
+    def overdue(self, today: dt.date, **groups) -> np.ndarray:
+        return self.due_between(EPOCH, today - dt.timedelta(days=1), **groups)
+
+    def counts(self, dim: str, start: dt.date, end: dt.date) -> dict:
+        """``{label: assets due in [start, end]}`` for every label of ``dim`` — one vectorised lookup."""
+        base = np.arange(len(self.labels[dim]), dtype=np.int64) * SPAN
+        n = self.group_axes[dim].count(base + epoch_day(start), base + epoch_day(end))
+        return {label: int(c) for label, c in zip(self.labels[dim], n) if c}
+
+    def update(self, changed: list) -> list:
+        """
+        Re-derive next due for ``changed`` rows (matched by asset id) and move
+        their index entries. Returns ``[(position, old day, new day)]`` for the
+        ones whose due date actually moved.
+        """
+        from .assets import asset_id
+
+        moved = []
+        for row in changed:
+            position = self.by_id.get(asset_id(row, -1))
+            if position is None:
+                continue
+            self.rows[position] = row
+            self.interval[position] = -1 if (m := interval_months(row)) is None else m
+            new = next_due(row)
+            new_day = -1 if new is None else epoch_day(new)
+            old_day = int(self.due[position])
+            if new_day == old_day:
+                continue
+            if old_day >= 0:
+                self.axis.remove(old_day, position)
+                for dim, axis in self.group_axes.items():
+                    axis.remove(self.codes[dim][position] * SPAN + old_day, position)
+            if new_day >= 0:
+                self.axis.insert(new_day, position)
+                for dim, axis in self.group_axes.items():
+                    axis.insert(self.codes[dim][position] * SPAN + new_day, position)
+            self.due[position] = new_day
+            moved.append((position, old_day, new_day))
+        return moved
+
+    def calendar(self, start: dt.date, months: int = 12) -> Occurrences:
+        """
+        Every visit from the first of ``start``'s month for ``months`` months.
+
+        Month-based intervals step from each asset's due date keeping its
+        day-of-month (clamped in short months); weekly ones step by 7 days.
+        Visits before the window are skipped, so an overdue asset shows its
+        next regular slot here and appears in :meth:`overdue`.
+        """
+        w0 = np.datetime64(start.replace(day=1), "M")
+        w_end = (w0 + months).astype("datetime64[D]").astype(np.int64)   # exclusive epoch day
+        w_start = w0.astype("datetime64[D]").astype(np.int64)
+        parts = []
+
+        monthly = np.flatnonzero((self.due >= 0) & (self.interval > 0))
+        if len(monthly):
+            due = self.due[monthly].astype("datetime64[D]")
+            step = self.interval[monthly]
+            m0 = due.astype("datetime64[M]").astype(np.int64)
+            anchor = (due - due.astype("datetime64[M]").astype("datetime64[D]")).astype(np.int64)   # day - 1
+            first_k = np.maximum(0, -((m0 - w0.astype(np.int64)) // step))                          # ceil, ≥ 0
+            k = first_k[:, None] + np.arange(months + 1)
+            occ_month = m0[:, None] + k * step[:, None]
+            month_start = occ_month.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+            month_len = (occ_month + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) - month_start
+            days = month_start + np.minimum(anchor[:, None], month_len - 1)
+            keep = (days >= w_start) & (days < w_end)
+            rows = np.broadcast_to(monthly[:, None], days.shape)
+            parts.append((rows[keep], days[keep]))
+
+        weekly = np.flatnonzero((self.due >= 0) & (self.interval == 0))
+        if len(weekly):
+            due = self.due[weekly]
+            first = due + np.maximum(0, -((due - w_start) // WEEK)) * WEEK
+            days = first[:, None] + WEEK * np.arange((w_end - w_start) // WEEK + 1)
+            keep = days < w_end
+            rows = np.broadcast_to(weekly[:, None], days.shape)
+            parts.append((rows[keep], days[keep]))
+
+        once = np.flatnonzero((self.due >= w_start) & (self.due < w_end) & (self.interval < 0))
+        parts.append((once, self.due[once]))
+
+        positions = np.concatenate([p for p, _ in parts])
+        days = np.concatenate([d for _, d in parts])
+        order = np.lexsort((positions, days))
+        return Occurrences(positions[order], days[order])
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+ARTIFACT_NAME = "ppm-schedule.json"
+WINDOWS       = (7, 30, 60, 90)
+
+
+def changed_rows(rows: list, ids: list, previous: Optional[dict]) -> list:
+    """
+    Rows whose fingerprint differs from the last run's. Without a last run
+    there is nothing to compare against, so nothing has changed: the run only
+    seeds the fingerprints (``previous=None``), it never rewrites dates.
+    """
+    if not previous:
+        return []
+    return [r for r, a in zip(rows, ids) if previous.get(a) != fingerprint(r)]
+
+
+def _iso(days) -> Optional[str]:
+    return from_epoch(days).isoformat() if days >= 0 else None
+
+
+def _label_counts(index: PpmIndex, dim: str, positions: np.ndarray) -> dict:
+    n = np.bincount(index.codes[dim][positions], minlength=len(index.labels[dim]))
+    return {label: int(c) for label, c in zip(index.labels[dim], n) if c}
+
+
+def artifact(index: PpmIndex, today: dt.date, months: int = 12) -> dict:
+    occurrences = index.calendar(today, months)
+    first = np.datetime64(today.replace(day=1), "M")
+    keys = first + np.arange(months + 1)
+    # Visits are sorted by day, so each month is one slice between two searchsorted bounds.
+    bounds = np.searchsorted(occurrences.days, keys.astype("datetime64[D]").astype(np.int64))
+    calendar_months = {}
+    for key, a, b in zip(keys[:-1], bounds[:-1], bounds[1:]):
+        positions = occurrences.positions[a:b]
+        calendar_months[str(key)] = {
+            "count": int(b - a),
+            **{"by" + dim.capitalize(): _label_counts(index, dim, positions) for dim in DIMENSIONS},
+            "visits": [[int(p), _iso(d)] for p, d in zip(positions, occurrences.days[a:b])],
+        }
+    overdue = index.overdue(today)
+    return {
+        "generatedAt": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "today": today.isoformat(),
+        "assets": [
+            {"id": a, "zone": index.labels["zone"][index.codes["zone"][i]],
+             "discipline": index.labels["discipline"][index.codes["discipline"][i]],
+             "intervalMonths": None if index.interval[i] < 0 else int(index.interval[i]),
+             "nextDue": _iso(index.due[i])}
+            for i, a in enumerate(index.ids)
+        ],
+        "unscheduled": len(index.unscheduled),
+        "overdue": {
+            "count": len(overdue),
+            **{"by" + dim.capitalize(): index.counts(dim, EPOCH, today - dt.timedelta(days=1)) for dim in DIMENSIONS},
+        },
+        "dueWithin": {
+            str(n): {
+                "count": len(index.due_between(today, today + dt.timedelta(days=n))),
+                **{"by" + dim.capitalize(): index.counts(dim, today, today + dt.timedelta(days=n)) for dim in DIMENSIONS},
+            }
+            for n in WINDOWS
+        },
+        "calendar": calendar_months,
+        "fingerprints": {a: fingerprint(r) for a, r in zip(index.ids, index.rows)},
+    }
+
+
+def publish(client, index: PpmIndex, moved: list) -> int:
+    """PATCH ``next_ppm_date`` for the moved assets — one request per distinct new date."""
+    from .assets import TABLE
+    from .rest import quote_list
+
+    by_date = {}
+    for position, _, new_day in moved:
+        uid = field(index.rows[position], "asset_uid")
+        if uid:                                 # rows keyed only by tag cannot be targeted safely
+            by_date.setdefault(_iso(new_day), []).append(uid)
+    for date, ids in by_date.items():
+        for i in range(0, len(ids), 200):
+            client.update(TABLE, {"next_ppm_date": date}, asset_uid=f"in.{quote_list(ids[i:i + 200])}")
+    return sum(len(ids) for ids in by_date.values())
+
+
+def run(client, out_dir, today: Optional[dt.date] = None, months: int = 12, full: bool = False,
+        dry_run: bool = False, confirm: bool = False) -> dict:
+    from .assets import fetch_register
+
+    today = today or dt.date.today()
+    register = fetch_register(client)
+    path = out_dir / ARTIFACT_NAME
+    previous = None
+    if path.exists():
+        previous = json.loads(path.read_text(encoding="utf-8")).get("fingerprints")
+
+    # The index starts from the stored dates; only what changed since the last run is re-derived.
+    index = PpmIndex.from_register(register)
+    changed = list(index.rows) if full else changed_rows(index.rows, index.ids, previous)
+    moved = [m for m in index.update(changed) if m[2] >= 0]
+    print(f"  {len(index)} active assets, {len(index.unscheduled)} without a due date; "
+          f"{len(moved)} next-PPM date(s) recomputed")
+    if not full and not previous:
+        print(f"  no previous run in {path}: fingerprints seeded from the register, no date rewritten")
+    # A full run re-derives every date, overwriting ones set by hand: only with an explicit confirm.
+    held = full and not confirm
+    if held and moved and not dry_run:
+        print(f"  --full would rewrite {len(moved)} next_ppm_date(s) across the register; "
+              f"pass --confirm to write them")
+    if moved and not dry_run and not held:
+        publish(client, index, moved)
+
+    payload = artifact(index, today, months)
+    if (dry_run or held) and previous:
+        # Nothing was written, so the next run must still see these rows as changed.
+        payload["fingerprints"] = previous
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, separators=(",", ":")) + "\n", encoding="utf-8")
+    print(f"  {payload['overdue']['count']} overdue, {payload['dueWithin']['30']['count']} due in 30 days → {path}")
+    return payload
@@ -0,0 +1,116 @@
+"""
+Month-range queries in two lookups.
+
+The Water Monthly dashboard's ``Sel`` is a month index, an inclusive
+``[start, end]`` range or the whole year, and ``sumRange`` / ``hasReading`` /
+``meanReading`` (lib/water-monthly-data.ts) re-walk the covered months of every
+meter on each selection change. :class:`PrefixTable` keeps, per row, the
+running sum of the readings and — in a parallel array — the running count of
+months that HAVE a reading, both with a leading zero column, so for any
+``[s, e]``::
+
+    total    sums[:, e + 1] - sums[:, s]          sumRange (blanks skipped)
+    count    counts[:, e + 1] - counts[:, s]      readings in the range
+    has      count > 0                            hasReading
+    mean     total / count, 0 when count == 0     meanReading
+    value    total where has, else NaN            periodValue
+
+A blank month adds nothing to the sum and nothing to the count, so "not read"
+stays distinct from a reading of zero — the same rule ``monthToDateFromDailyRow``
+applies to ``day_N`` columns (:func:`daily_table`).
+
+Range totals are prefix differences, so they agree with the sequential sum to
+floating-point rounding (~1e-12 relative), not bit for bit;
+``water_balance.WaterBalance.period`` re-adds the months where the dashboard's
+exact sort order matters.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from .water import WaterData, _number
+
+
+class PrefixTable:
+    """Running sums and reading counts of one ``(rows × columns)`` block; NaN = not read."""
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        rows, width = values.shape
+        read = ~np.isnan(values)
+        self.width = width
+        self.sums = np.zeros((rows, width + 1))
+        self.counts = np.zeros((rows, width + 1), dtype=np.int32)
+        np.cumsum(np.where(read, values, 0.0), axis=1, out=self.sums[:, 1:])
+        np.cumsum(read, axis=1, out=self.counts[:, 1:])
+
+    @classmethod
+    def from_lists(cls, rows: list, width: Optional[int] = None) -> "PrefixTable":
+        """From per-row lists of readings with ``None`` for blanks (``YearCache.vals``)."""
+        width = width if width is not None else max((len(r) for r in rows), default=0)
+        values = np.full((len(rows), width), np.nan)
+        for i, row in enumerate(rows):
+            for j, raw in enumerate(row[:width]):
+                value = _number(raw)
+                if value is not None:
+                    values[i, j] = value
+        return cls(values)
+
+    def _bounds(self, start: Optional[int], end: Optional[int]) -> tuple:
+        s = 0 if start is None else start
+        e = self.width - 1 if end is None else end
+        if not 0 <= s <= e < self.width:
+            raise ValueError(f"range [{start}, {end}] outside 0..{self.width - 1}")
+        return s, e + 1
+
+    def total(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        s, e = self._bounds(start, end)
+        return self.sums[:, e] - self.sums[:, s]
+
+    def count(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        s, e = self._bounds(start, end)
+        return self.counts[:, e] - self.counts[:, s]
+
+    def has_reading(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        return self.count(start, end) > 0
+
+    def mean(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        count = self.count(start, end)
+        return np.where(count > 0, self.total(start, end) / np.maximum(count, 1), 0.0)
+
+    def value(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """``total`` where the range has a reading, NaN where it has none."""
+        return np.where(self.has_reading(start, end), self.total(start, end), np.nan)
+
+
+class YearRanges:
+    """
+    One :class:`PrefixTable` per year over ``data.meters`` (rows in meter
+    order). A meter with no ``YearCache`` for a year is all blank there and
+    ``present`` is False for it.
+    """
+
+    def __init__(self, data: WaterData):
+        self.years = [str(y) for y in data.years]
+        self.tables, self.present = {}, {}
+        for year in self.years:
+            caches = [m.y.get(year) for m in data.meters]
+            self.tables[year] = PrefixTable.from_lists([c.vals if c else [] for c in caches], width=12)
+            self.present[year] = np.array([c is not None for c in caches], dtype=bool)
+
+    def period_values(self, year: str, sel) -> np.ndarray:
+        """``periodValue`` for every meter — NaN where it returns null or the meter has no cache."""
+        table = self.tables.get(str(year))
+        if table is None:
+            raise KeyError(f"no readings for {year}")
+        if sel is None:
+            return table.value()
+        if isinstance(sel, (tuple, list)):
+            return table.value(sel[0], sel[1])
+        return table.value(sel, sel)
+
+
+def daily_table(rows: list) -> PrefixTable:
+    """Wide ``water_daily_consumption`` rows as a ``(rows × 31)`` table; ``value(0, d - 1)`` is month-to-date at day d."""
+    return PrefixTable.from_lists([[row.get(f"day_{day}") for day in range(1, 32)] for row in rows], width=31)
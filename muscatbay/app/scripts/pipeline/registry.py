@@ -0,0 +1,148 @@
+"""
+The water meter registry, snapshotted once and served from memory.
+
+``filterMetersByConfiguration`` (functions/api/csv-upload.ts) fetches
+``water_meters`` through ``getWaterMetersFromSupabase`` and rebuilds its
+account / name maps on every upload, then translates and zone-normalises each
+row on its own. :class:`MeterRegistry` does that work once per registry
+version:
+
+    by_account / by_name   case-folded keys → meter position
+    patches                per meter, the metadata an upload row inherits when
+                           its own cell is blank (legacy strings, zone already
+                           in display form)
+    translations           ZONE/PARENT/TYPE_TO_LEGACY and their inverses, so
+                           v2 ↔ legacy is a dict lookup in both directions
+
+so enriching a batch of thousands of rows is dictionary lookups only.
+
+PostgREST sends no ETag for table reads, so the version is the row count plus
+the newest ``updated_at`` (bumped by ``trg_water_meters_updated_at``) — one
+HEAD and one single-row read. :func:`load_registry` keeps the snapshot in
+memory and in ``pipeline-artifacts/meter-registry.json`` until that changes.
+"""
+
+import datetime as dt
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .water import METER_SELECT, PARENT_TO_LEGACY, TYPE_TO_LEGACY, ZONE_TO_LEGACY, meters_from_rows
+
+TABLE         = "water_meters"
+ARTIFACT_NAME = "meter-registry.json"
+
+# csv-upload.ts ZONE_CODE_TO_DISPLAY — the zone strings water_loss_daily uses.
+ZONE_CODE_TO_DISPLAY = {
+    "zone_01_(fm)": "Zone FM",
+    "zone_03_(a)": "Zone 3A",
+    "zone_03_(b)": "Zone 3B",
+    "zone_05": "Zone 5",
+    "zone_08": "Zone 08",
+    "zone_vs": "Village Square",
+}
+# resolveZoneDisplay in one lookup: a code or an existing display name, case-folded.
+_ZONE_DISPLAY = {**{v.casefold(): v for v in ZONE_CODE_TO_DISPLAY.values()}, **ZONE_CODE_TO_DISPLAY}
+
+TRANSLATIONS = {"zone": ZONE_TO_LEGACY, "parent_meter": PARENT_TO_LEGACY, "type": TYPE_TO_LEGACY}
+INVERSE = {name: {legacy: v2 for v2, legacy in table.items()} for name, table in TRANSLATIONS.items()}
+
+
+def resolve_zone_display(zone: str) -> Optional[str]:
+    return _ZONE_DISPLAY.get((zone or "").strip().casefold())
+
+
+def to_legacy(column: str, value: str) -> str:
+    """A v2 ``water_meters`` value as the "Water System" string (unchanged when it has no mapping)."""
+    return TRANSLATIONS[column].get(value, value)
+
+
+def to_v2(column: str, value: str) -> str:
+    return INVERSE[column].get(value, value)
+
+
+@dataclass
+class MeterRegistry:
+    rows: list                     # water_meters rows as read (v2 strings)
+    version: str = ""
+    meters: list = field(init=False)
+    by_account: dict = field(init=False)
+    by_name: dict = field(init=False)
+    patches: list = field(init=False)
+
+    def __post_init__(self):
+        self.meters, _ = meters_from_rows(self.rows, [])
+        self.by_account, self.by_name, self.patches = {}, {}, []
+        for i, m in enumerate(self.meters):
+            if m.account_number:
+                self.by_account.setdefault(m.account_number.strip().casefold(), i)
+            if m.label:
+                self.by_name.setdefault(m.label.strip().casefold(), i)
+            patch = {"label": m.level, "zone": resolve_zone_display(m.zone) or m.zone,
+                     "parent_meter": m.parent_meter, "type": m.type}
+            self.patches.append({k: v for k, v in patch.items() if v})
+
+    def __len__(self) -> int:
+        return len(self.meters)
+
+    def find(self, account: str = "", name: str = "") -> Optional[int]:
+        """Position of the meter by account number, else by name (``filterMetersByConfiguration`` order)."""
+        i = self.by_account.get(account.strip().casefold()) if account else None
+        if i is None and name:
+            i = self.by_name.get(name.strip().casefold())
+        return i
+
+    def enrich(self, record: dict, name: str = "") -> bool:
+        """
+        Fill a wide upload record's blank metadata from its meter in place;
+        ``False`` when the meter is not in the registry. ``name`` is the meter
+        name the file itself gave (empty when it had none).
+        """
+        i = self.find(record.get("account_number") or "", name)
+        if i is None:
+            return False
+        if not name and self.meters[i].label:
+            record["meter_name"] = self.meters[i].label
+        for key, value in self.patches[i].items():
+            if not record.get(key):
+                record[key] = value
+        if record.get("zone"):
+            record["zone"] = resolve_zone_display(record["zone"]) or record["zone"]
+        return True
+
+
+# --------------------------------------------------------------------------
+# Cache
+# --------------------------------------------------------------------------
+
+_MEMO = {}
+
+
+def source_version(client) -> str:
+    newest = client.select(TABLE, "updated_at", order="updated_at.desc.nullslast", limit="1")
+    return f"{TABLE}:{client.count(TABLE)}:{(newest[0].get('updated_at') or '') if newest else ''}"
+
+
+def load_registry(client, cache_dir=None, version: Optional[str] = None) -> tuple:
+    """``(registry, refetched)`` — from memory or the cache file while the version holds."""
+    version = version or source_version(client)
+    if version in _MEMO:
+        return _MEMO[version], False
+    path = cache_dir / ARTIFACT_NAME if cache_dir is not None else None
+    if path is not None and path.exists():
+        cached = json.loads(path.read_text(encoding="utf-8"))
+        if cached.get("version") == version:
+            registry = MeterRegistry(cached["rows"], version)
+            _MEMO.clear()
+            _MEMO[version] = registry
+            return registry, False
+
+    registry = MeterRegistry(client.select(TABLE, METER_SELECT, order="meter_id"), version)
+    _MEMO.clear()
+    _MEMO[version] = registry
+    if path is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        payload = {"version": version, "generatedAt": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+                   "rows": registry.rows}
+        path.write_text(json.dumps(payload, separators=(",", ":")) + "\n", encoding="utf-8")
+    return registry, True
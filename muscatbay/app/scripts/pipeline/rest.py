@@ -0,0 +1,139 @@
+"""
+Minimal PostgREST client for the pipeline commands.
+
+Reads page through the 1000-row response cap with a ``Range`` header (the same
+window the app uses); writes go out in BATCH_SIZE chunks as merge-duplicates
+upserts, the way the asset import scripts already talk to Supabase.
+"""
+
+import json
+
+from .env import supabase_credentials
+
+PAGE_SIZE  = 1000
+BATCH_SIZE = 200
+TIMEOUT_S  = 60
+
+
+def quote_list(values) -> str:
+    """A PostgREST ``in.(…)`` operand; every item quoted so commas and colons survive."""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return "(" + ",".join(f'"{v}"' for v in escaped) + ")"
+
+
+def client_errors() -> tuple:
+    """
+    What a RestClient call may raise: its own RuntimeError for an HTTP error
+    and, from ``requests``, a dropped connection or a timeout. Jobs that carry
+    on past one failed read catch this tuple.
+    """
+    try:
+        from requests import RequestException
+    except ImportError:                 # no real client, nothing but RuntimeError to catch
+        return (RuntimeError,)
+    return (RuntimeError, RequestException)
+
+
+class RestClient:
+    def __init__(self, supabase_url: str, service_key: str, session=None):
+        self.base = f"{supabase_url}/rest/v1"
+        self.storage = f"{supabase_url}/storage/v1/object"
+        if session is None:
+            import requests             # only the client needs it; quote_list stays importable without it
+
+            session = requests.Session()
+        self.session = session
+        self.session.headers.update({
+            "apikey": service_key,
+            "Authorization": f"Bearer {service_key}",
+            "Content-Type": "application/json",
+        })
+
+    @classmethod
+    def from_env(cls) -> "RestClient":
+        return cls(*supabase_credentials())
+
+    def _check(self, response, action: str, table: str) -> None:
+        if not response.ok:
+            raise RuntimeError(f"{action} {table} failed ({response.status_code}): {response.text[:500]}")
+
+    def select(self, table: str, select: str = "*", order: str = "", **filters) -> list:
+        """Every row matching ``filters`` (PostgREST operator strings, e.g. ``period="gte.2024-01"``)."""
+        params = {"select": select, **filters}
+        if order:
+            params["order"] = order
+        rows, start = [], 0
+        while True:
+            response = self.session.get(
+                f"{self.base}/{table}",
+                params=params,
+                headers={"Range-Unit": "items", "Range": f"{start}-{start + PAGE_SIZE - 1}"},
+                timeout=TIMEOUT_S,
+            )
+            self._check(response, "Reading", table)
+            page = response.json()
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            start += PAGE_SIZE
+
+    def count(self, table: str, **filters) -> int:
+        """Exact row count from ``Content-Range`` — a HEAD request, no rows transferred."""
+        response = self.session.head(
+            f"{self.base}/{table}",
+            params={"select": "*", **filters},
+            headers={"Prefer": "count=exact", "Range-Unit": "items", "Range": "0-0"},
+            timeout=TIMEOUT_S,
+        )
+        self._check(response, "Counting", table)
+        return int(response.headers.get("Content-Range", "*/0").rpartition("/")[2] or 0)
+
+    def upsert(self, table: str, rows: list, on_conflict: str) -> int:
+        for i in range(0, len(rows), BATCH_SIZE):
+            batch = rows[i:i + BATCH_SIZE]
+            response = self.session.post(
+                f"{self.base}/{table}",
+                params={"on_conflict": on_conflict},
+                headers={"Prefer": "return=minimal,resolution=merge-duplicates"},
+                data=json.dumps(batch, default=str),
+                timeout=TIMEOUT_S,
+            )
+            self._check(response, "Upserting", table)
+        return len(rows)
+
+    def update(self, table: str, values: dict, **filters) -> None:
+        """PATCH ``values`` onto every row matching ``filters`` (no insert, so NOT NULL columns are not needed)."""
+        if not filters:
+            raise RuntimeError(f"Refusing to update {table} without a filter")
+        response = self.session.patch(
+            f"{self.base}/{table}",
+            params=filters,
+            headers={"Prefer": "return=minimal"},
+            data=json.dumps(values, default=str),
+            timeout=TIMEOUT_S,
+        )
+        self._check(response, "Updating", table)
+
+    def upload(self, bucket: str, path: str, data: bytes, content_type: str = "text/csv") -> bool:
+        """Store an object in Supabase Storage unless the path exists; ``False`` when it already did."""
+        response = self.session.post(
+            f"{self.storage}/{bucket}/{path}",
+            headers={"Content-Type": content_type, "x-upsert": "false"},
+            data=data,
+            timeout=TIMEOUT_S,
+        )
+        if response.status_code in (400, 409) and "Duplicate" in response.text:
+            return False
+        self._check(response, "Uploading to", f"{bucket}/{path}")
+        return True
+
+    def delete(self, table: str, **filters) -> None:
+        if not filters:
+            raise RuntimeError(f"Refusing to delete from {table} without a filter")
+        response = self.session.delete(
+            f"{self.base}/{table}",
+            params=filters,
+            headers={"Prefer": "return=minimal"},
+            timeout=TIMEOUT_S,
+        )
+        self._check(response, "Deleting from", table)
@@ -0,0 +1,190 @@
+"""
+Per-module dashboard snapshots for the first paint of a full page load.
+
+``lib/page-cache.ts`` only survives client-side navigation: a full document
+load starts from an empty cache, a skeleton and a few dozen PostgREST round
+trips. This job precomputes, per module, what those pages derive on mount:
+
+    water        the Water Monthly breakdowns for every month
+                 (``water_summary.summarize`` — balance, zone, type, DC,
+                 building rows)
+    electricity  the heatmap: months, meters, values and the full-range and
+                 trailing-window load states
+    stp          the STP KPI cube: every month and the last RECENT_DAYS days
+    assets       register counts and replacement value per discipline / zone /
+                 condition
+    contractors  active / expiring / lapsed contracts and committed OMR per year
+
+Each module is written as one compact file — ``{module}.json`` or, with
+``fmt="msgpack"``, ``{module}.msgpack`` — in an envelope that carries its
+``version`` (a hash of the data), and ``index.json`` lists every module's
+version and file, so a page can render from the snapshot and revalidate, and
+a client that already holds a version skips the download. A module whose data
+did not change keeps its file untouched; one whose sources cannot be read
+keeps its previous snapshot and is listed as unavailable.
+"""
+
+import datetime as dt
+import hashlib
+import json
+import math
+from typing import Optional
+
+import numpy as np
+
+from . import assets, contractors, electricity, stp, water_summary
+from .rest import client_errors
+from .water import fetch_water_meters, key_to_period, month_span
+
+SCHEMA      = 1
+DIR_NAME    = "snapshots"           # under the artifact directory
+INDEX_NAME  = "index.json"
+RECENT_DAYS = 90
+FORMATS     = ("json", "msgpack")
+
+
+def plain(value):
+    """``value`` with NumPy scalars unwrapped, dates as ISO strings and NaN / ±inf as ``None``."""
+    if isinstance(value, dict):
+        return {str(k): plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return plain(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    return value
+
+
+def data_version(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+# --------------------------------------------------------------------------
+# Modules
+# --------------------------------------------------------------------------
+
+def water_snapshot(client, cache_dir, today: dt.date) -> dict:
+    meters, derived = fetch_water_meters(client)
+    months = sorted({p for m in meters for p in map(key_to_period, m.consumption) if p})
+    periods = month_span(months[0], months[-1]) if months else []
+    rows = water_summary.summarize(meters, periods, {key_to_period(k): d for k, d in derived})
+    return {"derivedMonths": [{"month": k, "throughDay": d} for k, d in derived], **rows}
+
+
+def electricity_snapshot(client, cache_dir, today: dt.date, rolling_width: int = 12) -> dict:
+    payload = electricity.artifact(electricity.LoadClassifier(electricity.fetch_matrix(client)), rolling_width)
+    # The prefix arrays only serve arbitrary-range queries; the first paint needs the states.
+    return {k: v for k, v in payload.items() if k not in ("positiveSum", "positiveCount")}
+
+
+def stp_snapshot(client, cache_dir, today: dt.date) -> dict:
+    daily = stp.build_daily(stp.normalize_days(client.select("stp_operations", stp.OPS_SELECT, order="date")))
+    recent = [{k: v for k, v in r.items() if k != "source_updated_at"} for r in daily[-RECENT_DAYS:]]
+    return {"monthly": stp.monthly_rollup(daily), "recentDays": recent}
+
+
+def _breakdown(labels: list, mask: np.ndarray, value: np.ndarray) -> dict:
+    out = {}
+    for label, keep, v in zip(labels, mask, value):
+        if keep:
+            entry = out.setdefault(label or "Unassigned", {"count": 0, "value": 0.0})
+            entry["count"] += 1
+            entry["value"] += 0.0 if np.isnan(v) else float(v)
+    return {k: {"count": e["count"], "value": round(e["value"], 3)} for k, e in sorted(out.items())}
+
+
+def asset_snapshot(client, cache_dir, today: dt.date) -> dict:
+    register = assets.fetch_register(client)
+    active, value = register.active, register.unit_cost * register.quantity
+    return {
+        "assets": len(register),
+        "active": int(active.sum()),
+        "decommissioned": int((~active).sum()),
+        "replacementValue": round(float(np.nansum(value[active])), 3),
+        "unpriced": int(np.isnan(register.unit_cost[active]).sum()),
+        "byDiscipline": _breakdown(register.disciplines, active, value),
+        "byZone": _breakdown(register.zones, active, value),
+        "byCondition": _breakdown(register.conditions, active, value),
+    }
+
+
+def contractor_snapshot(client, cache_dir, today: dt.date) -> dict:
+    index, _ = contractors.load_index(client, cache_dir)
+    return contractors.summary(index, today)
+
+
+MODULES = {
+    "water": water_snapshot,
+    "electricity": electricity_snapshot,
+    "stp": stp_snapshot,
+    "assets": asset_snapshot,
+    "contractors": contractor_snapshot,
+}
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+def encode(envelope: dict, fmt: str) -> bytes:
+    if fmt == "msgpack":
+        try:
+            import msgpack
+        except ImportError as exc:
+            raise RuntimeError("MessagePack snapshots need the msgpack package (pip install msgpack)") from exc
+        return msgpack.packb(envelope, use_bin_type=True)
+    return (json.dumps(envelope, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def write_snapshot(module: str, data, out_dir, fmt: str = "json", previous: Optional[dict] = None,
+                   now: Optional[dt.datetime] = None) -> tuple:
+    """``(index entry, written)`` — the file is left alone when ``previous`` already has this version."""
+    data = plain(data)
+    version = data_version(data)
+    path = out_dir / f"{module}.{fmt}"
+    if previous and previous["version"] == version and previous["file"] == path.name and path.exists():
+        return previous, False
+    stamp = (now or dt.datetime.now(dt.timezone.utc)).isoformat(timespec="seconds")
+    body = encode({"module": module, "schema": SCHEMA, "version": version, "generatedAt": stamp, "data": data}, fmt)
+    path.write_bytes(body)
+    return {"version": version, "file": path.name, "bytes": len(body), "generatedAt": stamp}, True
+
+
+def read_index(out_dir) -> dict:
+    path = out_dir / INDEX_NAME
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {"schema": SCHEMA, "modules": {}, "unavailable": []}
+
+
+def run(client, out_dir, cache_dir=None, modules: Optional[list] = None, fmt: str = "json",
+        today: Optional[dt.date] = None) -> dict:
+    """Build the named modules (all by default) and rewrite ``index.json``; the index."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown snapshot format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    today = today or dt.date.today()
+    cache_dir = cache_dir if cache_dir is not None else out_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    index = read_index(out_dir)
+    unavailable = set(index.get("unavailable", []))
+    for module in modules or list(MODULES):
+        try:
+            data = MODULES[module](client, cache_dir, today)
+        except client_errors() as exc:
+            print(f"  {module}: {exc} — previous snapshot kept")
+            unavailable.add(module)
+            continue
+        entry, written = write_snapshot(module, data, out_dir, fmt, index["modules"].get(module))
+        index["modules"][module] = entry
+        unavailable.discard(module)
+        state = f"written, {entry['bytes']:,} bytes" if written else "unchanged"
+        print(f"  {module}: version {entry['version']} ({state})")
+    index.update(schema=SCHEMA, generatedAt=dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+                 unavailable=sorted(unavailable))
+    (out_dir / INDEX_NAME).write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+    return index
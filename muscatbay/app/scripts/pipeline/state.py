@@ -0,0 +1,19 @@
+"""Per-job watermarks in ``pipeline_state`` (sql/migrations/20261019_pipeline_state.sql)."""
+
+import datetime as dt
+from typing import Optional
+
+STATE_TABLE = "pipeline_state"
+
+
+def get_watermark(client, job: str) -> Optional[str]:
+    rows = client.select(STATE_TABLE, "watermark", job=f"eq.{job}")
+    return rows[0]["watermark"] if rows else None
+
+
+def set_watermark(client, job: str, watermark: Optional[str]) -> None:
+    client.upsert(STATE_TABLE, [{
+        "job": job,
+        "watermark": watermark,
+        "updated_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+    }], on_conflict="job")
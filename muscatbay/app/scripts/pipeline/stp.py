@@ -0,0 +1,408 @@
+"""
+STP daily KPI cube.
+
+Plant Watch (components/stp/stp-analytics.ts) re-derives recovery, hydraulic
+load, reuse and tanker severities from the raw ``stp_operations`` log on every
+render. This module computes them once per day and keeps them in two tables
+(sql/migrations/20261019_stp_kpi_cube.sql):
+
+    stp_daily_kpi     one row per logged day: volumes, recovery, the rolling
+                      baselines, each dimension's severity and the worst of them
+    stp_monthly_kpi   per-month totals, income/savings, completeness and how
+                      many days landed in each severity
+
+The gates are lib/thresholds.ts ``STP_THRESHOLDS``. Where Plant Watch judges a
+day against the median of whatever range is on screen, the cube judges it
+against the median of the trailing BASELINE_DAYS logged days, so a stored
+severity never changes when someone widens the date picker. Medians are kept
+by :class:`RollingMedian` (two heaps, lazy deletion): O(log w) per day, so a
+full rebuild is O(n log w) and appending a day touches only that day.
+
+Incremental runs read the days whose ``updated_at`` is past the cube's
+watermark, plus the BASELINE_DAYS logged days before the earliest of them, and
+rewrite the cube from there on. Range views use :class:`RangeIndex` — prefix
+sums over the daily rows, so any range total is two subtractions.
+"""
+
+import bisect
+import calendar
+import datetime as dt
+import heapq
+import math
+from collections import Counter, deque
+from typing import Optional
+
+RECOVERY_GOOD        = 95
+RECOVERY_WATCH       = 90
+RECOVERY_CRITICAL    = 80
+LOAD_HIGH            = 1.4
+LOAD_WATCH           = 1.2
+LOAD_LOW             = 0.4
+TANKER_HIGH_MULTIPLE = 2
+TANKER_HIGH_FLOOR    = 4
+TANKER_WATCH_OFFSET  = 2
+TANKER_WATCH_FLOOR   = 3
+EFFICIENCY_DROP_PP   = 10
+
+TANKER_FEE      = 4.50
+TSE_SAVING_RATE = 1.32
+
+BASELINE_DAYS = 30      # trailing logged days behind each day's median baselines
+DROP_DAYS     = 7       # trailing logged days behind the efficiency-drop mean
+DAILY_TABLE   = "stp_daily_kpi"
+MONTHLY_TABLE = "stp_monthly_kpi"
+
+SEVERITY_RANK = {"good": 0, "nodata": 1, "watch": 2, "high": 3, "critical": 4}
+
+
+# --------------------------------------------------------------------------
+# Gates (lib/thresholds.ts)
+# --------------------------------------------------------------------------
+
+def classify_recovery(eff: Optional[float]) -> str:
+    if eff is None or not math.isfinite(eff):
+        return "nodata"
+    if eff >= RECOVERY_GOOD:
+        return "good"
+    if eff >= RECOVERY_WATCH:
+        return "watch"
+    if eff >= RECOVERY_CRITICAL:
+        return "high"
+    return "critical"
+
+
+def classify_hydraulic_load(inlet: float, baseline: float) -> str:
+    if inlet <= 0:
+        return "nodata"
+    if baseline <= 0:
+        return "good"
+    ratio = inlet / baseline
+    if ratio >= LOAD_HIGH:
+        return "high"
+    if ratio >= LOAD_WATCH or ratio <= LOAD_LOW:
+        return "watch"
+    return "good"
+
+
+def classify_tanker_trips(trips: float, baseline: float) -> str:
+    high_gate = max(TANKER_HIGH_FLOOR, math.ceil(baseline * TANKER_HIGH_MULTIPLE))
+    watch_gate = max(TANKER_WATCH_FLOOR, math.ceil(baseline) + TANKER_WATCH_OFFSET)
+    if trips >= high_gate:
+        return "high"
+    if trips >= watch_gate:
+        return "watch"
+    return "good"
+
+
+def classify_reuse(tse: float, inlet: float) -> str:
+    """stp-analytics.ts ``tseSeverity``: negative is a data fault, zero with inflow is reuse stopped."""
+    if tse < 0:
+        return "critical"
+    if inlet <= 0:
+        return "nodata"
+    if tse == 0:
+        return "critical"
+    return classify_recovery(tse / inlet * 100)
+
+
+def worst(severities) -> str:
+    return max(severities, key=SEVERITY_RANK.__getitem__, default="good")
+
+
+# --------------------------------------------------------------------------
+# Rolling median
+# --------------------------------------------------------------------------
+
+class RollingMedian:
+    """
+    Median of a sliding window: a max-heap for the low half, a min-heap for the
+    high half, and lazily deleted values that are dropped when they surface.
+    ``add``/``remove`` are O(log w) amortised; ``median`` is O(1).
+    """
+
+    def __init__(self):
+        self.low, self.high = [], []         # low holds negated values
+        self.low_size = self.high_size = 0
+        self.pending = Counter()
+
+    def _prune(self, heap, sign):
+        while heap and self.pending[sign * heap[0]]:
+            self.pending[sign * heap[0]] -= 1
+            heapq.heappop(heap)
+
+    def _balance(self):
+        if self.low_size > self.high_size + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.low_size -= 1
+            self.high_size += 1
+            self._prune(self.low, -1)
+        elif self.low_size < self.high_size:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.low_size += 1
+            self.high_size -= 1
+            self._prune(self.high, 1)
+
+    def add(self, value: float) -> None:
+        if not self.low or value <= -self.low[0]:
+            heapq.heappush(self.low, -value)
+            self.low_size += 1
+        else:
+            heapq.heappush(self.high, value)
+            self.high_size += 1
+        self._balance()
+
+    def remove(self, value: float) -> None:
+        self.pending[value] += 1
+        if self.low and value <= -self.low[0]:
+            self.low_size -= 1
+            if value == -self.low[0]:
+                self._prune(self.low, -1)
+        else:
+            self.high_size -= 1
+            if self.high and value == self.high[0]:
+                self._prune(self.high, 1)
+        self._balance()
+
+    def __len__(self):
+        return self.low_size + self.high_size
+
+    def median(self) -> float:
+        """0 for an empty window, like stp-analytics.ts ``median``."""
+        if not len(self):
+            return 0.0
+        if self.low_size > self.high_size:
+            return float(-self.low[0])
+        return (-self.low[0] + self.high[0]) / 2
+
+
+# --------------------------------------------------------------------------
+# Daily cube
+# --------------------------------------------------------------------------
+
+def to_number(value) -> float:
+    """``Number(x) || 0`` — NaN/NULL become 0, negatives survive."""
+    try:
+        n = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return n if math.isfinite(n) else 0.0
+
+
+def parse_date(value) -> Optional[dt.date]:
+    if isinstance(value, dt.date):
+        return value
+    try:
+        return dt.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def normalize_days(operations: list) -> list:
+    """
+    ``[(date, inlet, tse, trips, updated_at)]`` in date order, one per date.
+
+    The cube is keyed by date; should the log ever hold two rows for one day
+    their volumes are summed (one plant, one day) rather than one silently
+    shadowing the other.
+    """
+    by_date = {}
+    for op in operations:
+        day = parse_date(op.get("date"))
+        if day is None:
+            continue
+        inlet, tse, trips, stamp = by_date.get(day, (0.0, 0.0, 0.0, ""))
+        by_date[day] = (
+            inlet + to_number(op.get("inlet_sewage")),
+            tse + to_number(op.get("tse_for_irrigation")),
+            trips + to_number(op.get("tanker_trips")),
+            max(stamp, str(op.get("updated_at") or "")),
+        )
+    return [(day, *values) for day, values in sorted(by_date.items())]
+
+
+def build_daily(days: list, context: list = (), baseline_days: int = BASELINE_DAYS) -> list:
+    """
+    Cube rows for ``days``; ``context`` is the normalized days immediately
+    before them (at least ``baseline_days`` of them) that only seed the
+    rolling windows and are not emitted.
+    """
+    inlet_median, trips_median = RollingMedian(), RollingMedian()
+    inlet_window, trips_window = deque(), deque()
+    effs = deque()
+    rows = []
+    series = list(context) + list(days)
+    first_emitted = len(context)
+
+    for i, (day, inlet, tse, trips, stamp) in enumerate(series):
+        eff = tse / inlet * 100 if inlet > 0 else None
+        prior = [e for e in effs if e is not None]
+
+        # The day joins its own baseline window, as the page's period median includes the day.
+        trips_window.append(trips)
+        trips_median.add(trips)
+        if len(trips_window) > baseline_days:
+            trips_median.remove(trips_window.popleft())
+        inlet_window.append(inlet)
+        if inlet > 0:
+            inlet_median.add(inlet)
+        if len(inlet_window) > baseline_days:
+            dropped = inlet_window.popleft()
+            if dropped > 0:
+                inlet_median.remove(dropped)
+
+        if i >= first_emitted:
+            base_inlet, base_trips = inlet_median.median(), trips_median.median()
+            drop = None
+            if eff is not None and i >= 3 and len(prior) >= 3:
+                mean = sum(prior) / len(prior)
+                drop = mean - eff
+            severities = {
+                "efficiency_severity": classify_recovery(eff),
+                "load_severity": classify_hydraulic_load(inlet, base_inlet),
+                "reuse_severity": classify_reuse(tse, inlet),
+                "tanker_severity": classify_tanker_trips(trips, base_trips),
+                "drop_severity": "watch" if drop is not None and drop >= EFFICIENCY_DROP_PP else "good",
+            }
+            rows.append({
+                "date": day.isoformat(),
+                "ym": day.isoformat()[:7],
+                "inlet": inlet,
+                "tse": tse,
+                "trips": trips,
+                "efficiency": eff,
+                "baseline_inlet": base_inlet,
+                "baseline_trips": base_trips,
+                "load_ratio": inlet / base_inlet if inlet > 0 and base_inlet > 0 else None,
+                "efficiency_drop_pp": drop,
+                **severities,
+                "severity": worst(severities.values()),
+                "source_updated_at": stamp or None,
+            })
+
+        effs.append(eff)
+        if len(effs) > DROP_DAYS:
+            effs.popleft()
+    return rows
+
+
+def monthly_rollup(daily: list) -> list:
+    """``stp_monthly_kpi`` rows from the daily rows of whole months."""
+    months = {}
+    for row in daily:
+        months.setdefault(row["ym"], []).append(row)
+    out = []
+    for ym, rows in sorted(months.items()):
+        year, month = int(ym[:4]), int(ym[5:7])
+        inlet = sum(r["inlet"] for r in rows)
+        tse = sum(r["tse"] for r in rows)
+        trips = sum(r["trips"] for r in rows)
+        counts = Counter(r["severity"] for r in rows)
+        out.append({
+            "ym": ym,
+            "days_logged": len(rows),
+            "days_in_month": calendar.monthrange(year, month)[1],
+            "total_inlet": inlet,
+            "total_tse": tse,
+            "total_trips": trips,
+            "recovery": tse / inlet * 100 if inlet > 0 else None,
+            "income": trips * TANKER_FEE,
+            "savings": tse * TSE_SAVING_RATE,
+            "days_good": counts["good"],
+            "days_watch": counts["watch"],
+            "days_high": counts["high"],
+            "days_critical": counts["critical"],
+            "severity": worst(r["severity"] for r in rows),
+        })
+    return out
+
+
+class RangeIndex:
+    """Prefix sums over daily cube rows (date order) — a range summary is two bisects and two subtractions."""
+
+    FIELDS = ("inlet", "tse", "trips")
+
+    def __init__(self, daily: list):
+        self.dates = [dt.date.fromisoformat(r["date"]) for r in daily]
+        self.prefix = {f: [0.0] for f in self.FIELDS}
+        for row in daily:
+            for f in self.FIELDS:
+                self.prefix[f].append(self.prefix[f][-1] + row[f])
+
+    def summary(self, start: dt.date, end: dt.date) -> dict:
+        """stp-analytics.ts ``buildSTPModel`` summary for the logged days in ``[start, end]``."""
+        i = bisect.bisect_left(self.dates, start)
+        j = bisect.bisect_right(self.dates, end)
+        total = {f: self.prefix[f][j] - self.prefix[f][i] for f in self.FIELDS}
+        logged = j - i
+        expected = (self.dates[j - 1] - self.dates[i]).days + 1 if logged > 1 else logged
+        income = total["trips"] * TANKER_FEE
+        savings = total["tse"] * TSE_SAVING_RATE
+        return {
+            "totalInlet": total["inlet"],
+            "totalTSE": total["tse"],
+            "totalTrips": total["trips"],
+            "avgEfficiency": total["tse"] / total["inlet"] * 100 if total["inlet"] > 0 else None,
+            "income": income,
+            "savings": savings,
+            "economicImpact": income + savings,
+            "daysLogged": logged,
+            "daysExpected": expected,
+            "completenessPct": logged / expected * 100 if expected > 0 else None,
+            "missingDays": max(0, expected - logged),
+        }
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+OPS_SELECT = "date,inlet_sewage,tse_for_irrigation,tanker_trips,updated_at"
+
+
+def watermark(client) -> Optional[str]:
+    rows = client.select(DAILY_TABLE, "source_updated_at", order="source_updated_at.desc.nullslast", limit="1")
+    return rows[0]["source_updated_at"] if rows and rows[0].get("source_updated_at") else None
+
+
+def load_window(client, since: Optional[str], baseline_days: int = BASELINE_DAYS) -> tuple:
+    """
+    ``(context, days)``: every day from the first of the month of the earliest
+    change onwards, and the ``baseline_days`` logged days before that.
+    ``since=None`` (or ``--full``) loads the whole log.
+    """
+    if since is None:
+        return [], normalize_days(client.select("stp_operations", OPS_SELECT, order="date"))
+    changed = client.select("stp_operations", "date", order="date", limit="1", updated_at=f"gt.{since}")
+    if not changed:
+        return [], []
+    start = parse_date(changed[0]["date"]).replace(day=1).isoformat()
+    days = normalize_days(client.select("stp_operations", OPS_SELECT, order="date", date=f"gte.{start}"))
+    before = client.select("stp_operations", OPS_SELECT, order="date.desc", date=f"lt.{start}",
+                           limit=str(baseline_days * 2))
+    context = normalize_days(before)[-baseline_days:]
+    return context, days
+
+
+def run(client, full: bool = False, dry_run: bool = False) -> tuple:
+    since = None if full else watermark(client)
+    context, days = load_window(client, since)
+    if not days:
+        print(f"  {DAILY_TABLE} is current (watermark {since})")
+        return [], []
+    daily = build_daily(days, context)
+    monthly = monthly_rollup(daily)
+    print(f"  {len(daily)} day(s) from {daily[0]['date']}, {len(monthly)} month(s) "
+          f"({'full rebuild' if since is None else f'changes since {since}'})")
+    if not dry_run:
+        stamp = dt.datetime.now(dt.timezone.utc).isoformat()
+        client.upsert(DAILY_TABLE, [{**r, "refreshed_at": stamp} for r in daily], on_conflict="date")
+        client.upsert(MONTHLY_TABLE, [{**r, "refreshed_at": stamp} for r in monthly], on_conflict="ym")
+        # Days deleted from the log in the rewritten span leave the cube too.
+        kept = {r["date"] for r in daily}
+        stale = [r["date"] for r in client.select(DAILY_TABLE, "date", date=f"gte.{daily[0]['date']}")
+                 if r["date"] not in kept]
+        if stale:
+            from .rest import quote_list
+
+            client.delete(DAILY_TABLE, date=f"in.{quote_list(stale)}")
+    return daily, monthly
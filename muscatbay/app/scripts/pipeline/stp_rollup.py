@@ -0,0 +1,134 @@
+"""
+Maintain the monthly rollup columns of ``stp_operations``.
+
+Every daily row carries its month's totals in ``monthly_volume_input`` (Σ
+inlet), ``monthly_volume_output`` (Σ TSE), ``monthly_income`` (Σ trips ×
+TANKER_FEE) and ``monthly_savings`` (Σ TSE × TSE_SAVING_RATE) — the same
+arithmetic as Plant Watch's summary, derived from the volumes rather than
+summed from ``generated_income``/``water_savings``, which several of the old
+hand-written ``update_stp_*.sql`` loads filled column-shifted.
+
+A run reads the days whose ``updated_at`` passed the job's watermark, widens
+them to whole months, recomputes those months and upserts only the rows whose
+stored rollup differs. Writing only real differences is what makes the
+watermark safe: our own UPDATEs bump ``updated_at`` too, and the next run finds
+nothing to change. ``--months 2025-11:2026-01`` recomputes a range regardless
+of the watermark (deleted days, backfills, corrections).
+"""
+
+import calendar
+import datetime as dt
+from typing import Optional
+
+from .state import get_watermark, set_watermark
+from .stp import TANKER_FEE, TSE_SAVING_RATE, parse_date, to_number
+from .water import month_span
+
+JOB            = "stp-monthly"
+ROLLUP_COLUMNS = ("monthly_volume_input", "monthly_volume_output", "monthly_income", "monthly_savings")
+ROW_SELECT     = "id,date,inlet_sewage,tse_for_irrigation,tanker_trips,updated_at," + ",".join(ROLLUP_COLUMNS)
+
+
+def month_bounds(ym: str) -> tuple:
+    year, month = int(ym[:4]), int(ym[5:7])
+    return f"{ym}-01", f"{ym}-{calendar.monthrange(year, month)[1]:02d}"
+
+
+def month_rollups(rows: list) -> dict:
+    """``{yyyy-mm: {column: value}}`` over the given daily rows."""
+    totals = {}
+    for row in rows:
+        day = parse_date(row.get("date"))
+        if day is None:
+            continue
+        t = totals.setdefault(day.isoformat()[:7], [0.0, 0.0, 0.0])
+        t[0] += to_number(row.get("inlet_sewage"))
+        t[1] += to_number(row.get("tse_for_irrigation"))
+        t[2] += to_number(row.get("tanker_trips"))
+    return {
+        ym: {
+            "monthly_volume_input": round(inlet, 2),
+            "monthly_volume_output": round(tse, 2),
+            "monthly_income": round(trips * TANKER_FEE, 2),
+            "monthly_savings": round(tse * TSE_SAVING_RATE, 2),
+        }
+        for ym, (inlet, tse, trips) in totals.items()
+    }
+
+
+def _same(stored, computed: float) -> bool:
+    return stored is not None and abs(to_number(stored) - computed) < 0.005
+
+
+def plan_updates(rows: list) -> list:
+    """The upsert payload: ``{id, date, <rollups>}`` for rows whose stored rollup is stale."""
+    rollups = month_rollups(rows)
+    updates = []
+    for row in rows:
+        day = parse_date(row.get("date"))
+        if day is None:
+            continue
+        target = rollups[day.isoformat()[:7]]
+        if all(_same(row.get(c), v) for c, v in target.items()):
+            continue
+        # `date` rides along: PostgREST upserts are INSERT … ON CONFLICT, and the
+        # NOT NULL check runs on the proposed row before the conflict is seen.
+        updates.append({"id": row["id"], "date": day.isoformat(), **target})
+    return updates
+
+
+def affected_months(changed: list) -> list:
+    return sorted({d.isoformat()[:7] for d in (parse_date(r.get("date")) for r in changed) if d})
+
+
+def run(client, months: Optional[list] = None, dry_run: bool = False, newest: Optional[str] = None) -> list:
+    """
+    Recompute the months changed since the watermark, or ``months``. With
+    ``months``, ``newest`` is the newest ``updated_at`` they cover (a caller
+    that saw the changes, like ``watch``); the watermark moves up to it.
+    """
+    since = None
+    if months is None:
+        since = get_watermark(client, JOB)
+        filters = {"updated_at": f"gt.{since}"} if since else {}
+        changed = client.select("stp_operations", "date,updated_at", order="updated_at", **filters)
+        months = affected_months(changed)
+        newest = max((r["updated_at"] for r in changed if r.get("updated_at")), default=since)
+    elif newest:
+        since = get_watermark(client, JOB)
+    if not months:
+        print(f"  no STP days changed since {since}")
+        return []
+
+    updates = []
+    # One read per contiguous block of months keeps a long backfill to a few requests.
+    for block in _contiguous(months):
+        start, end = month_bounds(block[0])[0], month_bounds(block[-1])[1]
+        rows = client.select("stp_operations", ROW_SELECT, order="date", date=f"gte.{start}", **{"and": f"(date.lte.{end})"})
+        updates.extend(plan_updates(rows))
+
+    print(f"  {len(months)} month(s) {months[0]}…{months[-1]}: {len(updates)} row(s) to update")
+    if not dry_run:
+        if updates:
+            client.upsert("stp_operations", updates, on_conflict="id")
+        if newest and (since is None or newest > since):
+            set_watermark(client, JOB, newest)
+    return updates
+
+
+def _contiguous(months: list) -> list:
+    blocks = []
+    for ym in months:
+        if blocks and month_span(blocks[-1][-1], ym)[1:] == [ym]:
+            blocks[-1].append(ym)
+        else:
+            blocks.append([ym])
+    return blocks
+
+
+def parse_months(value: str) -> list:
+    """``"2026-01"`` or ``"2025-11:2026-01"``."""
+    start, _, end = value.partition(":")
+    for ym in (start, end or start):
+        dt.date.fromisoformat(f"{ym}-01")           # raises on a malformed month
+    return month_span(start, end or start)
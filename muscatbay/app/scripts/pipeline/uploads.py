@@ -0,0 +1,85 @@
+"""
+Content-addressed source files for the daily water imports.
+
+``uploadCSVToStorage`` (functions/api/csv-upload.ts) stores every upload as
+``water/{year}/{month}/{timestamp}_{name}``, so the same export uploaded twice
+is stored twice and imported twice. Here a file is identified by the SHA-256
+of its normalised content — BOM dropped, line endings unified, trailing
+blanks and empty lines removed, so a re-save in another editor hashes the
+same — and:
+
+    storage    the original bytes go to ``grafana-uploads`` at
+               ``water/{year}/{month}/{sha256}.csv`` (month of the file's
+               first record), so a second write of the same content is a no-op
+    manifest   ``water_upload_manifest`` holds one row per (hash, month) the
+               file covered; a hash already there is skipped before anything
+               is parsed, stored or written
+
+A file that only overlaps earlier ones (a month-to-date export re-pulled a
+week later) hashes differently and goes through
+:func:`daily_import.changed_records`, which writes only the cells that
+differ.
+"""
+
+import datetime as dt
+import hashlib
+from typing import Optional
+
+from .rest import client_errors
+from .water import key_to_period
+
+BUCKET   = "grafana-uploads"
+MANIFEST = "water_upload_manifest"
+
+
+def normalized_lines(handle):
+    """The lines that count for the hash: text only, no BOM, no line-ending or trailing-blank noise."""
+    first = True
+    for line in handle:
+        if first:
+            line, first = line.lstrip("\ufeff"), False
+        line = line.rstrip()
+        if line:
+            yield line
+
+
+def content_hash(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, encoding="utf-8-sig", errors="replace", newline="") as handle:
+        for line in normalized_lines(handle):
+            digest.update(line.encode("utf-8"))
+            digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def applied_months(client, digest: str) -> list:
+    """The months a file with this hash was already imported for (empty when it is new)."""
+    return sorted(r["month"] for r in client.select(MANIFEST, "month", sha256=f"eq.{digest}"))
+
+
+def storage_path(digest: str, month_key: str) -> str:
+    period = key_to_period(month_key) or "unknown-unknown"
+    year, month = period.split("-")
+    return f"water/{year}/{month}/{digest}.csv"
+
+
+def store(client, path, digest: str, month_key: str) -> Optional[str]:
+    """Put the original file in the bucket under its hash; the storage path, or None when storage is unavailable."""
+    target = storage_path(digest, month_key)
+    try:
+        with open(path, "rb") as handle:
+            client.upload(BUCKET, target, handle.read())
+    except client_errors() as err:
+        # As in the app: storage is a backup, an import never fails on it.
+        print(f"  storage backup skipped: {err}")
+        return None
+    return target
+
+
+def record(client, digest: str, name: str, months: list, target: Optional[str], records: int, cells: int) -> None:
+    stamp = dt.datetime.now(dt.timezone.utc).isoformat()
+    client.upsert(MANIFEST, [
+        {"sha256": digest, "month": month, "file_name": name, "storage_path": target,
+         "records": records, "cells_written": cells, "imported_at": stamp}
+        for month in months
+    ], on_conflict="sha256,month")
@@ -0,0 +1,204 @@
+"""
+Keep the derived tables and artifacts fresh as the source tables change.
+
+``20260703_water_monthly_auto_sync.sql`` and ``20260706_stp_realtime.sql``
+publish ``water_meters``, ``water_monthly_consumption`` and ``stp_operations``
+to ``supabase_realtime``, but only browsers subscribe (``useSupabaseRealtime``).
+This daemon follows the same three tables by polling their trigger-maintained
+``updated_at``, which needs nothing beyond PostgREST — so a local stand-in
+serves it as well as Supabase does:
+
+    poll      one read per table for the rows whose ``updated_at`` passed the
+              daemon's in-memory mark (the mark starts at the newest stamp)
+    batch     changes are held until the feed has been quiet for ``settle``
+              seconds, or ``max_wait`` after the first of them, so an import
+              of a few hundred rows triggers one recompute, not hundreds
+    recompute the jobs fed by the tables in the batch, in dependency order:
+              stp-monthly and water-summary get the months the batch touched
+              and its newest ``updated_at``, which advances their watermark
+              (a water_meters change can move a meter between zones in every
+              month, so it leaves water-summary on its watermark, which then
+              rebuilds all months); stp follows its own ``pipeline_state``
+              watermark; water-balance, alerts and the module's dashboard
+              snapshot (:mod:`pipeline.snapshots`, last) are whole-artifact
+              rebuilds from one read each and run in full
+
+The durable watermarks stay the jobs' own ``pipeline_state`` rows, moved on
+by every batch a job completes: a restarted daemon runs every job once to
+catch up on what arrived while it was down, then follows the feed. Writes made by the jobs
+themselves (stp-monthly's rollup columns) show up as one more batch, on which
+they find nothing left to change. A failed job or poll — an HTTP error or a
+dropped connection — is reported and the daemon carries on.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from . import alerts, snapshots, stp, stp_rollup, water_balance, water_summary
+from .rest import client_errors
+
+# table → the columns that say what a change touched (besides updated_at).
+SOURCES = {
+    "water_meters": "meter_id,zone",
+    "water_monthly_consumption": "period,meter_id",
+    "stp_operations": "date",
+}
+
+# table → the jobs it feeds, and the order jobs run in within one batch.
+TRIGGERS = {
+    "water_meters": ("water-summary", "water-balance", "alerts", "snapshots:water"),
+    "water_monthly_consumption": ("water-summary", "water-balance", "alerts", "snapshots:water"),
+    "stp_operations": ("stp-monthly", "stp", "alerts", "snapshots:stp"),
+}
+JOB_ORDER = ("stp-monthly", "stp", "water-summary", "water-balance", "alerts", "snapshots:stp", "snapshots:water")
+
+# job → callable(client, out_dir, batch); ``batch`` is the job's :func:`scope`
+# entry — ``{"months", "newest"}`` — or None outside a batch (catch-up) and for
+# the jobs it does not narrow.
+JOBS = {
+    "stp-monthly": lambda client, out_dir, batch: stp_rollup.run(client, **(batch or {})),
+    "stp": lambda client, out_dir, batch: stp.run(client),
+    "water-summary": lambda client, out_dir, batch: water_summary.run(client, **(batch or {})),
+    "water-balance": lambda client, out_dir, batch: water_balance.run(client, out_dir),
+    "alerts": lambda client, out_dir, batch: alerts.run(client, out_dir),
+    "snapshots:stp": lambda client, out_dir, batch:
+        snapshots.run(client, out_dir / snapshots.DIR_NAME, out_dir, ["stp"]),
+    "snapshots:water": lambda client, out_dir, batch:
+        snapshots.run(client, out_dir / snapshots.DIR_NAME, out_dir, ["water"]),
+}
+
+INTERVAL = 30.0             # seconds between polls
+SETTLE   = 10.0             # quiet time that closes a batch
+MAX_WAIT = 120.0            # a batch never waits longer than this
+
+
+def newest(client, table: str) -> Optional[str]:
+    rows = client.select(table, "updated_at", order="updated_at.desc.nullslast", limit="1")
+    return rows[0].get("updated_at") if rows else None
+
+
+def poll(client, marks: dict) -> list:
+    """``(table, row)`` for every row changed after its table's mark; advances the marks."""
+    changes = []
+    for table, columns in SOURCES.items():
+        filters = {"updated_at": f"gt.{marks[table]}"} if marks.get(table) else {}
+        rows = client.select(table, f"{columns},updated_at", order="updated_at", **filters)
+        changes.extend((table, row) for row in rows)
+        marks[table] = max((r["updated_at"] for r in rows if r.get("updated_at")), default=marks.get(table))
+    return changes
+
+
+@dataclass
+class MicroBatch:
+    settle: float = SETTLE
+    max_wait: float = MAX_WAIT
+    pending: list = field(default_factory=list)
+    first: Optional[float] = None
+    last: Optional[float] = None
+
+    def add(self, changes: list, now: float) -> None:
+        if not changes:
+            return
+        self.pending.extend(changes)
+        self.first = now if self.first is None else self.first
+        self.last = now
+
+    def due(self, now: float) -> bool:
+        return bool(self.pending) and (now - self.last >= self.settle or now - self.first >= self.max_wait)
+
+    def take(self) -> list:
+        changes, self.pending, self.first, self.last = self.pending, [], None, None
+        return changes
+
+
+def plan(tables) -> list:
+    """The jobs fed by these tables, in JOB_ORDER."""
+    wanted = {job for table in tables for job in TRIGGERS[table]}
+    return [job for job in JOB_ORDER if job in wanted]
+
+
+def affected(changes: list) -> dict:
+    """Per table, the ``(months, zones)`` a batch touched."""
+    scope = {}
+    for table, row in changes:
+        months, zones = scope.setdefault(table, (set(), set()))
+        month = (row.get("period") or row.get("date") or "")[:7]
+        if month:
+            months.add(month)
+        if row.get("zone"):
+            zones.add(row["zone"])
+    return scope
+
+
+def scope(changes: list) -> dict:
+    """
+    job → ``{"months": the YYYY-MM months it recomputes, "newest": the newest
+    updated_at among the rows behind them}`` for this batch, so the job's
+    watermark moves past what the batch covered. stp-monthly takes the
+    stp_operations days' months and water-summary the consumption periods,
+    unless the batch also moved a meter; jobs left out run unscoped.
+    """
+    touched = affected(changes)
+    scoped = {}
+    for job, table in (("stp-monthly", "stp_operations"), ("water-summary", "water_monthly_consumption")):
+        if not touched.get(table, (None,))[0] or (job == "water-summary" and "water_meters" in touched):
+            continue
+        stamps = [row["updated_at"] for t, row in changes if t == table and row.get("updated_at")]
+        scoped[job] = {"months": sorted(touched[table][0]), "newest": max(stamps, default=None)}
+    return scoped
+
+
+def describe(changes: list) -> str:
+    parts = []
+    for table, (months, zones) in sorted(affected(changes).items()):
+        count = sum(1 for t, _ in changes if t == table)
+        detail = ", ".join(sorted(months) + sorted(zones))
+        parts.append(f"{table} ×{count}" + (f" ({detail})" if detail else ""))
+    return "; ".join(parts)
+
+
+def run_jobs(client, names: list, out_dir, jobs: dict = JOBS, scoped: Optional[dict] = None) -> list:
+    """
+    Run the jobs in order, each with its ``scoped`` entry (None if it has none);
+    a job that fails is reported and the rest still run. The failed names.
+    """
+    failed, scoped = [], scoped or {}
+    for name in names:
+        print(f"  → {name}" + (f" ({', '.join(scoped[name]['months'])})" if name in scoped else ""))
+        try:
+            jobs[name](client, out_dir, scoped.get(name))
+        except client_errors() as exc:
+            print(f"  {name} failed: {exc}")
+            failed.append(name)
+    return failed
+
+
+def watch(client, out_dir, interval: float = INTERVAL, settle: float = SETTLE, max_wait: float = MAX_WAIT,
+          cycles: Optional[int] = None, catch_up: bool = True, jobs: dict = JOBS,
+          clock: Callable = time.monotonic, sleep: Callable = time.sleep) -> int:
+    """
+    Poll every ``interval`` seconds and recompute each closed batch;
+    ``cycles`` bounds the number of polls (``None`` runs until interrupted).
+    The number of batches recomputed.
+    """
+    marks = {table: newest(client, table) for table in SOURCES}
+    if catch_up:
+        print("  catching up")
+        run_jobs(client, list(JOB_ORDER), out_dir, jobs)
+    batch, batches, polled = MicroBatch(settle, max_wait), 0, 0
+    while cycles is None or polled < cycles:
+        if polled:
+            sleep(interval)
+        polled += 1
+        try:
+            batch.add(poll(client, marks), clock())
+        except client_errors() as exc:
+            print(f"  poll failed: {exc}")
+            continue
+        if batch.due(clock()):
+            changes = batch.take()
+            print(f"  {len(changes)} change(s): {describe(changes)}")
+            run_jobs(client, plan({table for table, _ in changes}), out_dir, jobs, scope(changes))
+            batches += 1
+    return batches
@@ -0,0 +1,427 @@
+"""
+Water balance, ported from the app so batch jobs compute the same numbers.
+
+    meters_from_rows    functions/api/water.ts ``getWaterMetersFromSupabase``:
+                        water_meters + water_monthly_consumption (+ month-to-date
+                        daily sums for months the monthly import has not reached)
+                        with the legacy zone/parent/type strings applied
+    build_monthly_data  lib/water-monthly-data.ts ``buildMonthlyData``
+    compute_period      lib/water-monthly-data.ts ``computePeriod``
+
+``None`` is "not read" and stays distinct from ``0`` throughout, as in the app.
+Rounding follows JavaScript (``toFixed`` / ``Math.round``) so percentages and
+message text match what the dashboard prints to the decimal.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+
+MONTHS            = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+TARGET_LOSS_PCT   = 15
+LOSS_RATE_OMR     = 1.32
+PERIOD_FLOOR      = "2024-01"
+MAIN_BULK_ACCOUNT = "C43659"
+METER_LEVELS      = {"L1", "L2", "L3", "L4", "DC", "N/A"}
+DAY_COLUMNS       = [f"day_{d}" for d in range(1, 32)]
+
+# functions/api/water.ts — the strings the "Water System" view used to expose.
+ZONE_TO_LEGACY = {
+    "Zone_FM": "Zone_01_(FM)",
+    "Zone_03A": "Zone_03_(A)",
+    "Zone_03B": "Zone_03_(B)",
+    "Direct_Connection": "Direct Connection",
+    "Main_Bulk": "Main Bulk",
+}
+PARENT_TO_LEGACY = {
+    "Zone 3A (Bulk)": "ZONE 3A (BULK ZONE 3A)",
+    "Zone 3B (Bulk)": "ZONE 3B (BULK ZONE 3B)",
+    "Zone 5 (Bulk)": "ZONE 5 (Bulk Zone 5)",
+    "Zone 8 (Bulk)": "BULK ZONE 8",
+    "Zone FM (Bulk)": "ZONE FM ( BULK ZONE FM )",
+    "Village Square (Bulk)": "Village Square (Zone Bulk)",
+}
+TYPE_TO_LEGACY = {
+    "Building (Bulk)": "D_Building_Bulk",
+    "Building (Common)": "D_Building_Common",
+    "Irrigation (Services)": "IRR_Servies",
+    "Common Area (MB)": "MB_Common",
+    "Main Bulk": "Main BULK",
+    "Residential (Apartment)": "Residential (Apart)",
+}
+
+# lib/water-data.ts ZONE_CONFIG, keyed by legacy code.
+ZONE_NAMES = {
+    "Zone_01_(FM)": "Zone FM",
+    "Zone_03_(A)": "Zone 3A",
+    "Zone_03_(B)": "Zone 3B",
+    "Zone_05": "Zone 5",
+    "Zone_08": "Zone 8",
+    "Zone_VS": "Village Square",
+}
+
+PERIOD_RE = re.compile(r"^(\d{4})-(0[1-9]|1[0-2])$")
+
+
+# --------------------------------------------------------------------------
+# JavaScript-compatible rounding and formatting
+# --------------------------------------------------------------------------
+
+def to_fixed(value: float, digits: int = 1) -> float:
+    """``+value.toFixed(digits)``: ties on the exact binary value round away from zero."""
+    quantum = Decimal(1).scaleb(-digits)
+    return float(Decimal(value).quantize(quantum, rounding=ROUND_HALF_UP))
+
+
+def fixed_str(value: float, digits: int = 1) -> str:
+    """``value.toFixed(digits)`` as text."""
+    quantum = Decimal(1).scaleb(-digits)
+    return str(Decimal(value).quantize(quantum, rounding=ROUND_HALF_UP)).replace("-0.0", "0.0")
+
+
+def js_round(value: float) -> int:
+    """``Math.round``: halves go towards +∞."""
+    return math.floor(value + 0.5)
+
+
+def fmt_int(value: float) -> str:
+    """``Math.round(n).toLocaleString("en-GB")``."""
+    return f"{js_round(value):,}"
+
+
+def pct(a: float, b: float) -> float:
+    """Percentage of ``a`` within ``b`` to one decimal; 0 when ``b`` is falsy."""
+    return to_fixed(a / b * 100, 1) if b else 0
+
+
+# --------------------------------------------------------------------------
+# Period keys
+# --------------------------------------------------------------------------
+
+def period_to_key(period: str) -> Optional[str]:
+    """``"2026-07"`` → ``"Jul-26"``, or ``None``."""
+    match = PERIOD_RE.match(period or "")
+    if not match:
+        return None
+    return f"{MONTHS[int(match.group(2)) - 1]}-{match.group(1)[2:]}"
+
+
+def key_to_period(key: str) -> Optional[str]:
+    """``"Jul-26"`` → ``"2026-07"``, or ``None``."""
+    mon, _, yy = (key or "").partition("-")
+    if mon not in MONTHS or not re.fullmatch(r"\d{2}", yy):
+        return None
+    return f"20{yy}-{MONTHS.index(mon) + 1:02d}"
+
+
+def month_span(start: str, end: str) -> list:
+    """``"2025-11"``, ``"2026-01"`` → every ``yyyy-mm`` in between, inclusive."""
+    y, m = int(start[:4]), int(start[5:7])
+    out = []
+    while f"{y:04d}-{m:02d}" <= end:
+        out.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+def parse_month_key(key: str) -> Optional[tuple]:
+    """``"Mon-YY"`` → ``(year string, month index)``."""
+    mon, _, yy = (key or "").partition("-")
+    if mon not in MONTHS or not yy:
+        return None
+    return f"20{yy}", MONTHS.index(mon)
+
+
+def zone_name_for(code: str) -> str:
+    if not code:
+        return "Unzoned"
+    if code in ZONE_NAMES:
+        return ZONE_NAMES[code]
+    return re.sub(r"\s*\(([^)]*)\)\s*", r" \1", code.replace("_", " ")).strip()
+
+
+# --------------------------------------------------------------------------
+# Source rows → meters
+# --------------------------------------------------------------------------
+
+@dataclass
+class WaterMeter:
+    label: str
+    account_number: str
+    level: str
+    zone: str
+    parent_meter: str
+    type: str
+    consumption: dict = field(default_factory=dict)
+
+
+def _number(raw) -> Optional[float]:
+    if raw is None:
+        return None
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def month_to_date(row: dict) -> tuple:
+    """``(sum of the day_N readings or None, last day read)`` for one wide daily row."""
+    value, last_day = None, 0
+    for day in range(1, 32):
+        num = _number(row.get(f"day_{day}"))
+        if num is None:
+            continue
+        value = (value or 0) + num
+        last_day = day
+    return value, last_day
+
+
+def meters_from_rows(meter_rows: list, consumption_rows: list, daily_rows: list = ()) -> tuple:
+    """
+    ``(meters, derived_months)`` exactly as the app's fetch produces them.
+
+    ``daily_rows`` are wide ``water_daily_consumption`` rows; only months with
+    no monthly rows at all are summed from them, and ``derived_months`` lists
+    those as ``(key, through_day)`` so callers can label them month-to-date.
+    """
+    by_account = {}
+    monthly_keys = set()
+    for row in consumption_rows:
+        if (row.get("period") or "") < PERIOD_FLOOR:
+            continue
+        key = period_to_key(row.get("period"))
+        if key:
+            monthly_keys.add(key)
+        by_account.setdefault(row["account_number"], []).append(row)
+
+    derived, through = {}, {}
+    for row in daily_rows:
+        month = row.get("month")
+        if month in monthly_keys:
+            continue
+        period = key_to_period(month)
+        if not period or period < PERIOD_FLOOR:
+            continue
+        value, last_day = month_to_date(row)
+        derived.setdefault(month, {})[row["account_number"]] = value
+        through[month] = max(through.get(month, 0), last_day)
+    derived_months = sorted(
+        ((month, through[month]) for month, values in derived.items() if any(v is not None for v in values.values())),
+        key=lambda item: key_to_period(item[0]),
+    )
+
+    meters = []
+    for m in meter_rows:
+        level = m.get("level", m.get("label"))
+        parent = m.get("parent_meter") or ""
+        consumption = {}
+        for row in by_account.get(m["account_number"], []):
+            key = period_to_key(row["period"])
+            if key:
+                consumption[key] = _number(row.get("consumption"))
+        for month, _ in derived_months:
+            if m["account_number"] in derived[month]:
+                consumption[month] = derived[month][m["account_number"]]
+        meters.append(WaterMeter(
+            label=(m.get("meter_name_original") or m.get("meter_name")) or "Unknown Meter",
+            account_number=m.get("account_number") or "",
+            level=level if level in METER_LEVELS else "N/A",
+            zone=ZONE_TO_LEGACY.get(m.get("zone"), m.get("zone") or ""),
+            parent_meter=PARENT_TO_LEGACY.get(parent, parent),
+            type=TYPE_TO_LEGACY.get(m.get("type"), m.get("type") or ""),
+            consumption=consumption,
+        ))
+    return meters, derived_months
+
+
+# --------------------------------------------------------------------------
+# buildMonthlyData / computePeriod
+# --------------------------------------------------------------------------
+
+@dataclass
+class YearCache:
+    label: str
+    zone: str
+    zone_name: str
+    typ: str
+    parent: str
+    vals: list
+    total: float = 0.0
+    readings: int = 0
+
+
+@dataclass
+class MeterRecord:
+    name: str
+    acct: str
+    y: dict
+
+
+@dataclass
+class WaterData:
+    years: list
+    available_months: list
+    months_with_data: dict
+    main_account: str
+    meters: list
+
+
+def build_monthly_data(meters: list) -> WaterData:
+    years_with_data, months_present = set(), {}
+    records = []
+    for m in meters:
+        y = {}
+        for key, raw in m.consumption.items():
+            parsed = parse_month_key(key)
+            if not parsed:
+                continue
+            year, month_index = parsed
+            cache = y.get(year)
+            if cache is None:
+                cache = y[year] = YearCache(
+                    label=m.level, zone=m.zone, zone_name=zone_name_for(m.zone),
+                    typ=m.type, parent=m.parent_meter, vals=[None] * 12,
+                )
+            value = _number(raw)
+            cache.vals[month_index] = value
+            if value is not None:
+                cache.total += value
+                cache.readings += 1
+                years_with_data.add(year)
+                months_present.setdefault(year, set()).add(month_index)
+        records.append(MeterRecord(name=m.label or "Unknown Meter", acct=m.account_number, y=y))
+
+    years = sorted(int(y) for y in years_with_data)
+    available, with_data = [], {}
+    for year in years:
+        idxs = sorted(months_present.get(str(year), ()))
+        with_data[str(year)] = len(idxs)
+        available.extend(f"{MONTHS[i]}-{str(year)[2:]}" for i in idxs)
+
+    main = next((m for m in meters if m.level == "L1"), None)
+    return WaterData(
+        years=years,
+        available_months=available,
+        months_with_data=with_data,
+        main_account=main.account_number if main else "—",
+        meters=records,
+    )
+
+
+def period_value(cache: YearCache, sel) -> Optional[float]:
+    """The reading for a month index, an inclusive ``(start, end)`` range, or the whole year (``None``)."""
+    if sel is None:
+        return cache.total if cache.readings > 0 else None
+    if isinstance(sel, tuple):
+        window = cache.vals[sel[0]:sel[1] + 1]
+        return sum(v for v in window if v is not None) if any(v is not None for v in window) else None
+    return cache.vals[sel]
+
+
+def _is_end(cache: YearCache) -> bool:
+    return cache.label in ("L3", "L4") and cache.typ != "D_Building_Bulk"
+
+
+def compute_period(data: WaterData, year: str, sel) -> dict:
+    """The balance and breakdowns for one year and selection; keys match ``PeriodResult``."""
+    a1 = l2 = dc = end = 0.0
+    missing_meters = negative_meters = 0
+    zb, ze, zc, zmiss, zbulk_miss, zname, tt = {}, {}, {}, {}, {}, {}, {}
+    dcs, bulks, child_sum = [], {}, {}
+
+    for m in data.meters:
+        c = m.y.get(year)
+        if c is None or c.label == "N/A":
+            continue
+        raw = period_value(c, sel)
+        missing = raw is None
+        v = 0 if missing else raw
+        missing_meters += missing
+        negative_meters += v < 0
+
+        if c.label == "L1":
+            a1 += v
+        elif c.label == "L2":
+            l2 += v
+            zb[c.zone] = zb.get(c.zone, 0) + v
+            zname[c.zone] = c.zone_name
+            if missing:
+                zbulk_miss[c.zone] = True
+        elif c.label == "DC":
+            dc += v
+            if v:
+                dcs.append({"name": m.name.replace("DC |", "", 1).strip(), "typ": c.typ, "total": v})
+        elif _is_end(c):
+            end += v
+            ze[c.zone] = ze.get(c.zone, 0) + v
+            zc[c.zone] = zc.get(c.zone, 0) + 1
+            if missing:
+                zmiss[c.zone] = zmiss.get(c.zone, 0) + 1
+            zname[c.zone] = c.zone_name
+            tt[c.typ] = tt.get(c.typ, 0) + v
+        if c.typ == "D_Building_Bulk":
+            bulks[m.name] = {"v": v, "zone": c.zone_name}
+        if c.label == "L4":
+            child_sum[c.parent] = child_sum.get(c.parent, 0) + v
+
+    a2, a3 = l2 + dc, end + dc
+    zones = sorted(
+        (
+            {
+                "zone": z, "name": zname.get(z) or z, "bulk": b, "end": ze.get(z, 0), "loss": b - ze.get(z, 0),
+                "lossPct": pct(b - ze.get(z, 0), b), "meters": zc.get(z, 0),
+                "missing": zmiss.get(z, 0), "bulkMissing": bool(zbulk_miss.get(z)),
+            }
+            for z, b in zb.items() if b > 0
+        ),
+        key=lambda r: -r["loss"],
+    )
+    tot = end or 1
+    types = sorted(({"type": k, "total": t, "pct": pct(t, tot)} for k, t in tt.items()), key=lambda r: -r["total"])
+    buildings = sorted(
+        (
+            {"name": n, "zone": b["zone"], "bulk": b["v"], "sub": child_sum.get(n, 0),
+             "loss": b["v"] - child_sum.get(n, 0), "lossPct": pct(b["v"] - child_sum.get(n, 0), b["v"])}
+            for n, b in bulks.items() if b["v"] > 0
+        ),
+        key=lambda r: -r["loss"],
+    )
+    return {
+        "A1": a1, "A2": a2, "A3": a3,
+        "stage1": a1 - a2, "stage2": a2 - a3, "loss": a1 - a3,
+        "lossPct": pct(a1 - a3, a1), "stage1Pct": pct(a1 - a2, a1), "stage2Pct": pct(a2 - a3, a1),
+        "zones": zones,
+        "types": types,
+        "dcs": sorted(dcs, key=lambda r: -r["total"]),
+        "buildings": buildings,
+        "missingMeters": missing_meters,
+        "negativeMeters": negative_meters,
+    }
+
+
+# --------------------------------------------------------------------------
+# Fetch
+# --------------------------------------------------------------------------
+
+METER_SELECT = "meter_id,account_number,meter_name,meter_name_original,level:label,zone,parent_meter,type,sort_order"
+
+
+def fetch_water_meters(client) -> tuple:
+    """``meters_from_rows`` over the live tables (service role, all pages)."""
+    from .rest import quote_list
+
+    meter_rows = client.select("water_meters", METER_SELECT, order="meter_id")
+    consumption = client.select(
+        "water_monthly_consumption", "account_number,period,consumption",
+        order="account_number,period", period=f"gte.{PERIOD_FLOOR}",
+    )
+    # Only months the monthly import has not reached are read from the daily table.
+    covered = sorted({k for k in (period_to_key(r["period"]) for r in consumption) if k})
+    filters = {"month": f"not.in.{quote_list(covered)}"} if covered else {}
+    daily = client.select(
+        "water_daily_consumption", "account_number,month," + ",".join(DAY_COLUMNS), order="account_number", **filters,
+    )
+    return meters_from_rows(meter_rows, consumption, daily)
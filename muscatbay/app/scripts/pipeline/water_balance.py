@@ -0,0 +1,277 @@
+"""
+Water balance over the full history in one pass.
+
+``computePeriod`` (lib/water-monthly-data.ts, ported as
+:func:`pipeline.water.compute_period`) walks every meter for one year and one
+selection; the dashboard and the loss alerts call it again for each month.
+Here the readings sit in one ``(meter × month)`` array — NaN where a month is
+blank — and every balance figure is a linear sum over a group of meters, so
+all of them come out of ONE matrix product::
+
+    series = G @ V        G: (groups × meters) 0/1, V: (meters × months)
+
+with groups L1 supply (A1), L2 zone bulks, DC meters, L3/L4 end users (not
+building bulks), each zone's bulk and end-user meters, and each end-user type,
+plus the same product over the "counted but blank" mask for the missing-meter
+counts. A2 = L2 + DC and A3 = end + DC, as in computePeriod.
+
+Prefix sums over the month axis (``cumsum`` with a leading zero) make the total
+of any group over any month range two lookups, whatever the number of meters
+— that is what :meth:`WaterBalance.balance` answers. :meth:`WaterBalance.period`
+rebuilds a full ``PeriodResult`` for an arbitrary range; it adds the readings
+in computePeriod's order (month by month, then meter by meter) rather than by
+prefix differences, so its figures and its sort order among near-equal losses
+match the dashboard to the last bit.
+
+A meter takes part in a year when it has any month key in that year — the
+``YearCache`` rule — and never when its level is ``N/A``.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .ranges import PrefixTable
+from .water import LOSS_RATE_OMR, MONTHS, _number, parse_month_key, pct, zone_name_for
+
+BUILDING_BULK = "D_Building_Bulk"
+
+
+@dataclass
+class BalanceMatrix:
+    meters: list                   # WaterMeter, in source order
+    years: list                    # int, consecutive
+    values: np.ndarray             # (meters, 12 × years) float, NaN = blank
+    present: np.ndarray            # (meters, years) bool — YearCache exists
+
+    @property
+    def months(self) -> list:
+        return [f"{m}-{str(y)[2:]}" for y in self.years for m in MONTHS]
+
+    @classmethod
+    def from_meters(cls, meters: list) -> "BalanceMatrix":
+        cells = []
+        for i, m in enumerate(meters):
+            for key, raw in m.consumption.items():
+                parsed = parse_month_key(key)
+                if parsed:
+                    cells.append((i, int(parsed[0]), parsed[1], _number(raw)))
+        years = list(range(min(c[1] for c in cells), max(c[1] for c in cells) + 1)) if cells else []
+        values = np.full((len(meters), 12 * len(years)), np.nan)
+        present = np.zeros((len(meters), len(years)), dtype=bool)
+        for i, year, month, value in cells:
+            y = year - years[0]
+            present[i, y] = True
+            if value is not None:
+                values[i, 12 * y + month] = value
+        return cls(list(meters), years, values, present)
+
+
+def _balance(total) -> dict:
+    """The A1/A2/A3 stages from a ``group → total`` function."""
+    a1, dc = total(("A1",)), total(("DC",))
+    a2, a3 = total(("L2",)) + dc, total(("end",)) + dc
+    return {
+        "A1": a1, "A2": a2, "A3": a3, "stage1": a1 - a2, "stage2": a2 - a3, "loss": a1 - a3,
+        "lossPct": pct(a1 - a3, a1), "stage1Pct": pct(a1 - a2, a1), "stage2Pct": pct(a2 - a3, a1),
+        "lossCost": max(0.0, a1 - a3) * LOSS_RATE_OMR,
+    }
+
+
+def _end_user(meter) -> bool:
+    return meter.level in ("L3", "L4") and meter.type != BUILDING_BULK
+
+
+class WaterBalance:
+    def __init__(self, matrix: BalanceMatrix):
+        self.matrix = matrix
+        meters = matrix.meters
+        n, width = matrix.values.shape
+        self.counted = np.repeat(matrix.present, 12, axis=1) & np.array(
+            [m.level != "N/A" for m in meters], dtype=bool)[:, None]
+        self.filled = np.where(self.counted, np.nan_to_num(matrix.values, nan=0.0), 0.0)
+        self.blank = self.counted & np.isnan(matrix.values)
+
+        # One row of G per group; ``self.rows`` maps a group key to its row.
+        groups = {}
+
+        def member(key, i):
+            groups.setdefault(key, []).append(i)
+
+        for i, m in enumerate(meters):
+            if m.level == "L1":
+                member(("A1",), i)
+            elif m.level == "L2":
+                member(("L2",), i)
+                member(("zone-bulk", m.zone), i)
+            elif m.level == "DC":
+                member(("DC",), i)
+            elif _end_user(m):
+                member(("end",), i)
+                member(("zone-end", m.zone), i)
+                member(("type", m.type), i)
+        for key in (("A1",), ("L2",), ("DC",), ("end",)):
+            groups.setdefault(key, [])
+        self.rows = {key: r for r, key in enumerate(groups)}
+        self.members = {key: np.array(members, dtype=np.int64) for key, members in groups.items()}
+        g = np.zeros((len(groups), n))
+        for key, members in groups.items():
+            g[self.rows[key], members] = 1.0
+        self.groups = g
+
+        self.series = g @ self.filled                          # (groups, months)
+        self.blank_series = g @ self.blank.astype(float)
+        self.prefix = np.zeros((len(groups), width + 1))
+        np.cumsum(self.series, axis=1, out=self.prefix[:, 1:])
+        # Per meter: which ranges have a reading, for the blank-over-the-range rule.
+        self.readings = PrefixTable(np.where(self.counted, matrix.values, np.nan))
+
+    # ------------------------------------------------------------ lookups
+
+    def column(self, key: str) -> int:
+        return self.matrix.months.index(key)
+
+    def total(self, group: tuple, start: int, end: int) -> float:
+        """Sum of one group over columns ``start..end`` inclusive — two lookups."""
+        row = self.rows.get(group)
+        return 0.0 if row is None else float(self.prefix[row, end + 1] - self.prefix[row, start])
+
+    def balance(self, start: int, end: int) -> dict:
+        return _balance(lambda group: self.total(group, start, end))
+
+    def meter_values(self, start: int, end: int) -> np.ndarray:
+        """Each meter's sum over ``start..end``, added left to right as ``periodValue`` does."""
+        return np.add.accumulate(self.filled[:, start:end + 1], axis=1)[:, -1]
+
+    # ------------------------------------------------------------ full series
+
+    def monthly_series(self) -> dict:
+        """Every balance figure for every month, plus per-zone and per-type rows."""
+        row = lambda key: self.series[self.rows[key]] if key in self.rows else np.zeros(self.series.shape[1])
+        a1, dc = row(("A1",)), row(("DC",))
+        a2, a3 = row(("L2",)) + dc, row(("end",)) + dc
+        loss = a1 - a3
+        zones = {}
+        for key, r in self.rows.items():
+            if key[0] != "zone-bulk":
+                continue
+            bulk = self.series[r]
+            end = row(("zone-end", key[1]))
+            zones[key[1]] = {
+                "name": zone_name_for(key[1]),
+                "bulk": bulk.tolist(), "end": end.tolist(), "loss": (bulk - end).tolist(),
+                "lossPct": [pct(b - e, b) for b, e in zip(bulk, end)],
+                "lossCost": (np.maximum(bulk - end, 0) * LOSS_RATE_OMR).tolist(),
+                "missing": self.blank_series[self.rows[("zone-end", key[1])]].astype(int).tolist()
+                if ("zone-end", key[1]) in self.rows else [0] * len(bulk),
+            }
+        types = {key[1]: self.series[r].tolist() for key, r in self.rows.items() if key[0] == "type"}
+        meters = self.matrix.meters
+        dcs = {meters[i].label.replace("DC |", "", 1).strip(): self.filled[i].tolist()
+               for i in range(len(meters)) if meters[i].level == "DC"}
+        return {
+            "months": self.matrix.months,
+            "A1": a1.tolist(), "A2": a2.tolist(), "A3": a3.tolist(),
+            "stage1": (a1 - a2).tolist(), "stage2": (a2 - a3).tolist(), "loss": loss.tolist(),
+            "lossPct": [pct(l, s) for l, s in zip(loss, a1)],
+            "lossCost": (np.maximum(loss, 0) * LOSS_RATE_OMR).tolist(),
+            "missingMeters": self.blank.sum(axis=0).astype(int).tolist(),
+            "zones": zones,
+            "types": types,
+            "dcs": dcs,
+        }
+
+    # ------------------------------------------------------------ any range
+
+    def period(self, start: int, end: int) -> dict:
+        """
+        A ``PeriodResult`` for columns ``start..end``. For a month or a range
+        within one year it equals ``compute_period`` for that selection.
+        """
+        meters = self.matrix.meters
+        y0, y1 = start // 12, end // 12
+        taking_part = self.matrix.present[:, y0:y1 + 1].any(axis=1) & np.array([m.level != "N/A" for m in meters])
+        value = self.meter_values(start, end)
+        missing = taking_part & ~self.readings.has_reading(start, end)
+
+        def total(group):
+            members = self.members.get(group)
+            return float(np.add.accumulate(value[members])[-1]) if members is not None and len(members) else 0.0
+
+        result = _balance(total)
+        del result["lossCost"]
+
+        zone_order, type_order = {}, {}
+        zone_count, zone_missing, bulk_missing = {}, {}, set()
+        dcs, bulks, children = [], {}, {}
+        for i in np.flatnonzero(taking_part):
+            m, v = meters[i], float(value[i])
+            if m.level == "L2":
+                zone_order.setdefault(m.zone, len(zone_order))
+                if missing[i]:
+                    bulk_missing.add(m.zone)
+            elif m.level == "DC":
+                if v:
+                    dcs.append({"name": m.label.replace("DC |", "", 1).strip(), "typ": m.type, "total": v})
+            elif _end_user(m):
+                zone_count[m.zone] = zone_count.get(m.zone, 0) + 1
+                zone_missing[m.zone] = zone_missing.get(m.zone, 0) + bool(missing[i])
+                type_order.setdefault(m.type, len(type_order))
+            if m.type == BUILDING_BULK:
+                bulks[m.label] = {"v": v, "zone": zone_name_for(m.zone)}
+            if m.level == "L4":
+                children[m.parent_meter] = children.get(m.parent_meter, 0) + v
+
+        zones = []
+        for z in zone_order:
+            b = total(("zone-bulk", z))
+            if b <= 0:
+                continue
+            e = total(("zone-end", z))
+            zones.append({"zone": z, "name": zone_name_for(z), "bulk": b, "end": e, "loss": b - e,
+                          "lossPct": pct(b - e, b), "meters": zone_count.get(z, 0),
+                          "missing": zone_missing.get(z, 0), "bulkMissing": z in bulk_missing})
+        end_total = total(("end",)) or 1
+        types = [{"type": t, "total": total(("type", t)), "pct": pct(total(("type", t)), end_total)}
+                 for t in type_order]
+        buildings = [
+            {"name": n, "zone": b["zone"], "bulk": b["v"], "sub": children.get(n, 0),
+             "loss": b["v"] - children.get(n, 0), "lossPct": pct(b["v"] - children.get(n, 0), b["v"])}
+            for n, b in bulks.items() if b["v"] > 0
+        ]
+        return {
+            **result,
+            "zones": sorted(zones, key=lambda r: -r["loss"]),
+            "types": sorted(types, key=lambda r: -r["total"]),
+            "dcs": sorted(dcs, key=lambda r: -r["total"]),
+            "buildings": sorted(buildings, key=lambda r: -r["loss"]),
+            "missingMeters": int(missing.sum()),
+            "negativeMeters": int((taking_part & (value < 0)).sum()),
+        }
+
+    def period_for(self, start_key: str, end_key: Optional[str] = None) -> dict:
+        """``period`` by ``"Mon-YY"`` keys."""
+        return self.period(self.column(start_key), self.column(end_key or start_key))
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+ARTIFACT_NAME = "water-balance.json"
+
+
+def run(client, out_dir) -> dict:
+    from .water import fetch_water_meters
+
+    meters, derived = fetch_water_meters(client)
+    engine = WaterBalance(BalanceMatrix.from_meters(meters))
+    payload = {"derivedMonths": [{"month": k, "throughDay": d} for k, d in derived], **engine.monthly_series()}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / ARTIFACT_NAME
+    path.write_text(json.dumps(payload, separators=(",", ":")) + "\n", encoding="utf-8")
+    shape = engine.matrix.values.shape
+    print(f"  {shape[0]} meters × {shape[1]} months, {len(engine.rows)} balance groups → {path}")
+    return payload
@@ -0,0 +1,225 @@
+"""
+Materialised Water Monthly summaries, refreshed for the months an import touched.
+
+``buildMonthlyData`` + ``computePeriod`` (lib/water-monthly-data.ts) rebuild
+the zone, type, DC and building breakdowns from every meter's readings in
+every session. This job stores them per month, one row per group:
+
+    water_balance_monthly    A1 / A2 / A3, stage and total loss, loss cost,
+                             missing / negative meters
+    water_zone_monthly       zone bulk vs the sum of its end-user meters
+    water_type_monthly       end-user consumption per meter type (the
+                             categories the dashboard colours with TYPECOL)
+    water_dc_monthly         direct-connection meters
+    water_building_monthly   building bulk (D_Building_Bulk) vs the sum of its
+                             L4 units — the BUILDING_CONFIG buildings
+
+so a month view reads a few dozen rows instead of ~350 meters × N months.
+Figures are :meth:`water_balance.WaterBalance.period` for one month, i.e.
+exactly ``computePeriod(data, year, month)``.
+
+A run reads the ``water_monthly_consumption`` rows whose ``updated_at`` passed
+the job's watermark and recomputes only their months; a change in
+``water_meters`` (zone, type or level moves a meter between groups) recomputes
+every month. Months still derived from ``water_daily_consumption`` are
+refreshed on every run, since the daily table carries no change stamp.
+Deleted readings are not visible to the watermark — ``--months A:B`` or
+``--full`` recomputes regardless.
+"""
+
+import datetime as dt
+from typing import Optional
+
+from .state import get_watermark, set_watermark
+from .water import (
+    DAY_COLUMNS, LOSS_RATE_OMR, METER_SELECT, PERIOD_FLOOR, key_to_period, meters_from_rows, month_span,
+    period_to_key,
+)
+from .water_balance import BalanceMatrix, WaterBalance
+
+JOB = "water-summary"
+
+# table → the key columns after ``period`` (its primary key is period + these).
+TABLES = {
+    "water_balance_monthly": (),
+    "water_zone_monthly": ("zone",),
+    "water_type_monthly": ("type",),
+    "water_dc_monthly": ("name",),
+    "water_building_monthly": ("building",),
+}
+
+
+def _money(value: float) -> float:
+    return round(float(value), 2)
+
+
+def month_rows(period: str, result: dict, through_day: Optional[int] = None) -> dict:
+    """``{table: rows}`` for one month's ``PeriodResult``."""
+    return {
+        "water_balance_monthly": [{
+            "period": period,
+            "a1": _money(result["A1"]), "a2": _money(result["A2"]), "a3": _money(result["A3"]),
+            "stage1_loss": _money(result["stage1"]), "stage2_loss": _money(result["stage2"]),
+            "total_loss": _money(result["loss"]), "loss_pct": result["lossPct"],
+            "loss_cost": _money(max(0.0, result["loss"]) * LOSS_RATE_OMR),
+            "missing_meters": result["missingMeters"], "negative_meters": result["negativeMeters"],
+            "through_day": through_day,
+        }],
+        "water_zone_monthly": [
+            {"period": period, "zone": z["zone"], "zone_name": z["name"], "bulk": _money(z["bulk"]),
+             "end_users": _money(z["end"]), "loss": _money(z["loss"]), "loss_pct": z["lossPct"],
+             "meters": z["meters"], "missing": z["missing"], "bulk_missing": z["bulkMissing"]}
+            for z in result["zones"]
+        ],
+        "water_type_monthly": [
+            {"period": period, "type": t["type"], "total": _money(t["total"]), "pct": t["pct"]}
+            for t in result["types"]
+        ],
+        "water_dc_monthly": [
+            {"period": period, "name": d["name"], "type": d["typ"], "total": _money(d["total"])}
+            for d in result["dcs"]
+        ],
+        "water_building_monthly": [
+            {"period": period, "building": b["name"], "zone_name": b["zone"], "bulk": _money(b["bulk"]),
+             "sub": _money(b["sub"]), "loss": _money(b["loss"]), "loss_pct": b["lossPct"]}
+            for b in result["buildings"]
+        ],
+    }
+
+
+def summarize(meters: list, periods: list, derived: dict = None) -> dict:
+    """``{table: rows}`` for every ``yyyy-mm`` in ``periods`` that has readings."""
+    derived = derived or {}
+    engine = WaterBalance(BalanceMatrix.from_meters(meters))
+    columns = {key_to_period(key): j for j, key in enumerate(engine.matrix.months)}
+    out = {table: [] for table in TABLES}
+    for period in periods:
+        j = columns.get(period)
+        if j is None or not engine.readings.has_reading(j, j).any():
+            continue
+        for table, rows in month_rows(period, engine.period(j, j), derived.get(period)).items():
+            out[table].extend(rows)
+    return out
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+def touched_periods(client, since: Optional[str]) -> tuple:
+    """``(periods or None for all, newest updated_at)`` changed after ``since``."""
+    if since is None:
+        return None, _newest(client)
+    moved = client.select("water_meters", "meter_id,updated_at", updated_at=f"gt.{since}")
+    changed = client.select("water_monthly_consumption", "period,updated_at", order="period",
+                            updated_at=f"gt.{since}", period=f"gte.{PERIOD_FLOOR}")
+    newest = max((r["updated_at"] for r in moved + changed if r.get("updated_at")), default=since)
+    if moved:
+        return None, newest
+    return sorted({r["period"] for r in changed}), newest
+
+
+def _newest(client) -> Optional[str]:
+    stamps = [
+        rows[0]["updated_at"]
+        for rows in (client.select(t, "updated_at", order="updated_at.desc", limit="1")
+                     for t in ("water_meters", "water_monthly_consumption"))
+        if rows and rows[0].get("updated_at")
+    ]
+    return max(stamps, default=None)
+
+
+def month_to_date_periods(client) -> list:
+    """Months present in ``water_daily_consumption`` that the monthly import has not reached."""
+    from .rest import quote_list
+
+    daily = sorted({p for p in (key_to_period(r.get("month")) for r in client.select(
+        "water_daily_consumption", "month")) if p and p >= PERIOD_FLOOR})
+    if not daily:
+        return []
+    covered = {r["period"] for r in client.select("water_monthly_consumption", "period", period=f"in.{quote_list(daily)}")}
+    return [p for p in daily if p not in covered]
+
+
+def load_years(client, years: Optional[list]) -> tuple:
+    """
+    ``meters_from_rows`` over whole years (``None`` = everything from
+    PERIOD_FLOOR). A meter takes part in a month when it has any reading row in
+    that year, so a month cannot be summarised from its own rows alone.
+    """
+    meter_rows = client.select("water_meters", METER_SELECT, order="meter_id")
+    if years is None:
+        filters = {"period": f"gte.{PERIOD_FLOOR}"}
+    else:
+        filters = {"period": f"gte.{max(f'{years[0]}-01', PERIOD_FLOOR)}", "and": f"(period.lte.{years[-1]}-12)"}
+    consumption = client.select("water_monthly_consumption", "account_number,period,consumption",
+                                order="account_number,period", **filters)
+    covered = {period_to_key(r["period"]) for r in consumption}
+    daily = [
+        r for r in client.select("water_daily_consumption", "account_number,month," + ",".join(DAY_COLUMNS),
+                                 order="account_number")
+        if r.get("month") not in covered and (years is None or (key_to_period(r.get("month")) or "")[:4] in years)
+    ]
+    return meters_from_rows(meter_rows, consumption, daily)
+
+
+def refresh(client, rows: dict, periods: list) -> None:
+    """Upsert the new rows, then drop the stored groups of those months that no longer exist."""
+    from .rest import quote_list
+
+    stamp = dt.datetime.now(dt.timezone.utc).isoformat()
+    for table, keys in TABLES.items():
+        if rows[table]:
+            client.upsert(table, [{**r, "refreshed_at": stamp} for r in rows[table]],
+                          on_conflict=",".join(("period",) + keys))
+        fresh = {tuple(r[k] for k in ("period",) + keys) for r in rows[table]}
+        stored = client.select(table, ",".join(("period",) + keys), period=f"in.{quote_list(periods)}")
+        stale = [r for r in stored if tuple(r[k] for k in ("period",) + keys) not in fresh]
+        for period in sorted({r["period"] for r in stale}):
+            if not keys:
+                client.delete(table, period=f"eq.{period}")
+                continue
+            names = [r[keys[0]] for r in stale if r["period"] == period]
+            client.delete(table, period=f"eq.{period}", **{keys[0]: f"in.{quote_list(names)}"})
+
+
+def run(client, months: Optional[list] = None, full: bool = False, dry_run: bool = False,
+        newest: Optional[str] = None) -> dict:
+    """
+    Refresh the months changed since the watermark, every month (``full``) or
+    ``months``. With ``months``, ``newest`` is the newest ``updated_at`` they
+    cover (a caller that saw the changes, like ``watch``); the watermark moves
+    up to it.
+    """
+    since = None
+    if months is None:
+        since = None if full else get_watermark(client, JOB)
+        months, newest = touched_periods(client, since)
+    else:
+        since = get_watermark(client, JOB) if newest else None
+        months = sorted(months)
+    if months is not None:
+        months = sorted(set(months) | set(month_to_date_periods(client)))
+        if not months:
+            print(f"  no water readings changed since {since}")
+            return {table: [] for table in TABLES}
+
+    years = None if months is None else sorted({p[:4] for p in months})
+    meters, derived = load_years(client, years)
+    derived_periods = {key_to_period(key): day for key, day in derived}
+    if months is None:
+        months = sorted({key_to_period(k) for m in meters for k in m.consumption if key_to_period(k)})
+        months = month_span(months[0], months[-1]) if months else []
+    periods = sorted(set(months) | set(derived_periods))
+    if not periods:
+        print("  no water readings")
+        return {table: [] for table in TABLES}
+
+    rows = summarize(meters, periods, derived_periods)
+    counts = ", ".join(f"{len(rows[t])} {t.split('_')[1]}" for t in TABLES)
+    print(f"  {len(periods)} month(s) {periods[0]}…{periods[-1]}: {counts}")
+    if not dry_run:
+        refresh(client, rows, periods)
+        if newest and (since is None or newest > since):
+            set_watermark(client, JOB, newest)
+    return rows
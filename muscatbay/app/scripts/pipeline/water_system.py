@@ -0,0 +1,200 @@
+"""
+Wide legacy "Water System" rows → the v2 tables, as set-based upserts.
+
+``water_system_view_write()`` (sql/migrations/20260703_water_monthly_auto_sync.sql)
+is a row-level INSTEAD OF trigger: every wide row written to the view is
+translated, looked up in ``water_meters`` and decomposed into one
+``water_monthly_consumption`` statement per month column, so an older script
+that writes a few hundred meters × 36 months issues thousands of statements
+through the view. :func:`plan` does the same decomposition for the whole file
+at once, against one read of each base table:
+
+    water_meters               new accounts registered as the trigger does
+                               (``WS-<account>``, 'Unknown Meter' / 'Unzoned' /
+                               'Unknown' defaults); changed name / level /
+                               zone / parent / type / id written back
+    water_monthly_consumption  the ``jan_24`` … ``dec_26`` cells unpivoted to
+                               ``(meter_id, account_number, period,
+                               consumption)``, only where they differ from
+                               what is stored; a blank cell clears a stored
+                               reading
+
+Legacy zone / parent / type spellings are translated with the registry's
+inverse tables (the exact inverse of the view's read side), and both tables
+get one bulk upsert each — the view and its trigger are never touched.
+"""
+
+import csv
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .daily_import import parse_reading
+from .registry import to_v2
+from .water import METER_LEVELS, MONTHS, _number
+
+METERS       = "water_meters"
+CONSUMPTION  = "water_monthly_consumption"
+METER_FIELDS = ("meter_id", "account_number", "meter_name", "meter_name_original", "label", "zone",
+                "parent_meter", "type", "sort_order")
+
+WIDE_COLUMN = re.compile(r"^(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)_(\d{2})$")
+
+
+def column_period(column: str) -> Optional[str]:
+    """``water_wide_col_to_period``: ``"jun_26"`` → ``"2026-06"``; ``None`` for a non-month column."""
+    match = WIDE_COLUMN.match(column)
+    if not match:
+        return None
+    return f"20{match.group(2)}-{[m.lower() for m in MONTHS].index(match.group(1)) + 1:02d}"
+
+
+def _text(value) -> Optional[str]:
+    text = str(value).strip() if value is not None else ""
+    return text or None
+
+
+def _cell(value) -> Optional[float]:
+    return parse_reading(value) if isinstance(value, str) else _number(value)
+
+
+def clean_metadata(row: dict) -> dict:
+    """The v2 values of the metadata columns a wide row carries (absent columns are left out)."""
+    clean = {}
+    if "level" in row:
+        level = _text(row["level"])
+        clean["label"] = level if level in METER_LEVELS else "N/A"
+    for column in ("zone", "parent_meter", "type"):
+        if column in row:
+            value = _text(row[column])
+            clean[column] = to_v2(column, value) if value else None
+    return clean
+
+
+@dataclass
+class WidePlan:
+    meters: list = field(default_factory=list)        # water_meters rows to upsert (whole rows)
+    readings: list = field(default_factory=list)      # water_monthly_consumption rows to upsert
+    registered: int = 0
+    updated: int = 0
+    cleared: int = 0
+    unchanged: int = 0
+    skipped: int = 0                                  # rows without an account number
+
+
+def _new_meter(account: str, row: dict, clean: dict, sort_order: int) -> dict:
+    name = _text(row.get("label"))
+    return {
+        "meter_id": f"WS-{account}", "account_number": account,
+        "meter_name": name or "Unknown Meter", "meter_name_original": row.get("label"),
+        "label": clean.get("label", "N/A"), "zone": clean.get("zone") or "Unzoned",
+        "parent_meter": clean.get("parent_meter"), "type": clean.get("type") or "Unknown",
+        "sort_order": sort_order,
+    }
+
+
+def _meter_changes(stored: dict, row: dict, clean: dict) -> dict:
+    """The registry columns a wide row changes — the trigger's UPDATE branch against the stored meter."""
+    changes = {}
+    name = _text(row.get("label"))
+    if name and row["label"] != (stored.get("meter_name_original") or stored["meter_name"]):
+        changes.update(meter_name=name, meter_name_original=row["label"])
+    if "label" in clean and clean["label"] != stored.get("label"):
+        changes["label"] = clean["label"]
+    for column in ("zone", "type"):
+        if clean.get(column) and clean[column] != stored.get(column):
+            changes[column] = clean[column]
+    if "parent_meter" in clean and clean["parent_meter"] != stored.get("parent_meter"):
+        changes["parent_meter"] = clean["parent_meter"]
+    sort_order = _number(row.get("id"))
+    if sort_order is not None and int(sort_order) != stored.get("sort_order"):
+        changes["sort_order"] = int(sort_order)
+    return changes
+
+
+def plan(rows: list, meters: list, stored: dict) -> WidePlan:
+    """
+    The upserts that bring ``meters`` (water_meters rows) and ``stored``
+    (``{(meter_id, period): consumption}``) up to the wide ``rows``. A later
+    row for the same account wins.
+    """
+    result = WidePlan()
+    by_account = {m["account_number"]: m for m in meters}
+    next_sort = max((m.get("sort_order") or 0 for m in meters), default=0) + 1
+    latest = {}
+    for row in rows:
+        account = _text(row.get("account_number"))
+        if account is None:
+            result.skipped += 1
+            continue
+        latest[account] = row
+
+    for account, row in latest.items():
+        clean = clean_metadata(row)
+        meter = by_account.get(account)
+        if meter is None:
+            sort_order = _number(row.get("id"))
+            meter = _new_meter(account, row, clean, int(sort_order) if sort_order is not None else next_sort)
+            next_sort = max(next_sort, meter["sort_order"]) + 1
+            result.meters.append(meter)
+            result.registered += 1
+        else:
+            changes = _meter_changes(meter, row, clean)
+            if changes:
+                result.meters.append({**{k: meter.get(k) for k in METER_FIELDS}, **changes})
+                result.updated += 1
+
+        for column, value in row.items():
+            period = column_period(column)
+            if period is None:
+                continue
+            key = (meter["meter_id"], period)
+            value, old = _cell(value), stored.get(key)
+            if value is None:
+                if old is None:
+                    continue
+                result.cleared += 1
+            elif key in stored and value == old:
+                result.unchanged += 1
+                continue
+            result.readings.append({"meter_id": meter["meter_id"], "account_number": account,
+                                    "period": period, "consumption": value})
+    return result
+
+
+def read_rows(path) -> list:
+    """A wide CSV export (the view's columns) as dicts; blank cells are ``None``."""
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        return [{k.strip().lower(): (v if v and v.strip() else None) for k, v in row.items() if k}
+                for row in csv.DictReader(handle)]
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+def stored_readings(client, periods: list) -> dict:
+    from .rest import quote_list
+
+    if not periods:
+        return {}
+    rows = client.select(CONSUMPTION, "meter_id,period,consumption", order="meter_id,period",
+                         period=f"in.{quote_list(periods)}")
+    return {(r["meter_id"], r["period"]): _number(r.get("consumption")) for r in rows}
+
+
+def run(client, rows: list, dry_run: bool = False) -> WidePlan:
+    periods = sorted({p for row in rows for p in map(column_period, row) if p})
+    meters = client.select(METERS, ",".join(METER_FIELDS), order="meter_id")
+    result = plan(rows, meters, stored_readings(client, periods))
+    span = f"{periods[0]}…{periods[-1]}" if periods else "no months"
+    print(f"  {len(rows)} wide row(s), {span}: {result.registered} new meter(s), {result.updated} updated, "
+          f"{len(result.readings)} reading(s) to write ({result.cleared} cleared), {result.unchanged} unchanged, "
+          f"{result.skipped} without an account")
+    if not dry_run:
+        # Meters first: a new meter must exist before its readings reference it.
+        if result.meters:
+            client.upsert(METERS, result.meters, on_conflict="meter_id")
+        if result.readings:
+            client.upsert(CONSUMPTION, result.readings, on_conflict="meter_id,period")
+    return result
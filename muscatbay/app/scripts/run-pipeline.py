@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Run a batch pipeline job after a data import (see scripts/pipeline/).
+
+Usage:
+    python3 scripts/run-pipeline.py alerts [--dry-run]
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from pipeline.__main__ import main  # noqa: E402
+
+if __name__ == "__main__":
+    sys.exit(main())
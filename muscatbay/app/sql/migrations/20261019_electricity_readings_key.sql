@@ -0,0 +1,23 @@
+-- =============================================================================
+-- electricity_readings (meter_id, month) key — one reading per meter and month
+-- =============================================================================
+-- The monthly update scripts (update_electricity_*.sql) delete a month and
+-- re-insert it, so nothing stops a second run or an overlapping script from
+-- leaving two rows for the same meter and month. scripts/pipeline/
+-- electricity_import.py (`run-pipeline.py electricity-import`) upserts on
+-- (meter_id, month) instead, which needs this unique index.
+--
+-- Existing duplicates are collapsed first, keeping the most recently created
+-- row of each (meter_id, month). A NULL consumption (closed / not in service)
+-- is a reading like any other and is kept when it is the newest row.
+-- Idempotent, safe to run repeatedly.
+-- =============================================================================
+
+delete from public.electricity_readings r
+ using public.electricity_readings newer
+ where newer.meter_id = r.meter_id
+   and newer.month = r.month
+   and (coalesce(newer.created_at, '-infinity'), newer.id) > (coalesce(r.created_at, '-infinity'), r.id);
+
+create unique index if not exists electricity_readings_meter_month_key
+    on public.electricity_readings (meter_id, month);
@@ -0,0 +1,47 @@
+-- =============================================================================
+-- operational_alerts — precomputed alert feed
+-- =============================================================================
+-- The alert rules in lib/operational-alerts.ts (water loss vs target, contract
+-- expiry, STP gates) used to run in every browser session over the full water
+-- history. scripts/pipeline/alerts.py now evaluates the same rules once per data
+-- import and replaces the contents of this table, so a dashboard reads a handful
+-- of rows instead of re-deriving them:
+--
+--     python3 scripts/run-pipeline.py alerts
+--
+-- `id` is the same stable fingerprint the browser computes (`water-loss:Sep-26`,
+-- `contracts-expiring:<names>` …), so acknowledgements stored against it keep
+-- working. `rank` preserves the engine's ordering (most severe first).
+--
+-- The job writes with the service role (bypasses RLS); signed-in users read.
+-- Idempotent, safe to run repeatedly.
+-- =============================================================================
+
+create table if not exists public.operational_alerts (
+    id           text        primary key,
+    level        text        not null check (level in ('error', 'warning', 'info')),
+    module       text        not null check (module in ('water', 'contractors', 'stp')),
+    title        text        not null,
+    message      text        not null,
+    href         text        not null,
+    rank         integer     not null default 0,
+    evaluated_at timestamptz not null default now()
+);
+
+alter table public.operational_alerts enable row level security;
+
+drop policy if exists "operational_alerts_authed_read" on public.operational_alerts;
+create policy "operational_alerts_authed_read" on public.operational_alerts
+    for select to authenticated using (true);
+
+-- Publish it so open sessions pick up a new evaluation without polling.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_publication_tables
+        WHERE pubname = 'supabase_realtime'
+          AND schemaname = 'public' AND tablename = 'operational_alerts'
+    ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE public.operational_alerts;
+    END IF;
+END $$;
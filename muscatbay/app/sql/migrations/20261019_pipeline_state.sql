@@ -0,0 +1,20 @@
+-- =============================================================================
+-- pipeline_state — watermarks for the incremental pipeline jobs
+-- =============================================================================
+-- Jobs under scripts/pipeline/ that only process what changed since their last
+-- run (e.g. `run-pipeline.py stp-monthly`) keep their watermark here, one row
+-- per job. Written with the service role only; no policies, so anon and
+-- authenticated cannot read or write it. The jobs' "rows changed since X"
+-- reads of stp_operations rely on the updated_at trigger from
+-- 20261019_stp_kpi_cube.sql.
+--
+-- Idempotent, safe to run repeatedly.
+-- =============================================================================
+
+create table if not exists public.pipeline_state (
+    job        text        primary key,
+    watermark  text,
+    updated_at timestamptz not null default now()
+);
+
+alter table public.pipeline_state enable row level security;
@@ -0,0 +1,26 @@
+-- =============================================================================
+-- schema_migrations — the migrations scripts/pipeline/migrations.py applied
+-- =============================================================================
+-- One row per file in sql/migrations/ the runner (`run-pipeline.py migrate`)
+-- has applied, with the checksum of the text it ran, so an edited migration is
+-- noticed instead of silently skipped. A data migration split into chunks is
+-- 'partial' until its last chunk commits; `chunks_done` is where a re-run
+-- resumes. Per-statement timings and locks go to the run report
+-- (pipeline-artifacts/migrations/), not here.
+--
+-- The runner applies this file itself before anything else. Service role
+-- only; no policies. Idempotent, safe to run repeatedly.
+-- =============================================================================
+
+create table if not exists public.schema_migrations (
+    version      text        primary key,          -- file name without .sql
+    checksum     text        not null,             -- sha256 of the file text
+    status       text        not null default 'applied' check (status in ('applied', 'partial', 'baseline')),
+    chunks_done  integer     not null default 0,
+    chunks_total integer     not null default 1,
+    statements   integer     not null default 0,
+    duration_ms  numeric,
+    applied_at   timestamptz not null default now()
+);
+
+alter table public.schema_migrations enable row level security;
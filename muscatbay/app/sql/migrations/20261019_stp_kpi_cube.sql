@@ -0,0 +1,92 @@
+-- =============================================================================
+-- STP KPI cube — stp_daily_kpi + stp_monthly_kpi
+-- =============================================================================
+-- Materialised by scripts/pipeline/stp.py from stp_operations:
+--
+--     python3 scripts/run-pipeline.py stp            # changes since the watermark
+--     python3 scripts/run-pipeline.py stp --full     # rebuild everything
+--
+-- Each logged day is judged once against the median of the trailing 30 logged
+-- days (inlet and tanker trips) with the gates in lib/thresholds.ts, and the
+-- severities are stored, so month and range views read rows instead of
+-- re-deriving them from the raw log. `source_updated_at` is the newest
+-- stp_operations.updated_at folded into the row; its maximum is the job's
+-- watermark. That needs stp_operations.updated_at to move on UPDATE as well —
+-- until now it was only set on INSERT, so a corrected day was invisible to
+-- "rows changed since X" — hence pipeline_touch_updated_at() and its trigger
+-- below, which later pipeline migrations reuse.
+--
+-- The job writes with the service role (bypasses RLS); signed-in users read.
+-- Idempotent, safe to run repeatedly.
+-- =============================================================================
+
+create table if not exists public.stp_daily_kpi (
+    date                date        primary key,
+    ym                  text        not null,
+    inlet               numeric     not null default 0,
+    tse                 numeric     not null default 0,
+    trips               numeric     not null default 0,
+    efficiency          numeric,
+    baseline_inlet      numeric     not null default 0,
+    baseline_trips      numeric     not null default 0,
+    load_ratio          numeric,
+    efficiency_drop_pp  numeric,
+    efficiency_severity text        not null,
+    load_severity       text        not null,
+    reuse_severity      text        not null,
+    tanker_severity     text        not null,
+    drop_severity       text        not null,
+    severity            text        not null,
+    source_updated_at   timestamptz,
+    refreshed_at        timestamptz not null default now()
+);
+
+create index if not exists stp_daily_kpi_source_updated_at_idx on public.stp_daily_kpi (source_updated_at);
+
+create table if not exists public.stp_monthly_kpi (
+    ym             text        primary key,
+    days_logged    integer     not null,
+    days_in_month  integer     not null,
+    total_inlet    numeric     not null default 0,
+    total_tse      numeric     not null default 0,
+    total_trips    numeric     not null default 0,
+    recovery       numeric,
+    income         numeric     not null default 0,
+    savings        numeric     not null default 0,
+    days_good      integer     not null default 0,
+    days_watch     integer     not null default 0,
+    days_high      integer     not null default 0,
+    days_critical  integer     not null default 0,
+    severity       text        not null,
+    refreshed_at   timestamptz not null default now()
+);
+
+-- stp_operations is filtered by updated_at on every incremental run.
+create index if not exists idx_stp_operations_updated_at on public.stp_operations (updated_at);
+
+create or replace function public.pipeline_touch_updated_at()
+returns trigger
+language plpgsql
+set search_path = ''
+as $$
+begin
+  new.updated_at := now();
+  return new;
+end;
+$$;
+
+drop trigger if exists stp_operations_touch_updated_at on public.stp_operations;
+create trigger stp_operations_touch_updated_at
+  before update on public.stp_operations
+  for each row execute function public.pipeline_touch_updated_at();
+
+alter table public.stp_daily_kpi   enable row level security;
+alter table public.stp_monthly_kpi enable row level security;
+
+drop policy if exists "stp_daily_kpi_authed_read" on public.stp_daily_kpi;
+create policy "stp_daily_kpi_authed_read" on public.stp_daily_kpi
+    for select to authenticated using (true);
+
+drop policy if exists "stp_monthly_kpi_authed_read" on public.stp_monthly_kpi;
+create policy "stp_monthly_kpi_authed_read" on public.stp_monthly_kpi
+    for select to authenticated using (true);
@@ -0,0 +1,26 @@
+-- =============================================================================
+-- Contractor_Tracker.updated_at — a version stamp for the contractor cache
+-- =============================================================================
+-- scripts/pipeline/contractors.py caches the parsed tracker (epoch-day start /
+-- end arrays, committed OMR per year) and re-reads the table only when its
+-- version moves: row count plus newest `updated_at`. contractor_contracts and
+-- contractor_yearly_costs already carry the column and a trigger
+-- (sql/schema/contractor-contracts-setup.sql); the tracker had neither, so an
+-- edited End Date would never invalidate the cache.
+--
+-- The trigger reuses public.pipeline_touch_updated_at() from
+-- 20261019_stp_kpi_cube.sql, which this file's name sorts after so the
+-- migration runner applies that one first. Existing rows are stamped now().
+-- Idempotent, safe to run repeatedly.
+-- =============================================================================
+
+alter table public."Contractor_Tracker"
+    add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists contractor_tracker_touch_updated_at on public."Contractor_Tracker";
+create trigger contractor_tracker_touch_updated_at
+  before update on public."Contractor_Tracker"
+  for each row execute function public.pipeline_touch_updated_at();
+
+create index if not exists contractor_tracker_updated_at_idx
+    on public."Contractor_Tracker" (updated_at desc);
@@ -0,0 +1,108 @@
+-- =============================================================================
+-- Water Monthly summaries — balance / zone / type / DC / building per month
+-- =============================================================================
+-- Materialised by scripts/pipeline/water_summary.py from water_meters and
+-- water_monthly_consumption (plus month-to-date water_daily_consumption):
+--
+--     python3 scripts/run-pipeline.py water-summary          # months changed since the watermark
+--     python3 scripts/run-pipeline.py water-summary --full   # every month
+--
+-- Each row is computePeriod (lib/water-monthly-data.ts) for one month, so a
+-- month view reads a few dozen rows instead of every meter's readings.
+-- `period` is 'YYYY-MM' as in water_monthly_consumption; `through_day` is set
+-- on months still summed from the daily table (month-to-date).
+--
+-- The job writes with the service role (bypasses RLS); signed-in users read.
+-- Idempotent, safe to run repeatedly.
+-- =============================================================================
+
+create table if not exists public.water_balance_monthly (
+    period           text        primary key,
+    a1               numeric     not null default 0,
+    a2               numeric     not null default 0,
+    a3               numeric     not null default 0,
+    stage1_loss      numeric     not null default 0,
+    stage2_loss      numeric     not null default 0,
+    total_loss       numeric     not null default 0,
+    loss_pct         numeric     not null default 0,
+    loss_cost        numeric     not null default 0,
+    missing_meters   integer     not null default 0,
+    negative_meters  integer     not null default 0,
+    through_day      integer,
+    refreshed_at     timestamptz not null default now()
+);
+
+create table if not exists public.water_zone_monthly (
+    period        text        not null,
+    zone          text        not null,
+    zone_name     text        not null,
+    bulk          numeric     not null default 0,
+    end_users     numeric     not null default 0,
+    loss          numeric     not null default 0,
+    loss_pct      numeric     not null default 0,
+    meters        integer     not null default 0,
+    missing       integer     not null default 0,
+    bulk_missing  boolean     not null default false,
+    refreshed_at  timestamptz not null default now(),
+    primary key (period, zone)
+);
+
+create table if not exists public.water_type_monthly (
+    period        text        not null,
+    type          text        not null,
+    total         numeric     not null default 0,
+    pct           numeric     not null default 0,
+    refreshed_at  timestamptz not null default now(),
+    primary key (period, type)
+);
+
+create table if not exists public.water_dc_monthly (
+    period        text        not null,
+    name          text        not null,
+    type          text,
+    total         numeric     not null default 0,
+    refreshed_at  timestamptz not null default now(),
+    primary key (period, name)
+);
+
+create table if not exists public.water_building_monthly (
+    period        text        not null,
+    building      text        not null,
+    zone_name     text,
+    bulk          numeric     not null default 0,
+    sub           numeric     not null default 0,
+    loss          numeric     not null default 0,
+    loss_pct      numeric     not null default 0,
+    refreshed_at  timestamptz not null default now(),
+    primary key (period, building)
+);
+
+-- water_monthly_consumption / water_meters are filtered by updated_at on every incremental run.
+create index if not exists idx_wmc_updated_at on public.water_monthly_consumption (updated_at);
+create index if not exists idx_water_meters_updated_at on public.water_meters (updated_at);
+
+alter table public.water_balance_monthly  enable row level security;
+alter table public.water_zone_monthly     enable row level security;
+alter table public.water_type_monthly     enable row level security;
+alter table public.water_dc_monthly       enable row level security;
+alter table public.water_building_monthly enable row level security;
+
+drop policy if exists "water_balance_monthly_authed_read" on public.water_balance_monthly;
+create policy "water_balance_monthly_authed_read" on public.water_balance_monthly
+    for select to authenticated using (true);
+
+drop policy if exists "water_zone_monthly_authed_read" on public.water_zone_monthly;
+create policy "water_zone_monthly_authed_read" on public.water_zone_monthly
+    for select to authenticated using (true);
+
+drop policy if exists "water_type_monthly_authed_read" on public.water_type_monthly;
+create policy "water_type_monthly_authed_read" on public.water_type_monthly
+    for select to authenticated using (true);
+
+drop policy if exists "water_dc_monthly_authed_read" on public.water_dc_monthly;
+create policy "water_dc_monthly_authed_read" on public.water_dc_monthly
+    for select to authenticated using (true);
+
+drop policy if exists "water_building_monthly_authed_read" on public.water_building_monthly;
+create policy "water_building_monthly_authed_read" on public.water_building_monthly
+    for select to authenticated using (true);
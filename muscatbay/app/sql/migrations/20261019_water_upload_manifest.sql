@@ -0,0 +1,26 @@
+-- =============================================================================
+-- water_upload_manifest — daily water source files already imported
+-- =============================================================================
+-- Written by scripts/pipeline/daily_import.py (`run-pipeline.py daily-import`):
+-- one row per (content hash, month) a file covered. `sha256` is the hash of
+-- the file's normalised text (pipeline/uploads.py), so the same export saved
+-- again or uploaded twice is recognised and skipped before it is parsed,
+-- stored or written. `storage_path` is the content-addressed copy in the
+-- grafana-uploads bucket (water/{year}/{month}/{sha256}.csv).
+--
+-- Service role only; no policies, so anon and authenticated cannot read or
+-- write it. Idempotent, safe to run repeatedly.
+-- =============================================================================
+
+create table if not exists public.water_upload_manifest (
+    sha256         text        not null,
+    month          text        not null,          -- 'Mon-YY', as water_daily_consumption.month
+    file_name      text,
+    storage_path   text,
+    records        integer     not null default 0,
+    cells_written  integer     not null default 0,
+    imported_at    timestamptz not null default now(),
+    primary key (sha256, month)
+);
+
+alter table public.water_upload_manifest enable row level security;
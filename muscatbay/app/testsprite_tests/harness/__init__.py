@@ -0,0 +1,18 @@
+"""
+Local runner and instrumentation for the TestSprite-generated Playwright suites.
+
+The TC*.py files in this directory (and in the repo-root ``testsprite_tests/``)
+are generated: each one launches its own browser and ends with
+``asyncio.run(run_test())``. This package runs them in-process and instruments
+every browser context they open, so performance and network data can be
+collected without editing the generated files.
+
+Usage (from ``muscatbay/app/testsprite_tests``):
+    python3 -m harness run
+    python3 -m harness run --tests-dir ../../../testsprite_tests --only TC004,TC022
+    python3 -m harness dedup && python3 -m harness run --fast
+    python3 -m harness run --profile-network --only TC004
+    python3 -m harness run --backend record              # once, against a live project
+    python3 -m harness run --backend replay --scale 10 --latency-ms 80
+    python3 -m harness generate --scale 100 && python3 -m harness run --backend dataset --dataset fixtures/datasets/x100
+"""
@@ -0,0 +1,156 @@
+"""
+Command line entry point: ``python3 -m harness <command>``.
+
+Commands:
+    run     execute the generated suite with performance budgets enforced
+            (``--profile-network`` also records Supabase traffic per page;
+            ``--backend record|replay|dataset|offline`` swaps in the mock backend)
+    dedup   group equivalent generated tests and write a page × assertion
+            coverage map (``run --fast`` runs one test per group)
+    generate
+            write a synthetic dataset at --scale 1/10/100 for the mock backend
+            or a local PostgreSQL stand-in
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from . import budgets as perf
+from . import dataset as synthetic
+from . import dedup
+from .mock_backend import FIXTURES_DIR, MODES, FixtureStore, MockBackend
+from .network import NetworkProfiler, format_summary
+from .runner import REPORT_NAME, discover, run_suite, write_report
+
+
+def _split(value: str) -> list:
+    return [v for v in (value or "").split(",") if v.strip()]
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    tests_dir = Path(args.tests_dir).resolve()
+    cases = discover(tests_dir, _split(args.only))
+    if not cases:
+        print(f"No generated tests found in {tests_dir}")
+        return 1
+    if args.fast:
+        analysis = dedup.group([dedup.fingerprint(c.path, c.test_id) for c in cases])
+        skipped = len(cases)
+        cases = dedup.representatives(cases, analysis)
+        print(f"Fast mode: {len(cases)} of {skipped} test(s), none of the skipped asserting anything new")
+
+    collector = perf.BudgetCollector(
+        perf.load_budgets(Path(args.budgets)),
+        {} if args.update_baseline else perf.load_baseline(Path(args.baseline)),
+    )
+    plugins = [collector]
+    backend = None
+    if args.backend != "live":
+        # First in the list: its routes must be installed before anything
+        # else sees the context.
+        backend = MockBackend(
+            args.backend,
+            FixtureStore(Path(args.fixtures)),
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            scale=args.scale if args.backend == "replay" else 1,
+            dataset=synthetic.load_dataset(Path(args.dataset)) if args.backend == "dataset" else None,
+        )
+        plugins.insert(0, backend)
+    profiler = NetworkProfiler() if args.profile_network else None
+    if profiler:
+        plugins.append(profiler)
+
+    print(f"Running {len(cases)} test(s) from {tests_dir} …")
+    results = run_suite(cases, plugins)
+    report_path = Path(args.report) if args.report else tests_dir / "tmp" / REPORT_NAME
+    report = write_report(results, plugins, report_path)
+
+    if args.update_baseline:
+        Path(args.baseline).write_text(json.dumps(perf.baseline_from(collector.verdicts), indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if profiler:
+        print("\nSupabase traffic per page:")
+        print(format_summary(report[profiler.name]["pages"]) or "  (no Supabase requests recorded)")
+
+    if backend and backend.misses:
+        print(f"\n{len(backend.misses)} request(s) had no recorded fixture and were answered with an empty result.")
+
+    s = report["summary"]
+    print(f"\nDone. {s['passed']} passed, {s['failed']} failed, {s['error']} errored. Report: {report_path}")
+    return 0 if s["failed"] == 0 and s["error"] == 0 else 1
+
+
+def cmd_dedup(args: argparse.Namespace) -> int:
+    tests_dir = Path(args.tests_dir).resolve()
+    analysis = dedup.analyse(discover(tests_dir))
+    report_path = Path(args.report) if args.report else dedup.REPORT_FILE
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(analysis, indent=2))
+
+    for g in analysis["duplicates"]:
+        print(f"{g['kind']:11} keep {', '.join(g['fast'])}")
+        for name in g["members"]:
+            if name not in g["fast"]:
+                print(f"{'':11}   ~ {name}")
+    print("\nPage loads (full suite → fast CI):")
+    for page, loads in analysis["page_loads"].items():
+        print(f"  {page:24} {loads['full']:4} → {loads['fast']}")
+    print(f"\n{analysis['tests']} tests, {analysis['groups']} groups. Report: {report_path}")
+    return 0
+
+
+def cmd_generate(args: argparse.Namespace) -> int:
+    out_dir = Path(args.out) if args.out else synthetic.DATASETS_DIR / f"x{args.scale}"
+    manifest = synthetic.write_dataset(synthetic.generate(args.scale, args.seed), out_dir, args.scale, args.seed)
+    for table, count in manifest["tables"].items():
+        print(f"  {table:28} {count:>9,} rows")
+    print(f"Dataset ×{args.scale} written to {out_dir}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="harness")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the generated suite")
+    run.add_argument("--tests-dir", default=str(perf.SUITE_DIR), help="directory holding the TC*.py files")
+    run.add_argument("--only", default="", help="comma-separated test ids or file stems")
+    run.add_argument("--budgets", default=str(perf.BUDGETS_FILE))
+    run.add_argument("--baseline", default=str(perf.BASELINE_FILE))
+    run.add_argument("--update-baseline", action="store_true",
+                     help="record this run's medians as the new performance baseline")
+    run.add_argument("--profile-network", action="store_true",
+                     help="record /rest/v1 and /realtime requests and report over-fetching per page")
+    run.add_argument("--backend", choices=MODES, default="live",
+                     help="live Supabase, record fixtures, replay them, or simulate the backend being down")
+    run.add_argument("--fixtures", default=str(FIXTURES_DIR), help="recorded PostgREST responses")
+    run.add_argument("--latency-ms", type=float, default=0.0, help="synthetic latency added to replayed responses")
+    run.add_argument("--jitter-ms", type=float, default=0.0, help="deterministic per-request jitter on top of it")
+    run.add_argument("--scale", type=int, default=1, help="replay tables N times larger (leaf rows replicated)")
+    run.add_argument("--dataset", default=str(synthetic.DATASETS_DIR / "x1"),
+                     help="generated dataset served by --backend dataset")
+    run.add_argument("--fast", action="store_true", help="run one representative per group of equivalent tests")
+    run.add_argument("--report", default="", help="report path (default: <tests-dir>/tmp/harness_report.json)")
+    run.set_defaults(func=cmd_run)
+
+    dd = sub.add_parser("dedup", help="find duplicate tests and write the coverage map")
+    dd.add_argument("--tests-dir", default=str(perf.SUITE_DIR))
+    dd.add_argument("--report", default="", help="report path (default: pipeline-artifacts/dedup_report.json)")
+    dd.set_defaults(func=cmd_dedup)
+
+    gen = sub.add_parser("generate", help="write a scaled synthetic dataset")
+    gen.add_argument("--scale", type=int, default=1, help="1, 10, 100 … times the real data volume")
+    gen.add_argument("--seed", type=int, default=7)
+    gen.add_argument("--out", default="", help="output directory (default: fixtures/datasets/x<scale>)")
+    gen.set_defaults(func=cmd_generate)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
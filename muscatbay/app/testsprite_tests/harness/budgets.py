@@ -0,0 +1,211 @@
+"""
+Declarative performance budgets for the dashboard pages.
+
+Budgets live in ``testsprite_performance_budgets.json`` next to the functional
+test plans. Each entry names a route and a "ready" condition — a CSS selector
+that must match at least ``min_count`` elements, optionally with no
+``[aria-busy="true"]`` skeleton left on the page. An init script times, in the
+browser, how long after entering the route the condition first holds, and
+reports it back through an exposed binding, so nothing depends on the test
+surviving long enough to be queried.
+
+A measurement over its budget fails the test. Every measurement is also
+compared with ``testsprite_performance_baseline.json`` — the performance
+counterpart of ``testsprite_frontend_test_plan_baseline.json`` — and the delta
+is reported whether or not the budget held.
+"""
+
+import json
+import statistics
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+SUITE_DIR     = Path(__file__).resolve().parents[1]
+BUDGETS_FILE  = SUITE_DIR / "testsprite_performance_budgets.json"
+BASELINE_FILE = SUITE_DIR / "testsprite_performance_baseline.json"
+
+# Runs in every page before any app script. Times each budget's ready
+# condition from the moment its route was entered (a full load starts the
+# clock at navigation start; a client-side pushState restarts it).
+INIT_SCRIPT = """
+(() => {
+  if (window.top !== window || window.__mbPerfInstalled) return;
+  window.__mbPerfInstalled = true;
+  const budgets = __BUDGETS__;
+  const seen = new Set();
+  let routeStart = 0;
+  let routePath = location.pathname;
+  const matches = (route, path) =>
+    path === route || (route !== "/" && path.startsWith(route + "/"));
+  const onRoute = () => {
+    if (location.pathname === routePath) return;
+    routePath = location.pathname;
+    routeStart = performance.now();
+    seen.clear();
+  };
+  for (const method of ["pushState", "replaceState"]) {
+    const original = history[method];
+    history[method] = function (...args) {
+      const out = original.apply(this, args);
+      onRoute();
+      return out;
+    };
+  }
+  addEventListener("popstate", onRoute);
+  const check = () => {
+    for (const b of budgets) {
+      if (seen.has(b.id) || !matches(b.route, location.pathname)) continue;
+      try {
+        if (document.querySelectorAll(b.ready).length < b.min_count) continue;
+      } catch (e) {
+        continue;
+      }
+      if (b.settled && document.querySelector('[aria-busy="true"]')) continue;
+      seen.add(b.id);
+      const ms = performance.now() - routeStart;
+      if (typeof window.__mbPerfMark === "function") {
+        window.__mbPerfMark({ id: b.id, ms, path: location.pathname });
+      }
+    }
+  };
+  new MutationObserver(check).observe(document, { subtree: true, childList: true, attributes: true });
+})();
+"""
+
+
+@dataclass(frozen=True)
+class Budget:
+    id: str
+    title: str
+    route: str
+    ready: str
+    budget_ms: float
+    min_count: int = 1
+    settled: bool = True
+    tests: tuple = ()   # test ids the budget is enforced for; empty = any test reaching it
+
+
+@dataclass
+class Verdict:
+    budget_id: str
+    title: str
+    test: str
+    measured_ms: float
+    budget_ms: float
+    baseline_ms: Optional[float]
+    delta_ms: Optional[float]
+    delta_pct: Optional[float]
+    exceeded: bool
+
+
+def load_budgets(path: Path = BUDGETS_FILE) -> list:
+    if not path.exists():
+        return []
+    raw = json.loads(path.read_text())
+    budgets = []
+    for entry in raw.get("budgets", []):
+        budgets.append(Budget(
+            id=entry["id"],
+            title=entry.get("title", entry["id"]),
+            route=entry["route"],
+            ready=entry["ready"],
+            budget_ms=float(entry["budget_ms"]),
+            min_count=int(entry.get("min_count", 1)),
+            settled=bool(entry.get("settled", True)),
+            tests=tuple(entry.get("tests", ())),
+        ))
+    return budgets
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> dict:
+    """``{budget_id: ms}`` from the stored baseline; empty when none was recorded yet."""
+    if not path.exists():
+        return {}
+    raw = json.loads(path.read_text())
+    return {k: float(v["ms"]) for k, v in raw.get("measurements", {}).items()}
+
+
+def evaluate(budgets, measured: dict, baseline: dict, test: str) -> list:
+    """
+    Compare one test's measurements (``{budget_id: ms}``) with the budgets.
+
+    Budgets the test never reached are not judged — a test that does not open
+    the STP tab says nothing about how fast the STP table renders.
+    """
+    test_id = test.split("_", 1)[0]
+    verdicts = []
+    for b in budgets:
+        if b.id not in measured or (b.tests and test_id not in b.tests):
+            continue
+        ms = round(measured[b.id], 1)
+        base = baseline.get(b.id)
+        delta = round(ms - base, 1) if base is not None else None
+        verdicts.append(Verdict(
+            budget_id=b.id,
+            title=b.title,
+            test=test,
+            measured_ms=ms,
+            budget_ms=b.budget_ms,
+            baseline_ms=base,
+            delta_ms=delta,
+            delta_pct=round(delta / base * 100, 1) if base else None,
+            exceeded=ms > b.budget_ms,
+        ))
+    return verdicts
+
+
+def baseline_from(verdicts) -> dict:
+    """Median measurement per budget across a run, in the baseline file's shape."""
+    samples = {}
+    for v in verdicts:
+        samples.setdefault(v.budget_id, []).append(v.measured_ms)
+    return {
+        "measurements": {
+            budget_id: {"ms": round(statistics.median(values), 1), "samples": len(values)}
+            for budget_id, values in sorted(samples.items())
+        }
+    }
+
+
+class BudgetCollector:
+    """Runner plugin: installs the timing script and fails tests over budget."""
+
+    name = "budgets"
+
+    def __init__(self, budgets, baseline: dict):
+        self.budgets = budgets
+        self.baseline = baseline
+        self.verdicts = []
+        self._marks = {}
+
+    async def attach(self, context, case) -> None:
+        if not self.budgets:
+            return
+        marks = self._marks.setdefault(case.name, {})
+
+        def on_mark(_source, payload):
+            # Worst observation per budget: a revisit that renders slower than
+            # the first visit is still a page the user waited for.
+            marks[payload["id"]] = max(marks.get(payload["id"], 0.0), float(payload["ms"]))
+
+        await context.expose_binding("__mbPerfMark", on_mark)
+        config = [
+            {"id": b.id, "route": b.route, "ready": b.ready, "min_count": b.min_count, "settled": b.settled}
+            for b in self.budgets
+        ]
+        await context.add_init_script(INIT_SCRIPT.replace("__BUDGETS__", json.dumps(config)))
+
+    def finish(self, case, result) -> None:
+        verdicts = evaluate(self.budgets, self._marks.pop(case.name, {}), self.baseline, case.name)
+        for v in verdicts:
+            if v.exceeded:
+                drift = f", {v.delta_ms:+.0f} ms vs baseline" if v.delta_ms is not None else ""
+                result.fail(f"budget '{v.title}': {v.measured_ms:.0f} ms > {v.budget_ms:.0f} ms{drift}")
+        self.verdicts.extend(verdicts)
+
+    def report(self, _results) -> dict:
+        return {
+            "exceeded": sum(1 for v in self.verdicts if v.exceeded),
+            "verdicts": [asdict(v) for v in self.verdicts],
+        }
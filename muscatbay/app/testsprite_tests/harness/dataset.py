@@ -0,0 +1,430 @@
+"""
+Scaled synthetic datasets for load-testing the dashboards.
+
+The real data is about 350 water meters, a few years of months and a couple of
+hundred assets — too small to expose anything quadratic in ``computePeriod``,
+``buildMonthlyData`` or the asset and contractor tables. ``generate`` writes a
+realistic dataset at 1×, 10× or 100× that size:
+
+    water_meters                the registry from sql/data/water_meters_seed.sql;
+                                L1, L2, DC, building bulks and N/A meters are kept
+                                as-is, villa/retail/apartment leaves are replicated
+                                under their real parents, so every zone, building
+                                and DC account in lib/water-accounts.ts keeps its
+                                place in the hierarchy
+    water_monthly_consumption   'YYYY-MM' readings; bulk meters are the sum of
+                                their children plus a per-zone loss, so A1/A2/A3
+                                and the zone losses look like production
+    water_daily_consumption     day_1…day_31 rows for the most recent months
+    electricity_meters          the meters from sql/schema/electricity-setup.sql,
+    electricity_readings        replicated; 'Mon-YY' months with NULL gaps, zero
+                                reads and the occasional spike
+    stp_operations              one row per day; scale lengthens the history
+    master_assets_register      snake_case columns, as the app reads them, and
+    Assets_Register_Database    the same assets under the legacy column names
+
+Every table is written as ``<table>.json`` (rows, for the mock backend's
+``--backend dataset`` mode) and ``<table>.csv`` with a ``load.sql`` of
+``\\copy`` statements for loading a local PostgreSQL stand-in with psql.
+Output is deterministic for a given ``--seed``.
+"""
+
+import calendar
+import csv
+import datetime as dt
+import json
+import math
+import random
+import re
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from .budgets import SUITE_DIR
+
+APP_DIR          = SUITE_DIR.parent
+METERS_SEED      = APP_DIR / "sql" / "data" / "water_meters_seed.sql"
+ELECTRICITY_SEED = APP_DIR / "sql" / "schema" / "electricity-setup.sql"
+DATASETS_DIR     = SUITE_DIR / "fixtures" / "datasets"
+
+MONTHS           = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+FIRST_PERIOD     = (2024, 1)       # PERIOD_FLOOR in functions/api/water.ts
+FIRST_ELEC_MONTH = (2024, 4)
+STP_BASE_DAYS    = 520             # roughly the real daily log length at 1×
+BASE_ASSETS      = 220
+DAILY_MONTHS     = 3
+TANKER_FEE       = 4.50            # lib/config.ts
+TSE_SAVING_RATE  = 1.32
+
+# Leaf meters that are replicated when scaling. Building bulks are L3 too, but
+# they are parents in BUILDING_CONFIG and must stay single.
+REPLICATED_TYPES = {"Residential (Villa)", "Residential (Apartment)", "Building (Common)", "Retail", "Unsold"}
+NAMESPACE        = uuid.UUID("6f1d7a52-3b5e-4c1e-9a55-2f0e8c1d7b10")
+
+# Monthly m³ by meter type (mean, spread); bulks are derived from children.
+CONSUMPTION_MODEL = {
+    "Residential (Villa)": (32.0, 14.0),
+    "Residential (Apartment)": (11.0, 5.0),
+    "Building (Common)": (4.0, 2.5),
+    "Retail": (120.0, 60.0),
+    "Unsold": (1.5, 1.5),
+    "Irrigation (Services)": (650.0, 250.0),
+    "Common Area (MB)": (180.0, 80.0),
+    "N/A": (300.0, 120.0),
+}
+ZONE_LOSS = {"Zone_FM": 0.08, "Zone_03A": 0.22, "Zone_03B": 0.31, "Zone_05": 0.12, "Zone_08": 0.18, "Zone_VS": 0.05}
+TRUNK_LOSS = 0.04
+
+ZONE_TO_LEGACY = {
+    "Zone_FM": "Zone_01_(FM)", "Zone_03A": "Zone_03_(A)", "Zone_03B": "Zone_03_(B)",
+    "Direct_Connection": "Direct Connection", "Main_Bulk": "Main Bulk",
+}
+
+ELECTRICITY_MODEL = {
+    "Beach well": (22000.0, 8000.0), "Common Building": (9000.0, 4000.0), "DB": (1500.0, 900.0),
+    "D_Building": (4200.0, 1800.0), "FP-Landscape Lights Z3": (600.0, 300.0), "IRR": (900.0, 500.0),
+    "LS": (3500.0, 1500.0), "PS": (5500.0, 2500.0), "Street Light": (2800.0, 1200.0),
+}
+
+ASSET_DISCIPLINES = {
+    "Mechanical & Plumbing": [("Pumps", 15), ("Water Heaters", 12), ("Valves", 20), ("Tanks", 25)],
+    "Electrical": [("Generators", 20), ("Distribution Boards", 25), ("Controllers", 10), ("Transformers", 30)],
+    "HVAC": [("Chillers", 20), ("AHU", 18), ("Split Units", 10), ("Exhaust Fans", 15)],
+    "Fire & Life Safety": [("Fire Pumps", 20), ("Fire Alarm Panels", 15), ("Sprinklers", 25)],
+    "Lifts & Transport": [("Elevators", 25), ("Vehicles", 8)],
+    "Civil & Landscape": [("Irrigation", 12), ("Lighting Poles", 20), ("Play Equipment", 10)],
+}
+ASSET_ZONES      = ["Zone 1 (FM)", "Zone 3", "Zone 5", "Zone 8", "Village Square", "STP", "Main Entrance"]
+ASSET_SYSTEMS    = ["Water Supply", "Sewage", "Power", "Cooling", "Fire Protection", "Landscape", "Transport"]
+ASSET_STATUSES   = [("Active", 70), ("Working", 12), ("Under Maintenance", 8), ("In Storage", 5),
+                    ("Decommissioned", 3), ("TO VERIFY", 2)]
+ASSET_CONDITIONS = [("Good", 55), ("Fair", 30), ("Poor", 10), ("Critical", 5)]
+PPM_FREQUENCIES  = [("Monthly", 1), ("Quarterly", 3), ("Semi-Annual", 6), ("Annual", 12)]
+CONTRACTORS      = ["Kone Elevators", "Muna Noor", "Bahwan Engineering", "Gulf Expert", "Oman Pumps", "Al Naba"]
+
+# master_assets_register column → Assets_Register_Database column
+LEGACY_ASSET_COLUMNS = {
+    "asset_uid": "Asset_UID", "asset_tag": "Asset_Tag", "asset_name": "Asset_Name",
+    "discipline": "Discipline", "category": "Category", "system_area": "System_Area",
+    "zone": "Zone", "building_area": "Building", "manufacturer": "Manufacturer_Brand",
+    "model": "Model", "quantity": "Quantity", "install_year": "Install_Year",
+    "life_expectancy_years": "Life_Expectancy_Years", "current_age_years": "Current_Age_Years",
+    "erl_years": "ERL_Years", "condition": "Condition", "status": "Status",
+    "is_asset_active": "Is_Asset_Active", "ppm_frequency": "PPM_Frequency",
+    "ppm_interval_months": "PPM_Interval", "amc_contractor": "AMC_Contractor",
+    "responsibility_owner": "Responsibility_Owner", "notes_remarks": "Notes_Remarks",
+}
+
+_TOKEN_RE = re.compile(r"'((?:[^']|'')*)'|(NULL)|(-?\d+(?:\.\d+)?)")
+
+
+def _tuples(path: Path, start_marker: str) -> list:
+    """Value tuples of the first ``INSERT … VALUES`` after ``start_marker`` in a seed file."""
+    text = path.read_text(encoding="utf-8")
+    body = text[text.index(start_marker):]
+    body = body[body.index("VALUES") + len("VALUES"):body.index(";")]
+    rows = []
+    for line in body.splitlines():
+        line = line.strip()
+        if not line.startswith("("):
+            continue
+        if "ON CONFLICT" in line:
+            break
+        values = []
+        for quoted, null, number in _TOKEN_RE.findall(line):
+            if null:
+                values.append(None)
+            elif number:
+                values.append(float(number) if "." in number else int(number))
+            else:
+                values.append(quoted.replace("''", "'"))
+        rows.append(values)
+    return rows
+
+
+def load_meter_registry(path: Path = METERS_SEED) -> list:
+    columns = ["meter_id", "account_number", "meter_name", "meter_name_original",
+               "label", "zone", "parent_meter", "parent_account_number", "type", "sort_order"]
+    return [dict(zip(columns, values)) for values in _tuples(path, "INSERT INTO water_meters")]
+
+
+def load_electricity_meters(path: Path = ELECTRICITY_SEED) -> list:
+    return [
+        {"name": name, "meter_type": meter_type, "account_number": account}
+        for name, meter_type, account in _tuples(path, "INSERT INTO electricity_meters")
+    ]
+
+
+def _weighted(rng: random.Random, choices) -> str:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _suffix(k: int, scale: int) -> str:
+    return f"S{k:0{len(str(scale - 1))}d}"
+
+
+def periods(first: tuple, last: tuple) -> list:
+    (year, month), out = first, []
+    while (year, month) <= last:
+        out.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return out
+
+
+def scale_meters(registry: list, scale: int) -> list:
+    """The registry with every replicable leaf meter repeated ``scale`` times under its own parent."""
+    meters = [dict(m) for m in registry]
+    next_sort = max(m["sort_order"] or 0 for m in registry) + 1
+    for k in range(1, scale):
+        suffix = _suffix(k, scale)
+        for m in registry:
+            if m["label"] not in ("L3", "L4") or m["type"] not in REPLICATED_TYPES:
+                continue
+            meters.append(dict(
+                m,
+                meter_id=f"{m['meter_id']}-{suffix}",
+                account_number=f"{m['account_number']}{suffix}",
+                meter_name=f"{m['meter_name']} [{suffix}]",
+                meter_name_original=f"{m['meter_name_original']} [{suffix}]",
+                sort_order=next_sort,
+            ))
+            next_sort += 1
+    return meters
+
+
+def _season(month: int) -> float:
+    # Muscat summers push consumption up roughly a third over winter.
+    return 1.0 - 0.18 * math.cos((month - 1) / 12 * 2 * math.pi)
+
+
+def monthly_consumption(meters: list, months: list, rng: random.Random) -> dict:
+    """``{(account, (year, month)): m³ or None}`` with bulks summed bottom-up from their children."""
+    children = defaultdict(list)
+    for m in meters:
+        if m["parent_account_number"]:
+            children[m["parent_account_number"]].append(m)
+    values = {}
+
+    def leaf(m, ym):
+        mean, spread = CONSUMPTION_MODEL.get(m["type"], (20.0, 10.0))
+        roll = rng.random()
+        if roll < 0.015:
+            return None                               # not yet reported
+        if roll < 0.05 or (m["type"] == "Unsold" and roll < 0.5):
+            return 0.0                                # vacant / no draw
+        return round(max(0.0, rng.gauss(mean, spread)) * _season(ym[1]), 2)
+
+    def total(m, ym):
+        kids = children.get(m["account_number"], [])
+        if not kids:
+            value = leaf(m, ym)
+        else:
+            child_sum = sum(total(c, ym) or 0.0 for c in kids)
+            if m["label"] == "L1":
+                loss = TRUNK_LOSS
+            elif m["label"] == "L2":
+                loss = ZONE_LOSS.get(m["zone"], 0.1)
+            else:
+                loss = 0.03                           # building bulk vs its apartments
+            value = round(child_sum * (1 + loss + rng.uniform(-0.03, 0.03)), 2)
+        values[(m["account_number"], ym)] = value
+        return value
+
+    roots = [m for m in meters if not m["parent_account_number"]]
+    for ym in months:
+        for m in roots:
+            total(m, ym)
+    return values
+
+
+def generate(scale: int = 1, seed: int = 7, today: dt.date = None) -> dict:
+    """Every table of the dataset as ``{table: rows}``."""
+    today = today or dt.date.today()
+    last = (today.year, today.month)
+    months = periods(FIRST_PERIOD, last)
+    tables = {}
+
+    meters = scale_meters(load_meter_registry(), scale)
+    tables["water_meters"] = meters
+    readings = monthly_consumption(meters, months, random.Random(f"{seed}:water"))
+    tables["water_monthly_consumption"] = [
+        {"meter_id": m["meter_id"], "account_number": m["account_number"],
+         "period": f"{y}-{mo:02d}", "consumption": readings[(m["account_number"], (y, mo))]}
+        for (y, mo) in months for m in meters
+    ]
+    tables["water_daily_consumption"] = daily_rows(meters, readings, months[-DAILY_MONTHS:], today,
+                                                   random.Random(f"{seed}:daily"))
+
+    elec_meters, elec_readings = electricity(scale, periods(FIRST_ELEC_MONTH, last), random.Random(f"{seed}:elec"))
+    tables["electricity_meters"] = elec_meters
+    tables["electricity_readings"] = elec_readings
+    tables["stp_operations"] = stp_operations(STP_BASE_DAYS * scale, today, random.Random(f"{seed}:stp"))
+
+    assets = generate_assets(BASE_ASSETS * scale, today, random.Random(f"{seed}:assets"))
+    tables["master_assets_register"] = assets
+    tables["Assets_Register_Database"] = [
+        {LEGACY_ASSET_COLUMNS.get(k, k): v for k, v in a.items() if k in LEGACY_ASSET_COLUMNS} for a in assets
+    ]
+    return tables
+
+
+def daily_rows(meters: list, readings: dict, months: list, today: dt.date, rng: random.Random) -> list:
+    rows = []
+    for year, month in months:
+        days = calendar.monthrange(year, month)[1]
+        if (year, month) == (today.year, today.month):
+            days = today.day - 1                      # the current month is month-to-date
+        for m in meters:
+            monthly = readings.get((m["account_number"], (year, month)))
+            row = {
+                "meter_name": m["meter_name"], "account_number": m["account_number"], "label": m["label"],
+                "zone": ZONE_TO_LEGACY.get(m["zone"], m["zone"]), "parent_meter": m["parent_meter"],
+                "type": m["type"], "month": f"{MONTHS[month - 1]}-{year % 100:02d}", "year": year,
+            }
+            per_day = (monthly or 0.0) / calendar.monthrange(year, month)[1]
+            for d in range(1, 32):
+                if d > days or monthly is None:
+                    row[f"day_{d}"] = None
+                else:
+                    row[f"day_{d}"] = round(max(0.0, per_day * rng.uniform(0.6, 1.4)), 3)
+            rows.append(row)
+    return rows
+
+
+def electricity(scale: int, months: list, rng: random.Random) -> tuple:
+    base = load_electricity_meters()
+    meters = []
+    for k in range(scale):
+        suffix = _suffix(k, scale) if k else ""
+        for m in base:
+            account = f"{m['account_number']}-{suffix}" if suffix else m["account_number"]
+            meters.append({
+                "id": str(uuid.uuid5(NAMESPACE, f"electricity:{account}")),
+                "name": f"{m['name']} [{suffix}]" if suffix else m["name"],
+                "meter_type": m["meter_type"],
+                "account_number": account,
+            })
+    readings = []
+    for m in meters:
+        mean, spread = ELECTRICITY_MODEL.get(m["meter_type"], (2000.0, 1000.0))
+        for year, month in months:
+            label = f"{MONTHS[month - 1]}-{year % 100:02d}"
+            roll = rng.random()
+            if roll < 0.02:
+                value = None                          # not read
+            elif roll < 0.04:
+                value = 0.0                           # meter offline
+            else:
+                value = max(0.0, rng.gauss(mean, spread)) * _season(month)
+                if roll > 0.985:
+                    value *= rng.choice((3.5, 0.15))  # spike or dip
+                value = round(value, 1)
+            readings.append({
+                "id": str(uuid.uuid5(NAMESPACE, f"reading:{m['account_number']}:{label}")),
+                "meter_id": m["id"], "month": label, "consumption": value,
+            })
+    return meters, readings
+
+
+def stp_operations(days: int, today: dt.date, rng: random.Random) -> list:
+    rows = []
+    start = today - dt.timedelta(days=days)
+    for i in range(days):
+        date = start + dt.timedelta(days=i)
+        inlet = round(max(0.0, rng.gauss(620, 140)) * _season(date.month), 1)
+        if rng.random() < 0.01:
+            inlet = 0.0                               # plant stopped
+        recovery = min(1.0, max(0.5, rng.gauss(0.9, 0.06)))
+        tse = round(inlet * recovery, 1)
+        trips = max(0, int(rng.gauss(inlet / 45, 3)))
+        income = round(trips * TANKER_FEE, 2)
+        savings = round(tse * TSE_SAVING_RATE, 2)
+        rows.append({
+            "id": i + 1, "date": date.isoformat(), "inlet_sewage": inlet, "tse_for_irrigation": tse,
+            "tanker_trips": trips, "generated_income": income, "water_savings": savings,
+            "total_impact": round(income + savings, 2), "monthly_volume_input": None,
+            "monthly_volume_output": None, "monthly_income": None, "monthly_savings": None,
+            "original_id": f"synthetic-{i + 1:06d}",
+        })
+    return rows
+
+
+def generate_assets(count: int, today: dt.date, rng: random.Random) -> list:
+    assets = []
+    for i in range(1, count + 1):
+        discipline = rng.choice(list(ASSET_DISCIPLINES))
+        category, life = rng.choice(ASSET_DISCIPLINES[discipline])
+        install_year = rng.randint(today.year - 18, today.year)
+        age = today.year - install_year
+        frequency = _weighted(rng, [(f, 1) for f, _ in PPM_FREQUENCIES])
+        interval = dict(PPM_FREQUENCIES)[frequency]
+        last_ppm = today - dt.timedelta(days=rng.randint(0, interval * 45))
+        next_ppm = last_ppm + dt.timedelta(days=interval * 30)
+        unit_cost = round(rng.lognormvariate(7.5, 1.1), 2)
+        status = _weighted(rng, ASSET_STATUSES)
+        assets.append({
+            "asset_uid": f"MB-AST-{i:06d}",
+            "asset_tag": f"MB-{discipline[:3].upper()}-{i:05d}",
+            "asset_name": f"{category[:-1] if category.endswith('s') else category} {i:05d}",
+            "discipline": discipline,
+            "category": category,
+            "subcategory": category,
+            "system_area": rng.choice(ASSET_SYSTEMS),
+            "zone": rng.choice(ASSET_ZONES),
+            "building_area": f"Building {rng.randint(1, 60)}",
+            "manufacturer": rng.choice(["Grundfos", "Caterpillar", "Carrier", "Schneider", "Kone", "Hunter"]),
+            "model": f"M-{rng.randint(100, 999)}",
+            "quantity": rng.choice([1, 1, 1, 2, 4]),
+            "install_year": install_year,
+            "life_expectancy_years": life,
+            "current_age_years": age,
+            "erl_years": max(0, life - age),
+            "pct_life_used": round(min(100.0, age / life * 100), 1),
+            "criticality": _weighted(rng, [("High", 20), ("Medium", 50), ("Low", 30)]),
+            "condition": _weighted(rng, ASSET_CONDITIONS),
+            "status": status,
+            "is_asset_active": status not in ("Decommissioned", "In Storage"),
+            "ppm_frequency": frequency,
+            "ppm_interval_months": interval,
+            "last_ppm_date": last_ppm.isoformat(),
+            "next_ppm_date": next_ppm.isoformat(),
+            "amc_contractor": rng.choice(CONTRACTORS),
+            "responsibility_owner": "Facility Management",
+            "original_unit_cost_omr": unit_cost,
+            "current_replacement_cost_omr": round(unit_cost * (1.03 ** age), 2),
+            "notes_remarks": None,
+            "data_source": "synthetic",
+        })
+    return assets
+
+
+def write_dataset(tables: dict, out_dir: Path, scale: int, seed: int) -> dict:
+    """Write ``<table>.json``, ``<table>.csv``, ``load.sql`` and ``manifest.json``; return the manifest."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    load = [f"-- Synthetic dataset ×{scale} (seed {seed}). Run with psql from this directory:",
+            "--   psql \"$LOCAL_DATABASE_URL\" -f load.sql", "BEGIN;"]
+    counts = {}
+    for table, rows in tables.items():
+        counts[table] = len(rows)
+        (out_dir / f"{table}.json").write_text(json.dumps(rows, separators=(",", ":")))
+        columns = list(rows[0]) if rows else []
+        with open(out_dir / f"{table}.csv", "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(["" if row.get(c) is None else row.get(c) for c in columns])
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        load.append(f'\\copy "{table}" ({column_list}) FROM \'{table}.csv\' WITH (FORMAT csv, HEADER true)')
+    load.append("COMMIT;")
+    (out_dir / "load.sql").write_text("\n".join(load) + "\n")
+    manifest = {"scale": scale, "seed": seed, "generated_at": dt.datetime.now().isoformat(timespec="seconds"),
+                "tables": counts}
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n")
+    return manifest
+
+
+def load_dataset(directory: Path) -> dict:
+    """``{table: rows}`` from a directory written by :func:`write_dataset`."""
+    return {path.stem: json.loads(path.read_text()) for path in sorted(directory.glob("*.json"))
+            if path.name != "manifest.json"}
@@ -0,0 +1,242 @@
+"""
+Find duplicate and overlapping generated tests.
+
+TestSprite regenerates a plan entry several times, so one directory can hold
+four "loading spinner" variants of TC001 that each log in and load the same
+dashboard. Every TC*.py file is parsed (never imported) and reduced to:
+
+    journey     the interactions in source order — ``goto`` paths, the
+                selectors that were filled, clicked, pressed or hovered, and
+                page-level steps such as viewport changes, reloads and
+                scripted scrolling — with waits dropped and immediately
+                repeated blocks (the generated "retry sign in" steps)
+                collapsed
+    assertions  ``(page, matcher, target)`` for every ``expect(...)`` call and
+                plain ``assert``, where page is the route last navigated to
+
+Tests with the same journey form a group. The member with the most assertions
+is the group's representative. ``run --fast`` runs every representative plus
+each member that asserts something the members already kept do not, so fast
+CI drops only tests whose assertions are a subset of what it still runs. A
+group is ``identical`` when every member asserts the same things, otherwise
+``overlapping``; the coverage map shows which assertions fast CI keeps.
+"""
+
+import ast
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from .budgets import SUITE_DIR
+
+# The app's gitignored artifact directory, not the tests tree.
+REPORT_FILE  = SUITE_DIR.parent / "pipeline-artifacts" / "dedup_report.json"
+
+INTERACTIONS = {"fill", "click", "dblclick", "press", "hover", "check", "uncheck", "select_option", "type", "tap"}
+# Page-level steps that change what the page shows without a locator; their
+# arguments are part of the step (a 375px viewport is not a 1280px one).
+PAGE_STEPS   = {"set_viewport_size", "reload", "go_back", "go_forward", "emulate_media", "evaluate", "wheel"}
+
+
+@dataclass
+class Fingerprint:
+    name: str
+    test_id: str
+    journey: tuple
+    assertions: tuple
+    pages: tuple
+
+    @property
+    def journey_key(self) -> str:
+        return hashlib.sha1(repr(self.journey).encode()).hexdigest()[:12]
+
+
+@dataclass
+class Group:
+    key: str
+    representative: str
+    members: list = field(default_factory=list)
+    kind: str = "identical"             # identical | overlapping | unique
+    fast: list = field(default_factory=list)        # members ``run --fast`` keeps
+
+
+def _literal(node) -> Optional[str]:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+def _locator_target(node) -> Optional[str]:
+    """The selector string of ``x.locator('…')`` anywhere in a chain like ``.locator('…').nth(0).first``."""
+    while node is not None:
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Attribute) and func.attr in ("locator", "get_by_text", "get_by_role",
+                                                               "get_by_label", "get_by_placeholder", "get_by_test_id"):
+                arg = _literal(node.args[0]) if node.args else None
+                return arg if func.attr == "locator" else f"{func.attr}={arg}"
+            node = func.value if isinstance(func, ast.Attribute) else None
+        elif isinstance(node, ast.Attribute):
+            node = node.value
+        else:
+            return None
+    return None
+
+
+def _path(url: str) -> str:
+    return urlsplit(url).path.rstrip("/") or "/"
+
+
+def collapse(steps: list) -> list:
+    """Remove immediately repeated blocks: ``a b c a b c d`` → ``a b c d``."""
+    steps = list(steps)
+    changed = True
+    while changed:
+        changed = False
+        for size in range(1, len(steps) // 2 + 1):
+            i = 0
+            while i + 2 * size <= len(steps):
+                if steps[i:i + size] == steps[i + size:i + 2 * size]:
+                    del steps[i + size:i + 2 * size]
+                    changed = True
+                else:
+                    i += 1
+    return steps
+
+
+def fingerprint(path: Path, test_id: str = "") -> Fingerprint:
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    calls = sorted(
+        (n for n in ast.walk(tree) if isinstance(n, (ast.Call, ast.Assign, ast.Assert))),
+        key=lambda n: (n.lineno, n.col_offset),
+    )
+    variables = {}
+    steps, assertions, pages = [], set(), []
+    page = "/"
+
+    for node in calls:
+        if isinstance(node, ast.Assign):
+            target = _locator_target(node.value)
+            if target is not None:
+                for name in node.targets:
+                    if isinstance(name, ast.Name):
+                        variables[name.id] = target
+            continue
+        if isinstance(node, ast.Assert):
+            assertions.add((page, "assert", ast.unparse(node.test)))
+            continue
+
+        func = node.func
+        if not isinstance(func, ast.Attribute):
+            continue
+        if func.attr == "goto" and node.args and _literal(node.args[0]):
+            page = _path(_literal(node.args[0]))
+            steps.append(("goto", page))
+            if page not in pages:
+                pages.append(page)
+        elif func.attr in INTERACTIONS:
+            owner = func.value
+            target = variables.get(owner.id) if isinstance(owner, ast.Name) else _locator_target(owner)
+            if target is not None:
+                steps.append((func.attr, target))
+            elif func.attr == "press":
+                steps.append(("press", "|".join(ast.unparse(a) for a in node.args)))
+        elif func.attr in PAGE_STEPS:
+            steps.append((func.attr, "|".join(ast.unparse(a) for a in node.args + [k.value for k in node.keywords])))
+        elif func.attr.startswith("to_") and isinstance(func.value, ast.Call):
+            inner = func.value
+            if isinstance(inner.func, ast.Name) and inner.func.id == "expect" and inner.args:
+                subject = inner.args[0]
+                target = variables.get(subject.id) if isinstance(subject, ast.Name) else _locator_target(subject)
+                expected = ",".join(ast.unparse(a) for a in node.args)
+                assertions.add((page, func.attr, f"{target or ast.unparse(subject)}{'|' + expected if expected else ''}"))
+
+    return Fingerprint(
+        name=path.stem,
+        test_id=test_id,
+        journey=tuple(collapse(steps)),
+        assertions=tuple(sorted(assertions)),
+        pages=tuple(pages) or ("/",),
+    )
+
+
+def group(fingerprints: list) -> list:
+    by_journey = {}
+    for fp in fingerprints:
+        by_journey.setdefault(fp.journey_key, []).append(fp)
+
+    groups = []
+    for key, members in sorted(by_journey.items(), key=lambda item: min(m.name for m in item[1])):
+        members.sort(key=lambda m: (-len(m.assertions), m.name))
+        rep = members[0]
+        covered, fast = set(rep.assertions), [rep.name]
+        for m in members[1:]:
+            if not set(m.assertions) <= covered:
+                covered.update(m.assertions)
+                fast.append(m.name)
+        if len(members) == 1:
+            kind = "unique"
+        elif any(set(m.assertions) != set(rep.assertions) for m in members[1:]):
+            kind = "overlapping"
+        else:
+            kind = "identical"
+        groups.append(Group(
+            key=key,
+            representative=rep.name,
+            members=sorted(m.name for m in members),
+            kind=kind,
+            fast=sorted(fast),
+        ))
+    return groups
+
+
+def representatives(cases, groups) -> list:
+    """The subset of ``cases`` that fast CI runs: per journey group, the members that add an assertion."""
+    keep = {name for g in groups for name in g.fast}
+    return [c for c in cases if c.name in keep]
+
+
+def coverage_map(fingerprints: list, groups: list) -> dict:
+    """
+    ``{page: {assertion: {"tests": [...], "fast": bool}}}``.
+
+    ``fast`` says whether a representative still makes that assertion, i.e.
+    whether fast CI keeps covering it.
+    """
+    fast = {name for g in groups for name in g.fast}
+    pages = {}
+    for fp in fingerprints:
+        for page, matcher, target in fp.assertions:
+            cell = pages.setdefault(page, {}).setdefault(f"{matcher} {target}", {"tests": [], "fast": False})
+            cell["tests"].append(fp.name)
+            cell["fast"] = cell["fast"] or fp.name in fast
+        if not fp.assertions:
+            cell = pages.setdefault(fp.pages[-1], {}).setdefault("(no assertion)", {"tests": [], "fast": False})
+            cell["tests"].append(fp.name)
+            cell["fast"] = cell["fast"] or fp.name in fast
+    return {page: dict(sorted(cells.items())) for page, cells in sorted(pages.items())}
+
+
+def page_loads(fingerprints: list, groups: list) -> dict:
+    """How many times each page is loaded by the full suite vs. by fast CI."""
+    fast = {name for g in groups for name in g.fast}
+    loads = {}
+    for fp in fingerprints:
+        for page in fp.pages:
+            row = loads.setdefault(page, {"full": 0, "fast": 0})
+            row["full"] += 1
+            row["fast"] += fp.name in fast
+    return dict(sorted(loads.items()))
+
+
+def analyse(cases) -> dict:
+    fingerprints = [fingerprint(c.path, c.test_id) for c in cases]
+    groups = group(fingerprints)
+    return {
+        "tests": len(fingerprints),
+        "groups": len(groups),
+        "fast_selection": sorted(name for g in groups for name in g.fast),
+        "duplicates": [g.__dict__ for g in groups if g.kind != "unique"],
+        "page_loads": page_loads(fingerprints, groups),
+        "coverage": coverage_map(fingerprints, groups),
+    }
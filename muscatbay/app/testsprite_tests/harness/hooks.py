@@ -0,0 +1,34 @@
+"""
+Browser-context hook point.
+
+Every generated test creates its context with ``await browser.new_context()``.
+While :func:`context_hooks` is active, that call is wrapped so each registered
+callback receives the fresh context before the test touches it — the one place
+the budget collector, the network profiler and the mock backend attach.
+"""
+
+import contextlib
+from typing import Awaitable, Callable, Iterator, Sequence
+
+ContextCallback = Callable[[object], Awaitable[None]]
+
+
+@contextlib.contextmanager
+def context_hooks(callbacks: Sequence[ContextCallback]) -> Iterator[None]:
+    # Imported lazily so the pure parts of the harness (budget evaluation,
+    # reports) stay importable on machines without Playwright installed.
+    from playwright.async_api import Browser
+
+    original = Browser.new_context
+
+    async def new_context(self, *args, **kwargs):
+        context = await original(self, *args, **kwargs)
+        for callback in callbacks:
+            await callback(context)
+        return context
+
+    Browser.new_context = new_context
+    try:
+        yield
+    finally:
+        Browser.new_context = original
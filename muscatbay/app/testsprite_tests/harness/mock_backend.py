@@ -0,0 +1,313 @@
+"""
+Deterministic Supabase backend for the UI suites.
+
+Modes (``python3 -m harness run --backend <mode>``):
+
+    live      no interception; the app talks to whatever project the dev server
+              is configured for (the default, and what TestSprite does)
+    record    requests go to the real backend; every PostgREST response is also
+              saved under ``fixtures/supabase/<table>.json``
+    replay    PostgREST is served from those fixtures through ``context.route``;
+              nothing leaves the machine, so timings only depend on the app
+    dataset   PostgREST is answered from a generated dataset
+              (``python3 -m harness generate``) by :mod:`harness.postgrest`
+    offline   every Supabase request fails as if the project were down
+
+Tests that assert the fallback UI (``TC027_Demo_Mode_badge…`` and the other
+"fetch failure" / "Demo Mode" cases) always get the offline backend when the
+harness is intercepting, because their outcome depends on the backend being
+unreachable.
+
+Replay can add synthetic latency (``--latency-ms`` plus a per-request
+deterministic jitter) and scale datasets (``--scale 10``). Scaling rebuilds a
+table's full recorded result from its pages, replicates leaf rows with
+suffixed keys — rows another row points to as its parent (zone bulks, building
+bulks, the main bulk) are kept single so the hierarchy stays intact — and then
+serves the app's own ``offset``/``limit`` window of the enlarged result, so
+paging loops behave as they would against a bigger table.
+
+Writes (POST/PATCH/DELETE on tables) are acknowledged and discarded in replay.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from .budgets import SUITE_DIR
+from . import postgrest
+from .network import classify_url
+
+FIXTURES_DIR     = SUITE_DIR / "fixtures" / "supabase"
+MODES            = ("live", "record", "replay", "dataset", "offline")
+SUPABASE_ROUTES  = ("**/rest/v1/**", "**/auth/v1/**", "**/realtime/**")
+BACKEND_DOWN_RE  = re.compile(r"Demo_Mode|Fetch_Failure|cannot_be_fetched|fetch_is_unavailable", re.I)
+
+# Response headers worth keeping; the rest (dates, request ids, cookies) would
+# only make the fixtures churn between recordings.
+KEPT_HEADERS     = ("content-type", "content-range", "preference-applied")
+IDENTITY_COLUMNS = ("id", "meter_id", "account_number", "label", "name", "meter_name",
+                    "asset_uid", "Asset_UID", "original_id")
+PARENT_COLUMNS   = ("parent_meter", "parent_account_number", "Parent Meter")
+INT_ID_STRIDE    = 10_000_000
+
+
+def request_key(method: str, query: str, range_header: str = "", body: Optional[str] = None) -> str:
+    """Stable key of one request; RPC reads are POSTs, so the body is part of it."""
+    digest = hashlib.sha1((body or "").encode()).hexdigest()[:12] if body else ""
+    return "|".join((method, query, range_header, digest))
+
+
+def _window(query: str, range_header: str) -> tuple:
+    """``(offset, limit)`` requested via query params or a ``Range`` header."""
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    if "offset" in params or "limit" in params:
+        offset = int(params.get("offset") or 0)
+        return offset, int(params["limit"]) if params.get("limit") else None
+    if range_header and "-" in range_header:
+        start, _, end = range_header.partition("-")
+        if start.isdigit():
+            return int(start), (int(end) - int(start) + 1) if end.isdigit() else None
+    return 0, None
+
+
+def _base_query(query: str) -> str:
+    return urlencode([(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in ("offset", "limit")])
+
+
+def replicate_rows(rows: list, scale: int, keep: set) -> list:
+    """
+    ``rows`` repeated ``scale`` times with rewritten identity columns.
+
+    Rows whose identity appears in ``keep`` (parents of other rows) are emitted
+    once. Replica ``i`` of a string key ``"Z3-42"`` is ``"Z3-42~i"``; integer
+    ids move by ``INT_ID_STRIDE``.
+    """
+    out = list(rows)
+    for i in range(1, scale):
+        for row in rows:
+            if not isinstance(row, dict) or any(row.get(c) in keep for c in IDENTITY_COLUMNS if row.get(c)):
+                continue
+            copy = dict(row)
+            for column in IDENTITY_COLUMNS:
+                value = copy.get(column)
+                if isinstance(value, bool) or value is None:
+                    continue
+                if isinstance(value, int):
+                    copy[column] = value + i * INT_ID_STRIDE
+                elif isinstance(value, str) and value:
+                    copy[column] = f"{value}~{i}"
+            out.append(copy)
+    return out
+
+
+class FixtureStore:
+    """Recorded PostgREST responses, one JSON file per table."""
+
+    def __init__(self, directory: Path = FIXTURES_DIR):
+        self.directory = directory
+        self.tables = defaultdict(dict)     # table -> key -> entry
+        self._dirty = set()
+        if directory.exists():
+            for path in sorted(directory.glob("*.json")):
+                raw = json.loads(path.read_text())
+                for entry in raw.get("responses", []):
+                    self.tables[raw["table"]][entry["key"]] = entry
+
+    def get(self, table: str, key: str) -> Optional[dict]:
+        return self.tables.get(table, {}).get(key)
+
+    def put(self, table: str, entry: dict) -> None:
+        self.tables[table][entry["key"]] = entry
+        self._dirty.add(table)
+
+    def save(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for table in sorted(self._dirty):
+            entries = sorted(self.tables[table].values(), key=lambda e: e["key"])
+            path = self.directory / (table.replace("/", "__") + ".json")
+            path.write_text(json.dumps({"table": table, "responses": entries}, indent=1, ensure_ascii=False) + "\n")
+        self._dirty.clear()
+
+    def full_result(self, table: str, base_query: str) -> Optional[list]:
+        """Every recorded page of one GET query stitched back together in offset order."""
+        pages = []
+        for entry in self.tables.get(table, {}).values():
+            if entry["method"] != "GET" or _base_query(entry["query"]) != base_query:
+                continue
+            if not isinstance(entry.get("body"), list):
+                continue
+            offset, _ = _window(entry["query"], entry.get("range", ""))
+            pages.append((offset, entry["body"]))
+        if not pages:
+            return None
+        rows = {}
+        for offset, body in sorted(pages, key=lambda p: p[0]):
+            for i, row in enumerate(body):
+                rows[offset + i] = row
+        return [rows[i] for i in sorted(rows)]
+
+    def parent_keys(self) -> set:
+        """Values referenced as a parent by any recorded row."""
+        keys = set()
+        for entries in self.tables.values():
+            for entry in entries.values():
+                body = entry.get("body")
+                for row in body if isinstance(body, list) else []:
+                    if not isinstance(row, dict):
+                        continue
+                    keys.update(row[c] for c in PARENT_COLUMNS if row.get(c))
+        return keys
+
+
+class MockBackend:
+    """Runner plugin: records, replays or blacks out Supabase traffic."""
+
+    name = "mock_backend"
+
+    def __init__(self, mode: str = "replay", store: Optional[FixtureStore] = None, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, scale: int = 1, backend_down: Optional[re.Pattern] = BACKEND_DOWN_RE,
+                 dataset: Optional[dict] = None):
+        if mode not in MODES:
+            raise ValueError(f"unknown backend mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.store = store or FixtureStore()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.scale = max(1, int(scale))
+        self.backend_down = backend_down
+        self.dataset = dataset or {}
+        self.stats = defaultdict(int)
+        self.misses = []
+        self._keep = self.store.parent_keys() if self.scale > 1 else set()
+
+    def mode_for(self, case) -> str:
+        if self.mode == "live":
+            return "live"
+        if self.backend_down and self.backend_down.search(case.name):
+            return "offline"
+        return self.mode
+
+    async def attach(self, context, case) -> None:
+        mode = self.mode_for(case)
+        if mode == "live":
+            return
+
+        async def handle(route, request):
+            await self._handle(mode, case, route, request)
+
+        for pattern in SUPABASE_ROUTES:
+            await context.route(pattern, handle)
+        if mode in ("replay", "dataset", "offline") and hasattr(context, "route_web_socket"):
+            # Realtime never reaches the network: the socket stays silent in
+            # replay and is closed straight away when the backend is "down".
+            async def on_socket(ws):
+                if mode == "offline":
+                    await ws.close()
+
+            await context.route_web_socket(re.compile(r"/realtime/"), on_socket)
+
+    async def _handle(self, mode: str, case, route, request) -> None:
+        if mode == "offline":
+            self.stats["aborted"] += 1
+            await route.abort("connectionrefused")
+            return
+
+        classified = classify_url(request.url)
+        if not classified or classified[0] == "realtime":
+            # Auth and anything else pass through untouched in record/replay.
+            await route.continue_()
+            return
+        _kind, table, query = classified
+        range_header = request.headers.get("range", "")
+        body = request.post_data if request.method != "GET" else None
+        key = request_key(request.method, query, range_header, body)
+
+        if mode == "record":
+            response = await route.fetch()
+            text = await response.text()
+            try:
+                payload = json.loads(text) if text else None
+            except ValueError:
+                payload = text
+            headers = {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers}
+            if request.method in ("GET", "HEAD") or table.startswith("rpc/"):
+                self.store.put(table, {
+                    "key": key, "method": request.method, "query": query, "range": range_header,
+                    "status": response.status, "headers": headers, "body": payload,
+                })
+                self.stats["recorded"] += 1
+            await route.fulfill(response=response)
+            return
+
+        await self._delay(key)
+        if request.method not in ("GET", "HEAD") and not table.startswith("rpc/"):
+            self.stats["writes_discarded"] += 1
+            await route.fulfill(status=201 if request.method == "POST" else 204, body="")
+            return
+
+        if mode == "dataset":
+            served = self.serve_dataset(table, request.method, query, range_header, request.headers.get("prefer", ""))
+        else:
+            served = self.serve(table, request.method, query, range_header, body)
+        if served is None:
+            self.misses.append({"test": case.name, "table": table, "method": request.method, "query": query})
+            served = (200, {"content-type": "application/json", "content-range": "*/0"}, [])
+        status, headers, payload = served
+        self.stats["served"] += 1
+        await route.fulfill(
+            status=status,
+            headers=headers,
+            body="" if payload is None else (payload if isinstance(payload, str) else json.dumps(payload)),
+        )
+
+    def serve(self, table: str, method: str, query: str, range_header: str = "", body: Optional[str] = None):
+        """``(status, headers, body)`` for a replayed request, ``None`` when nothing was recorded."""
+        if self.scale > 1 and method == "GET":
+            rows = self.store.full_result(table, _base_query(query))
+            if rows is not None:
+                rows = replicate_rows(rows, self.scale, self._keep)
+                offset, limit = _window(query, range_header)
+                window = rows[offset:offset + limit] if limit is not None else rows[offset:]
+                end = offset + len(window) - 1
+                content_range = f"{offset}-{end}/{len(rows)}" if window else f"*/{len(rows)}"
+                return 200, {"content-type": "application/json", "content-range": content_range}, window
+
+        entry = self.store.get(table, request_key(method, query, range_header, body))
+        if entry is None:
+            return None
+        return entry["status"], dict(entry.get("headers") or {}), entry.get("body")
+
+    def serve_dataset(self, table: str, method: str, query: str, range_header: str = "", prefer: str = ""):
+        """``(status, headers, body)`` evaluated against the generated dataset, ``None`` for unknown tables."""
+        if table not in self.dataset or method not in ("GET", "HEAD"):
+            return None
+        rows, content_range = postgrest.query(self.dataset[table], query, range_header, prefer)
+        headers = {"content-type": "application/json", "content-range": content_range}
+        return 200, headers, None if method == "HEAD" else rows
+
+    async def _delay(self, key: str) -> None:
+        delay = self.latency_ms
+        if self.jitter_ms:
+            # Derived from the request, not a RNG, so two runs wait identically.
+            delay += int(hashlib.sha1(key.encode()).hexdigest()[:8], 16) % (int(self.jitter_ms) + 1)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def finish(self, case, result) -> None:
+        if self.mode == "record":
+            self.store.save()
+
+    def report(self, _results) -> dict:
+        return {
+            "mode": self.mode,
+            "scale": self.scale,
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "stats": dict(self.stats),
+            "misses": self.misses,
+        }
@@ -0,0 +1,320 @@
+"""
+Supabase traffic profiler.
+
+Records every request the app makes to ``/rest/v1/*`` (PostgREST) and
+``/realtime/*`` while a test runs: table, query string, response bytes, row
+count (from ``content-range``), duration and how often the identical request
+was repeated on the same page. The report groups the calls per app page and
+lists the patterns worth fixing:
+
+    select-star   a read without an explicit column list (``select=*`` or no
+                  ``select`` at all — PostgREST then returns every column)
+    duplicate     the same request issued more than once on one page visit
+    n-plus-one    many requests of one query shape that differ only in filter
+                  values (``meter_id=eq.A``, ``meter_id=eq.B``, …)
+    paged-read    one query walked in many ``offset``/``limit`` pages, e.g. the
+                  ``water_monthly_consumption`` loop in ``fetchWaterMeters``
+"""
+
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+REST_PREFIX     = "/rest/v1/"
+REALTIME_PREFIX = "/realtime/"
+
+N_PLUS_ONE_MIN  = 5     # same shape, different filter values, on one page
+PAGED_READ_MIN  = 3     # pages of one query before the loop is reported
+PAGING_PARAMS   = {"offset", "limit"}
+# PostgREST operators whose operand is a literal value; the shape keeps the
+# column and operator and drops the value.
+FILTER_RE       = re.compile(r"^(not\.)?(eq|neq|gt|gte|lt|lte|like|ilike|is|in|cs|cd|fts|plfts|phfts|wfts)\.")
+
+
+@dataclass
+class SupabaseCall:
+    test: str
+    page: str               # app route the request was issued from, e.g. "/water"
+    kind: str               # rest | rpc | realtime
+    method: str
+    table: str
+    query: str
+    status: Optional[int]
+    bytes: int
+    rows: Optional[int]     # rows in this response
+    total: Optional[int]    # rows matching the query, when the server counted them
+    duration_ms: float
+    range: str = ""         # Range request header, if the client paged that way
+
+
+def parse_content_range(header: Optional[str]) -> tuple:
+    """
+    ``(rows, total)`` from a PostgREST ``content-range`` header.
+
+    ``"0-999/3456"`` → ``(1000, 3456)``; ``"*/0"`` → ``(0, 0)``;
+    ``"0-24/*"`` → ``(25, None)``. A missing or malformed header gives
+    ``(None, None)``.
+    """
+    if not header or "/" not in header:
+        return None, None
+    span, _, total = header.strip().partition("/")
+    total_rows = int(total) if total.isdigit() else None
+    if span == "*":
+        return 0, total_rows
+    start, _, end = span.partition("-")
+    if not (start.isdigit() and end.isdigit()):
+        return None, total_rows
+    return int(end) - int(start) + 1, total_rows
+
+
+def classify_url(url: str) -> Optional[tuple]:
+    """``(kind, table, query)`` for Supabase URLs, ``None`` for everything else."""
+    parts = urlsplit(url)
+    if parts.path.startswith(REST_PREFIX):
+        table = parts.path[len(REST_PREFIX):].strip("/")
+        kind = "rpc" if table.startswith("rpc/") else "rest"
+        return kind, table, parts.query
+    if REALTIME_PREFIX in parts.path:
+        return "realtime", parts.path.split(REALTIME_PREFIX, 1)[1].strip("/"), parts.query
+    return None
+
+
+def query_shape(query: str) -> tuple:
+    """
+    The query with filter values and paging removed.
+
+    Two requests with the same shape ask the same question of different rows;
+    ``select`` and ``order`` are part of the shape, ``offset``/``limit`` are not.
+    """
+    shape = []
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if key in PAGING_PARAMS:
+            continue
+        match = FILTER_RE.match(value)
+        shape.append((key, match.group(0) + "?" if match else value))
+    return tuple(sorted(shape))
+
+
+def _is_select_star(call: SupabaseCall) -> bool:
+    if call.kind != "rest" or call.method != "GET":
+        return False
+    select = dict(parse_qsl(call.query, keep_blank_values=True)).get("select")
+    return select is None or select.strip() == "*"
+
+
+def find_patterns(calls) -> list:
+    """Over-fetching findings for the calls of one test on one page."""
+    findings = []
+    rest = [c for c in calls if c.kind in ("rest", "rpc")]
+
+    star = Counter(c.table for c in rest if _is_select_star(c))
+    for table, count in sorted(star.items()):
+        rows = sum(c.rows or 0 for c in rest if c.table == table and _is_select_star(c))
+        findings.append({
+            "pattern": "select-star",
+            "table": table,
+            "requests": count,
+            "rows": rows,
+            "detail": f"{count} read(s) of {table} return every column ({rows} rows)",
+        })
+
+    repeats = Counter((c.method, c.table, c.query, c.range) for c in rest)
+    for (method, table, query, _range), count in sorted(repeats.items()):
+        if count > 1:
+            findings.append({
+                "pattern": "duplicate",
+                "table": table,
+                "requests": count,
+                "query": query,
+                "detail": f"{method} {table}?{query} issued {count}× on one page",
+            })
+
+    by_shape = defaultdict(list)
+    for c in rest:
+        if c.method == "GET":
+            by_shape[(c.table, query_shape(c.query))].append(c)
+    for (table, shape), group in sorted(by_shape.items(), key=lambda item: item[0][0]):
+        variants = {_without_paging(c.query) for c in group}
+        pages = {(c.query, c.range) for c in group}
+        if len(variants) >= N_PLUS_ONE_MIN:
+            findings.append({
+                "pattern": "n-plus-one",
+                "table": table,
+                "requests": len(group),
+                "shape": "&".join(f"{k}={v}" for k, v in shape),
+                "detail": f"{len(group)} requests to {table} differ only in filter values",
+            })
+        elif len(variants) == 1 and len(pages) >= PAGED_READ_MIN:
+            rows = sum(c.rows or 0 for c in group)
+            findings.append({
+                "pattern": "paged-read",
+                "table": table,
+                "requests": len(group),
+                "rows": rows,
+                "shape": "&".join(f"{k}={v}" for k, v in shape),
+                "detail": f"{table} read in {len(group)} pages ({rows} rows)",
+            })
+    return findings
+
+
+def _without_paging(query: str) -> tuple:
+    return tuple(sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in PAGING_PARAMS))
+
+
+def summarize(calls) -> dict:
+    """Per-page totals, per-table breakdown and findings for a whole run."""
+    by_page = defaultdict(list)
+    for c in calls:
+        by_page[c.page].append(c)
+
+    pages = {}
+    for page, page_calls in sorted(by_page.items()):
+        tables = defaultdict(lambda: {"requests": 0, "bytes": 0, "rows": 0, "duration_ms": 0.0})
+        for c in page_calls:
+            t = tables[c.table]
+            t["requests"] += 1
+            t["bytes"] += c.bytes
+            t["rows"] += c.rows or 0
+            t["duration_ms"] = round(t["duration_ms"] + c.duration_ms, 1)
+
+        findings = []
+        by_test = defaultdict(list)
+        for c in page_calls:
+            by_test[c.test].append(c)
+        for test, test_calls in sorted(by_test.items()):
+            findings.extend(dict(f, test=test) for f in find_patterns(test_calls))
+
+        pages[page] = {
+            "requests": len(page_calls),
+            "bytes": sum(c.bytes for c in page_calls),
+            "rows": sum(c.rows or 0 for c in page_calls),
+            "duration_ms": round(sum(c.duration_ms for c in page_calls), 1),
+            "tables": dict(sorted(tables.items(), key=lambda item: -item[1]["bytes"])),
+            "findings": findings,
+        }
+    return pages
+
+
+def _page_of(request) -> str:
+    try:
+        return urlsplit(request.frame.url).path or "/"
+    except Exception:  # detached frame or service-worker request
+        return "?"
+
+
+class NetworkProfiler:
+    """Runner plugin: records Supabase requests for each test."""
+
+    name = "network"
+
+    def __init__(self):
+        self.calls = []
+        self._started = {}
+
+    async def attach(self, context, case) -> None:
+        def on_request(request):
+            if classify_url(request.url):
+                self._started[request] = (time.perf_counter(), _page_of(request))
+
+        async def on_finished(request):
+            started = self._started.pop(request, None)
+            if started is None:
+                return
+            await self._record(case, request, *started, failed=False)
+
+        async def on_failed(request):
+            started = self._started.pop(request, None)
+            if started is not None:
+                await self._record(case, request, *started, failed=True)
+
+        def on_page(page):
+            page.on("websocket", lambda ws: self._watch_socket(case, page, ws))
+
+        context.on("request", on_request)
+        context.on("requestfinished", on_finished)
+        context.on("requestfailed", on_failed)
+        context.on("page", on_page)
+
+    async def _record(self, case, request, started: float, page: str, failed: bool) -> None:
+        kind, table, query = classify_url(request.url)
+        response = None if failed else await request.response()
+        headers = await response.all_headers() if response else {}
+        rows, total = parse_content_range(headers.get("content-range"))
+        try:
+            size = (await request.sizes())["responseBodySize"]
+        except Exception:
+            size = int(headers.get("content-length") or 0)
+        # Browser timing is the honest duration; wall time between the two
+        # events is the fallback when the timing entry is not populated.
+        timing = request.timing or {}
+        duration = timing.get("responseEnd", -1)
+        if duration is None or duration < 0:
+            duration = (time.perf_counter() - started) * 1000
+        self.calls.append(SupabaseCall(
+            test=case.name,
+            page=page,
+            kind=kind,
+            method=request.method,
+            table=table,
+            query=query,
+            status=response.status if response else None,
+            bytes=size,
+            rows=rows,
+            total=total,
+            duration_ms=round(duration, 1),
+            range=request.headers.get("range", ""),
+        ))
+
+    def _watch_socket(self, case, page, ws) -> None:
+        classified = classify_url(ws.url)
+        if not classified:
+            return
+        call = SupabaseCall(
+            test=case.name,
+            page=urlsplit(page.url).path or "/",
+            kind="realtime",
+            method="WS",
+            table=classified[1],
+            query="",
+            status=None,
+            bytes=0,
+            rows=0,
+            total=None,
+            duration_ms=0.0,
+        )
+        opened = time.perf_counter()
+
+        def on_frame(payload):
+            call.bytes += len(payload)
+            call.rows += 1  # one realtime message per frame
+
+        def on_close(_ws):
+            call.duration_ms = round((time.perf_counter() - opened) * 1000, 1)
+
+        ws.on("framereceived", on_frame)
+        ws.on("close", on_close)
+        self.calls.append(call)
+
+    def report(self, _results) -> dict:
+        pages = summarize(self.calls)
+        return {
+            "requests": len(self.calls),
+            "bytes": sum(c.bytes for c in self.calls),
+            "pages": pages,
+            "calls": [asdict(c) for c in self.calls],
+        }
+
+
+def format_summary(pages: dict) -> str:
+    """Plain-text per-page digest printed at the end of a profiled run."""
+    lines = []
+    for page, s in pages.items():
+        lines.append(f"{page}: {s['requests']} requests, {s['bytes'] / 1024:.0f} KiB, {s['rows']} rows")
+        for table, t in list(s["tables"].items())[:5]:
+            lines.append(f"    {table:32} {t['requests']:4} req {t['bytes'] / 1024:8.0f} KiB {t['rows']:7} rows")
+        for f in s["findings"]:
+            lines.append(f"    ! {f['pattern']:12} {f['detail']} [{f['test']}]")
+    return "\n".join(lines)
@@ -0,0 +1,182 @@
+"""
+A small in-memory PostgREST evaluator.
+
+Serves a generated dataset (``python3 -m harness generate``) to the app through
+the mock backend, so the pages can be exercised against 10× or 100× the real
+row counts without a database. It understands what the app's supabase-js
+queries actually send:
+
+    select=col,col2,alias:col3     (embedded resources are ignored)
+    col=eq.v / neq / gt / gte / lt / lte / like / ilike / in.(a,b) / is.null
+    not.<op>  and  or=(a.eq.1,b.ilike.*x*)
+    order=col.asc.nullslast,col2.desc
+    offset / limit, a ``Range`` header, and ``Prefer: count=exact``
+
+Anything else is treated as "no filter" rather than an error; the profiler
+still shows the request, which is what a perf run cares about.
+"""
+
+import re
+from typing import Optional
+from urllib.parse import parse_qsl
+
+RESERVED = {"select", "order", "offset", "limit", "or", "and", "on_conflict", "columns"}
+OPS      = ("eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "in", "is")
+
+
+def _split_top(text: str) -> list:
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    if current:
+        parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _coerce(value, operand: str):
+    if isinstance(value, bool):
+        return operand.lower() == "true"
+    if isinstance(value, (int, float)):
+        try:
+            return float(operand)
+        except ValueError:
+            return operand
+    return operand
+
+
+def _compare(value, op: str, operand: str) -> bool:
+    if op == "is":
+        target = operand.lower()
+        return value is None if target == "null" else value is (target == "true")
+    if op == "in":
+        options = [o.strip('"') for o in _split_top(operand.strip("()"))]
+        return value is not None and any(_as_key(value) == _as_key(_coerce(value, o)) for o in options)
+    if value is None:
+        return False
+    if op in ("like", "ilike"):
+        pattern = "^" + ".*".join(re.escape(p) for p in re.split(r"[*%]", operand)) + "$"
+        return re.match(pattern, str(value), re.I if op == "ilike" else 0) is not None
+    target = _coerce(value, operand)
+    left = float(value) if isinstance(target, float) and not isinstance(value, bool) else str(value)
+    if op == "eq":
+        return left == target
+    if op == "neq":
+        return left != target
+    try:
+        return {"gt": left > target, "gte": left >= target, "lt": left < target, "lte": left <= target}[op]
+    except TypeError:
+        return False
+
+
+def _as_key(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+
+def parse_condition(column: str, expression: str):
+    """``(column, negate, op, operand)`` or ``None`` for operators we do not model."""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, operand = expression.partition(".")
+    if op not in OPS:
+        return None
+    return column, negate, op, operand
+
+
+def _matches(row: dict, condition) -> bool:
+    column, negate, op, operand = condition
+    hit = _compare(row.get(column), op, operand)
+    return not hit if negate else hit
+
+
+def _or_conditions(expression: str) -> list:
+    conditions = []
+    for part in _split_top(expression.strip("()")):
+        column, _, rest = part.partition(".")
+        condition = parse_condition(column, rest)
+        if condition:
+            conditions.append(condition)
+    return conditions
+
+
+def _project(row: dict, select: Optional[str]) -> dict:
+    if not select or select.strip() == "*":
+        return dict(row)
+    out = {}
+    for item in _split_top(select):
+        if "(" in item:          # embedded resource — no relations in the dataset
+            continue
+        if item == "*":
+            out.update(row)
+            continue
+        alias, _, column = item.rpartition(":")
+        column = column.split("::", 1)[0].strip('"')
+        out[alias or column] = row.get(column)
+    return out
+
+
+def _sort(rows: list, order: str) -> list:
+    for term in reversed(_split_top(order)):
+        column, *flags = term.split(".")
+        descending = "desc" in flags
+        nulls_first = "nullsfirst" in flags or ("nullslast" not in flags and descending)
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: _as_key(r[column]) if not isinstance(r[column], str) else r[column],
+                     reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def query(rows: list, query_string: str, range_header: str = "", prefer: str = "") -> tuple:
+    """
+    Evaluate a PostgREST GET against ``rows``.
+
+    Returns ``(window, content_range)`` where ``content_range`` is the header
+    PostgREST would send (total only when ``count=exact`` was asked for).
+    """
+    params = parse_qsl(query_string, keep_blank_values=True)
+    conditions, any_of, select, order = [], [], None, ""
+    offset, limit = 0, None
+    for key, value in params:
+        if key == "select":
+            select = value
+        elif key == "order":
+            order = value
+        elif key == "offset":
+            offset = int(value or 0)
+        elif key == "limit":
+            limit = int(value) if value else None
+        elif key == "or":
+            any_of.append(_or_conditions(value))
+        elif key not in RESERVED:
+            condition = parse_condition(key, value)
+            if condition:
+                conditions.append(condition)
+    if range_header and "-" in range_header and limit is None:
+        start, _, end = range_header.partition("-")
+        if start.isdigit():
+            offset = int(start)
+            limit = int(end) - offset + 1 if end.isdigit() else None
+
+    matched = [
+        r for r in rows
+        if all(_matches(r, c) for c in conditions) and all(any(_matches(r, c) for c in group) for group in any_of if group)
+    ]
+    if order:
+        matched = _sort(matched, order)
+    window = matched[offset:offset + limit] if limit is not None else matched[offset:]
+    total = str(len(matched)) if "count=exact" in prefer or "count=planned" in prefer or "count=estimated" in prefer else "*"
+    span = f"{offset}-{offset + len(window) - 1}" if window else "*"
+    return [_project(r, select) for r in window], f"{span}/{total}"
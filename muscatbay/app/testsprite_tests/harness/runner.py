@@ -0,0 +1,124 @@
+"""
+In-process runner for the generated TC*.py files.
+
+Each file is executed with ``runpy`` under :func:`harness.hooks.context_hooks`,
+so every plugin gets to attach to the browser contexts the test opens. After
+the test finishes each plugin may add failures to the result (a blown
+performance budget fails a test that was functionally green) and contribute a
+section to the suite report.
+
+A plugin is any object with these optional members:
+    name                          key of its section in the report
+    async attach(context, case)   instrument a fresh browser context
+    finish(case, result)          inspect what was captured, may fail the test
+    report(results) -> dict       summary written into the suite report
+"""
+
+import json
+import re
+import runpy
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from .hooks import context_hooks
+
+TEST_GLOB   = "TC*.py"
+TEST_ID_RE  = re.compile(r"^(TC\d+)")
+REPORT_NAME = "harness_report.json"
+
+
+@dataclass(frozen=True)
+class TestCase:
+    __test__ = False  # not a pytest class
+
+    test_id: str    # "TC004" — shared by the generated variants of one plan entry
+    name: str       # file stem, unique within a directory
+    path: Path
+
+
+@dataclass
+class TestResult:
+    __test__ = False
+
+    test_id: str
+    name: str
+    status: str = "passed"          # passed | failed | error
+    duration_s: float = 0.0
+    error: Optional[str] = None
+    failures: list = field(default_factory=list)
+
+    def fail(self, message: str) -> None:
+        """Record a plugin-detected failure; an already-failed test keeps its status."""
+        self.failures.append(message)
+        if self.status == "passed":
+            self.status = "failed"
+
+
+def discover(tests_dir: Path, only: Optional[Iterable[str]] = None) -> list:
+    """List the generated tests in ``tests_dir``, optionally filtered by test id or file stem."""
+    wanted = {w.strip() for w in only or [] if w.strip()}
+    cases = []
+    for path in sorted(tests_dir.glob(TEST_GLOB)):
+        match = TEST_ID_RE.match(path.stem)
+        if not match:
+            continue
+        case = TestCase(test_id=match.group(1), name=path.stem, path=path)
+        if wanted and case.test_id not in wanted and case.name not in wanted:
+            continue
+        cases.append(case)
+    return cases
+
+
+def run_case(case: TestCase, plugins: Sequence[object]) -> TestResult:
+    result = TestResult(test_id=case.test_id, name=case.name)
+    callbacks = [
+        (lambda context, p=plugin: p.attach(context, case))
+        for plugin in plugins
+        if hasattr(plugin, "attach")
+    ]
+
+    started = time.perf_counter()
+    with context_hooks(callbacks):
+        try:
+            runpy.run_path(str(case.path), run_name="__main__")
+        except AssertionError as err:
+            result.status = "failed"
+            result.error = str(err)
+        except Exception as err:  # a crashed test is reported, never fatal to the suite
+            result.status = "error"
+            result.error = f"{type(err).__name__}: {err}"
+    result.duration_s = round(time.perf_counter() - started, 3)
+
+    for plugin in plugins:
+        if hasattr(plugin, "finish"):
+            plugin.finish(case, result)
+    return result
+
+
+def run_suite(cases: Sequence[TestCase], plugins: Sequence[object]) -> list:
+    results = []
+    for case in cases:
+        result = run_case(case, plugins)
+        suffix = f" — {result.error or '; '.join(result.failures)}" if result.status != "passed" else ""
+        print(f"  {result.status.upper():6} {case.name} ({result.duration_s:.1f}s){suffix}")
+        results.append(result)
+    return results
+
+
+def write_report(results: Sequence[TestResult], plugins: Sequence[object], path: Path) -> dict:
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "summary": {
+            status: sum(1 for r in results if r.status == status)
+            for status in ("passed", "failed", "error")
+        },
+        "results": [asdict(r) for r in results],
+    }
+    for plugin in plugins:
+        if hasattr(plugin, "report"):
+            report[plugin.name] = plugin.report(results)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, default=str))
+    return report